@@ -15,13 +15,14 @@ import bpy
 import os
 import sys
 import subprocess
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty, PointerProperty
 from bpy.types import Panel, Operator, AddonPreferences
 
 
 from . import path_manager #manage all paths
 from . import scene_environment #manage scene environment settings for Qt Quick3D
 from . import qmlproject_helper #manage qmlproject related logic
+from . import change_journal #track scene changes for incremental export
 
 # 检查 PySide6 是否可用
 def check_pyside6_availability():
@@ -182,6 +183,265 @@ def register_scene_properties():
         update=update_qmlproject_assets_folder,  # 自动设置工作空间
     )
     
+    # 导出选项相关属性
+    bpy.types.Scene.show_export_options = BoolProperty(
+        name="Show Export Options",
+        description="Show/hide export options panel",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_gltf_export_format = EnumProperty(
+        name="GLTF Export Format",
+        description="File format of the intermediate GLTF passed to Balsam",
+        items=[
+            ('GLB', "GLB (Binary)", "Single binary file, no base64 encoding (fastest)"),
+            ('GLTF_SEPARATE', "glTF Separate", "JSON + .bin buffer + image files"),
+            ('GLTF_EMBEDDED', "glTF Embedded", "JSON with base64 embedded buffers (~33% larger, slowest)"),
+        ],
+        default='GLB'
+    )
+
+    bpy.types.Scene.qtquick3d_fast_export = BoolProperty(
+        name="Fast Export (NumPy)",
+        description="Write the GLTF directly from mesh data with NumPy instead of Blender's glTF exporter. Scenes with skins, shape keys, animation, instances or complex material node graphs fall back to Blender's exporter",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_incremental_export = BoolProperty(
+        name="Incremental Export",
+        description="Only re-export object hierarchies that changed since the last export and merge them into the GLTF read by Balsam",
+        default=False
+    )
+    
+    bpy.types.Scene.qtquick3d_live_environment = BoolProperty(
+        name="Live Environment",
+        description="Push SceneEnvironment changes straight into the running Quick3D preview (batched per frame) instead of reopening the window",
+        default=True
+    )
+    
+    bpy.types.Scene.qtquick3d_environment_fast_path = BoolProperty(
+        name="Environment Fast Path",
+        description="When only SceneEnvironment or WASD controller settings changed since the last conversion, skip the GLTF export and Balsam and only re-assemble the QML",
+        default=True
+    )
+    
+    bpy.types.Scene.qtquick3d_use_balsam_cache = BoolProperty(
+        name="Balsam Output Cache",
+        description="Reuse previous Balsam output when the GLTF, Balsam binary and arguments are unchanged",
+        default=True
+    )
+
+    bpy.types.Scene.qtquick3d_balsam_cache_size_mb = IntProperty(
+        name="Cache Size Limit (MB)",
+        description="Maximum size of the Balsam output cache; least recently used entries are evicted",
+        default=2048,
+        min=64,
+        max=65536
+    )
+
+    bpy.types.Scene.qtquick3d_instancing = EnumProperty(
+        name="GPU Instancing",
+        description="Merge objects that share mesh data and materials into one instanced Model",
+        items=[
+            ('OFF', "Off", "Export every duplicate as its own Model"),
+            ('AUTO', "Auto", "InstanceList for small groups, FileInstancing table for large groups"),
+            ('INSTANCE_LIST', "InstanceList", "Always write the transforms inline as an InstanceList"),
+            ('FILE_INSTANCING', "FileInstancing", "Always write the transforms to an XML instance table"),
+        ],
+        default='OFF'
+    )
+
+    bpy.types.Scene.qtquick3d_instancing_min_count = IntProperty(
+        name="Min Instances",
+        description="Minimum number of duplicates sharing a mesh before they are instanced",
+        default=4,
+        min=2,
+        max=10000
+    )
+
+    bpy.types.Scene.qtquick3d_lod = BoolProperty(
+        name="Mesh LOD",
+        description="Generate decimated levels of detail for high-poly meshes and switch between them by camera distance",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_lod_levels = IntProperty(
+        name="LOD Levels",
+        description="Number of decimated levels per mesh; each level keeps half the triangles of the previous one",
+        default=2,
+        min=1,
+        max=4
+    )
+
+    bpy.types.Scene.qtquick3d_lod_min_triangles = IntProperty(
+        name="Min Triangles",
+        description="Only meshes with at least this many triangles get levels of detail",
+        default=10000,
+        min=0
+    )
+
+    bpy.types.Scene.qtquick3d_lod_distance_factor = FloatProperty(
+        name="LOD Distance",
+        description="First switch distance as a multiple of the mesh bounding radius; each further level doubles it",
+        default=10.0,
+        min=0.1,
+        max=1000.0
+    )
+
+    # 逐对象LOD覆盖
+    bpy.types.Object.qtquick3d_lod_mode = EnumProperty(
+        name="LOD",
+        description="Per-object level-of-detail override",
+        items=[
+            ('DEFAULT', "Default", "Generate levels if the mesh exceeds the scene triangle threshold"),
+            ('OFF', "Off", "Never generate levels for this object"),
+            ('FORCE', "Force", "Always generate levels, regardless of triangle count"),
+        ],
+        default='DEFAULT'
+    )
+
+    bpy.types.Object.qtquick3d_lod_levels = IntProperty(
+        name="LOD Levels",
+        description="Number of decimated levels for this object (0 = scene setting)",
+        default=0,
+        min=0,
+        max=4
+    )
+
+    bpy.types.Object.qtquick3d_lod_bias = FloatProperty(
+        name="LOD Distance Bias",
+        description="Multiplies the switch distances of this object (larger keeps full detail further away)",
+        default=1.0,
+        min=0.01,
+        max=100.0
+    )
+
+    bpy.types.Scene.qtquick3d_optimize_meshes = BoolProperty(
+        name="Optimize Meshes",
+        description="Reorder triangles and vertices for vertex cache reuse and less overdraw before Balsam (reports ACMR per mesh)",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_quantize_positions = BoolProperty(
+        name="Quantize Positions",
+        description="Snap vertex positions to a 16-bit grid over the mesh bounds and weld vertices that become identical",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_cleanup_gltf = BoolProperty(
+        name="Clean Up glTF",
+        description="Before Balsam, drop degenerate triangles and unreferenced data and merge identical images and buffers in the exported glTF",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_flatten_empties = BoolProperty(
+        name="Flatten Empties",
+        description="Also bake static empty-node chains into their single child and drop empty leaf nodes (their names no longer appear in the QML)",
+        default=True
+    )
+
+    bpy.types.Scene.qtquick3d_prune_attributes = BoolProperty(
+        name="Prune Attributes",
+        description="Export only the vertex attributes the materials use: tangents for normal maps, UV sets used by textures, color and custom attributes read by attribute nodes",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_dedupe_materials = BoolProperty(
+        name="Deduplicate Materials",
+        description="Merge materials whose node trees and exported parameters are identical, and write repeated materials once as shared QML components",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_keyframe_reduction = BoolProperty(
+        name="Reduce Keyframes",
+        description="Remove baked keyframes that linear interpolation reproduces within the tolerances before Balsam",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_keyframe_tolerance = FloatProperty(
+        name="Keyframe Tolerance",
+        description="Maximum position error in scene units (also the relative error allowed for scale and morph weights)",
+        default=0.001,
+        min=0.0,
+        max=1.0,
+        precision=4
+    )
+
+    bpy.types.Scene.qtquick3d_keyframe_angle_tolerance = FloatProperty(
+        name="Angle Tolerance",
+        description="Maximum rotation error in degrees",
+        default=0.1,
+        min=0.0,
+        max=10.0
+    )
+
+    bpy.types.Scene.qtquick3d_binary_keyframes = BoolProperty(
+        name="Binary Keyframes",
+        description="Let Balsam write animation keyframes to binary data files instead of inline QML Keyframe elements (requires a Balsam with --useBinaryKeyframes)",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_target_profile = EnumProperty(
+        name="Target Profile",
+        description="Target platform; caps texture resolution and decides whether BC1/BC3 compressed KTX textures with mipmaps are generated",
+        items=[
+            ('ORIGINAL', "Original", "Keep textures as exported"),
+            ('DESKTOP', "Desktop", "Max 4096 px, BC1/BC3 compressed KTX with pre-generated mipmaps"),
+            ('MOBILE', "Mobile", "Max 1024 px, no GPU compression"),
+            ('EMBEDDED', "Embedded", "Max 512 px, no GPU compression"),
+        ],
+        default='ORIGINAL'
+    )
+
+    bpy.types.Scene.qtquick3d_preflight_check = BoolProperty(
+        name="Pre-flight Check",
+        description="Estimate triangles, vertex/texture memory, draw calls and animated channels before converting and warn when the target profile budget is exceeded",
+        default=True
+    )
+
+    bpy.types.Scene.qtquick3d_conversion_scope = EnumProperty(
+        name="Conversion Scope",
+        description="What Convert exports: the whole scene, or only a subset written as a separate reusable QML component",
+        items=[
+            ('SCENE', "Whole Scene", "Convert the whole scene; objects already converted as components are instantiated from their component"),
+            ('SELECTED', "Selected Objects", "Convert only the selected objects into a component"),
+            ('COLLECTION', "Collection", "Convert only the chosen collection into a component"),
+        ],
+        default='SCENE'
+    )
+
+    bpy.types.Scene.qtquick3d_scope_collection = PointerProperty(
+        name="Component Collection",
+        description="Collection converted into a component",
+        type=bpy.types.Collection
+    )
+
+    bpy.types.Scene.qtquick3d_scope_include_children = BoolProperty(
+        name="Include Children",
+        description="Also convert the children of the selected objects",
+        default=True
+    )
+
+    bpy.types.Scene.qtquick3d_component_name = StringProperty(
+        name="Component Name",
+        description="QML component name (defaults to the collection or active object name)",
+        default=""
+    )
+
+    bpy.types.Scene.qtquick3d_sharded_conversion = BoolProperty(
+        name="Sharded Conversion",
+        description="Split the scene by top-level collection and run one Balsam process per collection in parallel",
+        default=False
+    )
+
+    bpy.types.Scene.qtquick3d_shard_workers = IntProperty(
+        name="Parallel Balsam Processes",
+        description="Maximum number of Balsam processes running at the same time (0 = number of CPU cores)",
+        default=0,
+        min=0,
+        max=64
+    )
+    
     # 注册SceneEnvironment属性
     scene_environment.register_scene_environment_properties()
 
@@ -525,7 +785,11 @@ class VIEW3D_PT_qt_quick3d_panel(Panel):
             return
         
         # 添加一个按钮来启动Qt Quick3D窗口
-        layout.operator("qt_quick3d.open_window", text="Open Quick3D Window")
+        row = layout.row(align=True)
+        row.operator("qt_quick3d.open_window", text="Open Quick3D Window")
+        # 快速预览：不运行balsam，直接用RuntimeLoader加载导出的glTF
+        row.operator("qt_quick3d.quick_preview", text="Quick Preview", icon='HIDE_OFF')
+        layout.prop(context.scene, "qtquick3d_live_environment", text="Live Environment Updates")
         
         # 添加渲染引擎选择
         # layout.separator()
@@ -535,7 +799,71 @@ class VIEW3D_PT_qt_quick3d_panel(Panel):
         # QML转换功能
         layout.separator()
       #  layout.label(text="QML Export:")
-        layout.operator("qt_quick3d.balsam_convert_scene",text="Convert Scene to QML")
+        scope = getattr(context.scene, "qtquick3d_conversion_scope", 'SCENE')
+        layout.operator("qt_quick3d.balsam_convert_scene",text="Convert Scene to QML" if scope == 'SCENE' else "Convert to Component")
+        
+        # 选择性转换：只转换选中对象/集合，输出为独立的QML组件
+        scope_box = layout.box()
+        scope_box.prop(context.scene, "qtquick3d_conversion_scope", text="Scope")
+        if scope == 'COLLECTION':
+            scope_box.prop(context.scene, "qtquick3d_scope_collection", text="Collection")
+        elif scope == 'SELECTED':
+            scope_box.prop(context.scene, "qtquick3d_scope_include_children", text="Include Children")
+        if scope != 'SCENE':
+            scope_box.prop(context.scene, "qtquick3d_component_name", text="Name")
+        from . import component_conversion
+        for component_name, component in component_conversion.get_panel_components().items():
+            row = scope_box.row()
+            row.label(text=f"{component_name} ({len(component.get('objects', []))} objects)", icon='PACKAGE')
+            row.operator("qt_quick3d.remove_component", text="", icon='X').component_name = component_name
+        layout.operator("qt_quick3d.analyze_scene_cost", text="Analyze Scene Cost", icon='VIEWZOOM')
+        
+        # 最近一次预检结果
+        from . import scene_cost
+        cost_report = scene_cost.get_last_report()
+        if cost_report:
+            cost_box = layout.box()
+            cost_box.label(text=f"Pre-flight ({cost_report['profile'].title()}): {cost_report['object_count']} objects", icon='INFO')
+            totals = cost_report['totals']
+            for key, label in scene_cost.BUDGET_LABELS.items():
+                row = cost_box.row()
+                row.alert = totals[key] > cost_report['budgets'][key]
+                row.label(text=label)
+                row.label(text=f"{scene_cost.format_value(key, totals[key])} / {scene_cost.format_value(key, cost_report['budgets'][key])}")
+            cost_box.label(text=f"Materials: {totals['materials']}  Textures: {totals['textures']}")
+            if cost_report['objects']:
+                heaviest = cost_report['objects'][0]
+                cost_box.label(text=f"Heaviest: {heaviest['name']} ({heaviest['triangles']:,} tris)")
+            for warning in cost_report['warnings']:
+                cost_box.label(text=warning, icon='ERROR')
+        
+        # 后台转换进度
+        from . import conversion_jobs
+        job_manager = conversion_jobs.get_job_manager()
+        if job_manager.is_running():
+            job = job_manager.current_job
+            progress_box = layout.box()
+            if hasattr(progress_box, "progress"):
+                progress_box.progress(factor=job.progress, type='BAR', text=f"Balsam {job.progress * 100:.0f}% ({job.elapsed:.1f}s)")
+            else:
+                progress_box.label(text=f"Balsam {job.progress * 100:.0f}% ({job.elapsed:.1f}s)", icon='TIME')
+            if job_manager.follow_up_requested:
+                progress_box.label(text="Follow-up run queued", icon='RECOVER_LAST')
+            progress_box.operator("qt_quick3d.cancel_conversion", text="Cancel", icon='CANCEL')
+        elif job_manager.last_status:
+            layout.label(text=f"Last conversion: {job_manager.last_status}", icon='INFO')
+        
+        # 最近一次运行耗时最多的阶段（完整记录见工作空间的 .blender2quick3d/trace.json）
+        from . import conversion_trace
+        trace_summary = conversion_trace.get_last_summary()
+        if trace_summary and not job_manager.is_running():
+            trace_box = layout.box()
+            trace_box.label(text=f"Trace: {trace_summary['name']} {trace_summary['total']:.2f}s", icon='TIME')
+            total = max(trace_summary['total'], 1e-6)
+            for stage in trace_summary['stages']:
+                row = trace_box.row()
+                row.label(text=stage['name'])
+                row.label(text=f"{stage['seconds']:.2f}s ({stage['seconds'] / total * 100:.0f}%)")
         #设置导出路径
         # 设置工作空间路径
         layout.separator()
@@ -614,6 +942,78 @@ class VIEW3D_PT_qt_quick3d_panel(Panel):
             # 下拉框，允许用户选择balsam版本
             layout.prop(scene, "balsam_version", text="Select Version")
 
+        # 导出选项折叠框
+        export_box = layout.box()
+        export_box.prop(scene, "show_export_options", icon="TRIA_DOWN" if getattr(scene, "show_export_options", False) else "TRIA_RIGHT", emboss=False, text="Export Options")
+
+        if getattr(scene, "show_export_options", False):
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_gltf_export_format", text="Format")
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_fast_export", text="Fast Export (NumPy)")
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_incremental_export", text="Incremental Export")
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_environment_fast_path", text="Environment Fast Path")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_instancing", text="Instancing")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_instancing", 'OFF') != 'OFF'
+            sub.prop(scene, "qtquick3d_instancing_min_count", text="Min")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_lod", text="Mesh LOD")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_lod", False)
+            sub.prop(scene, "qtquick3d_lod_levels", text="Levels")
+            if getattr(scene, "qtquick3d_lod", False):
+                row = export_box.row(align=True)
+                row.prop(scene, "qtquick3d_lod_min_triangles", text="Min Tris")
+                row.prop(scene, "qtquick3d_lod_distance_factor", text="Distance")
+                obj = context.active_object
+                if obj and obj.type == 'MESH':
+                    lod_box = export_box.box()
+                    lod_box.label(text=f"LOD Override: {obj.name}", icon='MOD_DECIM')
+                    row = lod_box.row(align=True)
+                    row.prop(obj, "qtquick3d_lod_mode", text="")
+                    sub = row.row(align=True)
+                    sub.enabled = obj.qtquick3d_lod_mode != 'OFF'
+                    sub.prop(obj, "qtquick3d_lod_levels", text="Levels")
+                    sub.prop(obj, "qtquick3d_lod_bias", text="Bias")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_optimize_meshes", text="Optimize Meshes")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_optimize_meshes", False)
+            sub.prop(scene, "qtquick3d_quantize_positions", text="Quantize")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_cleanup_gltf", text="Clean Up glTF")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_cleanup_gltf", False)
+            sub.prop(scene, "qtquick3d_flatten_empties", text="Flatten Empties")
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_prune_attributes", text="Prune Attributes")
+            row.prop(scene, "qtquick3d_dedupe_materials", text="Deduplicate Materials")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_keyframe_reduction", text="Reduce Keyframes")
+            row.prop(scene, "qtquick3d_binary_keyframes", text="Binary Keyframes")
+            if getattr(scene, "qtquick3d_keyframe_reduction", False):
+                row = export_box.row(align=True)
+                row.prop(scene, "qtquick3d_keyframe_tolerance", text="Tolerance")
+                row.prop(scene, "qtquick3d_keyframe_angle_tolerance", text="Angle")
+            row = export_box.row()
+            row.prop(scene, "qtquick3d_target_profile", text="Target Profile")
+            row.prop(scene, "qtquick3d_preflight_check", text="Pre-flight Check")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_sharded_conversion", text="Sharded by Collection")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_sharded_conversion", False)
+            sub.prop(scene, "qtquick3d_shard_workers", text="Workers")
+            row = export_box.row(align=True)
+            row.prop(scene, "qtquick3d_use_balsam_cache", text="Balsam Cache")
+            sub = row.row(align=True)
+            sub.enabled = getattr(scene, "qtquick3d_use_balsam_cache", True)
+            sub.prop(scene, "qtquick3d_balsam_cache_size_mb", text="MB")
+            row = export_box.row()
+            row.operator("qt_quick3d.clear_balsam_cache", text="Clear Balsam Cache", icon='TRASH')
         
         #SceneSettings，用于设置弹出的窗口大小，view3d大小，sceneEnvironment设置
         # INSERT_YOUR_CODE
@@ -898,6 +1298,41 @@ class QT_QUICK3D_OT_open_window(Operator):
         
         return {'FINISHED'}
 
+class QT_QUICK3D_OT_quick_preview(Operator):
+    """Export the scene to glTF and preview it through RuntimeLoader without running Balsam"""
+    bl_idname = "qt_quick3d.quick_preview"
+    bl_label = "Quick Preview"
+    bl_description = "Export glTF only and load it with RuntimeLoader in the Quick3D window (Balsam runs on Convert)"
+    
+    def execute(self, context):
+        from . import balsam_gltf_converter
+        
+        if not hasattr(qt_quick3d_integration, 'show_quick3d_window'):
+            self.report({'ERROR'}, "Quick3D integration module not available")
+            return {'CANCELLED'}
+        
+        try:
+            converter = balsam_gltf_converter.BalsamGLTFToQMLConverter()
+            work_space = getattr(context.scene, 'work_space_path', None)
+            if work_space:
+                converter.set_custom_output_dir(work_space)
+            
+            gltf_path = converter.export_preview_gltf()
+            if not gltf_path:
+                self.report({'ERROR'}, "GLTF export failed")
+                return {'CANCELLED'}
+            
+            if qt_quick3d_integration.show_quick3d_window(preview_gltf_path=gltf_path):
+                self.report({'INFO'}, "Quick preview opened - use Convert for the final Balsam output")
+            else:
+                self.report({'ERROR'}, "Failed to open Quick3D window")
+        except Exception as e:
+            self.report({'ERROR'}, f"Quick preview failed: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        
+        return {'FINISHED'}
+
 class QT_QUICK3D_OT_toggle_debug_mode(Operator):
     """Toggle QML Debug Mode"""
     bl_idname = "qt_quick3d.toggle_debug_mode"
@@ -954,62 +1389,308 @@ class QT_QUICK3D_OT_balsam_convert_scene(Operator):
     """Convert current scene to QML using Balsam converter"""
     bl_idname = "qt_quick3d.balsam_convert_scene"
     bl_label = "Convert with Balsam"
-    bl_description = "Convert current Blender scene to QML using Balsam converter"
+    bl_description = "Convert current Blender scene to QML using Balsam converter (runs in background)"
+    
+    _timer = None
+    _converter = None
+    
+    def _create_converter(self, context):
+        from . import balsam_gltf_converter
+        
+        converter = balsam_gltf_converter.BalsamGLTFToQMLConverter()
+        
+        # 优先使用工作空间路径
+        work_space = getattr(context.scene, 'work_space_path', None)
+        if work_space:
+            converter.set_custom_output_dir(work_space)
+            print(f"✅ 使用工作空间路径: {work_space}")
+        return converter
+    
+    def _report_success(self, converter):
+        self.report({'INFO'}, "Balsam conversion successful!")
+        paths = converter.get_output_paths()
+        self.report({'INFO'}, f"Output directory: {paths['base_dir']}")
+        
+        # 显示IBL图像复制结果
+        copy_result = converter.ibl_copy_result or {}
+        if copy_result.get('surface_copied'):
+            self.report({'INFO'}, f"Surface IBL图像已复制: {os.path.basename(copy_result['surface_image_dest'])}")
+        if copy_result.get('environment_copied'):
+            self.report({'INFO'}, f"Environment IBL图像已复制: {os.path.basename(copy_result['environment_image_dest'])}")
+        if copy_result.get('surface_copied') or copy_result.get('environment_copied'):
+            from . import ibl_mappling
+            ibl_files = ibl_mappling.get_ibl_image_paths_in_output()
+            if ibl_files['iblimage_files']:
+                self.report({'INFO'}, f"IBL图像文件: {len(ibl_files['iblimage_files'])} 个")
+                for file_path in ibl_files['iblimage_files']:
+                    print(f"  📁 IBL文件: {os.path.basename(file_path)}")
+    
+    def _run_preflight_check(self, context):
+        """转换前的开销预检：超出目标平台预算时只警告，不阻止转换"""
+        if not getattr(context.scene, "qtquick3d_preflight_check", True):
+            return
+        from . import scene_cost
+        from . import conversion_trace
+        try:
+            with conversion_trace.span("preflight", stage=True):
+                report = scene_cost.analyze_scene(context)
+            scene_cost.print_report(report)
+            for warning in report['warnings']:
+                self.report({'WARNING'}, warning)
+        except Exception as e:
+            print(f"⚠️ 场景预检失败: {e}")
+    
+    def _try_environment_fast_path(self, context):
+        """只有环境/控制器设置变化时跳过导出与balsam，重新组装QML并刷新已打开的预览窗口"""
+        scene = context.scene
+        if not getattr(scene, "qtquick3d_environment_fast_path", True):
+            return False
+        if getattr(scene, "qtquick3d_conversion_scope", 'SCENE') != 'SCENE':
+            return False
+        try:
+            converter = self._create_converter(context)
+            qml_content = converter.try_environment_only_update()
+        except Exception as e:
+            print(f"⚠️ 环境快速更新失败，执行完整转换: {e}")
+            return False
+        if not qml_content:
+            return False
+        if hasattr(qt_quick3d_integration, 'reload_quick3d_window'):
+            qt_quick3d_integration.reload_quick3d_window(qml_content)
+        self.report({'INFO'}, "Only environment settings changed - QML re-assembled without export or Balsam")
+        return True
+    
+    def _start_background_conversion(self, context):
+        """在主线程导出GLTF，然后在后台启动balsam"""
+        from . import conversion_jobs
+        from . import conversion_trace
+        
+        # 追踪覆盖导出、后台balsam与收尾，任务结束时写出 trace.json
+        conversion_trace.begin_trace("convert_scene")
+        self._run_preflight_check(context)
+        self._converter = self._create_converter(context)
+        
+        if not self._converter.prepare_conversion():
+            conversion_trace.end_trace(self._converter.qml_output_dir)
+            self.report({'ERROR'}, "GLTF export failed")
+            return False
+        
+        job = self._converter.create_background_job()
+        if job is None:
+            self._converter.discard_staged_output()
+            conversion_trace.end_trace(self._converter.qml_output_dir)
+            self.report({'ERROR'}, "Balsam is not available")
+            return False
+        
+        conversion_jobs.get_job_manager().start(job)
+        print("🚀 Balsam已在后台启动")
+        return True
     
     def execute(self, context):
+        from . import conversion_jobs
+        
+        manager = conversion_jobs.get_job_manager()
+        
+        # 已有任务在运行：合并为一次后续运行
+        if manager.is_running():
+            manager.request_follow_up()
+            self.report({'INFO'}, "Conversion running - a follow-up run has been queued")
+            return {'FINISHED'}
+        
+        # 只有环境设置变化：不需要导出与balsam
+        if self._try_environment_fast_path(context):
+            return {'FINISHED'}
+        
+        # 后台模式（无窗口）下保持同步转换
+        if bpy.app.background or context.window is None:
+            try:
+                converter = self._create_converter(context)
+                if converter.convert(keep_files=True, copy_to_docs=False):
+                    self._report_success(converter)
+                else:
+                    self.report({'ERROR'}, "Balsam conversion failed")
+            except Exception as e:
+                self.report({'ERROR'}, f"Conversion failed: {str(e)}")
+                import traceback
+                traceback.print_exc()
+            return {'FINISHED'}
+        
         try:
-            from . import balsam_gltf_converter
-            from . import ibl_mappling
-            
-            converter = balsam_gltf_converter.BalsamGLTFToQMLConverter()
-            
-            # 优先使用工作空间路径
-            work_space = getattr(context.scene, 'work_space_path', None)
-            if work_space:
-                converter.set_custom_output_dir(work_space)
-                print(f"✅ 使用工作空间路径: {work_space}")
-            
-            # 在转换之前复制world图像
-            print("🔄 开始复制World图像到输出目录...")
-            copy_result = ibl_mappling.copy_all_world_images_to_balsam_output()
-            
-            if copy_result['surface_copied']:
-                self.report({'INFO'}, f"Surface IBL图像已复制: {os.path.basename(copy_result['surface_image_dest'])}")
-                print(f"✅ Surface IBL图像复制成功: {copy_result['surface_image_dest']}")
-            
-            if copy_result['environment_copied']:
-                self.report({'INFO'}, f"Environment IBL图像已复制: {os.path.basename(copy_result['environment_image_dest'])}")
-                print(f"✅ Environment IBL图像复制成功: {copy_result['environment_image_dest']}")
-            
-            if not copy_result['surface_copied'] and not copy_result['environment_copied']:
-                print("ℹ️ 没有World图像需要复制")
-            
-            # 执行Balsam转换
-            success = converter.convert(keep_files=True, copy_to_docs=False)
-            
-            if success:
-                self.report({'INFO'}, "Balsam conversion successful!")
-                paths = converter.get_output_paths()
-                self.report({'INFO'}, f"Output directory: {paths['base_dir']}")
-                
-                # 显示IBL图像复制结果
-                if copy_result['surface_copied'] or copy_result['environment_copied']:
-                    ibl_files = ibl_mappling.get_ibl_image_paths_in_output()
-                    if ibl_files['iblimage_files']:
-                        self.report({'INFO'}, f"IBL图像文件: {len(ibl_files['iblimage_files'])} 个")
-                        for file_path in ibl_files['iblimage_files']:
-                            print(f"  📁 IBL文件: {os.path.basename(file_path)}")
-            else:
-                self.report({'ERROR'}, "Balsam conversion failed")
-                
+            if not self._start_background_conversion(context):
+                return {'CANCELLED'}
         except Exception as e:
+            from . import conversion_trace
+            conversion_trace.end_trace()
             self.report({'ERROR'}, f"Conversion failed: {str(e)}")
             import traceback
             traceback.print_exc()
+            return {'CANCELLED'}
+        
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        from . import conversion_jobs
+        from . import conversion_trace
+        
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        manager = conversion_jobs.get_job_manager()
+        job = manager.current_job
+        
+        # 把balsam输出实时转发到控制台
+        for line in job.drain_output():
+            print(f"  [balsam] {line}")
+        
+        context.window_manager.progress_update(int(job.progress * 100))
+        _tag_qt_quick3d_panel_redraw(context)
+        
+        if not job.is_finished:
+            return {'PASS_THROUGH'}
+        
+        if job.state == conversion_jobs.JOB_SUCCEEDED:
+            self._converter.on_balsam_success()
+            self._report_success(self._converter)
+            manager.last_status = f"Finished in {job.elapsed:.1f}s"
+        elif job.state == conversion_jobs.JOB_CANCELLED:
+            self._converter.discard_staged_output()
+            self.report({'WARNING'}, "Balsam conversion cancelled")
+        else:
+            self._converter.discard_staged_output()
+            self.report({'ERROR'}, "Balsam conversion failed")
+            manager.last_status = "Failed"
+        conversion_trace.end_trace(self._converter.qml_output_dir)
+        
+        # 运行期间有新的转换请求：基于最新场景再执行一次
+        if job.state != conversion_jobs.JOB_CANCELLED and manager.take_follow_up():
+            print("🔁 执行合并后的后续转换...")
+            try:
+                if self._start_background_conversion(context):
+                    return {'PASS_THROUGH'}
+            except Exception as e:
+                self.report({'ERROR'}, f"Follow-up conversion failed: {str(e)}")
+        
+        self._finish(context)
+        return {'FINISHED'}
+    
+    def cancel(self, context):
+        from . import conversion_jobs
+        from . import conversion_trace
+        conversion_jobs.get_job_manager().cancel()
+        conversion_trace.end_trace(self._converter.qml_output_dir if self._converter else None)
+        self._finish(context)
+    
+    def _finish(self, context):
+        from . import component_conversion
+        
+        wm = context.window_manager
+        if self._timer is not None:
+            wm.event_timer_remove(self._timer)
+            self._timer = None
+        wm.progress_end()
+        # 组件转换会更新组件登记表
+        component_conversion.refresh_panel_components()
+        _tag_qt_quick3d_panel_redraw(context)
+
+
+class QT_QUICK3D_OT_analyze_scene_cost(Operator):
+    """Estimate the runtime cost of the scene before converting"""
+    bl_idname = "qt_quick3d.analyze_scene_cost"
+    bl_label = "Analyze Scene Cost"
+    bl_description = "Estimate triangles, vertex/texture memory, materials, draw calls and animated channels for the target profile without exporting"
+    
+    def execute(self, context):
+        from . import scene_cost
+        
+        try:
+            report = scene_cost.analyze_scene(context)
+        except Exception as e:
+            self.report({'ERROR'}, f"Scene analysis failed: {str(e)}")
+            return {'CANCELLED'}
+        scene_cost.print_report(report)
+        totals = report['totals']
+        self.report({'WARNING'} if report['warnings'] else {'INFO'},
+                    f"{totals['triangles']:,} triangles, ~{totals['draw_calls']:,} draw calls, "
+                    f"{scene_cost.format_bytes(totals['texture_bytes'])} textures ({len(report['warnings'])} budget warnings)")
+        _tag_qt_quick3d_panel_redraw(context)
+        return {'FINISHED'}
+
+
+class QT_QUICK3D_OT_remove_component(Operator):
+    """Remove a separately converted component"""
+    bl_idname = "qt_quick3d.remove_component"
+    bl_label = "Remove Component"
+    bl_description = "Delete the component's files; its objects return to the main scene on the next full conversion"
+    
+    component_name: StringProperty(default="")
+    
+    def execute(self, context):
+        from . import balsam_gltf_converter
+        from . import component_conversion
+        from . import path_manager
+        
+        pm = path_manager.get_path_manager()
+        output_dir = pm.work_space_path or pm.output_base_dir
+        main_qml_name = balsam_gltf_converter.BalsamGLTFToQMLConverter().get_main_qml_name()
+        if component_conversion.remove_component(output_dir, self.component_name, main_qml_name):
+            self.report({'INFO'}, f"Component {self.component_name} removed - convert the scene to include its objects again")
+        else:
+            self.report({'ERROR'}, f"Failed to remove component {self.component_name}")
+        component_conversion.refresh_panel_components()
+        _tag_qt_quick3d_panel_redraw(context)
+        return {'FINISHED'}
+
+
+class QT_QUICK3D_OT_cancel_conversion(Operator):
+    """Cancel the running background Balsam conversion"""
+    bl_idname = "qt_quick3d.cancel_conversion"
+    bl_label = "Cancel Conversion"
+    bl_description = "Stop the running Balsam conversion and kill its process tree"
+    
+    def execute(self, context):
+        from . import conversion_jobs
         
+        if conversion_jobs.get_job_manager().cancel():
+            self.report({'INFO'}, "Conversion cancelled")
+        else:
+            self.report({'INFO'}, "No conversion is running")
         return {'FINISHED'}
 
 
+class QT_QUICK3D_OT_clear_balsam_cache(Operator):
+    """Remove all cached Balsam outputs"""
+    bl_idname = "qt_quick3d.clear_balsam_cache"
+    bl_label = "Clear Balsam Cache"
+    bl_description = "Delete all cached Balsam conversion results and processed textures"
+    
+    def execute(self, context):
+        from . import balsam_cache
+        from . import texture_pipeline
+        
+        cache = balsam_cache.BalsamOutputCache()
+        usage = cache.get_usage()
+        texture_pipeline.clear_texture_cache()
+        if cache.clear():
+            self.report({'INFO'}, f"Balsam cache cleared ({usage['entries']} entries, {usage['size'] / 1024 / 1024:.1f} MB)")
+        else:
+            self.report({'ERROR'}, "Failed to clear Balsam cache")
+        return {'FINISHED'}
+
+
+def _tag_qt_quick3d_panel_redraw(context):
+    """刷新3D视图侧边栏，使进度条实时更新"""
+    screen = getattr(context, 'screen', None)
+    if not screen:
+        return
+    for area in screen.areas:
+        if area.type == 'VIEW_3D':
+            area.tag_redraw()
+
+
 class QT_QUICK3D_OT_test_ibl_copy(Operator):
     """Test IBL image copy functionality"""
     bl_idname = "qt_quick3d.test_ibl_copy"
@@ -1173,10 +1854,10 @@ class QT_QUICK3D_OT_balsam_cleanup(Operator):
         return {'FINISHED'}
 
 class QT_QUICK3D_OT_save_source_scene(Operator):
-    """Save source scene (.gltf and .blend) to workspace/source_scene folder"""
+    """Save source scene (.gltf/.glb and .blend) to workspace/source_scene folder"""
     bl_idname = "qt_quick3d.save_source_scene"
     bl_label = "Save Source Scene"
-    bl_description = "Save .gltf and .blend files to workspace/source_scene folder"
+    bl_description = "Save .gltf/.glb and .blend files to workspace/source_scene folder"
     
     def execute(self, context):
         try:
@@ -1209,8 +1890,9 @@ class QT_QUICK3D_OT_save_source_scene(Operator):
             original_output_dir = converter.output_base_dir
             converter.output_base_dir = source_scene_dir
             
-            if converter.export_scene_to_gltf():
-                print(f"✅ GLTF file saved: {converter.gltf_path}")
+            # 源场景为一次性完整导出，不使用增量缓存；格式与当前导出格式一致
+            if converter.export_scene_to_gltf(allow_incremental=False, allow_optimizations=False):
+                print(f"✅ GLTF file saved: {converter.gltf_path} ({converter.get_gltf_export_format()})")
                 self.report({'INFO'}, f"Source scene saved to: {source_scene_dir}")
             else:
                 self.report({'ERROR'}, "Failed to export GLTF")
@@ -1553,7 +2235,6 @@ class QT_QUICK3D_OT_balsam_convert_existing(Operator):
     def execute(self, context):
         try:
             from . import balsam_gltf_converter
-            from . import ibl_mappling
             converter = balsam_gltf_converter.BalsamGLTFToQMLConverter()
             
             # 优先使用工作空间路径，回退到旧属性
@@ -1568,22 +2249,14 @@ class QT_QUICK3D_OT_balsam_convert_existing(Operator):
             if work_space:
                 print(f"✅ 使用工作空间路径: {work_space}")
             
-            # 在转换之前复制world图像
-            print("🔄 开始复制World图像到输出目录...")
-            copy_result = ibl_mappling.copy_all_world_images_to_balsam_output()
+            # World图像由转换器复制到暂存目录，与balsam输出一起提交
+            success = converter.convert_existing_gltf(gltf_path, output_dir)
             
-            if copy_result['surface_copied']:
+            copy_result = converter.ibl_copy_result or {}
+            if copy_result.get('surface_copied'):
                 self.report({'INFO'}, f"Surface IBL图像已复制: {os.path.basename(copy_result['surface_image_dest'])}")
-                print(f"✅ Surface IBL图像复制成功: {copy_result['surface_image_dest']}")
-            
-            if copy_result['environment_copied']:
+            if copy_result.get('environment_copied'):
                 self.report({'INFO'}, f"Environment IBL图像已复制: {os.path.basename(copy_result['environment_image_dest'])}")
-                print(f"✅ Environment IBL图像复制成功: {copy_result['environment_image_dest']}")
-            
-            if not copy_result['surface_copied'] and not copy_result['environment_copied']:
-                print("ℹ️ 没有World图像需要复制")
-            
-            success = converter.convert_existing_gltf(gltf_path, output_dir)
             
             if success:
                 self.report({'INFO'}, "GLTF conversion successful!")
@@ -1709,10 +2382,15 @@ classes = [
     VIEW3D_PT_qt_quick3d_panel,
     RENDER_PT_qt_quick3d_qml,
     QT_QUICK3D_OT_open_window,
+    QT_QUICK3D_OT_quick_preview,
     QT_QUICK3D_OT_toggle_debug_mode,
     QT_QUICK3D_OT_set_render_engine,
     # Balsam转换器操作符
     QT_QUICK3D_OT_balsam_convert_scene,
+    QT_QUICK3D_OT_analyze_scene_cost,
+    QT_QUICK3D_OT_remove_component,
+    QT_QUICK3D_OT_cancel_conversion,
+    QT_QUICK3D_OT_clear_balsam_cache,
     QT_QUICK3D_OT_test_ibl_copy,
     QT_QUICK3D_OT_balsam_convert_existing,
     QT_QUICK3D_OT_balsam_set_work_space,  # 合并后的按钮，自动检测 .qmlproject
@@ -1736,6 +2414,7 @@ print("✓ Balsam converter will be integrated into render properties panel")
 def register():
     # 加载balsam缓存
     path_manager.load_balsam_cache()
+    path_manager.load_balsam_capabilities()
     
     # 注册场景属性（包含 work_space_path 等基础属性，并在内部调用 SceneEnvironment 注册）
     register_scene_properties()
@@ -1746,7 +2425,10 @@ def register():
         if hasattr(bpy.context, 'scene') and bpy.context.scene:
             scene = bpy.context.scene
             selected = getattr(scene, 'balsam_version', 'AUTO')
-            if selected != 'AUTO':
+            if selected == path_manager.NATIVE_CONVERTER_KEY:
+                path_manager.set_selected_balsam_path(path_manager.NATIVE_CONVERTER_FILE)
+                print(f"✅ 初始化全局balsam路径: 内置转换器")
+            elif selected != 'AUTO':
                 chosen = path_manager.BALSAM_PATH_MAP.get(selected)
                 if chosen and os.path.exists(chosen):
                     path_manager.set_selected_balsam_path(chosen)
@@ -1764,12 +2446,18 @@ def register():
     for cls in classes:
         bpy.utils.register_class(cls)
     
+    # 注册场景变更日志（增量导出使用）
+    change_journal.register_change_journal()
+    
     # 渲染引擎功能暂时禁用
     print("✓ Qt Quick3D plugin registered successfully (render engine disabled)")
 
 def unregister():
     # 渲染引擎功能已禁用
     
+    # 注销场景变更日志
+    change_journal.unregister_change_journal()
+    
     # 注销主插件类
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
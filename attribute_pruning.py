@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+顶点属性裁剪模块 - 按材质实际使用的属性删除导出glTF中多余的顶点数据
+负责：
+1. 分析材质节点树：是否使用切线空间的法线贴图、读取了哪些颜色属性与自定义属性
+2. 导出前：场景中没有材质需要时关闭 export_tangents / export_attributes，导出器直接跳过这些数据
+3. 导出后逐图元裁剪：材质没有法线贴图时删除TANGENT；TEXCOORD只保留到材质贴图用到的最高UV编号；
+   材质没有读取颜色属性时删除COLOR_n；删除材质没有引用的自定义属性（_NAME）
+4. 删除不再使用的访问器，输出每个网格节省的顶点数据字节数
+
+TEXCOORD按导出器解析后的texCoord判断（含KHR_texture_transform的覆盖），不依赖UV贴图名称；
+UV编号不重新排列，材质只用到UV1时仍保留UV0。
+"""
+
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+
+COMPONENT_SIZES = {5120: 1, 5121: 1, 5122: 2, 5123: 2, 5125: 4, 5126: 4}
+TYPE_COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+
+
+# ----------------------------------------------------------------------
+# 材质分析
+# ----------------------------------------------------------------------
+
+def _empty_usage() -> Dict:
+    return {'normal_map': False, 'colors': False, 'attributes': set()}
+
+
+def _walk_tree(node_tree, usage: Dict, visited: set):
+    if node_tree is None or node_tree.as_pointer() in visited:
+        return
+    visited.add(node_tree.as_pointer())
+    for node in node_tree.nodes:
+        if getattr(node, 'mute', False):
+            continue
+        kind = node.bl_idname
+        if kind == 'ShaderNodeNormalMap':
+            if node.space == 'TANGENT' and node.inputs['Color'].is_linked:
+                usage['normal_map'] = True
+        elif kind == 'ShaderNodeTangent':
+            if node.direction_type == 'UV_MAP':
+                usage['normal_map'] = True
+        elif kind == 'ShaderNodeVertexColor':
+            usage['colors'] = True
+        elif kind == 'ShaderNodeAttribute':
+            if getattr(node, 'attribute_type', 'GEOMETRY') == 'GEOMETRY' and node.attribute_name:
+                # 属性节点既可能读取颜色属性，也可能读取自定义属性
+                usage['colors'] = True
+                usage['attributes'].add(node.attribute_name)
+        elif kind == 'ShaderNodeGroup':
+            _walk_tree(node.node_tree, usage, visited)
+
+
+def analyze_material(material) -> Dict:
+    """分析材质节点树需要的顶点属性
+
+    Returns:
+        dict: {'normal_map': 是否需要切线, 'colors': 是否读取颜色属性, 'attributes': 读取的属性名集合}
+    """
+    usage = _empty_usage()
+    if material and material.use_nodes and material.node_tree:
+        _walk_tree(material.node_tree, usage, set())
+    return usage
+
+
+def analyze_materials(materials) -> Dict[str, Dict]:
+    """{材质名称: 属性需求}（glTF材质名与Blender材质名一致）"""
+    usages = {}
+    for material in materials:
+        try:
+            usages[material.name] = analyze_material(material)
+        except Exception as e:
+            print(f"⚠️ 分析材质属性失败，保留全部属性: {material.name} ({e})")
+            usages[material.name] = None
+    return usages
+
+
+def scene_materials(context) -> List:
+    """视图层中可见对象使用的材质"""
+    materials = {}
+    for obj in context.view_layer.objects:
+        if not obj.visible_get():
+            continue
+        for slot in obj.material_slots:
+            if slot.material:
+                materials[slot.material.name_full] = slot.material
+    return list(materials.values())
+
+
+def export_overrides(usages: Dict[str, Optional[Dict]]) -> Dict:
+    """场景中没有材质需要时关闭的导出选项"""
+    if any(usage is None for usage in usages.values()):
+        return {}
+    overrides = {}
+    if not any(usage['normal_map'] for usage in usages.values()):
+        overrides['export_tangents'] = False
+    if not any(usage['attributes'] for usage in usages.values()):
+        overrides['export_attributes'] = False
+    return overrides
+
+
+# ----------------------------------------------------------------------
+# glTF裁剪
+# ----------------------------------------------------------------------
+
+def accessor_size(accessor: Dict) -> int:
+    return accessor['count'] * TYPE_COMPONENTS[accessor['type']] * COMPONENT_SIZES[accessor['componentType']]
+
+
+def _texture_coords(material: Dict) -> List[int]:
+    """材质所有贴图使用的UV编号"""
+    coords = []
+
+    def collect(value):
+        if isinstance(value, dict):
+            if isinstance(value.get('index'), int):
+                transform = value.get('extensions', {}).get('KHR_texture_transform', {})
+                coords.append(transform.get('texCoord', value.get('texCoord', 0)))
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    collect(material)
+    return coords
+
+
+def _needed(name: str, material: Optional[Dict], usage: Optional[Dict]) -> bool:
+    """图元属性是否仍被材质需要"""
+    if usage is None:
+        return True
+    if name == 'TANGENT':
+        return bool(material and 'normalTexture' in material)
+    if name.startswith('TEXCOORD_'):
+        coords = _texture_coords(material) if material else []
+        return bool(coords) and int(name[len('TEXCOORD_'):]) <= max(coords)
+    if name.startswith('COLOR_'):
+        return usage['colors']
+    if name.startswith('_'):
+        return name[1:] in usage['attributes']
+    return True
+
+
+def prune_document(doc, usages: Dict[str, Optional[Dict]]) -> List[Dict]:
+    """删除材质不需要的顶点属性，返回每个有裁剪的网格 {'mesh', 'removed', 'bytes'}
+
+    Args:
+        doc: gltf_utils.GLTFDocument
+        usages: analyze_materials 的结果；图元材质不在其中时按不读取颜色与自定义属性处理
+    """
+    gltf = doc.gltf
+    materials = gltf.get('materials', [])
+    accessors = gltf.get('accessors', [])
+    report = []
+    for mesh_index, mesh in enumerate(gltf.get('meshes', [])):
+        removed_accessors = set()
+        removed_names = set()
+        for primitive in mesh.get('primitives', []):
+            material_index = primitive.get('material')
+            material = materials[material_index] if isinstance(material_index, int) else None
+            usage = usages.get(material.get('name'), _empty_usage()) if material else _empty_usage()
+            attributes = primitive.get('attributes', {})
+            for name in list(attributes):
+                if _needed(name, material, usage):
+                    continue
+                removed_accessors.add(attributes.pop(name))
+                removed_names.add(name)
+                for target in primitive.get('targets', []):
+                    if name in target:
+                        removed_accessors.add(target.pop(name))
+        if removed_names:
+            report.append({
+                'mesh': mesh.get('name', str(mesh_index)),
+                'removed': sorted(removed_names),
+                'bytes': sum(accessor_size(accessors[index]) for index in removed_accessors),
+            })
+    if report:
+        doc.remove_unused_accessors()
+    return report
+
+
+def prune_gltf(gltf_path: str, export_format: str, usages: Dict[str, Optional[Dict]]) -> List[Dict]:
+    """裁剪glTF文件中多余的顶点属性并保存"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    report = prune_document(doc, usages)
+    if report:
+        doc.save(gltf_path, export_format)
+    return report
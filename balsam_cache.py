@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Balsam输出缓存模块 - 按内容寻址缓存balsam的转换结果
+负责：
+1. 流式计算glTF及其外部文件、balsam可执行文件标识、命令参数的哈希作为缓存键
+2. 记录balsam生成的文件（QML、meshes/、maps/）并保存到缓存
+3. 命中缓存时直接恢复/硬链接到工作空间，不再启动balsam
+4. 按总大小限制进行LRU淘汰
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+
+CACHE_VERSION = 1
+INDEX_FILE_NAME = "index.json"
+ENTRY_FILE_NAME = "entry.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# balsam生成的文件：工作空间根目录下的QML，以及这些子目录中的文件
+OUTPUT_SUBDIRS = ("meshes", "maps")
+# 这些目录下的文件只会被读取，恢复时可以硬链接；QML会被后续步骤改写，必须复制
+LINKABLE_SUBDIRS = ("meshes", "maps")
+
+# 保护index.json的并发读写（后台任务线程与主线程）
+_index_lock = threading.Lock()
+
+
+def _hash_file(hasher, path: str):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+
+
+def get_default_cache_dir() -> str:
+    """默认缓存目录：插件目录下的 cache/balsam"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "balsam")
+
+
+def snapshot_outputs(output_dir: str) -> Dict[str, tuple]:
+    """记录输出目录中balsam相关文件的状态 {相对路径: (大小, 修改时间)}"""
+    snapshot = {}
+    if not output_dir or not os.path.isdir(output_dir):
+        return snapshot
+    for name in os.listdir(output_dir):
+        path = os.path.join(output_dir, name)
+        if name.endswith('.qml') and os.path.isfile(path):
+            stat = os.stat(path)
+            snapshot[name] = (stat.st_size, stat.st_mtime_ns)
+    for sub_dir in OUTPUT_SUBDIRS:
+        root_dir = os.path.join(output_dir, sub_dir)
+        if not os.path.isdir(root_dir):
+            continue
+        for root, _dirs, files in os.walk(root_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                snapshot[os.path.relpath(path, output_dir).replace(os.sep, '/')] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class BalsamOutputCache:
+    """Balsam输出缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir or get_default_cache_dir()
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE_NAME)
+        self.max_bytes = max_bytes
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # 缓存键
+    # ------------------------------------------------------------------
+    def compute_key(self, gltf_path: str, balsam_path: str, args: List, output_dir: str) -> str:
+        """计算缓存键
+
+        Args:
+            gltf_path: 输入glTF/GLB
+            balsam_path: balsam可执行文件
+            args: 命令参数（会把输入/输出路径替换为占位符，使键与工作空间位置无关）
+            output_dir: 输出目录
+        """
+        hasher = hashlib.sha256(f"b2q-balsam-cache-v{CACHE_VERSION}".encode('utf-8'))
+
+        # 输入文件名决定生成的QML组件名，需要参与哈希
+        hasher.update(os.path.basename(gltf_path).encode('utf-8'))
+        _hash_file(hasher, gltf_path)
+        for companion in sorted(gltf_utils.list_companion_files(gltf_path)):
+            hasher.update(os.path.basename(companion).encode('utf-8'))
+            if os.path.exists(companion):
+                _hash_file(hasher, companion)
+
+        # balsam可执行文件标识
+        stat = os.stat(balsam_path)
+        hasher.update(f"{os.path.abspath(balsam_path)}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8'))
+
+        # 命令参数
+        normalized = []
+        for arg in args:
+            arg = str(arg)
+            if os.path.normcase(os.path.abspath(arg)) == os.path.normcase(os.path.abspath(gltf_path)):
+                arg = "<input>"
+            elif output_dir and os.path.normcase(os.path.abspath(arg)) == os.path.normcase(os.path.abspath(output_dir)):
+                arg = "<output>"
+            elif os.path.normcase(arg) == os.path.normcase(balsam_path):
+                arg = "<balsam>"
+            normalized.append(arg)
+        hasher.update(json.dumps(normalized).encode('utf-8'))
+        return hasher.hexdigest()
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+    def _load_index(self) -> Dict:
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取balsam缓存索引失败: {e}")
+        return {}
+
+    def _save_index(self, index: Dict):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key)
+
+    # ------------------------------------------------------------------
+    # 查询 / 恢复
+    # ------------------------------------------------------------------
+    def lookup(self, key: str) -> Optional[Dict]:
+        entry_file = os.path.join(self._entry_dir(key), ENTRY_FILE_NAME)
+        if not os.path.exists(entry_file):
+            return None
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def restore(self, key: str, output_dir: str) -> bool:
+        """命中缓存时把文件恢复到输出目录，返回是否成功"""
+        entry = self.lookup(key)
+        if entry is None:
+            return False
+
+        files_dir = os.path.join(self._entry_dir(key), "files")
+        try:
+            linked = 0
+            for rel_path in entry['files']:
+                src = os.path.join(files_dir, rel_path)
+                dst = os.path.join(output_dir, rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if os.path.exists(dst):
+                    os.remove(dst)
+                # meshes/maps 只读使用，可硬链接；QML会被后续步骤改写，必须复制
+                if rel_path.split('/', 1)[0] in LINKABLE_SUBDIRS:
+                    try:
+                        os.link(src, dst)
+                        linked += 1
+                        continue
+                    except OSError:
+                        pass
+                shutil.copy2(src, dst)
+        except Exception as e:
+            print(f"⚠️ 从balsam缓存恢复失败: {e}")
+            return False
+
+        with _index_lock:
+            index = self._load_index()
+            if key in index:
+                index[key]['last_access'] = time.time()
+                self._save_index(index)
+
+        print(f"⚡ 命中balsam缓存: {len(entry['files'])} 个文件（{linked} 个硬链接），跳过balsam")
+        return True
+
+    # ------------------------------------------------------------------
+    # 存储 / 淘汰
+    # ------------------------------------------------------------------
+    def store(self, key: str, output_dir: str, before: Dict[str, tuple]) -> bool:
+        """balsam成功后，把新生成或改变的文件存入缓存
+
+        Args:
+            before: 运行balsam之前的 snapshot_outputs 结果
+        """
+        after = snapshot_outputs(output_dir)
+        produced = sorted(rel for rel, state in after.items() if before.get(rel) != state)
+        if not produced:
+            print("ℹ️ 未检测到balsam生成的文件，跳过缓存")
+            return False
+
+        entry_dir = self._entry_dir(key)
+        tmp_dir = entry_dir + ".tmp"
+        try:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir)
+            total_size = 0
+            for rel_path in produced:
+                src = os.path.join(output_dir, rel_path)
+                dst = os.path.join(tmp_dir, "files", rel_path)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(src, dst)
+                total_size += os.path.getsize(dst)
+            with open(os.path.join(tmp_dir, ENTRY_FILE_NAME), 'w', encoding='utf-8') as f:
+                json.dump({'files': produced, 'size': total_size, 'created': time.time()}, f, indent=2)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(tmp_dir, entry_dir)
+        except Exception as e:
+            print(f"⚠️ 写入balsam缓存失败: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        with _index_lock:
+            index = self._load_index()
+            index[key] = {'size': total_size, 'last_access': time.time()}
+            self._evict(index)
+            self._save_index(index)
+
+        print(f"💾 balsam结果已缓存: {len(produced)} 个文件, {total_size / 1024 / 1024:.1f} MB")
+        return True
+
+    def _evict(self, index: Dict):
+        """按最近访问时间淘汰，直到总大小不超过限制"""
+        total = sum(item.get('size', 0) for item in index.values())
+        for key in sorted(index, key=lambda k: index[k].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= index[key].get('size', 0)
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del index[key]
+            print(f"🧹 淘汰balsam缓存条目: {key[:12]}")
+
+    def clear(self) -> bool:
+        """清空缓存"""
+        try:
+            with _index_lock:
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
+                os.makedirs(self.entries_dir, exist_ok=True)
+            print(f"🧹 balsam缓存已清空: {self.cache_dir}")
+            return True
+        except Exception as e:
+            print(f"❌ 清空balsam缓存失败: {e}")
+            return False
+
+    def get_usage(self) -> Dict:
+        """缓存占用统计"""
+        index = self._load_index()
+        return {
+            'entries': len(index),
+            'size': sum(item.get('size', 0) for item in index.values()),
+            'max_bytes': self.max_bytes,
+        }
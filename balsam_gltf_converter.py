@@ -6,10 +6,20 @@ This script exports the current Blender scene to GLTF format and then calls bals
 
 import bpy
 import os
+import copy
 import subprocess
 import shutil
 from pathlib import Path
 from . import path_manager
+from . import gltf_utils
+from . import conversion_trace
+
+# 导出格式：GLB 为单个二进制文件，无需base64编解码，是Balsam可接受的最快格式
+DEFAULT_GLTF_EXPORT_FORMAT = 'GLB'
+GLTF_EXPORT_FORMATS = ('GLB', 'GLTF_SEPARATE', 'GLTF_EMBEDDED')
+
+# 快速预览导出的glTF所在的工作空间状态子目录（不被balsam输出与暂存提交覆盖）
+PREVIEW_STATE_SUB_DIR = "preview"
 
 # 全局变量定义 - 确保所有模块使用相同的路径
 QML_OUTPUT_DIR = None
@@ -58,6 +68,20 @@ class BalsamGLTFToQMLConverter:
         self.gltf_path = None
         self.qml_output_dir = None
         self.balsam_path = None
+        # 由场景设置决定的附加balsam选项（在主线程解析，后台线程构建命令时使用）
+        self.balsam_extra_args = []
+        self._balsam_cache_key = None
+        self._balsam_cache_before = None
+        # 暂存目录：balsam与后处理的输出先写到这里，成功后只把变化的文件提交到工作空间
+        self.staging_dir = None
+        self.ibl_copy_result = None
+        # 分片转换：export_shards 生成的分片列表及合并后的QML组件名
+        self.shard_plan = None
+        self.sharded_qml_name = None
+        # 选择性转换：export_component 生成的组件计划
+        self.component_plan = None
+        # 导出时计算的转换指纹，balsam成功后写入工作空间（用于判断下次是否只有环境变化）
+        self.pending_fingerprint = None
         
     def setup_environment(self):
         """设置环境"""
@@ -250,29 +274,23 @@ class BalsamGLTFToQMLConverter:
             print(f"  ❌ 未找到balsam可执行文件")
     
     def _test_balsam_help(self):
-        """测试balsam帮助信息"""
-        try:
-            # 尝试获取帮助信息
-            result = subprocess.run(
-                [self.balsam_path, "--help"],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode == 0:
-                print(f"  ✅ 帮助信息获取成功")
-                print(f"  📋 帮助内容: {result.stdout[:200]}...")
-            else:
-                print(f"  ⚠️  帮助信息获取失败，返回码: {result.returncode}")
-                
-        except Exception as e:
-            print(f"  ⚠️  帮助信息测试失败: {e}")
+        """测试balsam帮助信息（结果按可执行文件缓存，同一版本只探测一次）"""
+        capabilities = path_manager.probe_balsam_capabilities(self.balsam_path)
+        if capabilities:
+            print(f"  ✅ 帮助信息获取成功")
+            print(f"  📋 版本: {capabilities.get('version')}")
+            print(f"  📋 输出参数: {capabilities.get('output_flag') or '(无，使用工作目录)'}")
+        else:
+            print(f"  ⚠️  帮助信息获取失败")
+        return capabilities
     
-    def _generate_qmldir_if_needed(self):
+    def _generate_qmldir_if_needed(self, target_dir=None):
         """
         如果设置了 qmlproject，在 workspace 下生成 qmldir 文件
         
+        Args:
+            target_dir: 读取QML并写入 qmldir 的目录（默认即工作空间，分阶段输出时为暂存目录）
+        
         qmldir 格式：
         module Generated.QtQuick3D.AssetFolderName
         ComponentName 1.0 ComponentName.qml
@@ -301,28 +319,34 @@ class BalsamGLTFToQMLConverter:
             
             print(f"📦 使用 Asset Folder 名称: {asset_folder_name}")
             print(f"📁 实际工作空间路径: {workspace_path}")
+            target_dir = target_dir or workspace_path
             
-            # 查找实际生成的 QML 文件
-            qml_files = [f for f in os.listdir(workspace_path) if f.endswith('.qml')]
+            # 查找实际生成的 QML 文件（单独转换的组件另外列出）
+            from .qml_handler import ASSEMBLED_QML_EXTENSION
+            from . import component_conversion
+            component_files = component_conversion.get_component_qml_files(workspace_path)
+            qml_files = [f for f in os.listdir(target_dir)
+                         if f.endswith('.qml') and not f.endswith(ASSEMBLED_QML_EXTENSION) and f not in component_files]
             
-            if not qml_files:
+            if not qml_files and not component_files:
                 print("⚠️ 工作空间中未找到 QML 文件，跳过 qmldir 生成")
                 return
             
-            # 使用第一个找到的 QML 文件（通常只有一个主 QML 文件）
-            qml_file = qml_files[0]
-            qml_component_name = os.path.splitext(qml_file)[0]  # 移除 .qml 扩展名
-            
-            print(f"📄 检测到 QML 文件: {qml_file}")
-            print(f"📦 组件名称: {qml_component_name}")
-            
             # 生成 qmldir 文件路径
-            qmldir_path = os.path.join(workspace_path, "qmldir")
+            qmldir_path = os.path.join(target_dir, "qmldir")
             
             # 生成 qmldir 内容 - 使用 Asset Folder 名称作为模块名
-            qmldir_content = f"""module Generated.QtQuick3D.{asset_folder_name}
-{qml_component_name} 1.0 {qml_file}
-"""
+            qmldir_content = f"module Generated.QtQuick3D.{asset_folder_name}\n"
+            if qml_files:
+                # 使用第一个找到的 QML 文件（通常只有一个主 QML 文件）
+                qml_file = qml_files[0]
+                qml_component_name = os.path.splitext(qml_file)[0]  # 移除 .qml 扩展名
+                
+                print(f"📄 检测到 QML 文件: {qml_file}")
+                print(f"📦 组件名称: {qml_component_name}")
+                qmldir_content += f"{qml_component_name} 1.0 {qml_file}\n"
+            for component_file in component_files:
+                qmldir_content += f"{os.path.splitext(component_file)[0]} 1.0 {component_file}\n"
             
             # 写入 qmldir 文件
             with open(qmldir_path, 'w', encoding='utf-8') as f:
@@ -330,7 +354,7 @@ class BalsamGLTFToQMLConverter:
             
             print(f"✅ qmldir 文件已生成: {qmldir_path}")
             print(f"📦 模块名称: Generated.QtQuick3D.{asset_folder_name}")
-            print(f"📄 QML 组件: {qml_component_name} 1.0 {qml_file}")
+            print(f"📄 QML 组件: {', '.join(qml_files[:1] + component_files)}")
             
         except Exception as e:
             print(f"⚠️ 生成 qmldir 文件失败: {e}")
@@ -338,42 +362,80 @@ class BalsamGLTFToQMLConverter:
             traceback.print_exc()
             # 不影响主流程，只是警告
         
-    def export_scene_to_gltf(self):
-        """导出场景为GLTF格式"""
+    def get_gltf_export_format(self):
+        """获取场景中选择的GLTF导出格式"""
         try:
-            # 优先使用 Asset Folder 名称，其次使用 Blender 文件名
-            import re
-            
-            scene = bpy.context.scene
-            asset_folder_name = getattr(scene, "qmlproject_assets_folder", None)
-            
-            # 如果设置了 Asset Folder 且不是特殊值，使用它作为文件名
-            if asset_folder_name and asset_folder_name not in ["NONE", "EMPTY", "ERROR"]:
-                gltf_filename = f"{asset_folder_name}.gltf"
-                print(f"📦 使用 Asset Folder 名称作为 GLTF 文件名: {gltf_filename}")
-            else:
-                # 否则按照当前blender文件名称命名；如果包含中文字符就保存为scene.gltf
-                def contains_chinese(text):
-                    return any('\u4e00' <= char <= '\u9fff' for char in text)
-                def only_legal_english_characters(text):
-                    return re.match(r'^[a-zA-Z0-9\-\.]*$', text)
+            export_format = getattr(bpy.context.scene, "qtquick3d_gltf_export_format", DEFAULT_GLTF_EXPORT_FORMAT)
+        except Exception:
+            export_format = DEFAULT_GLTF_EXPORT_FORMAT
+        if export_format not in GLTF_EXPORT_FORMATS:
+            export_format = DEFAULT_GLTF_EXPORT_FORMAT
+        return export_format
 
-                # 获取当前blender文件名（不含扩展名）
-                blend_filepath = bpy.data.filepath
-                if blend_filepath:
-                    blend_filename = os.path.splitext(os.path.basename(blend_filepath))[0]
-                    if contains_chinese(blend_filename):
-                        gltf_filename = "scene.gltf"
-                    else:
-                        if only_legal_english_characters(blend_filename):
-                            safe_name = re.sub(r'[^\w\-\.]', '_', blend_filename)
-                        else:
-                            safe_name = "scene"
-                        gltf_filename = f"{safe_name}.gltf"
-                else:
+    def _remove_previous_exports(self, gltf_path):
+        """删除同名但格式不同的旧导出文件，避免工作空间中残留过期的 .gltf/.glb/.bin"""
+        stem = os.path.splitext(gltf_path)[0]
+        for ext in ('.gltf', '.glb'):
+            old_path = stem + ext
+            if os.path.normcase(old_path) == os.path.normcase(gltf_path) or not os.path.exists(old_path):
+                continue
+            for companion in gltf_utils.list_companion_files(old_path):
+                if companion.lower().endswith('.bin') and os.path.exists(companion):
+                    os.remove(companion)
+            os.remove(old_path)
+            print(f"🧹 删除旧格式导出文件: {old_path}")
+
+    def get_gltf_filename(self):
+        """确定导出文件名：优先使用 Asset Folder 名称，其次使用 Blender 文件名"""
+        import re
+        
+        scene = bpy.context.scene
+        asset_folder_name = getattr(scene, "qmlproject_assets_folder", None)
+        
+        # 如果设置了 Asset Folder 且不是特殊值，使用它作为文件名
+        if asset_folder_name and asset_folder_name not in ["NONE", "EMPTY", "ERROR"]:
+            gltf_filename = f"{asset_folder_name}.gltf"
+            print(f"📦 使用 Asset Folder 名称作为 GLTF 文件名: {gltf_filename}")
+        else:
+            # 否则按照当前blender文件名称命名；如果包含中文字符就保存为scene.gltf
+            def contains_chinese(text):
+                return any('\u4e00' <= char <= '\u9fff' for char in text)
+            def only_legal_english_characters(text):
+                return re.match(r'^[a-zA-Z0-9\-\.]*$', text)
+
+            # 获取当前blender文件名（不含扩展名）
+            blend_filepath = bpy.data.filepath
+            if blend_filepath:
+                blend_filename = os.path.splitext(os.path.basename(blend_filepath))[0]
+                if contains_chinese(blend_filename):
                     gltf_filename = "scene.gltf"
+                else:
+                    if only_legal_english_characters(blend_filename):
+                        safe_name = re.sub(r'[^\w\-\.]', '_', blend_filename)
+                    else:
+                        safe_name = "scene"
+                    gltf_filename = f"{safe_name}.gltf"
+            else:
+                gltf_filename = "scene.gltf"
+        return gltf_filename
 
+    def export_scene_to_gltf(self, allow_incremental=True, allow_optimizations=True):
+        """导出场景为GLTF格式
+        
+        Args:
+            allow_incremental: 是否允许使用增量导出（保存源场景等一次性导出应关闭）
+            allow_optimizations: 是否执行GPU实例化、属性裁剪与贴图优化（保存源场景时应关闭，保留原始节点、属性与贴图）
+        """
+        try:
+            scene = bpy.context.scene
+            gltf_filename = self.get_gltf_filename()
+
+            export_kwargs = self.get_balsam_export_kwargs() if allow_optimizations else self.get_gltf_export_kwargs()
+            export_format = export_kwargs['export_format']
+            gltf_filename = os.path.splitext(gltf_filename)[0] + gltf_utils.get_gltf_extension(export_format)
             self.gltf_path = os.path.join(self.output_base_dir, gltf_filename)
+            self._remove_previous_exports(self.gltf_path)
+            print(f"📦 GLTF导出格式: {export_format}")
 
             # 导出的.qml路径保存下来作为一个全局变量
             global BASE_DIR, QML_OUTPUT_DIR, OUTPUT_BASE_DIR
@@ -389,42 +451,542 @@ class BalsamGLTFToQMLConverter:
             #todo 导出场景到gltf的时候，可以读取blender的设置并应用于当前导出
             #todo 可以手动设置场景名称，亦或者直接调用blender的导出设置
             
-            # 默认GLTF导出设置
-            # https://docs.blender.org/api/current/bpy.ops.export_scene.html
-            bpy.ops.export_scene.gltf(
-                filepath=self.gltf_path,
-                export_format='GLTF_EMBEDDED',  # 使用embedded模式
-                export_copyright='Blender2Quick3DMadeByZhiningJiao',
-                
-                export_texcoords=True,
-                export_normals=True,
-                export_tangents=True,
-                export_materials='EXPORT',
-                # Blender 4.1/4.4: export_colors 和 export_visible_objects_only 参数已移除
-                # export_visible_objects_only=True,  # Blender 4.1 不支持此参数
-                use_visible=True,
-                export_animations=True,
-                export_attributes=True,
+            # 已单独转换为组件的对象不再导出到主场景，由主场景QML实例化组件
+            from . import component_conversion
+            excluded = component_conversion.get_component_object_names(self.output_base_dir)
+            if excluded:
+                from . import incremental_export
+                objects = [obj for obj in bpy.context.view_layer.objects
+                           if obj.visible_get() and obj.name not in excluded]
+                if not objects:
+                    print("⚠️ 场景中的可见对象都已转换为组件")
+                    return False
+                with conversion_trace.span("gltf_export", stage=True, format=export_format, components=True):
+                    if not incremental_export.export_objects(bpy.context, objects, self.gltf_path, export_kwargs):
+                        return False
+                print(f"✅ 场景导出成功（排除 {len(excluded)} 个组件对象）: {self.gltf_path}")
+                if allow_optimizations:
+                    self.optimize_exported_gltf([(self.gltf_path, export_format, "")])
+                return True
+            
+            # 增量导出：只重新导出自上次导出以来变化的对象层级
+            if allow_incremental and getattr(scene, "qtquick3d_incremental_export", False):
+                from . import incremental_export
+                with conversion_trace.span("gltf_export", stage=True, incremental=True):
+                    written_path = incremental_export.export_incremental(
+                        self.gltf_path, export_kwargs, export_format
+                    )
+                if written_path:
+                    self.gltf_path = written_path
+                    print(f"✅ 场景增量导出成功: {self.gltf_path}")
+                    if allow_optimizations:
+                        self.optimize_exported_gltf([(self.gltf_path, export_format, "")])
+                    return True
+                print("⚠️ 增量导出失败，回退到完整导出")
 
-                export_skins=True,
-                export_all_influences=False,
-                export_morph=True,
-                export_lights=True,
-                export_cameras=True,
-                export_extras=True,
-                export_yup=True,
-                export_apply=True,
-                export_import_convert_lighting_mode='COMPAT'
-               
-            )
+            # 快速导出：NumPy直接写出GLB/glTF，遇到不支持的内容时返回None并回退到官方导出器
+            fast_export = bool(getattr(scene, "qtquick3d_fast_export", False))
+            with conversion_trace.span("gltf_export", stage=True, format=export_format, fast=fast_export):
+                written_path = None
+                if fast_export:
+                    from . import fast_gltf_export
+                    written_path = fast_gltf_export.export_scene(bpy.context, self.gltf_path, export_kwargs)
+                if written_path:
+                    self.gltf_path = written_path
+                else:
+                    bpy.ops.export_scene.gltf(filepath=self.gltf_path, **export_kwargs)
             
             print(f"✅ 场景导出成功: {self.gltf_path}")
+            if allow_optimizations:
+                self.optimize_exported_gltf([(self.gltf_path, export_format, "")])
             return True
             
         except Exception as e:
             print(f"❌ 导出失败: {e}")
             return False
     
+    def is_sharded_conversion_enabled(self):
+        """是否按顶层集合分片并行转换"""
+        try:
+            return bool(getattr(bpy.context.scene, "qtquick3d_sharded_conversion", False))
+        except Exception:
+            return False
+    
+    def get_shard_worker_count(self):
+        """并行balsam进程数上限（0表示使用CPU核心数）"""
+        try:
+            workers = getattr(bpy.context.scene, "qtquick3d_shard_workers", 0)
+        except Exception:
+            workers = 0
+        return workers or os.cpu_count() or 1
+    
+    def export_shards(self):
+        """按顶层集合把场景导出为多个分片GLB（分片转换模式）"""
+        from . import sharded_conversion
+        
+        try:
+            self.qml_output_dir = self.output_base_dir
+            self.sharded_qml_name = sharded_conversion.qml_component_name(
+                os.path.splitext(self.get_gltf_filename())[0]
+            )
+            with conversion_trace.span("gltf_export", stage=True, sharded=True):
+                from . import component_conversion
+                self.shard_plan = sharded_conversion.export_shards(
+                    self.get_balsam_export_kwargs(), self.output_base_dir,
+                    exclude=component_conversion.get_component_object_names(self.output_base_dir),
+                )
+            if not self.shard_plan:
+                return False
+            self.optimize_exported_gltf([(shard['gltf_path'], 'GLB', shard['id'] + "_") for shard in self.shard_plan])
+            # 主分片作为代表性的GLTF路径（用于检查balsam输入与UI显示）
+            primary = next(shard for shard in self.shard_plan if shard['primary'])
+            self.gltf_path = primary['gltf_path']
+            return True
+        except Exception as e:
+            print(f"❌ 分片导出失败: {e}")
+            self.shard_plan = None
+            return False
+    
+    def get_main_qml_name(self):
+        """主场景QML组件名（与balsam由glTF文件名生成的规则一致）"""
+        from . import sharded_conversion
+        return sharded_conversion.qml_component_name(os.path.splitext(self.get_gltf_filename())[0])
+    
+    def export_component(self, selection):
+        """只导出转换范围内的对象（选择性转换模式），结果作为独立组件"""
+        from . import component_conversion
+        
+        try:
+            self.qml_output_dir = self.output_base_dir
+            self.main_qml_name = self.get_main_qml_name()
+            if selection['name'] == self.main_qml_name:
+                selection = dict(selection, name=selection['name'] + "Component", id=selection['id'] + "component")
+            with conversion_trace.span("gltf_export", stage=True, component=selection['name']):
+                self.component_plan = component_conversion.export_component(
+                    bpy.context, selection, self.get_balsam_export_kwargs(), self.output_base_dir
+                )
+            if not self.component_plan:
+                return False
+            self.gltf_path = self.component_plan['gltf_path']
+            self.optimize_exported_gltf([(self.gltf_path, 'GLB', self.component_plan['id'] + "_")])
+            return True
+        except Exception as e:
+            print(f"❌ 组件导出失败: {e}")
+            self.component_plan = None
+            return False
+    
+    def create_component_job_group(self):
+        """创建组件转换任务（需先调用 export_component）"""
+        from . import component_conversion
+        
+        if not self.component_plan or not self.resolve_balsam_path():
+            return None
+        return component_conversion.create_component_job_group(self, self.component_plan, cache=self.get_balsam_cache())
+    
+    def commit_component_output(self):
+        """提交组件输出（只替换组件自己的文件），并在主场景QML与qmldir中加入组件"""
+        from . import component_conversion
+        
+        try:
+            stats = component_conversion.commit_component(
+                self.component_plan, self.staging_dir, self.qml_output_dir, self.main_qml_name
+            )
+            print(f"📦 组件 {self.component_plan['name']} 已提交到工作空间: {stats['changed']} 个文件更新, "
+                  f"{stats['unchanged']} 个未变化, {stats['removed']} 个旧文件删除")
+            self._generate_qmldir_if_needed()
+        except Exception as e:
+            print(f"❌ 提交组件输出失败: {e}")
+        finally:
+            self.staging_dir = None
+    
+    def create_shard_job_group(self):
+        """创建分片并行转换任务组（需先调用 export_shards）"""
+        from . import sharded_conversion
+        
+        if not self.shard_plan or not self.resolve_balsam_path():
+            return None
+        return sharded_conversion.create_shard_job_group(
+            self,
+            self.shard_plan,
+            self.sharded_qml_name,
+            max_workers=self.get_shard_worker_count(),
+            cache=self.get_balsam_cache(),
+        )
+    
+    def call_sharded_balsam_converter(self):
+        """阻塞执行分片/组件的balsam任务组（批处理与无界面模式使用）"""
+        from . import conversion_jobs
+        
+        group = self.create_component_job_group() if self.component_plan else self.create_shard_job_group()
+        if group is None:
+            self.discard_staged_output()
+            return False
+        group.run()  # 任务组在自己的线程中记录balsam阶段
+        for line in group.drain_output():
+            print(f"  [balsam] {line}")
+        if group.state != conversion_jobs.JOB_SUCCEEDED:
+            print("❌ 分片转换失败")
+            self.discard_staged_output()
+            return False
+        print(f"✅ 分片转换完成，耗时 {group.elapsed:.2f}s")
+        self.on_balsam_success()
+        return True
+    
+    def get_workspace_state_dir(self):
+        """当前输出目录下的插件内部状态目录"""
+        return os.path.join(self.output_base_dir, path_manager.WORKSPACE_STATE_DIR_NAME)
+    
+    def write_optimization_plan(self, save_plan, *args):
+        """写入balsam完成后改写QML所用的计划文件（LOD、贴图、实例化）
+        
+        优化关闭或没有需要处理的对象时也要写入：空计划会覆盖或删除旧的计划文件，
+        否则上一次转换留下的计划会被应用到这次的输出上。
+        
+        Args:
+            save_plan: 各模块的 save_*_plan(state_dir, ...) 函数
+        """
+        save_plan(self.get_workspace_state_dir(), *args)
+    
+    def optimize_exported_gltf(self, targets):
+        """导出之后、balsam之前对glTF执行的优化（清理、材质去重、GPU实例化、LOD、属性裁剪、网格优化、关键帧精简、贴图处理）
+        
+        每个glTF只在第一个启用的步骤中读取一次，各步骤在内存中的文档上修改，最后有改动的文档保存一次。
+        
+        Args:
+            targets: [(glTF路径, 导出格式, 标记前缀)]
+        """
+        documents = [
+            {'path': gltf_path, 'format': export_format, 'prefix': prefix, 'doc': None, 'changed': False}
+            for gltf_path, export_format, prefix in targets
+        ]
+        with conversion_trace.span("gltf_optimize", stage=True):
+            # 清理在实例化与LOD之前进行：两者记录的节点变换都相对于折叠后的父节点
+            with conversion_trace.span("cleanup"):
+                self.cleanup_gltf(documents)
+            with conversion_trace.span("materials"):
+                self.dedupe_materials(documents)
+            with conversion_trace.span("instancing"):
+                self.prepare_instancing(documents)
+            with conversion_trace.span("lod"):
+                self.prepare_lods(documents)
+            with conversion_trace.span("attributes"):
+                self.prune_attributes(documents)
+            with conversion_trace.span("mesh_optimizer"):
+                self.optimize_meshes(documents)
+            with conversion_trace.span("keyframes"):
+                self.reduce_keyframes(documents)
+            with conversion_trace.span("textures"):
+                self.prepare_textures(documents)
+            with conversion_trace.span("save"):
+                for target in documents:
+                    if target['changed']:
+                        target['doc'].save(target['path'], target['format'])
+    
+    def _run_document_pass(self, documents, failure_message, apply):
+        """对每个待优化的文档执行一个优化步骤，返回成功的文档的结果列表
+        
+        文档在第一次使用时读取。步骤抛出异常时该文档恢复到步骤开始前的状态，
+        不会保存只修改了一半的数据。
+        
+        Args:
+            documents: optimize_exported_gltf 中的文档列表
+            failure_message: 失败时输出的提示
+            apply: apply(文档, 文档项) 返回 (结果, 是否修改了文档)
+        """
+        results = []
+        for target in documents:
+            snapshot = None
+            try:
+                if target['doc'] is None:
+                    target['doc'] = gltf_utils.GLTFDocument.load(target['path'])
+                doc = target['doc']
+                snapshot = (copy.deepcopy(doc.gltf), list(doc.buffers))
+                result, changed = apply(doc, target)
+            except Exception as e:
+                if snapshot is not None:
+                    target['doc'].gltf, target['doc'].buffers = snapshot
+                print(f"{failure_message}: {e}")
+                continue
+            target['changed'] = target['changed'] or bool(changed)
+            results.append(result)
+        return results
+    
+    def optimize_meshes(self, documents):
+        """重排三角形与顶点以提高顶点缓存命中率、减少过度绘制，并输出ACMR报告"""
+        from . import mesh_optimizer
+        
+        try:
+            scene = bpy.context.scene
+            if not getattr(scene, "qtquick3d_optimize_meshes", False):
+                return
+            quantize_bits = mesh_optimizer.DEFAULT_QUANTIZATION_BITS if getattr(scene, "qtquick3d_quantize_positions", False) else 0
+        except Exception:
+            return
+        if not mesh_optimizer.NUMPY_AVAILABLE:
+            print("⚠️ numpy不可用，跳过网格优化")
+            return
+        
+        def apply(doc, _target):
+            entries = mesh_optimizer.optimize_document(doc, quantize_bits)
+            return entries, bool(entries)
+        
+        report = [entry for entries in self._run_document_pass(documents, "⚠️ 网格优化失败，保留原始网格", apply)
+                  for entry in entries]
+        if report:
+            triangles = sum(entry['triangles'] for entry in report)
+            before = sum(entry['acmr_before'] * entry['triangles'] for entry in report) / triangles
+            after = sum(entry['acmr_after'] * entry['triangles'] for entry in report) / triangles
+            print(f"✅ 网格优化完成: {len(report)} 个网格, 平均ACMR {before:.3f} → {after:.3f}")
+    
+    def cleanup_gltf(self, documents):
+        """删除退化三角形与未引用的数据、合并相同的图像与缓冲、折叠静态空节点链"""
+        from . import gltf_cleanup
+        
+        try:
+            scene = bpy.context.scene
+            if not getattr(scene, "qtquick3d_cleanup_gltf", False):
+                return
+            flatten = getattr(scene, "qtquick3d_flatten_empties", True)
+        except Exception:
+            return
+        if not gltf_cleanup.NUMPY_AVAILABLE:
+            print("⚠️ numpy不可用，跳过glTF清理")
+            return
+        
+        def apply(doc, target):
+            stats = gltf_cleanup.cleanup_document(doc, flatten)
+            removed = ", ".join(f"{kind} {count}" for kind, count in stats['removed'].items()) or "无"
+            print(f"🧹 glTF清理: {os.path.basename(target['path'])} 退化三角形 {stats['degenerate_triangles']:,} "
+                  f"(图元 {stats['degenerate_primitives']}), 折叠空节点 {stats['flattened_nodes']}, "
+                  f"重复图像/纹理 {stats['duplicate_images']}, 重复缓冲 {stats['duplicate_views']}, 删除未引用: {removed}, "
+                  f"缓冲 {stats['bytes_before'] / 1024:.1f} KB → {stats['bytes_after'] / 1024:.1f} KB")
+            changed = (stats['degenerate_triangles'] or stats['flattened_nodes'] or stats['duplicate_images']
+                       or stats['duplicate_views'] or stats['removed'])
+            return stats, changed
+        
+        self._run_document_pass(documents, "⚠️ glTF清理失败，保留清理前的数据", apply)
+    
+    def prune_attributes(self, documents):
+        """删除材质不需要的顶点属性（切线、多余的UV、颜色与自定义属性），输出每个网格节省的字节数"""
+        from . import attribute_pruning
+        
+        try:
+            if not getattr(bpy.context.scene, "qtquick3d_prune_attributes", False):
+                return
+            usages = attribute_pruning.analyze_materials(bpy.data.materials)
+        except Exception as e:
+            print(f"⚠️ 分析材质属性失败，跳过属性裁剪: {e}")
+            return
+        
+        def apply(doc, _target):
+            entries = attribute_pruning.prune_document(doc, usages)
+            return entries, bool(entries)
+        
+        report = [entry for entries in self._run_document_pass(documents, "⚠️ 属性裁剪失败，保留全部属性", apply)
+                  for entry in entries]
+        for entry in report:
+            print(f"✂️ {entry['mesh']}: 删除 {', '.join(entry['removed'])}, 节省 {entry['bytes'] / 1024:.1f} KB")
+        if report:
+            print(f"✅ 属性裁剪完成: {len(report)} 个网格, 共节省 {sum(entry['bytes'] for entry in report) / 1024:.1f} KB")
+    
+    def dedupe_materials(self, documents):
+        """合并节点树与导出参数都相同的材质，每组只保留一个glTF材质"""
+        from . import material_dedup
+        
+        try:
+            if not getattr(bpy.context.scene, "qtquick3d_dedupe_materials", False):
+                return
+            fingerprints = material_dedup.collect_fingerprints(bpy.data.materials)
+        except Exception as e:
+            print(f"⚠️ 计算材质指纹失败，跳过材质去重: {e}")
+            return
+        
+        def apply(doc, _target):
+            stats = material_dedup.dedupe_document(doc, fingerprints)
+            return stats, stats['materials_after'] < stats['materials_before']
+        
+        before = after = 0
+        for stats in self._run_document_pass(documents, "⚠️ 材质去重失败，保留原始材质", apply):
+            before += stats['materials_before']
+            after += stats['materials_after']
+            for kept, merged in stats['merged'].items():
+                print(f"🎨 {kept}: 合并 {len(merged)} 个相同材质 ({', '.join(merged[:5])}{', ...' if len(merged) > 5 else ''})")
+        if after < before:
+            print(f"✅ 材质去重完成: {before} → {after} 个材质")
+    
+    def reduce_keyframes(self, documents):
+        """按每种通道的误差容差删除冗余关键帧，并输出关键帧数与动画数据大小的变化"""
+        from . import keyframe_reduction
+        
+        try:
+            scene = bpy.context.scene
+            if not getattr(scene, "qtquick3d_keyframe_reduction", False):
+                return
+            tolerance = getattr(scene, "qtquick3d_keyframe_tolerance", keyframe_reduction.DEFAULT_POSITION_TOLERANCE)
+            tolerances = keyframe_reduction.get_tolerances(
+                position=tolerance,
+                angle_degrees=getattr(scene, "qtquick3d_keyframe_angle_tolerance", keyframe_reduction.DEFAULT_ANGLE_TOLERANCE),
+                scale=tolerance,
+                weight=tolerance,
+            )
+        except Exception:
+            return
+        if not keyframe_reduction.NUMPY_AVAILABLE:
+            print("⚠️ numpy不可用，跳过关键帧精简")
+            return
+        
+        def apply(doc, _target):
+            if not doc.gltf.get('animations'):
+                return {}, False
+            stats = keyframe_reduction.reduce_document(doc, tolerances)
+            return stats, bool(stats['reduced_samplers'])
+        
+        totals = {}
+        for stats in self._run_document_pass(documents, "⚠️ 关键帧精简失败，保留原始动画", apply):
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        if totals.get('keyframes_before'):
+            print(f"✅ 关键帧精简完成: {totals['samplers']} 条曲线, 关键帧 {totals['keyframes_before']:,} → "
+                  f"{totals['keyframes_after']:,}, 动画数据 {totals['bytes_before'] / 1024:.1f} KB → "
+                  f"{totals['bytes_after'] / 1024:.1f} KB")
+    
+    def prepare_lods(self, documents):
+        """为高面数网格生成简化层级并并入导出的glTF，保存LOD计划"""
+        from . import gltf_utils
+        from . import lod_generation
+        
+        context = bpy.context
+        scene = context.scene
+        groups = []
+        if getattr(scene, "qtquick3d_lod", False):
+            try:
+                node_names = set()
+                for nodes in self._run_document_pass(
+                    documents, "⚠️ 读取glTF失败，跳过LOD",
+                    lambda doc, _target: ([node.get('name') for node in doc.gltf.get('nodes', [])], False),
+                ):
+                    node_names.update(nodes)
+                candidates = lod_generation.collect_lod_candidates(
+                    context, node_names,
+                    getattr(scene, "qtquick3d_lod_min_triangles", lod_generation.DEFAULT_MIN_TRIANGLES),
+                )
+                lod_path = os.path.join(self.get_workspace_state_dir(), "lod", lod_generation.LOD_MESHES_FILE_NAME)
+                if candidates and lod_generation.export_lod_meshes(
+                    context, candidates, self.get_balsam_export_kwargs(), lod_path
+                ):
+                    lod_doc = gltf_utils.GLTFDocument.load(lod_path)
+                    distance_factor = getattr(scene, "qtquick3d_lod_distance_factor", lod_generation.DEFAULT_DISTANCE_FACTOR)
+                    
+                    def apply(doc, _target):
+                        lod_groups = lod_generation.apply_lods_to_document(
+                            doc, candidates, lod_doc, distance_factor, first_index=len(groups)
+                        )
+                        groups.extend(lod_groups)
+                        return lod_groups, bool(lod_groups)
+                    
+                    self._run_document_pass(documents, "⚠️ LOD生成失败，保留原始网格", apply)
+            except Exception as e:
+                print(f"⚠️ LOD生成失败，保留原始网格: {e}")
+                groups = []
+        camera = scene.camera.name if scene.camera else None
+        self.write_optimization_plan(lod_generation.save_lod_plan, groups, camera)
+    
+    def prepare_textures(self, documents):
+        """按目标平台配置缩放贴图、生成压缩KTX，并保存纹理计划"""
+        from . import texture_pipeline
+        
+        try:
+            profile = getattr(bpy.context.scene, "qtquick3d_target_profile", texture_pipeline.DEFAULT_TEXTURE_PROFILE)
+        except Exception:
+            profile = texture_pipeline.DEFAULT_TEXTURE_PROFILE
+        
+        processor = texture_pipeline.TextureProcessor(profile)
+        compressed = {}
+        if processor.is_enabled():
+            for result in self._run_document_pass(
+                documents, "⚠️ 贴图处理失败，保留原始贴图", lambda doc, _target: processor.process_document(doc)
+            ):
+                compressed.update(result)
+            stats = processor.stats
+            print(f"🖼️ 贴图处理({profile}): {stats['images']} 张, 缩放 {stats['resized']}, "
+                  f"压缩 {stats['compressed']}, 缓存命中 {stats['cached']}")
+        self.write_optimization_plan(texture_pipeline.save_texture_plan, compressed, profile)
+    
+    def prepare_instancing(self, documents):
+        """在导出的glTF中合并共享网格的重复对象，并保存实例化计划
+        
+        Args:
+            documents: optimize_exported_gltf 中的文档列表（含标记前缀）
+        """
+        from . import instancing
+        
+        try:
+            scene = bpy.context.scene
+            mode = getattr(scene, "qtquick3d_instancing", 'OFF')
+            min_count = getattr(scene, "qtquick3d_instancing_min_count", instancing.DEFAULT_MIN_INSTANCES)
+        except Exception:
+            mode, min_count = 'OFF', instancing.DEFAULT_MIN_INSTANCES
+        
+        groups = []
+        if mode != 'OFF':
+            def apply(doc, target):
+                plan = instancing.instance_document(doc, min_count, target['prefix'])
+                return plan, bool(plan)
+            
+            for plan in self._run_document_pass(documents, "⚠️ GPU实例化失败，保留原始节点", apply):
+                groups.extend(plan)
+        self.write_optimization_plan(instancing.save_instancing_plan, groups, mode)
+    
+    def get_gltf_export_kwargs(self):
+        """获取GLTF导出参数（不含filepath），完整导出与增量导出共用；不含属性裁剪，保存源场景时直接使用"""
+        # 默认GLTF导出设置
+        # https://docs.blender.org/api/current/bpy.ops.export_scene.html
+        kwargs = dict(
+            # GLB/GLTF_SEPARATE 避免了GLTF_EMBEDDED的base64编码（体积约+33%，编解码耗时）
+            export_format=self.get_gltf_export_format(),
+            export_copyright='Blender2Quick3DMadeByZhiningJiao',
+            
+            export_texcoords=True,
+            export_normals=True,
+            export_tangents=True,
+            export_materials='EXPORT',
+            # Blender 4.1/4.4: export_colors 和 export_visible_objects_only 参数已移除
+            # export_visible_objects_only=True,  # Blender 4.1 不支持此参数
+            use_visible=True,
+            export_animations=True,
+            export_attributes=True,
+
+            export_skins=True,
+            export_all_influences=False,
+            export_morph=True,
+            export_lights=True,
+            export_cameras=True,
+            export_extras=True,
+            export_yup=True,
+            export_apply=True,
+            export_import_convert_lighting_mode='COMPAT'
+        )
+        return kwargs
+    
+    def get_balsam_export_kwargs(self):
+        """交给balsam转换的GLTF导出参数：在 get_gltf_export_kwargs 基础上应用属性裁剪的导出选项"""
+        kwargs = self.get_gltf_export_kwargs()
+        kwargs.update(self.get_attribute_export_overrides())
+        return kwargs
+    
+    def get_attribute_export_overrides(self):
+        """开启属性裁剪且场景中没有材质需要切线或自定义属性时，直接关闭对应的导出选项"""
+        from . import attribute_pruning
+        
+        try:
+            context = bpy.context
+            if not getattr(context.scene, "qtquick3d_prune_attributes", False):
+                return {}
+            usages = attribute_pruning.analyze_materials(attribute_pruning.scene_materials(context))
+        except Exception:
+            return {}
+        return attribute_pruning.export_overrides(usages)
+    
     def set_custom_gltf_path(self, gltf_path):
         """设置自定义GLTF文件路径"""
         if os.path.exists(gltf_path):
@@ -457,37 +1019,40 @@ class BalsamGLTFToQMLConverter:
     
     def convert_existing_gltf(self, gltf_path, output_dir=None):
         """转换已存在的GLTF文件"""
-        try:
-            print(f"🚀 开始转换已存在的GLTF文件...")
-            
-            # 设置GLTF路径
-            if not self.set_custom_gltf_path(gltf_path):
-                return False
-            
-            # 设置环境（这会设置默认的output_base_dir）
-            self.setup_environment()
-            
-            # 设置输出目录（这会覆盖默认设置或使用默认设置）
-            if output_dir:
-                self.set_custom_output_dir(output_dir)
-            else:
-                # 确保使用默认的output目录
-                self.qml_output_dir = self.output_base_dir
-                print(f"📁 使用默认输出目录: {self.qml_output_dir}")
+        with conversion_trace.traced_run("convert_existing", lambda: self.qml_output_dir):
+            try:
+                print(f"🚀 开始转换已存在的GLTF文件...")
+                
+                # 设置GLTF路径
+                if not self.set_custom_gltf_path(gltf_path):
+                    return False
+                
+                # 设置环境（这会设置默认的output_base_dir）
+                self.setup_environment()
+                
+                # 设置输出目录（这会覆盖默认设置或使用默认设置）
+                if output_dir:
+                    self.set_custom_output_dir(output_dir)
+                else:
+                    # 确保使用默认的output目录
+                    self.qml_output_dir = self.output_base_dir
+                    print(f"📁 使用默认输出目录: {self.qml_output_dir}")
+                
+                # 调用balsam转换器（IBL图像与balsam输出一起写入暂存目录）
+                self.begin_staged_output()
+                self.ibl_copy_result = self.copy_world_images()
+                if not self.call_balsam_converter():
+                    return False
+                
+                print(" Converted Successfully! 转换完成!")
+                return True
             
-            # 调用balsam转换器
-            if not self.call_balsam_converter():
+            except Exception as e:
+                print(f" 转换失败: {e}")
                 return False
-            
-            print(" Converted Successfully! 转换完成!")
-            return True
-            
-        except Exception as e:
-            print(f" 转换失败: {e}")
-            return False
     
-    def call_balsam_converter(self):
-        """调用balsam转换器"""
+    def resolve_balsam_path(self):
+        """确定本次转换使用的balsam路径，并检查输入文件"""
         # 优先使用全局选定的balsam路径
         try:
             selected_path = path_manager.get_selected_balsam_path()
@@ -503,124 +1068,494 @@ class BalsamGLTFToQMLConverter:
             print("❌ 未找到balsam可执行文件")
             return False
             
-        if not os.path.exists(self.gltf_path):
+        if not self.gltf_path or not os.path.exists(self.gltf_path):
             print("❌ GLTF文件不存在")
             return False
+        
+        if path_manager.is_native_converter(self.balsam_path):
+            self._check_native_converter_support()
+        self.balsam_extra_args = self.get_balsam_extra_args()
+        
+        # GLTF_SEPARATE 格式需要 .bin 与贴图和 .gltf 放在一起，Balsam按相对路径读取
+        missing_files = [f for f in gltf_utils.list_companion_files(self.gltf_path) if not os.path.exists(f)]
+        if missing_files:
+            print(f"❌ GLTF引用的外部文件不存在: {missing_files}")
+            return False
+        return True
+    
+    def _check_native_converter_support(self):
+        """内置转换器不支持的内容（蒙皮、变形目标、压缩扩展）交给已安装的balsam"""
+        from . import native_mesh_converter
+        
+        try:
+            unsupported = native_mesh_converter.check_gltf_file(self.gltf_path)
+        except Exception as e:
+            print(f"⚠️ 检查GLTF内容失败: {e}")
+            return
+        if not unsupported:
+            return
+        fallback = path_manager.find_balsam_executable()
+        if fallback:
+            print(f"ℹ️ 内置转换器不支持 {', '.join(unsupported)}，改用balsam: {fallback}")
+            self.balsam_path = fallback
+        else:
+            print(f"⚠️ 内置转换器不支持 {', '.join(unsupported)}，且未找到balsam，这些内容不会被转换")
+    
+    def get_balsam_extra_args(self):
+        """按场景设置确定附加的balsam选项（访问bpy，必须在主线程调用）"""
+        from . import keyframe_reduction
+        
+        try:
+            binary_keyframes = getattr(bpy.context.scene, "qtquick3d_binary_keyframes", False)
+        except Exception:
+            return []
+        if not binary_keyframes:
+            return []
+        option = keyframe_reduction.BINARY_KEYFRAMES_OPTION
+        if path_manager.balsam_supports_option(self.balsam_path, option):
+            return [option]
+        print(f"⚠️ 当前balsam不支持 {option}，关键帧仍以QML内联输出")
+        return []
+    
+    def get_balsam_environment(self):
+        """获取运行balsam的环境变量（不修改系统环境）"""
+        # 使用系统环境变量（不再使用lib目录）
+        env = path_manager.get_qt_environment_for_path(self.balsam_path)
+        
+        print(f"🔧 环境变量设置:")
+        if 'PYTHONPATH' in env:
+            print(f"  PYTHONPATH: {env['PYTHONPATH']}")
+        else:
+            print(f"  PYTHONPATH: (未设置)")
+        print(f"  PATH: {env['PATH'][:200]}...")
+        if 'QT_DIR' in env:
+            print(f"  QT_DIR: {env['QT_DIR']}")
+        if 'QT_PLUGIN_PATH' in env:
+            print(f"  QT_PLUGIN_PATH: {env['QT_PLUGIN_PATH']}")
+        return env
+    
+    def build_balsam_attempts(self, extra_args=None):
+        """构建balsam命令列表，按顺序尝试直到成功
+        
+        已探测到balsam命令行能力时只返回一条正确的命令；
+        探测失败时回退到依次尝试三种参数格式。
+        
+        Args:
+            extra_args: 附加的balsam选项（放在输入文件之前）
+        
+        Returns:
+            list: 每项为 {'label', 'cmd', 'cwd', 'timeout'}
+        """
+        extra_args = list(self.balsam_extra_args) + list(extra_args or [])
+        output_dir = self.get_balsam_output_dir()
+        command = path_manager.get_converter_command(self.balsam_path)
+        capabilities = path_manager.probe_balsam_capabilities(self.balsam_path)
+        if capabilities:
+            output_flag = capabilities.get('output_flag')
+            if output_flag:
+                cmd = command + [output_flag, output_dir] + extra_args + [self.gltf_path]
+                cwd = self.output_base_dir
+            else:
+                cmd = command + extra_args + [self.gltf_path]
+                cwd = output_dir
+            return [{
+                'label': f"balsam {output_flag or '(cwd)'}",
+                'cmd': cmd,
+                'cwd': cwd,
+                'timeout': None,  # 单次调用，不再因为超时切换格式
+            }]
+        
+        print("⚠️ 未能探测balsam命令行能力，回退到依次尝试多种参数格式")
+        return [
+            # 格式1：标准格式 --outputPath
+            {
+                'label': "格式1",
+                'cmd': command + ["--outputPath", output_dir] + extra_args + [self.gltf_path],
+                'cwd': self.output_base_dir,
+                'timeout': 120,  # 2分钟超时
+            },
+            # 格式2：简化参数，可能不需要--outputPath（直接在工作目录执行）
+            {
+                'label': "格式2",
+                'cmd': command + extra_args + [self.gltf_path],
+                'cwd': output_dir,
+                'timeout': 60,
+            },
+            # 格式3：使用-o参数
+            {
+                'label': "格式3",
+                'cmd': command + ["-o", output_dir] + extra_args + [self.gltf_path],
+                'cwd': self.output_base_dir,
+                'timeout': 60,
+            },
+        ]
+    
+    def on_balsam_success(self):
+        """balsam成功后的收尾工作（同步与后台转换共用）"""
+        print("🎉 Balsam转换成功！")
+        print(f"✅ 使用的balsam版本: {os.path.basename(self.balsam_path)}")
+        print(f"✅ 完整路径: {self.balsam_path}")
+        output_dir = self.get_balsam_output_dir()
+        
+        # balsam输出的后处理：实例表、LOD切换、压缩纹理
+        with conversion_trace.span("post_process", stage=True):
+            # 为实例化原型挂上实例表
+            from . import instancing
+            try:
+                if instancing.apply_instancing_to_output(output_dir, self.get_workspace_state_dir()):
+                    print("✅ GPU实例化已写入QML")
+            except Exception as e:
+                print(f"⚠️ 写入GPU实例化失败: {e}")
+            
+            # 为LOD组添加按相机距离切换的绑定
+            from . import lod_generation
+            try:
+                lod_generation.apply_lod_to_output(output_dir, self.get_workspace_state_dir())
+            except Exception as e:
+                print(f"⚠️ 写入LOD切换失败: {e}")
+            
+            # 用预生成mip的压缩KTX替换balsam输出的贴图
+            from . import texture_pipeline
+            try:
+                replaced = texture_pipeline.apply_compressed_textures(output_dir, self.get_workspace_state_dir())
+                if replaced:
+                    print(f"✅ 已替换 {replaced} 张压缩纹理(KTX)")
+            except Exception as e:
+                print(f"⚠️ 替换压缩纹理失败: {e}")
+            
+            # 在主场景QML中实例化已单独转换的组件
+            if not self.component_plan:
+                from . import component_conversion
+                try:
+                    component_conversion.apply_components_to_output(output_dir, self.qml_output_dir, self.get_main_qml_name())
+                except Exception as e:
+                    print(f"⚠️ 实例化组件失败: {e}")
+            
+            # 统计输出中的关键帧（内联QML与二进制关键帧文件）
+            from . import keyframe_reduction
+            try:
+                summary = keyframe_reduction.summarize_keyframe_output(output_dir)
+                if summary['inline_keyframes'] or summary['binary_files']:
+                    print(f"🎞️ 关键帧输出: QML {summary['qml_bytes'] / 1024:.1f} KB, 内联Keyframe {summary['inline_keyframes']:,} 个, "
+                          f"二进制关键帧 {summary['binary_files']} 个文件 {summary['binary_bytes'] / 1024:.1f} KB")
+            except Exception as e:
+                print(f"⚠️ 统计关键帧输出失败: {e}")
+        
+        # 选择性转换：只提交组件自己的文件，主场景与其他组件保持不变
+        if self.component_plan:
+            with conversion_trace.span("commit_output", stage=True):
+                self.commit_component_output()
+            return
+        
+        # 如果设置了 qmlproject，生成 qmldir 文件
+        with conversion_trace.span("qmldir", stage=True):
+            self._generate_qmldir_if_needed(output_dir)
+        
+        # 只把内容变化的文件提交到工作空间
+        with conversion_trace.span("commit_output", stage=True):
+            self.commit_staged_output()
+        
+        # 记录本次转换的指纹，下次只有环境变化时可以跳过导出与balsam
+        if self.pending_fingerprint:
+            from . import conversion_fingerprint
+            conversion_fingerprint.save_fingerprint(self.qml_output_dir, self.pending_fingerprint)
+            self.pending_fingerprint = None
+    
+    def begin_staged_output(self):
+        """创建全新的暂存目录，本次转换的所有输出先写入这里"""
+        from . import staged_output
+        
+        try:
+            self.staging_dir = staged_output.begin_staging(self.qml_output_dir)
+        except Exception as e:
+            print(f"⚠️ 创建暂存目录失败，直接输出到工作空间: {e}")
+            self.staging_dir = None
+        return self.staging_dir
+    
+    def get_balsam_output_dir(self):
+        """balsam与后处理的输出目录（暂存目录，未启用时为工作空间）"""
+        return self.staging_dir or self.qml_output_dir
+    
+    def commit_staged_output(self):
+        """把暂存目录中变化的文件原子替换到工作空间"""
+        from . import staged_output
+        
+        if not self.staging_dir:
+            return
+        try:
+            stats = staged_output.commit_staged_output(self.staging_dir, self.qml_output_dir)
+            print(f"📦 输出已提交到工作空间: {stats['changed']} 个文件更新, "
+                  f"{stats['unchanged']} 个未变化, {stats['removed']} 个旧文件删除")
+        except Exception as e:
+            print(f"❌ 提交暂存输出失败: {e}")
+        finally:
+            self.staging_dir = None
+    
+    def discard_staged_output(self):
+        """转换失败时丢弃暂存目录，工作空间保持上一次的结果"""
+        from . import staged_output
+        
+        if self.staging_dir:
+            staged_output.discard_staging(self.staging_dir)
+            self.staging_dir = None
+    
+    def copy_world_images(self):
+        """把World的IBL图像复制到暂存输出的 maps/ 目录"""
+        from . import ibl_mappling
+        
+        maps_dir = os.path.join(self.get_balsam_output_dir(), "maps")
+        return ibl_mappling.copy_all_world_images_to_balsam_output(maps_dir)
+    
+    def get_balsam_cache(self):
+        """获取balsam输出缓存（未启用时返回None）"""
+        try:
+            scene = bpy.context.scene
+            if not getattr(scene, "qtquick3d_use_balsam_cache", True):
+                return None
+            max_mb = getattr(scene, "qtquick3d_balsam_cache_size_mb", 2048)
+        except Exception:
+            max_mb = 2048
+        from . import balsam_cache
+        return balsam_cache.BalsamOutputCache(max_bytes=max_mb * 1024 * 1024)
+    
+    def try_restore_balsam_cache(self, cache):
+        """计算缓存键并尝试从缓存恢复输出（不访问bpy，可在后台线程调用）
+        
+        Returns:
+            bool: 命中缓存并恢复成功
+        """
+        from . import balsam_cache
+        
+        self._balsam_cache_key = None
+        self._balsam_cache_before = None
+        if cache is None:
+            return False
+        try:
+            output_dir = self.get_balsam_output_dir()
+            args = [arg for attempt in self.build_balsam_attempts() for arg in attempt['cmd']]
+            self._balsam_cache_key = cache.compute_key(self.gltf_path, self.balsam_path, args, output_dir)
+            if cache.restore(self._balsam_cache_key, output_dir):
+                return True
+            self._balsam_cache_before = balsam_cache.snapshot_outputs(output_dir)
+        except Exception as e:
+            print(f"⚠️ balsam缓存查询失败: {e}")
+        return False
+    
+    def store_balsam_cache(self, cache, success):
+        """balsam成功后把输出写入缓存（不访问bpy，可在后台线程调用）"""
+        if cache is None or not success or not getattr(self, '_balsam_cache_key', None):
+            return
+        if self._balsam_cache_before is None:
+            return
+        try:
+            cache.store(self._balsam_cache_key, self.get_balsam_output_dir(), self._balsam_cache_before)
+        except Exception as e:
+            print(f"⚠️ 写入balsam缓存失败: {e}")
+    
+    def call_balsam_converter(self):
+        """调用balsam转换器（阻塞执行，供批处理与已有GLTF转换使用）"""
+        if not self.resolve_balsam_path():
+            self.discard_staged_output()
+            return False
+        
+        # 内容寻址缓存：glTF、balsam版本和参数都未变化时直接恢复上次的输出
+        cache = self.get_balsam_cache()
+        with conversion_trace.span("balsam", stage=True, step="cache_lookup"):
+            restored = self.try_restore_balsam_cache(cache)
+        if restored:
+            self.on_balsam_success()
+            return True
             
         try:
             print(f"🔧 调用balsam转换器: {self.balsam_path}")
             print(f"🎯 最终执行的balsam版本: {os.path.basename(self.balsam_path)}")
             print(f"🎯 完整路径: {self.balsam_path}")
             
-            # 使用系统环境变量（不再使用lib目录）
-            env = path_manager.get_qt_environment_for_path(self.balsam_path)
+            env = self.get_balsam_environment()
             
-            print(f"🔧 环境变量设置:")
-            if 'PYTHONPATH' in env:
-                print(f"  PYTHONPATH: {env['PYTHONPATH']}")
-            else:
-                print(f"  PYTHONPATH: (未设置)")
-            print(f"  PATH: {env['PATH'][:200]}...")
-            if 'QT_DIR' in env:
-                print(f"  QT_DIR: {env['QT_DIR']}")
-            if 'QT_PLUGIN_PATH' in env:
-                print(f"  QT_PLUGIN_PATH: {env['QT_PLUGIN_PATH']}")
-            
-            # 调用balsam转换器 - 使用成功的逻辑
+            # 调用balsam转换器 - 尝试多种参数格式，直到成功
             print(f"开始调用balsam转换器...")
+            for attempt in self.build_balsam_attempts():
+                print(f"尝试{attempt['label']}: {' '.join(attempt['cmd'])}")
+                try:
+                    with conversion_trace.span("balsam", stage=True, attempt=attempt['label']):
+                        result = subprocess.run(
+                            attempt['cmd'],
+                            env=env,
+                            cwd=attempt['cwd'],
+                            capture_output=True,
+                            text=True,
+                            timeout=attempt['timeout']
+                        )
+                except subprocess.TimeoutExpired:
+                    print(f"❌ {attempt['label']} Balsam转换超时")
+                    continue
+                
+                if result.returncode == 0:
+                    print(f"✅ {attempt['label']}转换成功！")
+                    print(f"📋 输出: {result.stdout}")
+                    with conversion_trace.span("balsam", stage=True, step="cache_store"):
+                        self.store_balsam_cache(cache, True)
+                    self.on_balsam_success()
+                    return True
+                
+                print(f"{attempt['label']}失败，返回码: {result.returncode}")
+                if result.stderr:
+                    print(f"错误: {result.stderr}")
             
-            # 尝试多种参数格式，直到成功
-            success = False
-            
-            # 格式1：标准格式 --outputPath
-            cmd1 = [
-                self.balsam_path,
-                "--outputPath", self.qml_output_dir,
-                self.gltf_path
-            ]
-            
-            print(f"尝试格式1: {' '.join(cmd1)}")
-            result1 = subprocess.run(
-                cmd1,
-                env=env,
-                cwd=self.output_base_dir,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2分钟超时
+            print("❌ 所有参数格式都失败了")
+            self.discard_staged_output()
+            return False
+                
+        except Exception as e:
+            print(f"❌ 调用balsam失败: {e}")
+            self.discard_staged_output()
+            return False
+    
+    def prepare_conversion(self):
+        """转换前的准备：设置环境、复制IBL图像并导出GLTF（必须在主线程执行）"""
+        from . import component_conversion
+        
+        with conversion_trace.span("setup", stage=True):
+            self.setup_environment()
+            self.shard_plan = None
+            self.component_plan = None
+            self.pending_fingerprint = None
+            self.begin_staged_output()
+        # 选择性转换只输出组件自己的文件，IBL图像属于主场景
+        selection = component_conversion.collect_selection(bpy.context)
+        if selection is not None:
+            return self.export_component(selection)
+        with conversion_trace.span("ibl_copy", stage=True):
+            self.ibl_copy_result = self.copy_world_images()
+        if self.is_sharded_conversion_enabled():
+            exported = self.export_shards()
+        else:
+            exported = self.export_scene_to_gltf()
+        if exported:
+            with conversion_trace.span("fingerprint"):
+                self.pending_fingerprint = self.compute_conversion_fingerprint()
+        return exported
+    
+    def compute_conversion_fingerprint(self):
+        """当前场景的转换指纹（访问bpy，必须在主线程调用），失败时返回None"""
+        from . import conversion_fingerprint
+        
+        try:
+            balsam_args = [self.balsam_path] + self.get_balsam_extra_args()
+            return conversion_fingerprint.compute_fingerprint(
+                bpy.context, self.qml_output_dir, self.get_balsam_export_kwargs(), balsam_args
             )
-            
-            if result1.returncode == 0:
-                print("✅ 格式1转换成功！")
-                print(f"📋 输出: {result1.stdout}")
-                success = True
+        except Exception as e:
+            print(f"⚠️ 计算转换指纹失败: {e}")
+            return None
+    
+    def try_environment_only_update(self):
+        """自上次转换以来只有SceneEnvironment/WasdController设置变化时，跳过glTF导出与balsam，
+        复制IBL图像并用QMLHandler重新组装QML（必须在主线程执行）
+        
+        Returns:
+            str: 重新组装的QML内容；场景内容有变化（需要完整转换）时返回None
+        """
+        from . import conversion_fingerprint
+        from . import qml_handler
+        
+        with conversion_trace.traced_run("environment_update", lambda: self.qml_output_dir):
+            with conversion_trace.span("setup", stage=True):
+                self.setup_environment()
+            with conversion_trace.span("classify", stage=True):
+                fingerprint = self.compute_conversion_fingerprint()
+                if fingerprint is None:
+                    return None
+                change = conversion_fingerprint.classify_changes(self.qml_output_dir, fingerprint)
+            if change == conversion_fingerprint.CHANGE_CONTENT:
+                print("ℹ️ 场景内容自上次转换以来有变化，执行完整转换")
+                return None
+            if change == conversion_fingerprint.CHANGE_ENVIRONMENT:
+                print("⚡ 只有环境/控制器设置变化，跳过glTF导出与balsam")
             else:
-                print(f"格式1失败，返回码: {result1.returncode}")
-                if result1.stderr:
-                    print(f"错误: {result1.stderr}")
-                
-                # 格式2：简化参数，可能不需要--outputPath
-                cmd2 = [self.balsam_path, self.gltf_path]
-                print(f"尝试格式2: {' '.join(cmd2)}")
+                print("⚡ 自上次转换以来没有变化，跳过glTF导出与balsam")
+            
+            with conversion_trace.span("ibl_copy", stage=True):
+                self.ibl_copy_result = self.copy_world_images()
+            qml_content = qml_handler.get_qml_content_for_integration()
+            if not qml_content:
+                return None
+            conversion_fingerprint.save_fingerprint(self.qml_output_dir, fingerprint)
+            return qml_content
+    
+    def export_preview_gltf(self):
+        """快速预览：只导出glTF供 RuntimeLoader 直接加载，不运行balsam（必须在主线程执行）
+        
+        glTF与IBL图像写入工作空间状态目录下的 preview/，不影响上一次balsam转换的输出；
+        跳过导出后的优化步骤（它们只为balsam输出服务）。
+        
+        Returns:
+            str: 导出的glTF路径，失败时返回None
+        """
+        with conversion_trace.traced_run("quick_preview", lambda: self.qml_output_dir):
+            try:
+                with conversion_trace.span("setup", stage=True):
+                    self.setup_environment()
+                    preview_dir = os.path.join(self.get_workspace_state_dir(), PREVIEW_STATE_SUB_DIR)
+                    os.makedirs(preview_dir, exist_ok=True)
                 
-                result2 = subprocess.run(
-                    cmd2,
-                    env=env,
-                    cwd=self.qml_output_dir,  # 直接在工作目录执行
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
+                export_kwargs = self.get_balsam_export_kwargs()
+                export_format = export_kwargs['export_format']
+                gltf_filename = os.path.splitext(self.get_gltf_filename())[0] + gltf_utils.get_gltf_extension(export_format)
+                preview_path = os.path.join(preview_dir, gltf_filename)
+                self._remove_previous_exports(preview_path)
                 
-                if result2.returncode == 0:
-                    print("✅ 格式2转换成功！")
-                    print(f"📋 输出: {result2.stdout}")
-                    success = True
-                else:
-                    print(f"格式2失败，返回码: {result2.returncode}")
-                    if result2.stderr:
-                        print(f"错误: {result2.stderr}")
-                    
-                    # 格式3：使用-o参数
-                    cmd3 = [self.balsam_path, "-o", self.qml_output_dir, self.gltf_path]
-                    print(f"尝试格式3: {' '.join(cmd3)}")
-                    
-                    result3 = subprocess.run(
-                        cmd3,
-                        env=env,
-                        cwd=self.output_base_dir,
-                        capture_output=True,
-                        text=True,
-                        timeout=60
-                    )
-                    
-                    if result3.returncode == 0:
-                        print("✅ 格式3转换成功！")
-                        print(f"📋 输出: {result3.stdout}")
-                        success = True
-                    else:
-                        print(f"格式3失败，返回码: {result3.returncode}")
-                        if result3.stderr:
-                            print(f"错误: {result3.stderr}")
-            
-            if success:
-                print("🎉 Balsam转换成功！")
-                print(f"✅ 使用的balsam版本: {os.path.basename(self.balsam_path)}")
-                print(f"✅ 完整路径: {self.balsam_path}")
+                with conversion_trace.span("ibl_copy", stage=True):
+                    from . import ibl_mappling
+                    ibl_mappling.copy_all_world_images_to_balsam_output(os.path.join(preview_dir, "maps"))
                 
-                # 如果设置了 qmlproject，生成 qmldir 文件
-                self._generate_qmldir_if_needed()
+                scene = bpy.context.scene
+                with conversion_trace.span("gltf_export", stage=True, format=export_format, preview=True):
+                    written_path = None
+                    if getattr(scene, "qtquick3d_incremental_export", False):
+                        from . import incremental_export
+                        written_path = incremental_export.export_incremental(preview_path, export_kwargs, export_format)
+                    elif getattr(scene, "qtquick3d_fast_export", False):
+                        from . import fast_gltf_export
+                        written_path = fast_gltf_export.export_scene(bpy.context, preview_path, export_kwargs)
+                    if not written_path:
+                        bpy.ops.export_scene.gltf(filepath=preview_path, **export_kwargs)
+                        written_path = preview_path
                 
-                return True
-            else:
-                print("❌ 所有参数格式都失败了")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            print("❌ Balsam转换超时")
-            return False
-        except Exception as e:
-            print(f"❌ 调用balsam失败: {e}")
-            return False
+                print(f"✅ 快速预览导出成功（未运行balsam）: {written_path}")
+                return written_path
+            
+            except Exception as e:
+                print(f"❌ 快速预览导出失败: {e}")
+                return None
+    
+    def create_background_job(self):
+        """创建后台balsam任务（导出完成后调用）
+        
+        Returns:
+            conversion_jobs.BalsamJob 或 None
+        """
+        from . import conversion_jobs
+        
+        if self.component_plan:
+            return self.create_component_job_group()
+        if self.shard_plan:
+            return self.create_shard_job_group()
+        if not self.resolve_balsam_path():
+            return None
+        env = self.get_balsam_environment()
+        input_size = os.path.getsize(self.gltf_path) + sum(
+            os.path.getsize(f) for f in gltf_utils.list_companion_files(self.gltf_path) if os.path.exists(f)
+        )
+        cache = self.get_balsam_cache()
+        return conversion_jobs.BalsamJob(
+            self.build_balsam_attempts(),
+            env=env,
+            input_size=input_size,
+            pre_run=lambda: self.try_restore_balsam_cache(cache),
+            post_run=lambda success: self.store_balsam_cache(cache, success),
+        )
     
     def copy_to_documents(self):
         """复制结果到文档目录（可选）"""
@@ -651,64 +1586,74 @@ class BalsamGLTFToQMLConverter:
             print(f"❌ 复制到文档目录失败: {e}")
             return False
     
+    def get_exported_gltf_files(self):
+        """获取导出的GLTF文件及其外部依赖文件列表"""
+        if self.gltf_path:
+            candidates = [self.gltf_path]
+        else:
+            candidates = [os.path.join(self.output_base_dir, "scene" + ext) for ext in ('.gltf', '.glb')]
+        files = []
+        for gltf_file in candidates:
+            if os.path.exists(gltf_file):
+                files.extend(gltf_utils.list_companion_files(gltf_file))
+                files.append(gltf_file)
+        return files
+    
     def cleanup(self):
         """清理输出目录中的旧文件（可选）"""
         try:
             if self.output_base_dir and os.path.exists(self.output_base_dir):
-                # 只清理GLTF文件，保留QML输出
-                gltf_file = os.path.join(self.output_base_dir, "scene.gltf")
-                if os.path.exists(gltf_file):
-                    os.remove(gltf_file)
-                    print(f"🧹 清理GLTF文件: {gltf_file}")
+                # 清理导出的GLTF/GLB文件及其外部 .bin/贴图
+                for gltf_file in self.get_exported_gltf_files():
+                    if os.path.exists(gltf_file):
+                        os.remove(gltf_file)
+                        print(f"🧹 清理GLTF文件: {gltf_file}")
                 
-                # 清理QML输出目录中的旧文件
-                if os.path.exists(self.qml_output_dir):
-                    for item in os.listdir(self.qml_output_dir):
-                        item_path = os.path.join(self.qml_output_dir, item)
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                            print(f"🧹 清理QML文件: {item}")
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path)
-                            print(f"🧹 清理QML目录: {item}")
+                # 只清理输出清单中记录的转换结果，工作空间中的其他文件不受影响
+                if self.qml_output_dir and os.path.exists(self.qml_output_dir):
+                    from . import staged_output
+                    self.discard_staged_output()
+                    removed = staged_output.remove_committed_outputs(self.qml_output_dir)
+                    print(f"🧹 清理QML输出文件: {removed} 个")
                 
                 print(f"🧹 清理完成: {self.output_base_dir}")
         except Exception as e:
             print(f"⚠️ 清理文件失败: {e}")
     
     def convert(self, keep_files=True, copy_to_docs=False):
-        """执行完整的转换流程"""
-        try:
-            print("🚀 开始Balsam GLTF到QML转换...")
-            
-            # 1. 设置环境
-            self.setup_environment()
-            
-            # 2. 导出GLTF
-            if not self.export_scene_to_gltf():
-                return False
+        """执行完整的转换流程（各阶段耗时写入工作空间的 .blender2quick3d/trace.json）"""
+        with conversion_trace.traced_run("convert", lambda: self.qml_output_dir):
+            try:
+                print("🚀 开始Balsam GLTF到QML转换...")
+                
+                # 1. 设置环境并导出GLTF（分片模式下按集合导出多个GLB）
+                if not self.prepare_conversion():
+                    return False
+                
+                # 2. 调用balsam转换器
+                if self.shard_plan or self.component_plan:
+                    if not self.call_sharded_balsam_converter():
+                        return False
+                elif not self.call_balsam_converter():
+                    return False
+                
+                # 3. 可选：复制到文档目录
+                if copy_to_docs:
+                    self.copy_to_documents()
+                
+                print("🎉 转换完成！")
+                print(f"📁 GLTF文件: {self.gltf_path}")
+                print(f"📁 QML输出: {self.qml_output_dir}")
+                
+                # 4. 可选：清理文件
+                if not keep_files:
+                    self.cleanup()
+                
+                return True
             
-            # 3. 调用balsam转换器
-            if not self.call_balsam_converter():
+            except Exception as e:
+                print(f"❌ 转换失败: {e}")
                 return False
-            
-            # 4. 可选：复制到文档目录
-            if copy_to_docs:
-                self.copy_to_documents()
-            
-            print("🎉 转换完成！")
-            print(f"📁 GLTF文件: {self.gltf_path}")
-            print(f"📁 QML输出: {self.qml_output_dir}")
-            
-            # 5. 可选：清理文件
-            if not keep_files:
-                self.cleanup()
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ 转换失败: {e}")
-            return False
 
 def get_current_output_status():
     """获取当前输出路径状态"""
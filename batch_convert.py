@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+无界面批量转换：把一个或多个 .blend 文件中的所有场景转换为QML（用于构建服务器）
+
+Blender内运行（转换当前文件的场景）：
+    blender -b file.blend -P batch_convert.py -- --output-dir out --summary summary.json
+
+独立运行（为每个 .blend 启动一个Blender工作进程）：
+    python batch_convert.py --blender /path/to/blender --workers 4 --output-dir out a.blend b.blend
+    python batch_convert.py --blender /path/to/blender --file-list files.txt --summary summary.json
+
+每个场景依次执行：复制World的IBL贴图 -> BalsamGLTFToQMLConverter.convert -> QML组装，
+输出到 <output-dir>/<blend文件名>/<场景名>/，并把耗时与输出大小写入JSON汇总。
+
+可选参数：
+    --scenes NAME ...   只转换指定场景（默认 bpy.data.scenes 中的全部场景）
+    --balsam PATH       指定balsam可执行文件（默认使用插件中选择的版本，native 表示内置转换器）
+    --workers N         并行的Blender进程数（独立运行时有效）
+    --timeout SEC       单个 .blend 的超时时间（独立运行时有效）
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import bpy
+    BLENDER_AVAILABLE = True
+except ImportError:
+    BLENDER_AVAILABLE = False
+
+SUMMARY_VERSION = 1
+
+
+def _parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Batch convert Blender scenes to Qt Quick3D QML")
+    parser.add_argument("files", nargs="*", help=".blend files (standalone mode)")
+    parser.add_argument("--file-list", default=None, help="text file with one .blend path per line")
+    parser.add_argument("--blender", default=None, help="Blender executable (standalone mode)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--summary", default=None)
+    parser.add_argument("--scenes", nargs="*", default=None)
+    parser.add_argument("--balsam", default=None)
+    return parser.parse_args(argv)
+
+
+def _safe_name(name):
+    safe = re.sub(r'[^\w\-]', '_', name, flags=re.ASCII).strip('_')
+    return safe or "scene"
+
+
+def _directory_size(path):
+    """输出目录的大小与文件数（不含插件内部状态目录）"""
+    total = 0
+    count = 0
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d != ".blender2quick3d"]
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+            count += 1
+    return total, count
+
+
+def _write_summary(summary, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+
+# ----------------------------------------------------------------------
+# Blender工作进程：转换当前 .blend 中的场景
+# ----------------------------------------------------------------------
+def _import_addon():
+    """以包的形式导入插件（-P 运行脚本时没有包上下文），未启用时手动注册"""
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(addon_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    addon = importlib.import_module(os.path.basename(addon_dir))
+    if not hasattr(bpy.types.Scene, "work_space_path"):
+        addon.register()
+    return addon
+
+
+def convert_scene(addon, scene, output_dir):
+    """转换单个场景：IBL复制、balsam转换、QML组装"""
+    path_manager = importlib.import_module(addon.__name__ + ".path_manager")
+    converter_module = importlib.import_module(addon.__name__ + ".balsam_gltf_converter")
+    qml_handler = importlib.import_module(addon.__name__ + ".qml_handler")
+
+    result = {'scene': scene.name, 'output_dir': output_dir, 'success': False, 'timings': {}}
+    scene_start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 转换流程从 path_manager 与场景属性中读取工作空间
+    path_manager.get_path_manager().set_work_space(output_dir)
+    scene.work_space_path = output_dir
+
+    view_layer = scene.view_layers[0]
+    with bpy.context.temp_override(scene=scene, view_layer=view_layer):
+        start = time.perf_counter()
+        converter = converter_module.BalsamGLTFToQMLConverter()
+        converter.set_custom_output_dir(output_dir)
+        converted = converter.convert(keep_files=True, copy_to_docs=False)
+        result['timings']['convert'] = time.perf_counter() - start
+        copy_result = converter.ibl_copy_result or {}
+        result['ibl_copied'] = bool(copy_result.get('surface_copied') or copy_result.get('environment_copied'))
+        if not converted:
+            result['error'] = "Balsam conversion failed"
+            result['timings']['total'] = time.perf_counter() - scene_start
+            return result
+
+        start = time.perf_counter()
+        handler = qml_handler.QMLHandler()
+        assembled_path = None
+        if handler.process_qml_file(scene_name=scene.name):
+            assembled_path = os.path.join(output_dir, _safe_name(scene.name) + qml_handler.ASSEMBLED_QML_EXTENSION)
+            if not handler.save_assembled_qml(assembled_path):
+                assembled_path = None
+        result['timings']['assemble'] = time.perf_counter() - start
+        if not assembled_path:
+            result['error'] = "QML assembly failed"
+            result['timings']['total'] = time.perf_counter() - scene_start
+            return result
+
+    result['success'] = True
+    result['gltf_file'] = converter.gltf_path
+    result['assembled_qml'] = assembled_path
+    result['output_size'], result['file_count'] = _directory_size(output_dir)
+    result['timings']['total'] = time.perf_counter() - scene_start
+    return result
+
+
+def run_in_blender(args):
+    """Blender工作进程入口"""
+    addon = _import_addon()
+    if args.balsam:
+        path_manager = importlib.import_module(addon.__name__ + ".path_manager")
+        if args.balsam == "native":
+            path_manager.set_selected_balsam_path(path_manager.NATIVE_CONVERTER_FILE)
+        else:
+            path_manager.set_selected_balsam_path(args.balsam)
+
+    blend_file = bpy.data.filepath
+    blend_stem = os.path.splitext(os.path.basename(blend_file))[0] if blend_file else "untitled"
+    output_root = args.output_dir or os.path.join(os.path.dirname(blend_file) or os.getcwd(), "quick3d_batch")
+    output_root = os.path.join(os.path.abspath(output_root), _safe_name(blend_stem))
+
+    scenes = [scene for scene in bpy.data.scenes if not args.scenes or scene.name in args.scenes]
+    if not scenes:
+        print(f"⚠️ 没有需要转换的场景: {blend_file}")
+
+    start = time.perf_counter()
+    results = []
+    used_names = set()
+    for scene in scenes:
+        name = _safe_name(scene.name)
+        while name in used_names:
+            name += "_"
+        used_names.add(name)
+        print(f"🚀 转换场景: {scene.name}")
+        try:
+            results.append(convert_scene(addon, scene, os.path.join(output_root, name)))
+        except Exception as e:
+            print(f"❌ 场景转换失败 {scene.name}: {e}")
+            import traceback
+            traceback.print_exc()
+            results.append({'scene': scene.name, 'success': False, 'error': str(e)})
+
+    summary = {
+        'version': SUMMARY_VERSION,
+        'blend_file': blend_file,
+        'blender_version': bpy.app.version_string,
+        'time': time.perf_counter() - start,
+        'scenes': results,
+    }
+    summary_path = args.summary or os.path.join(output_root, "batch_summary.json")
+    _write_summary(summary, summary_path)
+    print(f"✅ 汇总已写入: {summary_path}")
+    return all(r['success'] for r in results)
+
+
+# ----------------------------------------------------------------------
+# 独立运行：为每个 .blend 启动一个Blender工作进程
+# ----------------------------------------------------------------------
+def _collect_files(args):
+    files = list(args.files)
+    if args.file_list:
+        with open(args.file_list, 'r', encoding='utf-8') as f:
+            files.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    return [os.path.abspath(f) for f in files]
+
+
+def _run_worker(args, index, blend_file, output_root, log_dir, result_dir):
+    stem = _safe_name(os.path.splitext(os.path.basename(blend_file))[0])
+    result_path = os.path.join(result_dir, f"{index:04d}_{stem}.json")
+    log_path = os.path.join(log_dir, f"{index:04d}_{stem}.log")
+    cmd = [args.blender, "-b", blend_file, "--python", os.path.abspath(__file__), "--",
+           "--output-dir", output_root, "--summary", result_path]
+    if args.scenes:
+        cmd += ["--scenes"] + args.scenes
+    if args.balsam:
+        cmd += ["--balsam", args.balsam]
+
+    entry = {'blend_file': blend_file, 'log': log_path, 'returncode': None, 'scenes': []}
+    start = time.perf_counter()
+    try:
+        with open(log_path, 'w', encoding='utf-8', errors='replace') as log:
+            completed = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, timeout=args.timeout)
+        entry['returncode'] = completed.returncode
+    except subprocess.TimeoutExpired:
+        entry['error'] = f"timeout after {args.timeout}s"
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['time'] = time.perf_counter() - start
+
+    if os.path.exists(result_path):
+        with open(result_path, 'r', encoding='utf-8') as f:
+            worker_summary = json.load(f)
+        entry['scenes'] = worker_summary.get('scenes', [])
+        entry['blender_version'] = worker_summary.get('blender_version')
+    elif 'error' not in entry:
+        entry['error'] = "worker did not write a summary"
+
+    entry['success'] = (entry['returncode'] == 0 and 'error' not in entry
+                        and all(scene.get('success') for scene in entry['scenes']))
+    status = "✅" if entry['success'] else "❌"
+    print(f"{status} {os.path.basename(blend_file)}: {len(entry['scenes'])} 个场景, {entry['time']:.1f}s")
+    return entry
+
+
+def run_standalone(args):
+    """独立运行入口"""
+    if not args.blender:
+        print("❌ 独立运行时需要通过 --blender 指定Blender可执行文件")
+        return False
+    files = _collect_files(args)
+    if not files:
+        print("❌ 没有需要转换的 .blend 文件")
+        return False
+    missing = [f for f in files if not os.path.exists(f)]
+    if missing:
+        print(f"❌ 文件不存在: {missing}")
+        return False
+
+    output_root = os.path.abspath(args.output_dir or "quick3d_batch")
+    log_dir = os.path.join(output_root, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    result_dir = tempfile.mkdtemp(prefix="b2q_batch_")
+    workers = max(1, min(args.workers, len(files)))
+    print(f"🚀 批量转换 {len(files)} 个文件，{workers} 个Blender进程")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(lambda item: _run_worker(args, item[0], item[1], output_root, log_dir, result_dir),
+                                enumerate(files)))
+
+    scenes = [scene for entry in entries for scene in entry['scenes']]
+    summary = {
+        'version': SUMMARY_VERSION,
+        'blender': args.blender,
+        'workers': workers,
+        'time': time.perf_counter() - start,
+        'files_succeeded': sum(1 for e in entries if e['success']),
+        'files_failed': sum(1 for e in entries if not e['success']),
+        'scenes_converted': sum(1 for s in scenes if s.get('success')),
+        'output_size': sum(s.get('output_size', 0) for s in scenes),
+        'files': entries,
+    }
+    summary_path = args.summary or os.path.join(output_root, "batch_summary.json")
+    _write_summary(summary, summary_path)
+
+    for name in os.listdir(result_dir):
+        os.remove(os.path.join(result_dir, name))
+    os.rmdir(result_dir)
+
+    print(f"📊 成功 {summary['files_succeeded']} / 失败 {summary['files_failed']}，"
+          f"共 {summary['scenes_converted']} 个场景，耗时 {summary['time']:.1f}s")
+    print(f"✅ 汇总已写入: {summary_path}")
+    return summary['files_failed'] == 0
+
+
+def main():
+    args = _parse_args()
+    success = run_in_blender(args) if BLENDER_AVAILABLE else run_standalone(args)
+    # Blender在 -P 脚本结束后不会自动返回错误码
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+balsam替身：在没有Qt的机器（Linux CI等）上代替balsam运行基准测试
+
+读取glTF/GLB，按balsam的目录结构写出输出：
+    <输出目录>/<Stem>.qml      根节点、材质、纹理、模型与关键帧动画
+    <输出目录>/meshes/*.mesh   每个网格一个文件，包含原始的顶点与索引数据
+    <输出目录>/maps/*          glTF中的图像（内嵌或外部文件）
+
+生成的文件大小与数量随场景规模变化，使转换后续步骤（QML组装、输出提交等）的耗时接近真实情况。
+只依赖Python标准库，命令行参数与balsam一致：
+    python balsam_stub.py [--outputPath DIR | -o DIR] input.glb
+"""
+
+import os
+import re
+import sys
+import json
+import base64
+import struct
+
+STUB_VERSION = "balsam-stub 1.0"
+
+HELP_TEXT = """Usage: balsam [options] sourceFileName
+Converts a 3D asset file to QML (benchmark stand-in)
+
+Options:
+  -?, -h, --help               Displays help.
+  -v, --version                Displays version information.
+  -o, --outputPath <outdir>    Sets the location to place the generated file(s).
+  --useBinaryKeyframes         Store keyframes in binary files.
+"""
+
+GLB_MAGIC = 0x46546C67
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+
+COMPONENT_FORMATS = {5120: 'b', 5121: 'B', 5122: 'h', 5123: 'H', 5125: 'I', 5126: 'f'}
+TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT4': 16}
+
+
+def _parse_args(argv):
+    output_dir = None
+    source = None
+    binary_keyframes = False
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in ('-h', '-?', '--help'):
+            print(HELP_TEXT)
+            sys.exit(0)
+        if arg in ('-v', '--version'):
+            print(STUB_VERSION)
+            sys.exit(0)
+        if arg in ('-o', '--outputPath'):
+            index += 1
+            output_dir = argv[index]
+        elif arg == '--useBinaryKeyframes':
+            binary_keyframes = True
+        elif arg.startswith('-'):
+            pass  # 其他balsam选项对替身没有影响
+        else:
+            source = arg
+        index += 1
+    return source, output_dir or os.getcwd(), binary_keyframes
+
+
+def load_gltf(path):
+    """读取glTF/GLB，返回 (json, [buffer bytes])"""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    glb_bin = None
+    if len(data) >= 12 and struct.unpack_from('<I', data, 0)[0] == GLB_MAGIC:
+        offset = 12
+        document = None
+        while offset + 8 <= len(data):
+            length, chunk_type = struct.unpack_from('<II', data, offset)
+            chunk = data[offset + 8:offset + 8 + length]
+            if chunk_type == GLB_CHUNK_JSON:
+                document = json.loads(chunk.decode('utf-8'))
+            elif chunk_type == GLB_CHUNK_BIN:
+                glb_bin = chunk
+            offset += 8 + length
+    else:
+        document = json.loads(data.decode('utf-8'))
+
+    buffers = []
+    for buffer in document.get('buffers', []):
+        uri = buffer.get('uri')
+        if uri is None:
+            buffers.append(glb_bin or b'')
+        elif uri.startswith('data:'):
+            buffers.append(base64.b64decode(uri.split(',', 1)[1]))
+        else:
+            with open(os.path.join(base_dir, uri), 'rb') as f:
+                buffers.append(f.read())
+    return document, buffers
+
+
+def _buffer_view_bytes(document, buffers, view_index):
+    view = document['bufferViews'][view_index]
+    start = view.get('byteOffset', 0)
+    return buffers[view['buffer']][start:start + view['byteLength']]
+
+
+def read_accessor(document, buffers, accessor_index):
+    """读取accessor为扁平的数值列表（只支持紧密排列的数据）"""
+    accessor = document['accessors'][accessor_index]
+    if 'bufferView' not in accessor:
+        return []
+    view = document['bufferViews'][accessor['bufferView']]
+    fmt = COMPONENT_FORMATS[accessor['componentType']]
+    components = TYPE_SIZES[accessor['type']]
+    count = accessor['count'] * components
+    start = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+    return list(struct.unpack_from(f'<{count}{fmt}', buffers[view['buffer']], start))
+
+
+def _identifier(name, used, fallback):
+    ident = re.sub(r'[^A-Za-z0-9_]', '_', name or fallback)
+    if not ident or ident[0].isdigit():
+        ident = "_" + ident
+    ident = ident[0].lower() + ident[1:]
+    candidate = ident
+    suffix = 1
+    while candidate in used:
+        candidate = f"{ident}_{suffix}"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def write_meshes(document, buffers, output_dir):
+    """每个网格写出一个 .mesh 文件，返回 [相对路径]"""
+    meshes_dir = os.path.join(output_dir, "meshes")
+    os.makedirs(meshes_dir, exist_ok=True)
+    paths = []
+    used = set()
+    for mesh_index, mesh in enumerate(document.get('meshes', [])):
+        name = _identifier(mesh.get('name'), used, f"mesh{mesh_index}")
+        rel_path = f"meshes/{name}.mesh"
+        with open(os.path.join(output_dir, rel_path), 'wb') as f:
+            f.write(b"QQ3DMESH")
+            f.write(struct.pack('<I', len(mesh.get('primitives', []))))
+            for primitive in mesh.get('primitives', []):
+                accessors = list(primitive.get('attributes', {}).values())
+                if 'indices' in primitive:
+                    accessors.append(primitive['indices'])
+                for accessor_index in accessors:
+                    accessor = document['accessors'][accessor_index]
+                    if 'bufferView' not in accessor:
+                        continue
+                    data = _buffer_view_bytes(document, buffers, accessor['bufferView'])
+                    f.write(struct.pack('<I', len(data)))
+                    f.write(data)
+        paths.append(rel_path)
+    return paths
+
+
+def write_maps(document, buffers, source_dir, output_dir):
+    """写出glTF中的图像，返回 {图像索引: 相对路径}"""
+    maps_dir = os.path.join(output_dir, "maps")
+    paths = {}
+    for image_index, image in enumerate(document.get('images', [])):
+        ext = '.jpg' if image.get('mimeType') == 'image/jpeg' else '.png'
+        if 'bufferView' in image:
+            data = _buffer_view_bytes(document, buffers, image['bufferView'])
+        elif image.get('uri', '').startswith('data:'):
+            data = base64.b64decode(image['uri'].split(',', 1)[1])
+        elif image.get('uri'):
+            with open(os.path.join(source_dir, image['uri']), 'rb') as f:
+                data = f.read()
+            ext = os.path.splitext(image['uri'])[1] or ext
+        else:
+            continue
+        os.makedirs(maps_dir, exist_ok=True)
+        rel_path = f"maps/{image_index}{ext}"
+        with open(os.path.join(output_dir, rel_path), 'wb') as f:
+            f.write(data)
+        paths[image_index] = rel_path
+    return paths
+
+
+def _format_vector(values):
+    return "Qt.vector%dd(%s)" % (len(values), ", ".join(f"{v:.6g}" for v in values))
+
+
+def _format_quaternion(values):
+    x, y, z, w = values
+    return f"Qt.quaternion({w:.6g}, {x:.6g}, {y:.6g}, {z:.6g})"
+
+
+def build_qml(document, buffers, mesh_paths, map_paths, output_dir, binary_keyframes):
+    """生成balsam风格的根QML"""
+    used = {"node"}
+    lines = ["import QtQuick", "import QtQuick3D", "", "Node {", "    id: node", "", "    // Resources"]
+
+    texture_ids = []
+    for texture_index, texture in enumerate(document.get('textures', [])):
+        source = map_paths.get(texture.get('source'))
+        if source is None:
+            texture_ids.append(None)
+            continue
+        texture_id = _identifier(f"_{texture_index}_texture", used, "texture")
+        texture_ids.append(texture_id)
+        lines += ["    Texture {", f"        id: {texture_id}", "        generateMipmaps: true",
+                  "        mipFilter: Texture.Linear", f"        source: \"{source}\"", "    }"]
+
+    material_ids = []
+    for material_index, material in enumerate(document.get('materials', [])):
+        material_id = _identifier((material.get('name') or f"material{material_index}") + "_material", used, "material")
+        material_ids.append(material_id)
+        pbr = material.get('pbrMetallicRoughness', {})
+        lines += ["    PrincipledMaterial {", f"        id: {material_id}",
+                  f"        objectName: \"{material.get('name', '')}\""]
+        base_texture = pbr.get('baseColorTexture', {}).get('index')
+        if base_texture is not None and base_texture < len(texture_ids) and texture_ids[base_texture]:
+            lines.append(f"        baseColorMap: {texture_ids[base_texture]}")
+        lines += [f"        metalness: {pbr.get('metallicFactor', 1.0):.6g}",
+                  f"        roughness: {pbr.get('roughnessFactor', 1.0):.6g}", "    }"]
+
+    lines += ["", "    // Nodes:"]
+    node_ids = {}
+
+    def emit_node(node_index, depth):
+        node = document['nodes'][node_index]
+        indent = "    " * depth
+        node_id = _identifier(node.get('name'), used, f"node{node_index}")
+        node_ids[node_index] = node_id
+        if 'mesh' in node:
+            element = "Model"
+        elif 'camera' in node:
+            element = "PerspectiveCamera"
+        else:
+            element = "Node"
+        lines.append(f"{indent}{element} {{")
+        lines.append(f"{indent}    id: {node_id}")
+        lines.append(f"{indent}    objectName: \"{node.get('name', '')}\"")
+        if 'translation' in node:
+            lines.append(f"{indent}    position: {_format_vector(node['translation'])}")
+        if 'rotation' in node:
+            lines.append(f"{indent}    rotation: {_format_quaternion(node['rotation'])}")
+        if 'scale' in node:
+            lines.append(f"{indent}    scale: {_format_vector(node['scale'])}")
+        if 'mesh' in node and node['mesh'] < len(mesh_paths):
+            lines.append(f"{indent}    source: \"{mesh_paths[node['mesh']]}\"")
+            materials = [material_ids[p['material']] for p in document['meshes'][node['mesh']].get('primitives', [])
+                         if p.get('material') is not None and p['material'] < len(material_ids)]
+            if materials:
+                lines.append(f"{indent}    materials: [{', '.join(materials)}]")
+        for child in node.get('children', []):
+            emit_node(child, depth + 1)
+        lines.append(f"{indent}}}")
+
+    scene = document.get('scenes', [{}])[document.get('scene', 0)] if document.get('scenes') else {}
+    for root in scene.get('nodes', range(len(document.get('nodes', [])))):
+        emit_node(root, 1)
+
+    lines += build_animations(document, buffers, node_ids, output_dir, binary_keyframes)
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def build_animations(document, buffers, node_ids, output_dir, binary_keyframes):
+    """glTF动画转换为 Timeline + KeyframeGroup（或二进制关键帧文件）"""
+    lines = []
+    for animation_index, animation in enumerate(document.get('animations', [])):
+        groups = []
+        end_frame = 0.0
+        for channel_index, channel in enumerate(animation.get('channels', [])):
+            target = channel.get('target', {})
+            node_id = node_ids.get(target.get('node'))
+            path = {'translation': 'position', 'rotation': 'rotation', 'scale': 'scale'}.get(target.get('path'))
+            if not node_id or not path:
+                continue
+            sampler = animation['samplers'][channel['sampler']]
+            times = read_accessor(document, buffers, sampler['input'])
+            values = read_accessor(document, buffers, sampler['output'])
+            width = 4 if path == 'rotation' else 3
+            if sampler.get('interpolation') == 'CUBICSPLINE':
+                values = [v for i in range(len(times)) for v in values[(i * 3 + 1) * width:(i * 3 + 2) * width]]
+            if times:
+                end_frame = max(end_frame, times[-1] * 1000.0)
+
+            if binary_keyframes:
+                os.makedirs(os.path.join(output_dir, "animations"), exist_ok=True)
+                rel_path = f"animations/animation{animation_index}_{channel_index}.qad"
+                with open(os.path.join(output_dir, rel_path), 'wb') as f:
+                    f.write(struct.pack(f'<{len(times)}f', *times))
+                    f.write(struct.pack(f'<{len(values)}f', *values))
+                groups.append(f"        KeyframeGroup {{ target: {node_id}; property: \"{path}\"; "
+                              f"keyframeSource: \"{rel_path}\" }}")
+                continue
+
+            groups.append("        KeyframeGroup {")
+            groups.append(f"            target: {node_id}")
+            groups.append(f"            property: \"{path}\"")
+            for key_index, time_value in enumerate(times):
+                value = values[key_index * width:(key_index + 1) * width]
+                formatted = _format_quaternion(value) if path == 'rotation' else _format_vector(value)
+                groups.append(f"            Keyframe {{ frame: {time_value * 1000.0:.6g}; value: {formatted} }}")
+            groups.append("        }")
+
+        if not groups:
+            continue
+        lines += ["", "    // Animations:", "    Timeline {",
+                  f"        id: timeline{animation_index}", "        startFrame: 0",
+                  f"        endFrame: {end_frame:.6g}", "        currentFrame: 0", "        enabled: true",
+                  "        animations: TimelineAnimation {", f"            duration: {max(end_frame, 1.0):.6g}",
+                  "            from: 0", f"            to: {end_frame:.6g}",
+                  "            running: true", "            loops: Animation.Infinite", "        }"]
+        lines += groups
+        lines.append("    }")
+    return lines
+
+
+def qml_component_name(source):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    stem = re.sub(r'[^A-Za-z0-9_]', '_', stem) or "Scene"
+    return stem[0].upper() + stem[1:]
+
+
+def main(argv):
+    source, output_dir, binary_keyframes = _parse_args(argv)
+    if not source or not os.path.exists(source):
+        print(f"balsam-stub: input file not found: {source}", file=sys.stderr)
+        return 1
+    os.makedirs(output_dir, exist_ok=True)
+    document, buffers = load_gltf(source)
+    mesh_paths = write_meshes(document, buffers, output_dir)
+    map_paths = write_maps(document, buffers, os.path.dirname(os.path.abspath(source)), output_dir)
+    qml = build_qml(document, buffers, mesh_paths, map_paths, output_dir, binary_keyframes)
+    qml_path = os.path.join(output_dir, qml_component_name(source) + ".qml")
+    with open(qml_path, 'w', encoding='utf-8') as f:
+        f.write(qml)
+    print(f"Generated {qml_path}: {len(mesh_paths)} meshes, {len(map_paths)} maps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
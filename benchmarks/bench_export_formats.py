@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+GLTF导出格式基准测试：对比 GLB / GLTF_SEPARATE / GLTF_EMBEDDED 的文件大小与端到端转换耗时
+
+在Blender中以后台模式运行：
+    blender -b scene.blend -P benchmarks/bench_export_formats.py -- --repeat 3 --output bench_formats.json
+
+balsam阶段使用转换器构建的命令（BalsamGLTFToQMLConverter.build_balsam_attempts），
+与实际转换的调用完全一致（包括内置转换器与附加选项）。
+
+可选参数：
+    --balsam PATH   指定balsam可执行文件（默认使用插件选定的版本，未安装balsam时为内置转换器）
+    --repeat N      每种格式重复次数（取中位数）
+    --output FILE   结果JSON路径
+    --workdir DIR   临时工作目录（默认系统临时目录）
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+import statistics
+import subprocess
+
+import bpy
+
+
+def _import_addon():
+    """以包的形式导入插件（-P 运行脚本时没有包上下文）"""
+    addon_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parent_dir = os.path.dirname(addon_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    return importlib.import_module(os.path.basename(addon_dir))
+
+
+def _parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Benchmark GLTF export formats for Balsam")
+    parser.add_argument("--balsam", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_formats.json")
+    parser.add_argument("--workdir", default=None)
+    return parser.parse_args(argv)
+
+
+def _total_size(files):
+    return sum(os.path.getsize(f) for f in files if os.path.exists(f))
+
+
+def _prepare_converter(converter, gltf_path, work_dir):
+    """让转换器输出到 work_dir，并按实际转换的流程确定balsam路径与附加选项"""
+    converter.gltf_path = gltf_path
+    converter.output_base_dir = work_dir
+    converter.qml_output_dir = work_dir
+    converter.staging_dir = None
+    return converter.resolve_balsam_path()
+
+
+def _run_balsam(converter, path_manager):
+    """依次执行转换器构建的balsam命令直到成功，返回 (是否成功, 使用的命令)"""
+    env = path_manager.get_qt_environment_for_path(converter.balsam_path)
+    for attempt in converter.build_balsam_attempts():
+        try:
+            completed = subprocess.run(attempt['cmd'], env=env, cwd=attempt['cwd'],
+                                       capture_output=True, text=True, timeout=attempt['timeout'])
+        except subprocess.TimeoutExpired:
+            continue
+        if completed.returncode == 0:
+            return True, attempt['cmd']
+    return False, None
+
+
+def bench_format(converter_module, gltf_utils, path_manager, export_format, work_dir):
+    """单次测试：导出 + balsam，返回耗时与大小"""
+    if os.path.exists(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir)
+
+    converter = converter_module.BalsamGLTFToQMLConverter()
+    kwargs = converter.get_balsam_export_kwargs()
+    kwargs['export_format'] = export_format
+    gltf_path = os.path.join(work_dir, "bench" + gltf_utils.get_gltf_extension(export_format))
+
+    start = time.perf_counter()
+    bpy.ops.export_scene.gltf(filepath=gltf_path, **kwargs)
+    export_time = time.perf_counter() - start
+
+    files = [gltf_path] + gltf_utils.list_companion_files(gltf_path)
+    result = {
+        'export_time': export_time,
+        'file_size': _total_size(files),
+        'file_count': len(files),
+        'balsam_time': None,
+    }
+
+    if _prepare_converter(converter, gltf_path, work_dir):
+        start = time.perf_counter()
+        result['balsam_ok'], result['balsam_cmd'] = _run_balsam(converter, path_manager)
+        result['balsam_time'] = time.perf_counter() - start
+        result['balsam'] = converter.balsam_path
+
+    return result
+
+
+def main():
+    args = _parse_args()
+    addon = _import_addon()
+    converter_module = importlib.import_module(addon.__name__ + ".balsam_gltf_converter")
+    gltf_utils = importlib.import_module(addon.__name__ + ".gltf_utils")
+    path_manager = importlib.import_module(addon.__name__ + ".path_manager")
+    if args.balsam:
+        path_manager.set_selected_balsam_path(args.balsam)
+
+    work_root = args.workdir or tempfile.mkdtemp(prefix="b2q_bench_formats_")
+    results = {}
+    for export_format in converter_module.GLTF_EXPORT_FORMATS:
+        runs = []
+        for run_index in range(args.repeat):
+            work_dir = os.path.join(work_root, export_format.lower())
+            runs.append(bench_format(converter_module, gltf_utils, path_manager, export_format, work_dir))
+            print(f"  {export_format} #{run_index + 1}: {runs[-1]}")
+
+        summary = {
+            'file_size': runs[-1]['file_size'],
+            'file_count': runs[-1]['file_count'],
+            'export_time_median': statistics.median(r['export_time'] for r in runs),
+        }
+        if all(r['balsam_time'] is not None for r in runs):
+            summary['balsam_time_median'] = statistics.median(r['balsam_time'] for r in runs)
+            summary['total_time_median'] = statistics.median(r['export_time'] + r['balsam_time'] for r in runs)
+            summary['balsam_ok'] = all(r.get('balsam_ok') for r in runs)
+            summary['balsam'] = runs[-1]['balsam']
+        summary['runs'] = runs
+        results[export_format] = summary
+
+    report = {
+        'blend_file': bpy.data.filepath,
+        'blender_version': bpy.app.version_string,
+        'balsam': path_manager.get_selected_balsam_path(),
+        'repeat': args.repeat,
+        'formats': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n📊 导出格式对比:")
+    print(f"{'format':<16}{'size (KB)':>12}{'export (s)':>12}{'balsam (s)':>12}{'total (s)':>12}")
+    for export_format, summary in results.items():
+        balsam_time = summary.get('balsam_time_median')
+        total_time = summary.get('total_time_median')
+        print(f"{export_format:<16}{summary['file_size'] / 1024:>12.1f}{summary['export_time_median']:>12.3f}"
+              f"{(balsam_time if balsam_time is not None else float('nan')):>12.3f}"
+              f"{(total_time if total_time is not None else float('nan')):>12.3f}")
+    print(f"✅ 结果已写入: {args.output}")
+
+    if not args.workdir:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
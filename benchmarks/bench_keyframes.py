@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+关键帧输出基准测试：对比关键帧精简与二进制关键帧对balsam输出大小和QML加载时间的影响
+
+对每个带动画的glTF/GLB分别转换以下变体：
+    original         原始关键帧，QML内联Keyframe
+    reduced          精简后的关键帧（keyframe_reduction.reduce_gltf），QML内联Keyframe
+    original_binary  原始关键帧，balsam --useBinaryKeyframes
+    reduced_binary   精简后的关键帧，balsam --useBinaryKeyframes
+（balsam不支持 --useBinaryKeyframes 时跳过二进制变体）
+
+每个变体统计QML大小、内联Keyframe数与二进制关键帧文件大小；安装了PySide6时，
+用与预览窗口相同的方式（QQmlComponent.setData 后 create）加载主QML，取多次的中位数作为解析时间。
+需要安装Qt（balsam），不需要Blender：
+    python benchmarks/bench_keyframes.py --balsam /path/to/balsam assembly_line.glb --output bench_keyframes.json
+
+可选参数：
+    --tolerance X   位置/缩放/变形权重容差（默认0.001）
+    --angle X       旋转容差，单位度（默认0.1）
+    --repeat N      每个变体的加载次数（默认5）
+    --workdir DIR   保留输出的目录（默认系统临时目录）
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "blender2quick3d"
+
+# 与 tests/conftest.py 相同：把插件目录注册为包，不执行 __init__.py（其中需要bpy）
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [ADDON_DIR]
+    sys.modules[PACKAGE_NAME] = package
+
+from blender2quick3d import gltf_utils, keyframe_reduction  # noqa: E402
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Measure keyframe reduction and binary keyframes on balsam output")
+    parser.add_argument("inputs", nargs="+", help="glTF/GLB files with animations")
+    parser.add_argument("--balsam", required=True, help="balsam executable")
+    parser.add_argument("--tolerance", type=float, default=keyframe_reduction.DEFAULT_POSITION_TOLERANCE)
+    parser.add_argument("--angle", type=float, default=keyframe_reduction.DEFAULT_ANGLE_TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--workdir", default=None, help="keep outputs in this directory")
+    return parser.parse_args(argv)
+
+
+def supports_binary_keyframes(balsam_path):
+    result = subprocess.run([balsam_path, "--help"], capture_output=True, text=True)
+    return keyframe_reduction.BINARY_KEYFRAMES_OPTION in (result.stdout or '') + (result.stderr or '')
+
+
+def run_balsam(balsam_path, gltf_path, output_dir, extra_args):
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    result = subprocess.run([balsam_path, "--outputPath", output_dir] + extra_args + [gltf_path],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"balsam failed: {result.stderr.strip()}")
+    return time.perf_counter() - start
+
+
+def find_main_qml(output_dir):
+    """balsam在输出目录顶层写出的场景QML"""
+    names = [name for name in os.listdir(output_dir) if name.endswith('.qml')]
+    if not names:
+        return None
+    return max((os.path.join(output_dir, name) for name in names), key=os.path.getsize)
+
+
+def measure_load_time(qml_path, repeat):
+    """用新的QQmlEngine多次加载QML（setData + create），返回中位数毫秒；没有PySide6时返回None"""
+    try:
+        from PySide6.QtCore import QUrl
+        from PySide6.QtGui import QGuiApplication
+        from PySide6.QtQml import QQmlComponent, QQmlEngine
+    except ImportError:
+        return None
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QGuiApplication.instance() or QGuiApplication([sys.argv[0]])  # noqa: F841
+    with open(qml_path, 'rb') as f:
+        data = f.read()
+    samples = []
+    for _ in range(max(repeat, 1)):
+        # 每次使用新引擎，避免命中上一次的编译缓存
+        engine = QQmlEngine()
+        engine.addImportPath(os.path.dirname(qml_path))
+        start = time.perf_counter()
+        component = QQmlComponent(engine)
+        component.setData(data, QUrl.fromLocalFile(qml_path))
+        instance = component.create() if component.isReady() else None
+        elapsed = time.perf_counter() - start
+        if instance is None:
+            raise RuntimeError(f"QML load failed: {component.errorString().strip()}")
+        samples.append(elapsed * 1000.0)
+        instance.deleteLater()
+        engine.deleteLater()
+    return statistics.median(samples)
+
+
+def bench_file(gltf_path, args, work_dir, binary):
+    ext = os.path.splitext(gltf_path)[1].lower()
+    export_format = 'GLB' if ext == '.glb' else 'GLTF_SEPARATE'
+    reduced_path = os.path.join(work_dir, "reduced", "reduced" + ext)
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    tolerances = keyframe_reduction.get_tolerances(args.tolerance, args.angle, args.tolerance, args.tolerance)
+    start = time.perf_counter()
+    stats = keyframe_reduction.reduce_document(doc, tolerances)
+    stats['seconds'] = time.perf_counter() - start
+    reduced_path = doc.save(reduced_path, export_format)
+
+    variants = [('original', gltf_path, []), ('reduced', reduced_path, [])]
+    if binary:
+        option = [keyframe_reduction.BINARY_KEYFRAMES_OPTION]
+        variants += [('original_binary', gltf_path, option), ('reduced_binary', reduced_path, option)]
+
+    results = {}
+    for name, source, extra_args in variants:
+        output_dir = os.path.join(work_dir, name)
+        balsam_seconds = run_balsam(args.balsam, source, output_dir, extra_args)
+        summary = keyframe_reduction.summarize_keyframe_output(output_dir)
+        main_qml = find_main_qml(output_dir)
+        summary['balsam_seconds'] = balsam_seconds
+        summary['load_ms'] = measure_load_time(main_qml, args.repeat) if main_qml else None
+        results[name] = summary
+    return {'file': gltf_path, 'reduction': stats, 'variants': results}
+
+
+def print_result(result):
+    stats = result['reduction']
+    print(f"{result['file']}: keyframes {stats['keyframes_before']:,} -> {stats['keyframes_after']:,}, "
+          f"animation data {stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB "
+          f"({stats['seconds'] * 1000:.0f} ms)")
+    baseline = result['variants']['original']
+    for name, summary in result['variants'].items():
+        size = summary['qml_bytes'] + summary['binary_bytes']
+        line = (f"  {name:<16} QML {summary['qml_bytes'] / 1024:>9.1f} KB  binary {summary['binary_bytes'] / 1024:>8.1f} KB"
+                f"  total {size / max(baseline['qml_bytes'] + baseline['binary_bytes'], 1):>6.1%}")
+        if summary['load_ms'] is not None:
+            line += f"  load {summary['load_ms']:>8.1f} ms"
+            if baseline['load_ms']:
+                line += f" ({summary['load_ms'] / baseline['load_ms']:.1%})"
+        print(line)
+
+
+def main(argv):
+    args = _parse_args(argv)
+    if not keyframe_reduction.NUMPY_AVAILABLE:
+        print("numpy is required")
+        return 1
+    binary = supports_binary_keyframes(args.balsam)
+    if not binary:
+        print(f"balsam does not support {keyframe_reduction.BINARY_KEYFRAMES_OPTION}, skipping binary variants")
+    work_root = args.workdir or tempfile.mkdtemp(prefix="b2q_bench_keyframes_")
+    results = []
+    for index, gltf_path in enumerate(args.inputs):
+        work_dir = os.path.join(work_root, f"{index:03d}")
+        if os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+        result = bench_file(gltf_path, args, work_dir, binary)
+        results.append(result)
+        print_result(result)
+
+    print(f"Outputs in {work_root}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'balsam': args.balsam, 'tolerance': args.tolerance, 'angle': args.angle, 'results': results},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+端到端转换基准测试：生成合成场景，分别计时转换流程的各个阶段
+
+每个用例在新建的场景中生成对象、网格、贴图与动画，然后依次计时：
+    ibl_copy   复制World的IBL图像（copy_all_world_images_to_balsam_output）
+    export     导出glTF（export_scene_to_gltf，含导出后的优化步骤）
+    balsam     balsam转换与后处理（call_balsam_converter）
+    qml        QML组装（QMLHandler.process_qml_file）
+
+用例以基准场景为中心，每次只改变一个维度（对象数、每个对象的三角形数、贴图数量、贴图分辨率、动画长度），
+便于定位是哪个维度导致性能变化。
+
+在Blender中以后台模式运行：
+    blender -b --factory-startup -P benchmarks/bench_pipeline.py -- --output bench_pipeline.json
+
+没有安装Qt时（如Linux CI）使用 benchmarks/balsam_stub.py 代替balsam：
+    blender -b --factory-startup -P benchmarks/bench_pipeline.py -- --balsam stub --quick
+
+测试插件内置的Python转换器（native_mesh_converter.py）：
+    blender -b --factory-startup -P benchmarks/bench_pipeline.py -- --balsam native
+
+比较两次结果（不需要Blender）：
+    python benchmarks/bench_pipeline.py --compare old.json new.json --threshold 10
+
+可选参数：
+    --balsam PATH|stub|native  balsam可执行文件（默认自动查找，找不到时使用替身）
+    --repeat N          每个用例重复次数（取中位数）
+    --cases NAME ...    只运行指定用例（如 baseline objects_500）
+    --quick             每个维度只测试一个较大的取值
+    --keep-caches       不关闭增量导出与balsam缓存（默认关闭，保证每次都完整转换）
+    --output FILE       结果JSON路径
+    --workdir DIR       工作目录（默认系统临时目录，结束后删除）
+    --compare OLD [NEW] 与之前的结果比较，超过 --threshold 百分比的阶段视为性能回退
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+import statistics
+import subprocess
+
+try:
+    import bpy
+    BLENDER_AVAILABLE = True
+except ImportError:
+    BLENDER_AVAILABLE = False
+
+REPORT_VERSION = 1
+STAGES = ('ibl_copy', 'export', 'balsam', 'qml')
+
+BASELINE_CASE = {
+    'objects': 20,
+    'triangles': 2000,
+    'textures': 2,
+    'texture_size': 512,
+    'animation_frames': 0,
+}
+# 每个维度相对基准场景的取值（--quick 时只取第一个）
+CASE_AXES = {
+    'objects': [500, 100],
+    'triangles': [100000, 20000],
+    'textures': [32, 8],
+    'texture_size': [2048, 1024],
+    'animation_frames': [1000, 250],
+}
+ENVIRONMENT_IMAGE_SIZE = (2048, 1024)
+# 比较结果时忽略小于该值的绝对变化（毫秒级的阶段受噪声影响较大）
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def _parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Benchmark the Blender -> Qt Quick3D conversion pipeline")
+    parser.add_argument("--balsam", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="*", default=None)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--keep-caches", action="store_true")
+    parser.add_argument("--output", default="bench_pipeline.json")
+    parser.add_argument("--workdir", default=None)
+    parser.add_argument("--compare", nargs="+", default=None, metavar="REPORT")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    return parser.parse_args(argv)
+
+
+def build_cases(names=None, quick=False):
+    """基准用例加上逐个维度变化的用例"""
+    cases = [dict(BASELINE_CASE, name="baseline")]
+    for axis, values in CASE_AXES.items():
+        for value in values[:1] if quick else values:
+            cases.append(dict(BASELINE_CASE, **{axis: value}, name=f"{axis}_{value}"))
+    if names:
+        cases = [case for case in cases if case['name'] in names]
+    return cases
+
+
+def _git_commit():
+    try:
+        completed = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return completed.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _directory_size(path):
+    """输出目录的大小与文件数（不含插件内部状态目录）"""
+    total = 0
+    count = 0
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d != ".blender2quick3d"]
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+            count += 1
+    return total, count
+
+
+# ----------------------------------------------------------------------
+# 结果比较（不需要Blender）
+# ----------------------------------------------------------------------
+def compare_reports(old_report, new_report, threshold):
+    """逐个用例、逐个阶段比较中位数耗时
+
+    Returns:
+        list: 超过阈值的回退 [(用例, 阶段, 旧耗时, 新耗时, 变化百分比)]
+    """
+    old_cases = {case['name']: case for case in old_report.get('cases', [])}
+    regressions = []
+    print(f"{'case':<24}{'stage':<10}{'old (s)':>10}{'new (s)':>10}{'change':>10}")
+    for case in new_report.get('cases', []):
+        old_case = old_cases.get(case['name'])
+        if not old_case:
+            continue
+        for stage in STAGES + ('total',):
+            old_time = old_case.get('median', {}).get(stage)
+            new_time = case.get('median', {}).get(stage)
+            if old_time is None or new_time is None:
+                continue
+            change = (new_time - old_time) / old_time * 100.0 if old_time > 0 else 0.0
+            marker = ""
+            if change > threshold and new_time - old_time > MIN_REGRESSION_SECONDS:
+                regressions.append((case['name'], stage, old_time, new_time, change))
+                marker = "  ⚠️"
+            print(f"{case['name']:<24}{stage:<10}{old_time:>10.3f}{new_time:>10.3f}{change:>+9.1f}%{marker}")
+    return regressions
+
+
+def _load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_compare(old_path, new_path, threshold):
+    regressions = compare_reports(_load_report(old_path), _load_report(new_path), threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} 个阶段比 {os.path.basename(old_path)} 慢了 {threshold:.0f}% 以上")
+        return False
+    print(f"✅ 没有超过 {threshold:.0f}% 的性能回退")
+    return True
+
+
+# ----------------------------------------------------------------------
+# 合成场景
+# ----------------------------------------------------------------------
+def _import_addon():
+    """以包的形式导入插件（-P 运行脚本时没有包上下文），未启用时手动注册"""
+    addon_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parent_dir = os.path.dirname(addon_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    addon = importlib.import_module(os.path.basename(addon_dir))
+    if not hasattr(bpy.types.Scene, "work_space_path"):
+        addon.register()
+    return addon
+
+
+def create_stub_launcher(work_root):
+    """为 balsam_stub.py 生成可直接执行的启动脚本（转换器把balsam当作可执行文件调用）"""
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "balsam_stub.py")
+    if os.name == 'nt':
+        path = os.path.join(work_root, "balsam_stub.bat")
+        content = f'@"{sys.executable}" "{stub}" %*\r\n'
+    else:
+        path = os.path.join(work_root, "balsam_stub")
+        content = f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.chmod(path, 0o755)
+    return path
+
+
+def _save_image(name, width, height, path, seed):
+    """生成带噪声的渐变图像并保存为PNG（噪声使PNG大小接近真实贴图）"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    xs = np.linspace(0.0, 1.0, width, dtype=np.float32)
+    ys = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    pixels[..., 0] = xs
+    pixels[..., 1] = ys
+    pixels[..., 2] = 0.5 + 0.5 * np.sin((xs + ys) * 12.0 + seed)
+    pixels[..., :3] += rng.normal(0.0, 0.05, (height, width, 3)).astype(np.float32)
+    pixels[..., 3] = 1.0
+    np.clip(pixels, 0.0, 1.0, out=pixels)
+
+    image = bpy.data.images.new(name, width, height, alpha=True)
+    image.pixels.foreach_set(pixels.ravel())
+    image.filepath_raw = path
+    image.file_format = 'PNG'
+    image.save()
+    return image
+
+
+def _grid_mesh(name, triangles):
+    """生成起伏的网格平面，三角形数约为 triangles"""
+    quads = max(1, triangles // 2)
+    cols = max(1, int(math.sqrt(quads)))
+    rows = max(1, quads // cols)
+    verts = []
+    uvs = []
+    for row in range(rows + 1):
+        for col in range(cols + 1):
+            u = col / cols
+            v = row / rows
+            verts.append((u * 2.0 - 1.0, v * 2.0 - 1.0, 0.1 * math.sin(u * 12.0) * math.cos(v * 12.0)))
+            uvs.append((u, v))
+    faces = []
+    for row in range(rows):
+        for col in range(cols):
+            i = row * (cols + 1) + col
+            faces.append((i, i + 1, i + cols + 2, i + cols + 1))
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    uv_layer = mesh.uv_layers.new(name="UVMap")
+    uv_layer.data.foreach_set("uv", [c for face in faces for i in face for c in uvs[i]])
+    mesh.update()
+    return mesh, rows * cols * 2
+
+
+def build_scene(case, work_dir):
+    """按用例参数生成合成场景
+
+    Returns:
+        tuple: (场景, 创建的数据块列表, 场景统计)
+    """
+    created = []
+    scene = bpy.data.scenes.new(f"Bench_{case['name']}")
+    created.append(scene)
+    textures_dir = os.path.join(work_dir, "textures")
+    os.makedirs(textures_dir, exist_ok=True)
+
+    # 材质：每张贴图一个材质，没有贴图时使用单色材质
+    materials = []
+    for index in range(max(1, case['textures'])):
+        material = bpy.data.materials.new(f"BenchMaterial{index}")
+        material.use_nodes = True
+        created.append(material)
+        if case['textures']:
+            size = case['texture_size']
+            image = _save_image(f"BenchTexture{index}", size, size,
+                                os.path.join(textures_dir, f"texture{index}.png"), index)
+            created.append(image)
+            nodes = material.node_tree.nodes
+            texture_node = nodes.new('ShaderNodeTexImage')
+            texture_node.image = image
+            bsdf = nodes.get("Principled BSDF")
+            if bsdf:
+                material.node_tree.links.new(texture_node.outputs['Color'], bsdf.inputs['Base Color'])
+        materials.append(material)
+
+    # 对象：每个对象拥有独立的网格数据（避免被实例化合并）
+    template, triangles = _grid_mesh("BenchMesh", case['triangles'])
+    created.append(template)
+    columns = max(1, int(math.ceil(math.sqrt(case['objects']))))
+    frames = case['animation_frames']
+    for index in range(case['objects']):
+        mesh = template.copy()
+        mesh.materials.append(materials[index % len(materials)])
+        created.append(mesh)
+        obj = bpy.data.objects.new(f"BenchObject{index}", mesh)
+        created.append(obj)
+        obj.location = ((index % columns) * 2.5, (index // columns) * 2.5, 0.0)
+        scene.collection.objects.link(obj)
+        if frames:
+            obj.keyframe_insert("location", frame=1)
+            obj.keyframe_insert("rotation_euler", frame=1)
+            obj.location.z += 2.0
+            obj.rotation_euler.z = math.pi
+            obj.keyframe_insert("location", frame=frames)
+            obj.keyframe_insert("rotation_euler", frame=frames)
+            if obj.animation_data and obj.animation_data.action:
+                created.append(obj.animation_data.action)
+    scene.frame_start = 1
+    scene.frame_end = max(1, frames)
+
+    camera_data = bpy.data.cameras.new("BenchCamera")
+    camera = bpy.data.objects.new("BenchCamera", camera_data)
+    camera.location = (columns * 1.25, -columns * 3.0, columns * 2.0)
+    camera.rotation_euler = (math.radians(60.0), 0.0, 0.0)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    light_data = bpy.data.lights.new("BenchSun", 'SUN')
+    light = bpy.data.objects.new("BenchSun", light_data)
+    scene.collection.objects.link(light)
+    created += [camera_data, camera, light_data, light]
+
+    # World环境贴图（IBL复制阶段的输入）
+    world = bpy.data.worlds.new("BenchWorld")
+    world.use_nodes = True
+    environment = _save_image("BenchEnvironment", *ENVIRONMENT_IMAGE_SIZE,
+                              os.path.join(textures_dir, "environment.png"), 1000)
+    environment_node = world.node_tree.nodes.new('ShaderNodeTexEnvironment')
+    environment_node.image = environment
+    background = world.node_tree.nodes.get("Background")
+    if background:
+        world.node_tree.links.new(environment_node.outputs['Color'], background.inputs['Color'])
+    scene.world = world
+    created += [environment, world]
+
+    stats = {
+        'objects': case['objects'],
+        'triangles_per_object': triangles,
+        'triangles_total': triangles * case['objects'],
+        'textures': case['textures'],
+        'texture_size': case['texture_size'],
+        'animation_frames': frames,
+    }
+    return scene, created, stats
+
+
+def remove_datablocks(created):
+    """删除用例创建的所有数据块（逆序删除，先删除引用者）"""
+    for datablock in reversed(created):
+        try:
+            collection = {
+                'SCENE': bpy.data.scenes, 'OBJECT': bpy.data.objects, 'MESH': bpy.data.meshes,
+                'MATERIAL': bpy.data.materials, 'IMAGE': bpy.data.images, 'WORLD': bpy.data.worlds,
+                'CAMERA': bpy.data.cameras, 'LIGHT': bpy.data.lights, 'ACTION': bpy.data.actions,
+            }[datablock.id_type]
+            collection.remove(datablock)
+        except (ReferenceError, KeyError):
+            pass
+
+
+# ----------------------------------------------------------------------
+# 计时
+# ----------------------------------------------------------------------
+def run_stages(modules, scene, output_dir, keep_caches):
+    """执行一次完整转换，返回各阶段耗时与输出大小"""
+    path_manager, converter_module, qml_handler = modules
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    path_manager.get_path_manager().set_work_space(output_dir)
+    scene.work_space_path = output_dir
+    if not keep_caches:
+        scene.qtquick3d_incremental_export = False
+        scene.qtquick3d_use_balsam_cache = False
+
+    run = {'timings': {}, 'success': False}
+    converter = converter_module.BalsamGLTFToQMLConverter()
+    converter.set_custom_output_dir(output_dir)
+    converter.setup_environment()
+    converter.begin_staged_output()
+
+    start = time.perf_counter()
+    converter.copy_world_images()
+    run['timings']['ibl_copy'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exported = converter.export_scene_to_gltf(allow_incremental=keep_caches)
+    run['timings']['export'] = time.perf_counter() - start
+    if not exported:
+        run['error'] = "glTF export failed"
+        return run
+    run['gltf_size'] = sum(os.path.getsize(f) for f in converter.get_exported_gltf_files())
+
+    start = time.perf_counter()
+    converted = converter.call_balsam_converter()
+    run['timings']['balsam'] = time.perf_counter() - start
+    if not converted:
+        run['error'] = "balsam conversion failed"
+        return run
+
+    start = time.perf_counter()
+    processed = qml_handler.QMLHandler().process_qml_file(scene_name=scene.name)
+    run['timings']['qml'] = time.perf_counter() - start
+    if not processed:
+        run['error'] = "QML assembly failed"
+        return run
+
+    run['timings']['total'] = sum(run['timings'].values())
+    run['output_size'], run['file_count'] = _directory_size(output_dir)
+    run['success'] = True
+    return run
+
+
+def run_case(modules, case, work_root, repeat, keep_caches):
+    print(f"\n🧪 用例 {case['name']}: {case}")
+    case_dir = os.path.join(work_root, case['name'])
+    os.makedirs(case_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    scene, created, stats = build_scene(case, case_dir)
+    result = {'name': case['name'], 'params': {k: v for k, v in case.items() if k != 'name'},
+              'scene': stats, 'build_time': time.perf_counter() - start, 'runs': []}
+    try:
+        with bpy.context.temp_override(scene=scene, view_layer=scene.view_layers[0]):
+            for run_index in range(repeat):
+                run = run_stages(modules, scene, os.path.join(case_dir, "output"), keep_caches)
+                result['runs'].append(run)
+                timings = ", ".join(f"{stage}={value:.3f}s" for stage, value in run['timings'].items())
+                print(f"  #{run_index + 1}: {'✅' if run['success'] else '❌ ' + run.get('error', '')} {timings}")
+    finally:
+        remove_datablocks(created)
+
+    succeeded = [run for run in result['runs'] if run['success']]
+    result['success'] = len(succeeded) == len(result['runs'])
+    if succeeded:
+        result['median'] = {stage: statistics.median(run['timings'][stage] for run in succeeded)
+                            for stage in STAGES + ('total',)}
+        result['output_size'] = succeeded[-1]['output_size']
+        result['file_count'] = succeeded[-1]['file_count']
+        result['gltf_size'] = succeeded[-1]['gltf_size']
+    return result
+
+
+def run_in_blender(args):
+    addon = _import_addon()
+    path_manager = importlib.import_module(addon.__name__ + ".path_manager")
+    modules = (
+        path_manager,
+        importlib.import_module(addon.__name__ + ".balsam_gltf_converter"),
+        importlib.import_module(addon.__name__ + ".qml_handler"),
+    )
+
+    work_root = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="b2q_bench_pipeline_"))
+    os.makedirs(work_root, exist_ok=True)
+    use_stub = args.balsam == "stub"
+    if args.balsam == "native":
+        balsam_path = path_manager.NATIVE_CONVERTER_FILE
+    else:
+        balsam_path = None if use_stub else (args.balsam or path_manager.find_balsam_executable())
+    if not balsam_path:
+        use_stub = True
+        balsam_path = create_stub_launcher(work_root)
+        print(f"ℹ️ 使用balsam替身: {balsam_path}")
+    path_manager.set_selected_balsam_path(balsam_path)
+
+    cases = build_cases(args.cases, args.quick)
+    results = [run_case(modules, case, work_root, args.repeat, args.keep_caches) for case in cases]
+
+    report = {
+        'version': REPORT_VERSION,
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'git_commit': _git_commit(),
+        'blender_version': bpy.app.version_string,
+        'platform': platform.platform(),
+        'balsam': balsam_path,
+        'balsam_stub': use_stub,
+        'repeat': args.repeat,
+        'keep_caches': args.keep_caches,
+        'cases': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n📊 各阶段耗时中位数 (s):")
+    print(f"{'case':<24}" + "".join(f"{stage:>10}" for stage in STAGES + ('total',)) + f"{'size (MB)':>12}")
+    for result in results:
+        median = result.get('median', {})
+        print(f"{result['name']:<24}" + "".join(f"{median.get(stage, float('nan')):>10.3f}"
+                                                for stage in STAGES + ('total',))
+              + f"{result.get('output_size', 0) / 1024 / 1024:>12.1f}")
+    print(f"✅ 结果已写入: {args.output}")
+
+    success = all(result['success'] for result in results)
+    if args.compare:
+        success = run_compare(args.compare[0], args.output, args.threshold) and success
+
+    if not args.workdir:
+        shutil.rmtree(work_root, ignore_errors=True)
+    return success
+
+
+def main():
+    args = _parse_args()
+    if BLENDER_AVAILABLE:
+        success = run_in_blender(args)
+    elif args.compare and len(args.compare) == 2:
+        success = run_compare(args.compare[0], args.compare[1], args.threshold)
+    else:
+        print("❌ 需要在Blender中运行基准测试，或通过 --compare OLD NEW 比较两份结果")
+        success = False
+    # Blender在 -P 脚本结束后不会自动返回错误码
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
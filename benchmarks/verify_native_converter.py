@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+对比内置转换器（native_mesh_converter.py）与balsam的输出
+
+对语料目录中的每个glTF/GLB分别运行balsam和内置转换器，比较：
+    QML      Model、材质、纹理、相机、灯光与关键帧组的数量
+    .mesh    网格文件数、子网格数、三角形总数、顶点属性集合与包围盒
+任何一项不一致时返回非零退出码，可在升级Qt或修改内置转换器后运行（需要安装Qt，不需要Blender）：
+    python benchmarks/verify_native_converter.py --balsam /path/to/balsam corpus/ --report verify.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADDON_DIR)
+
+import native_mesh_converter  # noqa: E402
+
+QML_ELEMENTS = ('Model', 'PrincipledMaterial', 'Texture', 'PerspectiveCamera', 'OrthographicCamera',
+                'DirectionalLight', 'PointLight', 'SpotLight', 'KeyframeGroup')
+BOUNDS_TOLERANCE = 1e-3
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Compare the built-in converter with balsam on a glTF corpus")
+    parser.add_argument("inputs", nargs="+", help="glTF/GLB files or directories")
+    parser.add_argument("--balsam", required=True, help="balsam executable")
+    parser.add_argument("--report", default=None, help="write the comparison as JSON")
+    parser.add_argument("--workdir", default=None, help="keep outputs in this directory")
+    return parser.parse_args(argv)
+
+
+def collect_corpus(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _dirs, names in os.walk(item):
+                files += [os.path.join(root, name) for name in names if name.lower().endswith(('.gltf', '.glb'))]
+        elif os.path.isfile(item):
+            files.append(item)
+    return sorted(files)
+
+
+def summarize_output(output_dir):
+    """统计一次转换的输出"""
+    summary = {'qml': {name: 0 for name in QML_ELEMENTS}, 'meshes': 0, 'subsets': 0, 'triangles': 0,
+               'attributes': set(), 'min': None, 'max': None, 'errors': []}
+    for name in os.listdir(output_dir):
+        if name.endswith('.qml'):
+            with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+                content = f.read()
+            for element in QML_ELEMENTS:
+                summary['qml'][element] += len(re.findall(r'\b%s\s*\{' % element, content))
+
+    meshes_dir = os.path.join(output_dir, "meshes")
+    for name in sorted(os.listdir(meshes_dir)) if os.path.isdir(meshes_dir) else []:
+        try:
+            mesh = native_mesh_converter.read_mesh_file(os.path.join(meshes_dir, name))
+        except Exception as e:
+            summary['errors'].append(f"{name}: {e}")
+            continue
+        summary['meshes'] += 1
+        summary['subsets'] += len(mesh['subsets'])
+        summary['triangles'] += mesh['index_count'] // 3
+        summary['attributes'].update(entry['name'] for entry in mesh['entries'])
+        for subset in mesh['subsets']:
+            summary['min'] = subset['min'] if summary['min'] is None else [min(a, b) for a, b in zip(summary['min'], subset['min'])]
+            summary['max'] = subset['max'] if summary['max'] is None else [max(a, b) for a, b in zip(summary['max'], subset['max'])]
+    summary['attributes'] = sorted(summary['attributes'])
+    return summary
+
+
+def compare_summaries(balsam, native):
+    """返回不一致项列表"""
+    differences = []
+    for element in QML_ELEMENTS:
+        if balsam['qml'][element] != native['qml'][element]:
+            differences.append(f"{element}: balsam {balsam['qml'][element]}, native {native['qml'][element]}")
+    for key in ('meshes', 'subsets', 'triangles', 'attributes'):
+        if balsam[key] != native[key]:
+            differences.append(f"{key}: balsam {balsam[key]}, native {native[key]}")
+    for key in ('min', 'max'):
+        if balsam[key] and native[key] and any(abs(a - b) > BOUNDS_TOLERANCE for a, b in zip(balsam[key], native[key])):
+            differences.append(f"bounds {key}: balsam {balsam[key]}, native {native[key]}")
+    differences += [f"balsam mesh: {error}" for error in balsam['errors']]
+    differences += [f"native mesh: {error}" for error in native['errors']]
+    return differences
+
+
+def verify_file(gltf_path, balsam_path, work_dir):
+    balsam_dir = os.path.join(work_dir, "balsam")
+    native_dir = os.path.join(work_dir, "native")
+    os.makedirs(balsam_dir, exist_ok=True)
+    result = subprocess.run([balsam_path, "--outputPath", balsam_dir, gltf_path], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'file': gltf_path, 'ok': False, 'differences': [f"balsam failed: {result.stderr.strip()}"]}
+    if not native_mesh_converter.convert_gltf(gltf_path, native_dir):
+        return {'file': gltf_path, 'ok': False, 'differences': ["native converter failed"]}
+
+    balsam = summarize_output(balsam_dir)
+    native = summarize_output(native_dir)
+    differences = compare_summaries(balsam, native)
+    return {'file': gltf_path, 'ok': not differences, 'differences': differences,
+            'unsupported': native_mesh_converter.check_gltf_file(gltf_path),
+            'balsam': balsam, 'native': native}
+
+
+def main(argv):
+    args = _parse_args(argv)
+    corpus = collect_corpus(args.inputs)
+    if not corpus:
+        print("No glTF files found")
+        return 1
+    work_root = args.workdir or tempfile.mkdtemp(prefix="b2q_verify_native_")
+    results = []
+    for index, gltf_path in enumerate(corpus):
+        result = verify_file(gltf_path, args.balsam, os.path.join(work_root, f"{index:03d}"))
+        results.append(result)
+        print(f"{'OK  ' if result['ok'] else 'DIFF'} {gltf_path}")
+        for difference in result['differences']:
+            print(f"     {difference}")
+
+    failed = sum(1 for result in results if not result['ok'])
+    print(f"{len(results) - failed}/{len(results)} files match (outputs in {work_root})")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'balsam': args.balsam, 'results': results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+场景变更日志模块 - 通过 depsgraph_update_post 记录自上次导出以来变化的数据块
+负责：
+1. 注册/注销 depsgraph_update_post 与 load_post 处理器
+2. 记录发生变化的对象、网格、材质、图片、节点组
+3. 为增量导出提供"脏数据"查询
+"""
+
+import uuid
+import bpy
+from bpy.app.handlers import persistent
+from typing import Dict, Set
+
+
+class ChangeJournal:
+    """场景变更日志"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """重置日志（加载新文件时调用）"""
+        # 会话ID：增量导出的清单只有在同一会话内才能信任日志
+        self.session_id = uuid.uuid4().hex
+        self.objects: Set[str] = set()
+        self.transforms: Set[str] = set()
+        self.data: Set[str] = set()
+        self.materials: Set[str] = set()
+        self.images: Set[str] = set()
+        self.node_groups: Set[str] = set()
+        self.actions: Set[str] = set()
+        self.structure_changed = False
+        # 修改计数：每记录一次影响导出内容的变化加一，clear() 不重置（供转换指纹判断是否有变化）
+        self.generation = 0
+
+    def record_update(self, update):
+        """记录一条depsgraph更新"""
+        data_block = getattr(update.id, 'original', None) or update.id
+        name = getattr(data_block, 'name', None)
+        if not name:
+            return
+
+        if isinstance(data_block, bpy.types.Object):
+            if update.is_updated_geometry:
+                self.objects.add(name)
+            if update.is_updated_transform:
+                self.transforms.add(name)
+            # 仅选择状态变化时两个标记都为False，不记录（导出时切换选择不应污染日志）
+            if not (update.is_updated_geometry or update.is_updated_transform):
+                return
+        elif isinstance(data_block, bpy.types.Material):
+            self.materials.add(name)
+        elif isinstance(data_block, bpy.types.Image):
+            self.images.add(name)
+        elif isinstance(data_block, bpy.types.NodeTree):
+            self.node_groups.add(name)
+        elif isinstance(data_block, bpy.types.Action):
+            self.actions.add(name)
+        elif isinstance(data_block, bpy.types.Collection):
+            # 集合成员变化：可见对象会在导出时重新收集，集合实例所在的单元需要重新导出
+            self.structure_changed = True
+        elif isinstance(data_block, (bpy.types.Mesh, bpy.types.Curve, bpy.types.Light,
+                                     bpy.types.Camera, bpy.types.Armature)):
+            self.data.add(name)
+        else:
+            return
+        self.generation += 1
+
+    def is_object_dirty(self, obj) -> bool:
+        """判断对象（及其数据、材质、图片）自上次清理以来是否变化"""
+        if obj.name in self.objects or obj.name in self.transforms:
+            return True
+        if obj.data is not None and obj.data.name in self.data:
+            return True
+        animation_data = getattr(obj, 'animation_data', None)
+        if animation_data and animation_data.action and animation_data.action.name in self.actions:
+            return True
+        for slot in obj.material_slots:
+            material = slot.material
+            if material is None:
+                continue
+            if material.name in self.materials:
+                return True
+            if self.node_groups or self.images:
+                if _material_uses_changed_nodes(material, self.images, self.node_groups):
+                    return True
+        return False
+
+    def clear(self):
+        """增量导出完成后清空已消费的记录（会话ID保持不变）"""
+        self.objects.clear()
+        self.transforms.clear()
+        self.data.clear()
+        self.materials.clear()
+        self.images.clear()
+        self.node_groups.clear()
+        self.actions.clear()
+        self.structure_changed = False
+
+    def summary(self) -> Dict[str, int]:
+        """变更统计"""
+        return {
+            'objects': len(self.objects),
+            'transforms': len(self.transforms),
+            'data': len(self.data),
+            'materials': len(self.materials),
+            'images': len(self.images),
+            'node_groups': len(self.node_groups),
+            'actions': len(self.actions),
+        }
+
+
+def _material_uses_changed_nodes(material, images: Set[str], node_groups: Set[str]) -> bool:
+    """材质节点树是否引用了变化的图片或节点组"""
+    if not material.use_nodes or not material.node_tree:
+        return False
+    for node in material.node_tree.nodes:
+        image = getattr(node, 'image', None)
+        if image is not None and image.name in images:
+            return True
+        tree = getattr(node, 'node_tree', None)
+        if tree is not None and tree.name in node_groups:
+            return True
+    return False
+
+
+# 全局变更日志实例
+_change_journal = None
+
+
+def get_change_journal() -> ChangeJournal:
+    """获取全局变更日志实例"""
+    global _change_journal
+    if _change_journal is None:
+        _change_journal = ChangeJournal()
+    return _change_journal
+
+
+@persistent
+def _on_depsgraph_update_post(scene, depsgraph):
+    """depsgraph更新后记录变化"""
+    try:
+        journal = get_change_journal()
+        for update in depsgraph.updates:
+            journal.record_update(update)
+    except Exception as e:
+        print(f"⚠️ 记录场景变更失败: {e}")
+
+
+@persistent
+def _on_load_post(*args):
+    """加载新文件后重置日志"""
+    get_change_journal().reset()
+    print("🔄 场景变更日志已重置")
+
+
+def register_change_journal():
+    """注册变更日志处理器"""
+    if _on_depsgraph_update_post not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update_post)
+    if _on_load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(_on_load_post)
+    print("✅ 场景变更日志处理器已注册")
+
+
+def unregister_change_journal():
+    """注销变更日志处理器"""
+    if _on_depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update_post)
+    if _on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load_post)
+    print("✅ 场景变更日志处理器已注销")
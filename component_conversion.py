@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+选择性转换模块 - 只转换选中的对象或集合，输出为可复用的QML组件
+负责：
+1. 按面板中的转换范围（选中对象、集合）收集要转换的对象
+2. 把这些对象单独导出为GLB并运行balsam，结果写为工作空间中的独立组件 <组件名>.qml，
+   meshes/、maps/ 加上组件前缀，使用组件自己的输出清单，主场景与其他组件的文件保持不变
+3. 在工作空间状态目录的 components.json 中登记组件及其对象：完整转换主场景时排除这些对象，
+   并在主场景QML中实例化组件
+4. 组件写入 qmldir，Qt Design Studio 中可以像主场景一样单独使用
+"""
+
+import os
+import re
+import json
+import shutil
+from typing import Dict, List, Optional
+
+from . import path_manager
+from . import staged_output
+from . import incremental_export
+from . import sharded_conversion
+
+COMPONENTS_STATE_SUB_DIR = "components"
+COMPONENTS_FILE_NAME = "components.json"
+# 主场景中组件实例的id前缀
+COMPONENT_INSTANCE_PREFIX = "b2q_component_"
+
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+.*?$', re.MULTILINE)
+
+# 面板显示的组件列表 {工作空间目录: 组件}：转换或删除组件完成后刷新，面板重绘只读取这里
+_panel_components = {}
+
+
+# ----------------------------------------------------------------------
+# 组件登记表
+# ----------------------------------------------------------------------
+
+def get_components_file(output_dir: str) -> str:
+    return os.path.join(output_dir, path_manager.WORKSPACE_STATE_DIR_NAME, COMPONENTS_FILE_NAME)
+
+
+def get_manifest_name(component_id: str) -> str:
+    """组件输出清单（相对于工作空间状态目录）"""
+    return os.path.join(COMPONENTS_STATE_SUB_DIR, f"{component_id}.manifest.json")
+
+
+def load_components(output_dir: Optional[str]) -> Dict[str, Dict]:
+    """读取已登记的组件 {组件名: {'id', 'label', 'objects'}}"""
+    if not output_dir:
+        return {}
+    path = get_components_file(output_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('components', {})
+    except Exception as e:
+        print(f"⚠️ 读取组件登记表失败: {e}")
+        return {}
+
+
+def save_components(output_dir: str, components: Dict[str, Dict]):
+    path = get_components_file(output_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'components': components}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _panel_workspace_dir() -> Optional[str]:
+    pm = path_manager.get_path_manager()
+    return pm.work_space_path or pm.output_base_dir
+
+
+def refresh_panel_components():
+    """重新读取当前工作空间的登记表，更新面板显示的组件列表"""
+    workspace_dir = _panel_workspace_dir()
+    if workspace_dir:
+        _panel_components[workspace_dir] = load_components(workspace_dir)
+
+
+def get_panel_components() -> Dict[str, Dict]:
+    """面板显示的组件列表（不访问磁盘；切换到新的工作空间后只读取一次登记表）"""
+    workspace_dir = _panel_workspace_dir()
+    if not workspace_dir:
+        return {}
+    if workspace_dir not in _panel_components:
+        refresh_panel_components()
+    return _panel_components.get(workspace_dir, {})
+
+
+def get_component_object_names(output_dir: str, skip: Optional[str] = None) -> set:
+    """已登记组件包含的对象名称（完整转换主场景时排除）"""
+    names = set()
+    for name, component in load_components(output_dir).items():
+        if name != skip:
+            names.update(component.get('objects', []))
+    return names
+
+
+def get_component_qml_files(output_dir: str) -> List[str]:
+    """工作空间中已生成的组件QML文件名"""
+    return [name + ".qml" for name in load_components(output_dir)
+            if os.path.exists(os.path.join(output_dir, name + ".qml"))]
+
+
+# ----------------------------------------------------------------------
+# 选择范围
+# ----------------------------------------------------------------------
+
+def collect_selection(context) -> Optional[Dict]:
+    """按转换范围收集对象
+
+    Returns:
+        dict: {'label', 'name', 'id', 'objects'}；范围为整个场景时返回None
+    """
+    scene = context.scene
+    scope = getattr(scene, "qtquick3d_conversion_scope", 'SCENE')
+    if scope == 'SCENE':
+        return None
+
+    view_layer = context.view_layer
+    visible = {obj.name for obj in view_layer.objects if obj.visible_get(view_layer=view_layer)}
+    if scope == 'COLLECTION':
+        collection = getattr(scene, "qtquick3d_scope_collection", None)
+        if collection is None:
+            print("⚠️ 未选择要转换的集合")
+            return {'label': "", 'name': "", 'id': "", 'objects': []}
+        label = collection.name
+        objects = [obj for obj in collection.all_objects if obj.name in visible]
+    else:
+        active = view_layer.objects.active
+        label = active.name if active and active.select_get() else "Selection"
+        objects = [obj for obj in context.selected_objects if obj.name in visible]
+        if getattr(scene, "qtquick3d_scope_include_children", True):
+            for obj in list(objects):
+                objects.extend(child for child in obj.children_recursive if child.name in visible)
+
+    label = getattr(scene, "qtquick3d_component_name", "").strip() or label
+    unique = list({obj.name: obj for obj in objects}.values())
+    name = sharded_conversion.qml_component_name(label)
+    return {'label': label, 'name': name, 'id': name.lower(), 'objects': unique}
+
+
+def export_component(context, selection: Dict, export_kwargs: Dict, output_base_dir: str) -> Optional[Dict]:
+    """把选中的对象导出为组件GLB（必须在主线程执行）
+
+    Returns:
+        dict: 组件计划（增加了 'gltf_path'、'output_dir'，对象改为名称列表），失败返回None
+    """
+    if not selection['objects']:
+        print("⚠️ 转换范围内没有可见对象")
+        return None
+
+    plan = dict(selection)
+    plan['output_dir'] = os.path.join(output_base_dir, path_manager.WORKSPACE_STATE_DIR_NAME,
+                                      COMPONENTS_STATE_SUB_DIR, plan['id'])
+    plan['gltf_path'] = os.path.join(plan['output_dir'], f"{plan['id']}.glb")
+    os.makedirs(plan['output_dir'], exist_ok=True)
+    if not incremental_export.export_objects_to_glb(context, plan['objects'], plan['gltf_path'], export_kwargs):
+        print(f"❌ 组件导出失败: {plan['name']}")
+        return None
+    print(f"📦 组件 {plan['name']}: {len(plan['objects'])} 个对象 -> {os.path.basename(plan['gltf_path'])}")
+    # 后台线程不能访问bpy对象
+    plan['objects'] = [obj.name for obj in plan['objects']]
+    return plan
+
+
+# ----------------------------------------------------------------------
+# 输出
+# ----------------------------------------------------------------------
+
+def _find_component_qml(plan: Dict) -> Optional[str]:
+    expected = os.path.join(plan['output_dir'], sharded_conversion.qml_component_name(plan['id']) + ".qml")
+    if os.path.exists(expected):
+        return expected
+    candidates = [os.path.join(plan['output_dir'], name) for name in os.listdir(plan['output_dir'])
+                  if name.endswith('.qml')]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def write_component_output(plan: Dict, output_dir: str) -> bool:
+    """把组件的balsam输出写入输出目录（不访问bpy，可在后台线程调用）
+
+    Args:
+        plan: export_component 返回的组件计划
+        output_dir: 输出目录（转换器的暂存目录）
+    """
+    try:
+        qml_path = _find_component_qml(plan)
+        if not qml_path:
+            print(f"❌ 组件 {plan['name']} 没有生成QML")
+            return False
+        with open(qml_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        # 组件之间、组件与主场景之间的 meshes/maps 可能重名，统一加上组件前缀
+        content, renamed = sharded_conversion.prefix_asset_references(content, plan['id'] + "_")
+        for src_rel, dst_rel in renamed:
+            src = os.path.join(plan['output_dir'], src_rel)
+            if not os.path.exists(src):
+                print(f"⚠️ 组件 {plan['name']} 引用的文件不存在: {src_rel}")
+                continue
+            dst = os.path.join(output_dir, dst_rel)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+
+        with open(os.path.join(output_dir, plan['name'] + ".qml"), 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"✅ 组件已生成: {plan['name']}.qml（{len(renamed)} 个资源文件）")
+        return True
+    except Exception as e:
+        print(f"❌ 写入组件输出失败: {e}")
+        return False
+
+
+def create_component_job_group(converter, plan: Dict, cache=None):
+    """为组件创建balsam任务（复用单个分片的任务组，合并步骤改为写出组件）"""
+    shard = {'name': plan['name'], 'id': plan['id'], 'gltf_path': plan['gltf_path'], 'output_dir': plan['output_dir']}
+    output_dir = converter.get_balsam_output_dir()
+    return sharded_conversion.create_shard_job_group(
+        converter, [shard], plan['name'], max_workers=1, cache=cache,
+        finalize=lambda: write_component_output(plan, output_dir),
+    )
+
+
+def add_component_instances(qml_content: str, component_names: List[str]) -> str:
+    """在场景QML根节点末尾实例化尚未实例化的组件"""
+    missing = [name for name in component_names
+               if not re.search(r'^\s*%s\s*\{' % re.escape(name), qml_content, re.MULTILINE)]
+    end = qml_content.rfind('}')
+    if not missing or end < 0:
+        return qml_content
+    lines = "".join(f"    {name} {{ id: {COMPONENT_INSTANCE_PREFIX}{name.lower()} }}\n" for name in missing)
+    return qml_content[:end].rstrip() + "\n\n" + lines + qml_content[end:]
+
+
+def remove_component_instance(qml_content: str, component_name: str) -> str:
+    pattern = r'^[ \t]*%s\s*\{\s*id:\s*%s\s*\}[ \t]*\n' % (re.escape(component_name),
+                                                           re.escape(COMPONENT_INSTANCE_PREFIX + component_name.lower()))
+    return re.sub(pattern, '', qml_content, flags=re.MULTILINE)
+
+
+def _update_qml_file(path: str, update) -> bool:
+    """原子改写QML文件，内容不变时不写入（避免多余的文件变更通知）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    updated = update(content)
+    if updated == content:
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(updated)
+    os.replace(tmp_path, path)
+    return True
+
+
+def apply_components_to_output(output_dir: str, workspace_dir: str, main_qml_name: str) -> int:
+    """在主场景QML中实例化工作空间中已生成的组件
+
+    Args:
+        output_dir: 主场景QML所在目录（完整转换时为暂存目录）
+        workspace_dir: 工作空间目录（组件QML所在位置）
+        main_qml_name: 主场景QML组件名（不含扩展名）
+
+    Returns:
+        int: 实例化的组件数量
+    """
+    names = [os.path.splitext(name)[0] for name in get_component_qml_files(workspace_dir)]
+    main_path = os.path.join(output_dir, main_qml_name + ".qml")
+    if not names or not os.path.exists(main_path):
+        return 0
+    _update_qml_file(main_path, lambda content: add_component_instances(content, names))
+    return len(names)
+
+
+def commit_component(plan: Dict, staging_dir: str, workspace_dir: str, main_qml_name: str) -> Dict[str, int]:
+    """提交组件输出：只替换组件自己的文件，登记组件并在主场景QML中实例化"""
+    stats = staged_output.commit_staged_output(staging_dir, workspace_dir, get_manifest_name(plan['id']))
+    components = dict(load_components(workspace_dir))
+    components[plan['name']] = {'id': plan['id'], 'label': plan['label'], 'objects': plan['objects']}
+    save_components(workspace_dir, components)
+    apply_components_to_output(workspace_dir, workspace_dir, main_qml_name)
+    return stats
+
+
+def remove_component(workspace_dir: str, component_name: str, main_qml_name: str) -> bool:
+    """删除组件的输出与登记，组件中的对象在下次完整转换时回到主场景"""
+    components = dict(load_components(workspace_dir))
+    component = components.pop(component_name, None)
+    if component is None:
+        return False
+    try:
+        removed = staged_output.remove_committed_outputs(workspace_dir, get_manifest_name(component['id']))
+        main_path = os.path.join(workspace_dir, main_qml_name + ".qml")
+        if os.path.exists(main_path):
+            _update_qml_file(main_path, lambda content: remove_component_instance(content, component_name))
+        save_components(workspace_dir, components)
+        shutil.rmtree(os.path.join(workspace_dir, path_manager.WORKSPACE_STATE_DIR_NAME,
+                                   COMPONENTS_STATE_SUB_DIR, component['id']), ignore_errors=True)
+        print(f"🧹 已删除组件 {component_name}（{removed} 个文件）")
+        return True
+    except Exception as e:
+        print(f"❌ 删除组件失败: {e}")
+        return False
+
+
+def load_inline_components(workspace_dir: str) -> List:
+    """组件QML（去掉import），预览时作为内联组件声明，主场景中的组件实例可以直接解析"""
+    components = []
+    for file_name in get_component_qml_files(workspace_dir):
+        with open(os.path.join(workspace_dir, file_name), 'r', encoding='utf-8') as f:
+            body = _IMPORT_PATTERN.sub('', f.read()).strip()
+        components.append((os.path.splitext(file_name)[0], body))
+    return components
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+转换指纹模块 - 判断自上次转换以来场景变化的类型
+负责：
+1. 环境指纹：SceneEnvironment / WasdController 设置、活动相机与World IBL图像
+2. 内容指纹：可见对象的导出签名、已转换为组件的对象、导出与balsam设置、变更日志的修改计数
+3. 对比工作空间中上次成功转换记录的指纹，区分"内容变化"与"只有环境变化"
+
+只有环境变化时balsam的输出不变，可以跳过glTF导出与balsam，直接重新组装QML。
+网格编辑等不改变对象签名的修改由变更日志计数捕获；变更日志只在同一会话内可信，
+重新打开Blender后第一次转换总是完整转换。
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, Optional
+
+import bpy
+
+from . import change_journal
+
+FINGERPRINT_FILE_NAME = "fingerprint.json"
+
+# 变化类型
+CHANGE_NONE = 'NONE'
+CHANGE_ENVIRONMENT = 'ENVIRONMENT'
+CHANGE_CONTENT = 'CONTENT'
+
+# 不影响glTF与balsam输出的插件属性（面板展开状态、转换范围等）
+_CONTENT_IGNORED_PROPERTIES = {
+    'qtquick3d_environment_fast_path',
+    'qtquick3d_live_environment',
+    'qtquick3d_conversion_scope',
+    'qtquick3d_scope_collection',
+    'qtquick3d_scope_include_children',
+    'qtquick3d_component_name',
+    'qtquick3d_preflight_check',
+    'qtquick3d_balsam_cache_size_mb',
+}
+
+
+def _normalize(value):
+    """转换为可稳定序列化的值（bpy数组转列表，数据块转名称）"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+    try:
+        return [_normalize(item) for item in value]
+    except TypeError:
+        return str(value)
+
+
+def _hash(data) -> str:
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _environment_property_names():
+    from . import scene_environment
+    return set(scene_environment.get_scene_environment_manager().registered_properties)
+
+
+def _world_image_signature():
+    """World连接的IBL图像路径与修改时间"""
+    from . import ibl_mappling
+
+    info = ibl_mappling.get_world_surface_connected_image_paths()
+    signature = []
+    for key in ('surface_image', 'environment_image'):
+        path = info.get(key)
+        if path:
+            try:
+                mtime = os.path.getmtime(bpy.path.abspath(path))
+            except OSError:
+                mtime = None
+            signature.append((key, path, mtime))
+    return signature
+
+
+def environment_hash(context) -> str:
+    """环境指纹：只影响组装后的QML外壳（SceneEnvironment、WasdController、窗口尺寸）"""
+    from . import scene_environment
+
+    scene = context.scene
+    settings = {name: _normalize(value) for name, value in scene_environment.get_scene_environment_settings().items()}
+    return _hash({
+        'settings': settings,
+        'camera': scene.camera.name if scene.camera else None,
+        'world': _world_image_signature(),
+    })
+
+
+def content_hash(context, output_dir: str, export_kwargs: Dict, balsam_args) -> str:
+    """内容指纹：影响glTF导出或balsam输出的所有输入"""
+    from . import incremental_export
+    from . import component_conversion
+
+    scene = context.scene
+    objects = sorted(
+        (obj for obj in context.view_layer.objects if obj.visible_get()),
+        key=lambda obj: obj.name,
+    )
+    signatures = [repr(incremental_export.compute_object_signature(obj)) for obj in objects]
+
+    environment_properties = _environment_property_names()
+    options = {}
+    for prop in scene.bl_rna.properties:
+        name = prop.identifier
+        if (not name.startswith(('qtquick3d_', 'qmlproject_')) or name in environment_properties
+                or name in _CONTENT_IGNORED_PROPERTIES):
+            continue
+        options[name] = _normalize(getattr(scene, name, None))
+
+    return _hash({
+        'objects': signatures,
+        'components': sorted(component_conversion.get_component_object_names(output_dir)),
+        'frame_range': (scene.frame_start, scene.frame_end),
+        'export': {key: _normalize(value) for key, value in export_kwargs.items()},
+        'options': options,
+        'balsam': [str(arg) for arg in balsam_args],
+    })
+
+
+def compute_fingerprint(context, output_dir: str, export_kwargs: Dict, balsam_args) -> Dict:
+    """当前场景的转换指纹（必须在主线程调用）"""
+    journal = change_journal.get_change_journal()
+    return {
+        'session_id': journal.session_id,
+        'generation': journal.generation,
+        'content': content_hash(context, output_dir, export_kwargs, balsam_args),
+        'environment': environment_hash(context),
+    }
+
+
+def _fingerprint_path(output_dir: str) -> str:
+    from . import path_manager
+    return os.path.join(output_dir, path_manager.WORKSPACE_STATE_DIR_NAME, FINGERPRINT_FILE_NAME)
+
+
+def load_fingerprint(output_dir: str) -> Optional[Dict]:
+    """读取上次成功转换记录的指纹"""
+    path = _fingerprint_path(output_dir)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 读取转换指纹失败: {e}")
+    return None
+
+
+def save_fingerprint(output_dir: str, fingerprint: Dict):
+    """记录成功转换的指纹"""
+    path = _fingerprint_path(output_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(fingerprint, f, indent=2)
+    except Exception as e:
+        print(f"⚠️ 保存转换指纹失败: {e}")
+
+
+def clear_fingerprint(output_dir: str):
+    """删除指纹记录，下一次转换必定完整执行"""
+    path = _fingerprint_path(output_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def has_scene_output(output_dir: str) -> bool:
+    """工作空间中是否有balsam输出的场景QML"""
+    from .qml_handler import ASSEMBLED_QML_EXTENSION
+
+    try:
+        return any(name.endswith('.qml') and not name.endswith(ASSEMBLED_QML_EXTENSION)
+                   for name in os.listdir(output_dir))
+    except OSError:
+        return False
+
+
+def classify_changes(output_dir: str, fingerprint: Dict) -> str:
+    """对比上次成功转换的指纹，返回 CHANGE_NONE / CHANGE_ENVIRONMENT / CHANGE_CONTENT"""
+    previous = load_fingerprint(output_dir)
+    if not previous or not has_scene_output(output_dir):
+        return CHANGE_CONTENT
+    for key in ('session_id', 'generation', 'content'):
+        if previous.get(key) != fingerprint[key]:
+            return CHANGE_CONTENT
+    if previous.get('environment') != fingerprint['environment']:
+        return CHANGE_ENVIRONMENT
+    return CHANGE_NONE
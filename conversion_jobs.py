@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+后台转换任务模块 - 在不阻塞Blender界面的情况下运行balsam
+负责：
+1. 使用 Popen 启动balsam，并在后台线程中读取 stdout/stderr
+2. 估算转换进度，供面板进度条显示
+3. 取消任务时终止整个进程树
+4. 合并任务运行期间的重复转换请求（只保留一次后续运行）
+5. 在有上限的进程池中并行运行多个balsam任务（分片转换）
+"""
+
+import os
+import sys
+import time
+import math
+import queue
+import signal
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import conversion_trace
+
+# 任务状态
+JOB_PENDING = 'PENDING'
+JOB_RUNNING = 'RUNNING'
+JOB_SUCCEEDED = 'SUCCEEDED'
+JOB_FAILED = 'FAILED'
+JOB_CANCELLED = 'CANCELLED'
+
+# 历史吞吐量（字节/秒），用于估算进度
+_BALSAM_THROUGHPUT = None
+
+
+def _process_group_kwargs() -> Dict:
+    """让balsam运行在独立的进程组中，便于终止整个进程树"""
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(process: Optional[subprocess.Popen]):
+    """终止进程及其所有子进程"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                capture_output=True,
+                timeout=10
+            )
+        else:
+            os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        print(f"🛑 已终止balsam进程树: PID {process.pid}")
+    except Exception as e:
+        print(f"⚠️ 终止进程树失败，尝试直接终止进程: {e}")
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+class BalsamJob:
+    """一次后台balsam转换任务"""
+
+    def __init__(self, attempts: List[Dict], env: Optional[Dict] = None, input_size: int = 0,
+                 pre_run: Optional[Callable[[], bool]] = None,
+                 post_run: Optional[Callable[[bool], None]] = None):
+        """
+        Args:
+            attempts: 依次尝试的命令列表，每项包含 label/cmd/cwd/timeout
+            env: balsam运行所需的环境变量
+            input_size: 输入glTF大小（字节），用于估算进度
+            pre_run: 在后台线程中于启动balsam前调用，返回True表示已满足（如命中缓存），不再启动balsam
+            post_run: 在后台线程中于balsam结束后调用，参数为是否成功
+        """
+        self.attempts = attempts
+        self.env = env
+        self.input_size = input_size
+        self.pre_run = pre_run
+        self.post_run = post_run
+        self.cache_hit = False
+        self.state = JOB_PENDING
+        self.process = None
+        self.returncode = None
+        self.successful_attempt = None
+        self.output_lines: List[str] = []
+        self.start_time = None
+        self.end_time = None
+        self._output_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        # 转换追踪中的区间名称；任务组中的子任务不计入面板的阶段汇总（由任务组整体计时）
+        self.trace_name = "balsam"
+        self.trace_stage = True
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+    @property
+    def is_finished(self) -> bool:
+        return self.state in (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+    @property
+    def elapsed(self) -> float:
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.perf_counter()) - self.start_time
+
+    @property
+    def progress(self) -> float:
+        """估算进度（0~1）。balsam不输出百分比，按历史吞吐量或指数曲线估算"""
+        if self.state == JOB_SUCCEEDED:
+            return 1.0
+        if self.start_time is None:
+            return 0.0
+        elapsed = self.elapsed
+        if _BALSAM_THROUGHPUT and self.input_size:
+            expected = max(self.input_size / _BALSAM_THROUGHPUT, 0.5)
+            return min(0.95, elapsed / expected)
+        return min(0.95, 1.0 - math.exp(-elapsed / 10.0))
+
+    # ------------------------------------------------------------------
+    # 控制
+    # ------------------------------------------------------------------
+    def start(self):
+        """在后台线程中启动任务"""
+        self.state = JOB_RUNNING
+        self.start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run_traced, name="BalsamJob", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """在当前线程中阻塞运行任务（进程池工作线程与无界面模式使用）"""
+        self.state = JOB_RUNNING
+        self.start_time = time.perf_counter()
+        self._run_traced()
+
+    def cancel(self):
+        """取消任务并终止balsam进程树"""
+        self._cancel_event.set()
+        kill_process_tree(self.process)
+
+    def drain_output(self) -> List[str]:
+        """取出自上次调用以来的新输出行（主线程调用）"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._output_queue.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+    def _emit(self, line: str):
+        self.output_lines.append(line)
+        self._output_queue.put(line)
+
+    def _read_stream(self, stream):
+        try:
+            for line in iter(stream.readline, ''):
+                self._emit(line.rstrip())
+        except Exception:
+            pass
+        finally:
+            stream.close()
+
+    def _run_traced(self):
+        with conversion_trace.span(self.trace_name, stage=self.trace_stage):
+            self._run()
+
+    def _run(self):
+        global _BALSAM_THROUGHPUT
+        try:
+            if self.pre_run is not None and self.pre_run():
+                self.cache_hit = True
+                self.successful_attempt = {'label': "cache", 'cmd': []}
+                self._emit("⚡ 命中缓存，跳过balsam")
+                return
+            for attempt in self.attempts:
+                if self._cancel_event.is_set():
+                    break
+                self._emit(f"▶ {attempt['label']}: {' '.join(attempt['cmd'])}")
+                returncode = self._run_attempt(attempt)
+                self.returncode = returncode
+                if returncode == 0:
+                    self.successful_attempt = attempt
+                    break
+                if not self._cancel_event.is_set():
+                    self._emit(f"⚠️ {attempt['label']} 失败，返回码: {returncode}")
+            if self.post_run is not None and not self._cancel_event.is_set():
+                self.post_run(self.successful_attempt is not None)
+        except Exception as e:
+            self._emit(f"❌ 运行balsam失败: {e}")
+        finally:
+            self.end_time = time.perf_counter()
+            if self._cancel_event.is_set():
+                self.state = JOB_CANCELLED
+            elif self.successful_attempt is not None:
+                self.state = JOB_SUCCEEDED
+                if self.input_size and self.elapsed > 0 and not self.cache_hit:
+                    _BALSAM_THROUGHPUT = self.input_size / self.elapsed
+            else:
+                self.state = JOB_FAILED
+
+    def _run_attempt(self, attempt: Dict) -> Optional[int]:
+        self.process = subprocess.Popen(
+            attempt['cmd'],
+            cwd=attempt.get('cwd'),
+            env=self.env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            **_process_group_kwargs()
+        )
+        reader = threading.Thread(target=self._read_stream, args=(self.process.stdout,), daemon=True)
+        reader.start()
+
+        timeout = attempt.get('timeout')
+        attempt_start = time.perf_counter()
+        while True:
+            try:
+                returncode = self.process.wait(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if self._cancel_event.is_set():
+                    kill_process_tree(self.process)
+                elif timeout and time.perf_counter() - attempt_start > timeout:
+                    self._emit(f"❌ {attempt['label']} 超时（{timeout}s）")
+                    kill_process_tree(self.process)
+        reader.join(timeout=2)
+        return returncode
+
+
+class BalsamJobGroup(BalsamJob):
+    """一组balsam任务：在有上限的进程池中并行运行，全部成功后执行合并"""
+
+    def __init__(self, jobs: List[Tuple[str, BalsamJob]], max_workers: Optional[int] = None,
+                 finalize: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            jobs: [(名称, 任务)]，名称用于输出前缀
+            max_workers: 同时运行的balsam进程数上限，默认为CPU核心数
+            finalize: 所有任务成功后在后台线程中调用，返回False表示合并失败
+        """
+        super().__init__([], input_size=sum(job.input_size for _name, job in jobs))
+        self.jobs = jobs
+        for name, job in jobs:
+            job.trace_name = f"balsam [{name}]"
+            job.trace_stage = False
+        self.max_workers = max(1, min(max_workers or os.cpu_count() or 1, max(len(jobs), 1)))
+        self.finalize = finalize
+
+    @property
+    def progress(self) -> float:
+        """按输入大小加权的平均进度"""
+        if self.state == JOB_SUCCEEDED:
+            return 1.0
+        if not self.jobs:
+            return 0.0
+        weights = [max(job.input_size, 1) for _name, job in self.jobs]
+        done = sum(weight * job.progress for weight, (_name, job) in zip(weights, self.jobs))
+        return min(0.95, done / sum(weights))
+
+    def cancel(self):
+        """取消所有任务（包括尚未启动的任务）"""
+        self._cancel_event.set()
+        for _name, job in self.jobs:
+            job.cancel()
+
+    def drain_output(self) -> List[str]:
+        lines = super().drain_output()
+        for name, job in self.jobs:
+            lines.extend(f"[{name}] {line}" for line in job.drain_output())
+        return lines
+
+    def _run_child(self, name: str, job: BalsamJob):
+        if self._cancel_event.is_set():
+            job.state = JOB_CANCELLED
+            return
+        job.run()
+        if job.state == JOB_FAILED:
+            # 一个任务失败，整体已经失败，停止其余任务
+            self._emit(f"❌ {name} 转换失败，停止其余任务")
+            for _other_name, other in self.jobs:
+                if other is not job:
+                    other.cancel()
+
+    def _run(self):
+        try:
+            self._emit(f"▶ 并行运行 {len(self.jobs)} 个balsam任务（最多 {self.max_workers} 个进程）")
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="BalsamJobGroup") as pool:
+                futures = [pool.submit(self._run_child, name, job) for name, job in self.jobs]
+                for future in futures:
+                    future.result()
+
+            self.cache_hit = bool(self.jobs) and all(job.cache_hit for _name, job in self.jobs)
+            if self._cancel_event.is_set():
+                return
+            failed = [name for name, job in self.jobs if job.state != JOB_SUCCEEDED]
+            if failed:
+                self._emit(f"❌ 失败的任务: {', '.join(failed)}")
+                return
+            with conversion_trace.span("merge_shards"):
+                merged = self.finalize is None or self.finalize()
+            if merged:
+                self.successful_attempt = {'label': "group", 'cmd': []}
+        except Exception as e:
+            self._emit(f"❌ 运行balsam任务组失败: {e}")
+        finally:
+            self.end_time = time.perf_counter()
+            if self._cancel_event.is_set():
+                self.state = JOB_CANCELLED
+            elif self.successful_attempt is not None:
+                self.state = JOB_SUCCEEDED
+            else:
+                self.state = JOB_FAILED
+
+
+class ConversionJobManager:
+    """转换任务管理器：同一时间只运行一个任务，重复请求合并为一次后续运行"""
+
+    def __init__(self):
+        self.current_job: Optional[BalsamJob] = None
+        self.follow_up_requested = False
+        self.last_status = ""
+
+    def is_running(self) -> bool:
+        return self.current_job is not None and not self.current_job.is_finished
+
+    def start(self, job: BalsamJob):
+        self.current_job = job
+        self.last_status = "Running balsam..."
+        job.start()
+
+    def request_follow_up(self):
+        """任务运行期间再次点击Convert：记录一次后续运行（多次点击只算一次）"""
+        self.follow_up_requested = True
+        self.last_status = "Follow-up conversion queued"
+        print("ℹ️ 转换正在进行，已合并为一次后续转换")
+
+    def take_follow_up(self) -> bool:
+        """取出后续运行请求"""
+        requested = self.follow_up_requested
+        self.follow_up_requested = False
+        return requested
+
+    def cancel(self) -> bool:
+        """取消当前任务，同时丢弃后续运行请求"""
+        self.follow_up_requested = False
+        if self.is_running():
+            self.current_job.cancel()
+            self.last_status = "Cancelled"
+            return True
+        return False
+
+
+# 全局任务管理器实例
+_job_manager = None
+
+
+def get_job_manager() -> ConversionJobManager:
+    """获取全局任务管理器实例"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = ConversionJobManager()
+    return _job_manager
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+转换计时追踪模块 - 以Chrome trace-event格式记录每次转换各阶段的耗时
+负责：
+1. 提供可嵌套的计时区间（span），未开始追踪时不做任何记录，开销可以忽略
+2. 按线程记录区间，后台balsam线程的区间显示在各自的轨道上（查看器按时间自动嵌套）
+3. 转换结束后写出 <工作空间>/.blender2quick3d/trace.json，可在 chrome://tracing 或 Perfetto 中打开
+4. 汇总标记为"阶段"的区间（glTF导出、balsam、IBL复制、qmldir生成、QML组装等），供面板显示耗时最多的阶段
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from . import path_manager
+
+TRACE_FILE_NAME = "trace.json"
+TRACE_CATEGORY = "blender2quick3d"
+# 面板中显示的阶段数量
+TRACE_SUMMARY_TOP = 5
+
+_trace_lock = threading.Lock()
+_active_trace = None
+_last_summary = None
+
+
+class ConversionTrace:
+    """一次转换的计时记录"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.events = []
+        self.thread_names = {}
+        self._lock = threading.Lock()
+        self.root_thread = threading.get_ident()
+        self._thread_id(self.root_thread)
+        self.root_start = self.origin
+        self.root_end = None
+
+    def _thread_id(self, ident: int) -> int:
+        # Chrome trace 中的 tid 使用从1开始的小整数，便于阅读
+        if ident not in self.thread_names:
+            self.thread_names[ident] = (len(self.thread_names) + 1, threading.current_thread().name)
+        return self.thread_names[ident][0]
+
+    def add_event(self, name: str, start: float, end: float, stage: bool = False, args: Optional[Dict] = None):
+        """记录一个完整区间（时间为 time.perf_counter 的值）"""
+        with self._lock:
+            self.events.append({
+                'name': name,
+                'start': start,
+                'end': end,
+                'stage': stage,
+                'tid': self._thread_id(threading.get_ident()),
+                'args': dict(args or {}),
+            })
+
+    @property
+    def total(self) -> float:
+        return (self.root_end or time.perf_counter()) - self.root_start
+
+    def to_chrome_trace(self) -> Dict:
+        """转换为Chrome trace-event JSON对象"""
+        pid = os.getpid()
+        trace_events = [{'name': "process_name", 'ph': "M", 'pid': pid, 'tid': 0,
+                         'args': {'name': "Blender2Quick3D"}}]
+        for tid, thread_name in self.thread_names.values():
+            trace_events.append({'name': "thread_name", 'ph': "M", 'pid': pid, 'tid': tid,
+                                 'args': {'name': thread_name}})
+        for event in self.events:
+            args = dict(event['args'])
+            if event['stage']:
+                args['stage'] = True
+            trace_events.append({
+                'name': event['name'],
+                'cat': TRACE_CATEGORY,
+                'ph': "X",
+                'ts': round((event['start'] - self.origin) * 1e6, 3),
+                'dur': round((event['end'] - event['start']) * 1e6, 3),
+                'pid': pid,
+                'tid': event['tid'],
+                'args': args,
+            })
+        return {'traceEvents': trace_events, 'displayTimeUnit': "ms",
+                'otherData': {'run': self.name, 'total_seconds': self.total}}
+
+    def summarize(self, top: int = TRACE_SUMMARY_TOP) -> Dict:
+        """按阶段名称汇总耗时，返回耗时最多的几个阶段"""
+        stages = {}
+        for event in self.events:
+            if not event['stage']:
+                continue
+            entry = stages.setdefault(event['name'], {'name': event['name'], 'seconds': 0.0, 'count': 0})
+            entry['seconds'] += event['end'] - event['start']
+            entry['count'] += 1
+        ranked = sorted(stages.values(), key=lambda entry: entry['seconds'], reverse=True)
+        return {'name': self.name, 'total': self.total, 'stages': ranked[:top]}
+
+
+def get_active_trace() -> Optional[ConversionTrace]:
+    return _active_trace
+
+
+def get_last_summary() -> Optional[Dict]:
+    """最近一次完成的追踪汇总 {'name', 'total', 'stages', 'path'}"""
+    return _last_summary
+
+
+def begin_trace(name: str) -> ConversionTrace:
+    """开始一次追踪（替换尚未结束的追踪），根区间在 end_trace 时记录"""
+    global _active_trace
+    trace = ConversionTrace(name)
+    with _trace_lock:
+        _active_trace = trace
+    return trace
+
+
+def end_trace(output_dir: Optional[str] = None) -> Optional[str]:
+    """结束当前追踪，写出 trace.json 并更新面板汇总
+
+    Args:
+        output_dir: 工作空间目录（trace.json 写入其内部状态目录），为空时只更新汇总
+
+    Returns:
+        str: trace.json 路径，未写出时返回None
+    """
+    global _active_trace, _last_summary
+    with _trace_lock:
+        trace = _active_trace
+        _active_trace = None
+    if trace is None:
+        return None
+    trace.root_end = time.perf_counter()
+    trace.events.insert(0, {'name': trace.name, 'start': trace.root_start, 'end': trace.root_end,
+                            'stage': False, 'tid': trace.thread_names[trace.root_thread][0], 'args': {}})
+
+    summary = trace.summarize()
+    summary['path'] = None
+    if output_dir:
+        try:
+            state_dir = os.path.join(output_dir, path_manager.WORKSPACE_STATE_DIR_NAME)
+            os.makedirs(state_dir, exist_ok=True)
+            trace_path = os.path.join(state_dir, TRACE_FILE_NAME)
+            with open(trace_path, 'w', encoding='utf-8') as f:
+                json.dump(trace.to_chrome_trace(), f)
+            summary['path'] = trace_path
+        except Exception as e:
+            print(f"⚠️ 写入转换追踪失败: {e}")
+    _last_summary = summary
+
+    stages = ", ".join(f"{entry['name']} {entry['seconds']:.2f}s" for entry in summary['stages'])
+    print(f"⏱️ {trace.name} 总耗时 {trace.total:.2f}s: {stages}")
+    if summary['path']:
+        print(f"⏱️ 追踪已写入: {summary['path']}")
+    return summary['path']
+
+
+@contextmanager
+def span(name: str, stage: bool = False, **args):
+    """计时区间（未开始追踪时不记录）
+
+    Args:
+        name: 区间名称
+        stage: 是否为面板汇总中的阶段（阶段之间不应相互嵌套，避免重复计时）
+        args: 附加信息，显示在trace查看器的详情中
+    """
+    trace = _active_trace
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_event(name, start, time.perf_counter(), stage, args)
+
+
+@contextmanager
+def traced_run(name: str, get_output_dir: Callable[[], Optional[str]]):
+    """一次完整的运行：没有进行中的追踪时开始新的追踪并在结束时写出，否则作为普通区间嵌套
+
+    Args:
+        name: 运行名称（根区间）
+        get_output_dir: 结束时调用，返回写入 trace.json 的工作空间目录
+    """
+    if _active_trace is not None:
+        with span(name):
+            yield
+        return
+    begin_trace(name)
+    try:
+        yield
+    finally:
+        try:
+            output_dir = get_output_dir()
+        except Exception:
+            output_dir = None
+        end_trace(output_dir)
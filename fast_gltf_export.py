@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+"""
+快速glTF导出模块 - 不经过 bpy.ops.export_scene.gltf，用 foreach_get + NumPy 直接写出GLB/glTF
+负责：
+1. 用 foreach_get 把求值后网格的顶点、角点法线、UV与切线一次性读入NumPy数组
+2. 按三角形材质拆分图元，以向量化方式按（位置、法线、UV、切线）合并相同的角点，生成顶点与索引缓冲
+3. 导出插件实际使用的内容：网格、Principled BSDF的PBR材质与贴图、相机、KHR_lights_punctual灯光、节点变换与自定义属性
+4. 坐标系与官方导出器一致（export_yup 时Z轴向上转换为Y轴向上，相机与灯光附加-90°的X轴修正）
+
+遇到不支持的内容（骨骼蒙皮、形态键、动画、实例、复杂的材质节点等）时返回None，
+由调用方回退到 bpy.ops.export_scene.gltf，保证输出结果不缺内容。
+"""
+
+import os
+import math
+import zlib
+import struct
+from urllib.parse import quote
+from typing import Dict, List, Optional
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+from . import gltf_utils
+
+# Z轴向上 -> Y轴向上：(x, y, z) -> (x, z, -y)
+AXIS_CONVERSION = Matrix(((1.0, 0.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, -1.0, 0.0, 0.0), (0.0, 0.0, 0.0, 1.0)))
+# Blender相机/灯光朝向局部-Z、上方为+Y，转换坐标系后需要绕X轴旋转-90°才与glTF一致
+CAMERA_LIGHT_CORRECTION = Matrix.Rotation(-math.pi / 2, 4, 'X')
+
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+MAX_UV_LAYERS = 2
+
+GL_ARRAY_BUFFER = 34962
+GL_ELEMENT_ARRAY_BUFFER = 34963
+COMPONENT_UNSIGNED_SHORT = 5123
+COMPONENT_UNSIGNED_INT = 5125
+COMPONENT_FLOAT = 5126
+FILTER_NEAREST = 9728
+WRAP_MODES = {'EXTEND': 33071, 'CLIP': 33071, 'MIRROR': 33648}
+
+# Principled BSDF 中不会被导出、但连接了节点或启用后官方导出器会写出扩展的输入（新旧版本名称）
+EXTENSION_INPUTS = (
+    ('Transmission Weight', 'Transmission'),
+    ('Coat Weight', 'Clearcoat'),
+    ('Sheen Weight', 'Sheen'),
+)
+
+
+class UnsupportedContent(Exception):
+    """场景中有快速导出器不处理的内容，需要回退到官方导出器"""
+
+
+# ----------------------------------------------------------------------
+# 对外接口
+# ----------------------------------------------------------------------
+
+def export_scene(context, filepath: str, export_kwargs: Dict) -> Optional[str]:
+    """快速导出当前场景
+
+    Args:
+        context: bpy.context
+        filepath: 目标路径（扩展名按导出格式修正）
+        export_kwargs: 与 bpy.ops.export_scene.gltf 相同的参数（只读取快速导出器理解的部分）
+
+    Returns:
+        str: 写入的文件路径；场景包含不支持的内容或导出失败时返回None
+    """
+    try:
+        exporter = SceneExporter(context, export_kwargs)
+        doc = exporter.build()
+        export_format = export_kwargs.get('export_format', 'GLB')
+        exporter.write_images(doc, export_format, os.path.dirname(os.path.abspath(filepath)))
+        path = doc.save(filepath, export_format)
+        stats = exporter.stats
+        print(f"⚡ 快速导出完成: {stats['nodes']} 个节点, {stats['meshes']} 个网格, "
+              f"{stats['triangles']} 个三角形, {stats['materials']} 个材质")
+        return path
+    except UnsupportedContent as e:
+        print(f"ℹ️ 快速导出不支持 {e}，使用Blender glTF导出器")
+        return None
+    except Exception as e:
+        print(f"⚠️ 快速导出失败，使用Blender glTF导出器: {e}")
+        return None
+
+
+# ----------------------------------------------------------------------
+# 网格
+# ----------------------------------------------------------------------
+
+def _foreach_get(collection, attribute: str, count: int, dtype, width: int = 1):
+    data = np.empty(count * width, dtype=dtype)
+    if count:
+        collection.foreach_get(attribute, data)
+    return data.reshape(count, width) if width > 1 else data
+
+
+def _to_yup(vectors):
+    """(x, y, z) -> (x, z, -y)"""
+    return np.stack([vectors[:, 0], vectors[:, 2], -vectors[:, 1]], axis=1)
+
+
+def extract_mesh_arrays(mesh, use_yup: bool = True, export_normals: bool = True,
+                        export_texcoords: bool = True, export_tangents: bool = True) -> Dict:
+    """读取网格的三角形与逐角点属性
+
+    Returns:
+        dict: {'triangles': (t,3) 角点索引, 'materials': (t,) 材质槽,
+               'corners': (角点数, k) float32 属性矩阵, 'layout': [(语义, 列范围)]}
+    """
+    mesh.calc_loop_triangles()
+    triangle_count = len(mesh.loop_triangles)
+    triangles = _foreach_get(mesh.loop_triangles, 'loops', triangle_count, np.int32, 3)
+    materials = _foreach_get(mesh.loop_triangles, 'material_index', triangle_count, np.int32)
+
+    loop_count = len(mesh.loops)
+    vertex_index = _foreach_get(mesh.loops, 'vertex_index', loop_count, np.int32)
+    positions = _foreach_get(mesh.vertices, 'co', len(mesh.vertices), np.float32, 3)[vertex_index]
+    columns = [('POSITION', positions)]
+
+    if export_normals:
+        if hasattr(mesh, 'calc_normals_split'):
+            mesh.calc_normals_split()  # Blender 4.1 之前需要先计算角点法线
+        columns.append(('NORMAL', _foreach_get(mesh.loops, 'normal', loop_count, np.float32, 3)))
+
+    uv_layers = list(mesh.uv_layers)[:MAX_UV_LAYERS] if export_texcoords else []
+    for index, layer in enumerate(uv_layers):
+        uv = _foreach_get(layer.data, 'uv', loop_count, np.float32, 2)
+        uv[:, 1] = 1.0 - uv[:, 1]  # glTF的V轴向下
+        columns.append((f'TEXCOORD_{index}', uv))
+
+    if export_tangents and export_normals and uv_layers:
+        try:
+            mesh.calc_tangents(uvmap=uv_layers[0].name)
+            tangents = _foreach_get(mesh.loops, 'tangent', loop_count, np.float32, 3)
+            signs = _foreach_get(mesh.loops, 'bitangent_sign', loop_count, np.float32)
+            columns.append(('TANGENT', np.hstack([tangents, signs[:, None]])))
+        except RuntimeError:
+            pass  # 含有多于四边的面时无法计算切线，交给balsam生成
+
+    layout = []
+    start = 0
+    converted = []
+    for semantic, values in columns:
+        if use_yup and semantic in ('POSITION', 'NORMAL'):
+            values = _to_yup(values)
+        elif use_yup and semantic == 'TANGENT':
+            values = np.hstack([_to_yup(values[:, :3]), values[:, 3:]])
+        converted.append(values.astype(np.float32, copy=False))
+        layout.append((semantic, slice(start, start + values.shape[1])))
+        start += values.shape[1]
+    corners = np.hstack(converted) if converted else np.zeros((loop_count, 0), dtype=np.float32)
+    return {'triangles': triangles, 'materials': materials, 'corners': np.ascontiguousarray(corners), 'layout': layout}
+
+
+def weld_corners(corners, corner_indices):
+    """合并属性完全相同的角点
+
+    Args:
+        corners: (角点数, k) 属性矩阵
+        corner_indices: 三角形使用的角点索引（展开的一维数组）
+
+    Returns:
+        (vertices, indices): 按首次使用排序的顶点属性与三角形索引
+    """
+    rows = np.ascontiguousarray(corners[corner_indices])
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).reshape(-1)
+    _unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rows[first[order]], rank[inverse]
+
+
+# ----------------------------------------------------------------------
+# 图像
+# ----------------------------------------------------------------------
+
+def _encode_png(width: int, height: int, rgba) -> bytes:
+    """把 (height, width, 4) 的uint8数组编码为PNG（第一行是图像顶部）"""
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def image_data(image):
+    """图像的编码数据与MIME类型：PNG/JPEG原样使用，其他格式从像素编码为PNG"""
+    file_format = getattr(image, 'file_format', '')
+    if file_format in ('PNG', 'JPEG'):
+        mime = 'image/png' if file_format == 'PNG' else 'image/jpeg'
+        if image.packed_file:
+            return bytes(image.packed_file.data), mime
+        path = bpy.path.abspath(image.filepath_raw or image.filepath, library=image.library)
+        if image.source == 'FILE' and os.path.isfile(path) and not image.is_dirty:
+            with open(path, 'rb') as f:
+                return f.read(), mime
+
+    width, height = image.size
+    if not width or not height:
+        raise UnsupportedContent(f"image without pixels '{image.name}'")
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    rgba = (np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8).reshape(height, width, 4)
+    return _encode_png(width, height, rgba[::-1]), 'image/png'
+
+
+# ----------------------------------------------------------------------
+# 材质节点
+# ----------------------------------------------------------------------
+
+def _input(node, *names):
+    for name in names:
+        socket = node.inputs.get(name)
+        if socket is not None:
+            return socket
+    return None
+
+
+def _linked_from(socket):
+    """socket连接的上游 (节点, 输出socket)，跳过转接点"""
+    if socket is None or not socket.is_linked:
+        return None, None
+    link = socket.links[0]
+    node, output = link.from_node, link.from_socket
+    while node.type == 'REROUTE':
+        if not node.inputs[0].is_linked:
+            return None, None
+        link = node.inputs[0].links[0]
+        node, output = link.from_node, link.from_socket
+    return node, output
+
+
+def _image_node(socket, outputs=('Color',)):
+    """socket直接连接的图像纹理节点，其他连接方式不支持"""
+    node, output = _linked_from(socket)
+    if node is None:
+        return None
+    if node.type != 'TEX_IMAGE' or output.name not in outputs or node.image is None:
+        raise UnsupportedContent(f"node '{node.name}' linked to '{socket.name}'")
+    if node.inputs['Vector'].is_linked:
+        raise UnsupportedContent(f"texture coordinates of '{node.name}'")
+    return node
+
+
+def _find_principled(material):
+    """材质输出连接的Principled BSDF；没有使用节点时返回None"""
+    if not material.use_nodes or not material.node_tree:
+        return None
+    outputs = [node for node in material.node_tree.nodes if node.type == 'OUTPUT_MATERIAL']
+    output = next((node for node in outputs if node.is_active_output), outputs[0] if outputs else None)
+    if output is None:
+        return None
+    node, _socket = _linked_from(output.inputs['Surface'])
+    if node is None:
+        return None
+    if node.type != 'BSDF_PRINCIPLED':
+        raise UnsupportedContent(f"material '{material.name}' uses {node.type}")
+    return node
+
+
+# ----------------------------------------------------------------------
+# 场景
+# ----------------------------------------------------------------------
+
+class SceneExporter:
+    """把当前视图层的可见对象转换为glTF文档"""
+
+    def __init__(self, context, export_kwargs: Dict):
+        self.context = context
+        self.scene = context.scene
+        self.kwargs = export_kwargs
+        self.use_yup = export_kwargs.get('export_yup', True)
+        self.doc = gltf_utils.GLTFDocument()
+        self.doc.gltf['asset']['generator'] = "Blender2Quick3D fast_gltf_export"
+        self.images = []          # [(名称, 数据, MIME)]
+        self.image_indices = {}
+        self.texture_indices = {}
+        self.material_indices = {}
+        self.mesh_indices = {}
+        self.light_indices = {}
+        self.stats = {'nodes': 0, 'meshes': 0, 'triangles': 0, 'materials': 0}
+
+    # 通用 ---------------------------------------------------------------
+
+    def _append(self, key: str, item: Dict) -> int:
+        items = self.doc.gltf.setdefault(key, [])
+        items.append(item)
+        return len(items) - 1
+
+    def _add_accessor(self, data, accessor_type: str, component_type: int, target: int, with_bounds=False) -> int:
+        view = self.doc.add_buffer_view(np.ascontiguousarray(data).tobytes(), target)
+        accessor = {'bufferView': view, 'componentType': component_type, 'count': len(data), 'type': accessor_type}
+        if with_bounds and len(data):
+            accessor['min'] = data.min(axis=0).tolist()
+            accessor['max'] = data.max(axis=0).tolist()
+        return self._append('accessors', accessor)
+
+    @staticmethod
+    def _extras(id_block) -> Optional[Dict]:
+        """自定义属性（只保留可序列化为JSON的值）"""
+        extras = {}
+        for key in id_block.keys():
+            if key.startswith('_') or key in ('cycles',):
+                continue
+            value = id_block[key]
+            if hasattr(value, 'to_dict'):
+                value = value.to_dict()
+            elif hasattr(value, 'to_list'):
+                value = value.to_list()
+            if isinstance(value, (str, int, float, bool, list, dict)):
+                extras[key] = value
+        return extras or None
+
+    # 检查 ---------------------------------------------------------------
+
+    def collect_objects(self, depsgraph) -> List:
+        """需要导出的对象；发现不支持的内容时抛出 UnsupportedContent"""
+        use_visible = self.kwargs.get('use_visible', False)
+        objects = [obj for obj in self.context.view_layer.objects if not use_visible or obj.visible_get()]
+        export_animations = self.kwargs.get('export_animations', True)
+        for obj in objects:
+            if obj.type == 'ARMATURE':
+                raise UnsupportedContent(f"armature '{obj.name}'")
+            if obj.instance_type == 'COLLECTION' and obj.instance_collection:
+                raise UnsupportedContent(f"collection instance '{obj.name}'")
+            if export_animations and obj.animation_data and (obj.animation_data.action or obj.animation_data.nla_tracks):
+                raise UnsupportedContent(f"animation on '{obj.name}'")
+            if obj.type == 'MESH':
+                shape_keys = obj.data.shape_keys
+                if shape_keys and len(shape_keys.key_blocks) > 1 and self.kwargs.get('export_morph', True):
+                    raise UnsupportedContent(f"shape keys on '{obj.name}'")
+                if any(modifier.type == 'ARMATURE' for modifier in obj.modifiers):
+                    raise UnsupportedContent(f"skinned mesh '{obj.name}'")
+            if obj.type == 'LIGHT' and obj.data.type != 'AREA' and self.kwargs.get('export_import_convert_lighting_mode', 'COMPAT') not in ('COMPAT', 'RAW'):
+                raise UnsupportedContent("lighting mode")
+        if any(instance.is_instance for instance in depsgraph.object_instances):
+            raise UnsupportedContent("geometry/particle instances")
+        return objects
+
+    # 构建 ---------------------------------------------------------------
+
+    def build(self):
+        depsgraph = self.context.evaluated_depsgraph_get()
+        objects = self.collect_objects(depsgraph)
+        exported = set(obj.name for obj in objects)
+
+        world_matrices = {}
+        node_indices = {}
+        for obj in objects:
+            evaluated = obj.evaluated_get(depsgraph)
+            world = evaluated.matrix_world.copy()
+            if self.use_yup:
+                world = AXIS_CONVERSION @ world @ AXIS_CONVERSION.inverted()
+            if obj.type in ('CAMERA', 'LIGHT'):
+                world = world @ CAMERA_LIGHT_CORRECTION
+            world_matrices[obj.name] = world
+            node_indices[obj.name] = self._append('nodes', {'name': obj.name})
+
+        roots = []
+        for obj in objects:
+            # 父对象未导出时挂到最近的已导出祖先上
+            parent = obj.parent
+            while parent is not None and parent.name not in exported:
+                parent = parent.parent
+            world = world_matrices[obj.name]
+            if parent is not None:
+                local = world_matrices[parent.name].inverted_safe() @ world
+                self.doc.gltf['nodes'][node_indices[parent.name]].setdefault('children', []).append(node_indices[obj.name])
+            else:
+                local = world
+                roots.append(node_indices[obj.name])
+            node = self.doc.gltf['nodes'][node_indices[obj.name]]
+            self._set_transform(node, local)
+            self._attach_content(node, obj, depsgraph)
+            if self.kwargs.get('export_extras', False):
+                extras = self._extras(obj)
+                if extras:
+                    node['extras'] = extras
+
+        self.doc.gltf['scenes'] = [{'name': self.scene.name, 'nodes': roots}]
+        self.doc.gltf['scene'] = 0
+        if self.light_indices:
+            self.doc.gltf.setdefault('extensionsUsed', []).append('KHR_lights_punctual')
+        self.stats['nodes'] = len(objects)
+        return self.doc
+
+    @staticmethod
+    def _set_transform(node: Dict, matrix):
+        translation, rotation, scale = matrix.decompose()
+        if translation.length > 1e-9:
+            node['translation'] = list(translation)
+        if abs(rotation.w - 1.0) > 1e-9:
+            node['rotation'] = [rotation.x, rotation.y, rotation.z, rotation.w]
+        if any(abs(value - 1.0) > 1e-9 for value in scale):
+            node['scale'] = list(scale)
+
+    def _attach_content(self, node: Dict, obj, depsgraph):
+        if obj.type in GEOMETRY_TYPES:
+            mesh_index = self.export_mesh(obj, depsgraph)
+            if mesh_index is not None:
+                node['mesh'] = mesh_index
+        elif obj.type == 'CAMERA' and self.kwargs.get('export_cameras', True):
+            node['camera'] = self.export_camera(obj.data)
+        elif obj.type == 'LIGHT' and self.kwargs.get('export_lights', True):
+            light_index = self.export_light(obj.data)
+            if light_index is not None:
+                node['extensions'] = {'KHR_lights_punctual': {'light': light_index}}
+
+    # 网格 ---------------------------------------------------------------
+
+    def _material_slots(self, obj) -> List:
+        if self.kwargs.get('export_materials', 'EXPORT') != 'EXPORT':
+            return []
+        return [slot.material for slot in obj.material_slots]
+
+    def export_mesh(self, obj, depsgraph) -> Optional[int]:
+        materials = self._material_slots(obj)
+        # 没有修改器的网格对象共享同一份glTF网格（与官方导出器相同，实例化依赖这一点）
+        shareable = obj.type == 'MESH' and not obj.modifiers
+        key = (obj.data.name_full, tuple(m.name_full if m else None for m in materials)) if shareable else obj.name
+        if key in self.mesh_indices:
+            return self.mesh_indices[key]
+
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        try:
+            if mesh is None:
+                return None
+            arrays = extract_mesh_arrays(
+                mesh, self.use_yup,
+                self.kwargs.get('export_normals', True),
+                self.kwargs.get('export_texcoords', True),
+                self.kwargs.get('export_tangents', False),
+            )
+            mesh_name = obj.data.name if shareable else (mesh.name or obj.name)
+        finally:
+            evaluated.to_mesh_clear()
+
+        primitives = self._build_primitives(arrays, materials)
+        mesh_index = self._append('meshes', {'name': mesh_name, 'primitives': primitives}) if primitives else None
+        self.mesh_indices[key] = mesh_index
+        if mesh_index is not None:
+            self.stats['meshes'] += 1
+        return mesh_index
+
+    def _build_primitives(self, arrays: Dict, materials: List) -> List[Dict]:
+        triangles = arrays['triangles']
+        if not len(triangles):
+            return []
+        slot_count = max(len(materials), 1)
+        slots = np.clip(arrays['materials'], 0, slot_count - 1)
+        primitives = []
+        for slot in np.unique(slots):
+            corner_indices = triangles[slots == slot].reshape(-1)
+            vertices, indices = weld_corners(arrays['corners'], corner_indices)
+
+            attributes = {}
+            for semantic, columns in arrays['layout']:
+                values = np.ascontiguousarray(vertices[:, columns])
+                accessor_type = {2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}[values.shape[1]]
+                attributes[semantic] = self._add_accessor(values, accessor_type, COMPONENT_FLOAT, GL_ARRAY_BUFFER,
+                                                          with_bounds=semantic == 'POSITION')
+            if len(vertices) <= 0xFFFF:
+                index_data, component = indices.astype('<u2'), COMPONENT_UNSIGNED_SHORT
+            else:
+                index_data, component = indices.astype('<u4'), COMPONENT_UNSIGNED_INT
+            primitive = {
+                'attributes': attributes,
+                'indices': self._add_accessor(index_data, 'SCALAR', component, GL_ELEMENT_ARRAY_BUFFER),
+                'mode': 4,
+            }
+            material = materials[slot] if slot < len(materials) else None
+            if material is not None:
+                primitive['material'] = self.export_material(material)
+            primitives.append(primitive)
+            self.stats['triangles'] += len(indices) // 3
+        return primitives
+
+    # 材质 ---------------------------------------------------------------
+
+    def export_material(self, material) -> int:
+        if material.name_full in self.material_indices:
+            return self.material_indices[material.name_full]
+
+        principled = _find_principled(material)
+        pbr = {}
+        gltf_material = {'name': material.name, 'pbrMetallicRoughness': pbr}
+        if principled is None:
+            pbr['baseColorFactor'] = list(material.diffuse_color)
+            pbr['metallicFactor'] = material.metallic
+            pbr['roughnessFactor'] = material.roughness
+        else:
+            self._principled_to_gltf(material, principled, gltf_material, pbr)
+        if not material.use_backface_culling:
+            gltf_material['doubleSided'] = True
+        if self.kwargs.get('export_extras', False):
+            extras = self._extras(material)
+            if extras:
+                gltf_material['extras'] = extras
+
+        index = self._append('materials', gltf_material)
+        self.material_indices[material.name_full] = index
+        self.stats['materials'] += 1
+        return index
+
+    def _principled_to_gltf(self, material, principled, gltf_material: Dict, pbr: Dict):
+        for names in EXTENSION_INPUTS:
+            socket = _input(principled, *names)
+            if socket is not None and (socket.is_linked or socket.default_value > 0.0):
+                raise UnsupportedContent(f"'{socket.name}' in material '{material.name}'")
+
+        # 基础色与透明度
+        base_socket = _input(principled, 'Base Color')
+        base_color = list(base_socket.default_value)
+        base_node = _image_node(base_socket)
+        if base_node:
+            pbr['baseColorTexture'] = {'index': self.export_texture(base_node)}
+            base_color = [1.0, 1.0, 1.0, 1.0]
+        alpha_socket = _input(principled, 'Alpha')
+        alpha_linked = alpha_socket is not None and alpha_socket.is_linked
+        if alpha_linked:
+            alpha_node = _image_node(alpha_socket, outputs=('Alpha',))
+            if alpha_node is not base_node:
+                raise UnsupportedContent(f"alpha of material '{material.name}'")
+        elif alpha_socket is not None:
+            base_color[3] *= alpha_socket.default_value
+        if base_color != [1.0, 1.0, 1.0, 1.0]:
+            pbr['baseColorFactor'] = base_color
+        if alpha_linked or base_color[3] < 1.0:
+            blend_method = getattr(material, 'blend_method', 'BLEND')
+            if blend_method == 'CLIP':
+                gltf_material['alphaMode'] = 'MASK'
+                gltf_material['alphaCutoff'] = material.alpha_threshold
+            elif blend_method != 'OPAQUE':
+                gltf_material['alphaMode'] = 'BLEND'
+
+        # 金属度/粗糙度：未连接时为系数，连接时必须来自同一张图像分离出的B/G通道
+        metallic = _input(principled, 'Metallic')
+        roughness = _input(principled, 'Roughness')
+        channel_image = None
+        for socket, channels in ((metallic, ('Blue', 'B')), (roughness, ('Green', 'G'))):
+            node, output = _linked_from(socket)
+            if node is None:
+                continue
+            if node.type not in ('SEPARATE_COLOR', 'SEPRGB', 'SEPARATE_RGB') or output.name not in channels:
+                raise UnsupportedContent(f"'{socket.name}' in material '{material.name}'")
+            image_node = _image_node(_input(node, 'Color', 'Image'))
+            if image_node is None or (channel_image is not None and image_node.image != channel_image.image):
+                raise UnsupportedContent(f"metallic/roughness of material '{material.name}'")
+            channel_image = image_node
+        if channel_image is not None:
+            pbr['metallicRoughnessTexture'] = {'index': self.export_texture(channel_image)}
+        pbr['metallicFactor'] = 1.0 if metallic.is_linked else metallic.default_value
+        pbr['roughnessFactor'] = 1.0 if roughness.is_linked else roughness.default_value
+
+        # 法线贴图：Normal Map 节点（切线空间）+ 图像
+        normal_node, _output = _linked_from(_input(principled, 'Normal'))
+        if normal_node is not None:
+            if normal_node.type != 'NORMAL_MAP' or normal_node.space != 'TANGENT':
+                raise UnsupportedContent(f"normal input of material '{material.name}'")
+            image_node = _image_node(normal_node.inputs['Color'])
+            if image_node is not None:
+                gltf_material['normalTexture'] = {'index': self.export_texture(image_node)}
+                strength = normal_node.inputs['Strength']
+                if strength.is_linked:
+                    raise UnsupportedContent(f"normal strength of material '{material.name}'")
+                if strength.default_value != 1.0:
+                    gltf_material['normalTexture']['scale'] = strength.default_value
+
+        # 自发光：颜色 × 强度，超过1的部分写入 KHR_materials_emissive_strength
+        emission_socket = _input(principled, 'Emission Color', 'Emission')
+        strength_socket = _input(principled, 'Emission Strength')
+        strength = strength_socket.default_value if strength_socket is not None else 1.0
+        if strength_socket is not None and strength_socket.is_linked:
+            raise UnsupportedContent(f"emission strength of material '{material.name}'")
+        emission_node = _image_node(emission_socket)
+        if emission_node is not None:
+            gltf_material['emissiveTexture'] = {'index': self.export_texture(emission_node)}
+            emissive = [strength] * 3
+        else:
+            emissive = [value * strength for value in list(emission_socket.default_value)[:3]]
+        peak = max(emissive)
+        if peak > 1.0:
+            gltf_material['emissiveFactor'] = [value / peak for value in emissive]
+            gltf_material['extensions'] = {'KHR_materials_emissive_strength': {'emissiveStrength': peak}}
+            used = self.doc.gltf.setdefault('extensionsUsed', [])
+            if 'KHR_materials_emissive_strength' not in used:
+                used.append('KHR_materials_emissive_strength')
+        elif peak > 0.0:
+            gltf_material['emissiveFactor'] = emissive
+
+    def export_texture(self, image_node) -> int:
+        sampler = {}
+        if image_node.interpolation == 'Closest':
+            sampler['magFilter'] = FILTER_NEAREST
+            sampler['minFilter'] = FILTER_NEAREST
+        wrap = WRAP_MODES.get(image_node.extension)
+        if wrap:
+            sampler['wrapS'] = sampler['wrapT'] = wrap
+        key = (image_node.image.name_full, tuple(sorted(sampler.items())))
+        if key in self.texture_indices:
+            return self.texture_indices[key]
+
+        texture = {'source': self.export_image(image_node.image)}
+        if sampler:
+            texture['sampler'] = self._append('samplers', sampler)
+        index = self._append('textures', texture)
+        self.texture_indices[key] = index
+        return index
+
+    def export_image(self, image) -> int:
+        if image.name_full in self.image_indices:
+            return self.image_indices[image.name_full]
+        data, mime = image_data(image)
+        index = self._append('images', {'name': image.name, 'mimeType': mime})
+        self.images.append((index, image.name, data, mime))
+        self.image_indices[image.name_full] = index
+        return index
+
+    def write_images(self, doc, export_format: str, out_dir: str):
+        """GLB/嵌入式格式把图像放入缓冲区，glTF Separate 写为 .gltf 旁边的文件"""
+        used_names = set()
+        for index, name, data, mime in self.images:
+            image = doc.gltf['images'][index]
+            if export_format != 'GLTF_SEPARATE':
+                image['bufferView'] = doc.add_buffer_view(data)
+                continue
+            ext = '.png' if mime == 'image/png' else '.jpg'
+            stem = bpy.path.clean_name(os.path.splitext(name)[0]) or f"image{index}"
+            file_name = stem + ext
+            suffix = 1
+            while file_name.lower() in used_names:
+                file_name = f"{stem}_{suffix}{ext}"
+                suffix += 1
+            used_names.add(file_name.lower())
+            with open(os.path.join(out_dir, file_name), 'wb') as f:
+                f.write(data)
+            image['uri'] = quote(file_name)
+            image.pop('mimeType', None)
+
+    # 相机与灯光 ---------------------------------------------------------
+
+    def export_camera(self, camera) -> int:
+        render = self.scene.render
+        width = render.resolution_x * render.pixel_aspect_x
+        height = render.resolution_y * render.pixel_aspect_y
+        aspect = width / height if height else 1.0
+        if camera.type == 'ORTHO':
+            half = camera.ortho_scale / 2.0
+            xmag, ymag = (half, half / aspect) if aspect >= 1.0 else (half * aspect, half)
+            data = {'type': 'orthographic', 'orthographic': {
+                'xmag': xmag, 'ymag': ymag, 'znear': camera.clip_start, 'zfar': camera.clip_end}}
+        else:
+            # Blender的视角对应传感器适配方向，glTF使用垂直视角
+            fit = camera.sensor_fit
+            if fit == 'VERTICAL' or (fit == 'AUTO' and aspect < 1.0):
+                yfov = camera.angle_y if fit == 'VERTICAL' else camera.angle
+            else:
+                xfov = camera.angle_x if fit == 'HORIZONTAL' else camera.angle
+                yfov = 2.0 * math.atan(math.tan(xfov / 2.0) / aspect)
+            data = {'type': 'perspective', 'perspective': {
+                'aspectRatio': aspect, 'yfov': yfov, 'znear': camera.clip_start, 'zfar': camera.clip_end}}
+        data['name'] = camera.name
+        return self._append('cameras', data)
+
+    def export_light(self, light) -> Optional[int]:
+        if light.name_full in self.light_indices:
+            return self.light_indices[light.name_full]
+        if light.type == 'AREA':
+            print(f"⚠️ glTF不支持面光源，跳过: {light.name}")
+            return None
+        data = {'name': light.name, 'color': list(light.color)}
+        raw = self.kwargs.get('export_import_convert_lighting_mode', 'COMPAT') == 'RAW'
+        if light.type == 'SUN':
+            data['type'] = 'directional'
+            data['intensity'] = light.energy
+        else:
+            # 与官方导出器的COMPAT模式相同：辐射功率(W)按4π换算为发光强度
+            data['intensity'] = light.energy if raw else light.energy / (4.0 * math.pi)
+            if light.type == 'SPOT':
+                angle = light.spot_size * 0.5
+                data['type'] = 'spot'
+                data['spot'] = {'outerConeAngle': angle, 'innerConeAngle': angle - angle * light.spot_blend}
+            else:
+                data['type'] = 'point'
+        lights = self.doc.gltf.setdefault('extensions', {}).setdefault('KHR_lights_punctual', {}).setdefault('lights', [])
+        lights.append(data)
+        self.light_indices[light.name_full] = len(lights) - 1
+        return len(lights) - 1
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+glTF清理模块 - balsam转换前清理导出的glTF，减少balsam输出中的无用数据与空节点
+负责：
+1. 删除退化三角形（重复索引，或没有形变目标时位置完全重合的顶点），没有三角形的图元与网格引用一并删除
+2. 折叠静态空节点链：只有一个子节点的空节点把变换烘焙到子节点中，再由子节点取代它；没有子节点的空节点直接删除
+   （动画目标、骨骼、带扩展的节点保持不变；变换含切变无法用TRS表示时不折叠）
+3. 按内容哈希合并相同的图像、纹理与bufferView
+4. 删除没有被引用的节点、网格、相机、蒙皮、材质、纹理、图像、采样器、访问器与bufferView
+
+bufferView按memoryview直接计算哈希，索引与位置以numpy视图读取，未修改的数据不复制。
+空节点折叠后，balsam输出中不再有对应的 Node {} 层级，依赖这些空节点名称的QML需要关闭 Flatten Empties。
+依赖numpy（Blender自带），不可用时跳过。
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+from . import native_mesh_converter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+GL_TRIANGLES = 4
+GL_ELEMENT_ARRAY_BUFFER = 34963
+INDEX_DTYPES = {5121: np.uint8, 5123: '<u2', 5125: '<u4'} if NUMPY_AVAILABLE else {}
+# 分解变换时允许的切变误差
+SHEAR_TOLERANCE = 1e-5
+# Blender导出器为带子对象的相机/灯光生成的方向修正节点后缀，折叠时改用父节点（即对象本身）的名称
+ORIENTATION_SUFFIX = "_Orientation"
+
+# 按引用关系从上到下删除，删除上层后再检查下层
+_PRUNE_ORDER = ('meshes', 'cameras', 'skins', 'materials', 'textures', 'images', 'samplers', 'accessors')
+
+
+# ----------------------------------------------------------------------
+# 退化图元
+# ----------------------------------------------------------------------
+
+def _store_indices(doc, primitive: Dict, indices, accessor_users: Dict, view_users: Dict):
+    """写回图元的索引：访问器与bufferView都独占时原地替换，否则写入新的访问器"""
+    accessors = doc.gltf['accessors']
+    accessor = accessors[primitive['indices']]
+    data = np.ascontiguousarray(indices, dtype=INDEX_DTYPES[accessor['componentType']])
+    if accessor_users.get(primitive['indices']) == 1 and view_users.get(accessor.get('bufferView')) == 1:
+        doc.replace_buffer_view(accessor['bufferView'], data.tobytes())
+        accessor.pop('byteOffset', None)
+        accessor['count'] = len(data)
+        return
+    accessor_users[primitive['indices']] -= 1
+    accessors.append({
+        'bufferView': doc.add_buffer_view(data.tobytes(), GL_ELEMENT_ARRAY_BUFFER),
+        'componentType': accessor['componentType'],
+        'count': len(data),
+        'type': 'SCALAR',
+    })
+    primitive['indices'] = len(accessors) - 1
+    accessor_users[primitive['indices']] = 1
+
+
+def remove_degenerate_triangles(doc) -> Dict:
+    """删除三角形列表中的退化三角形，返回 {'triangles', 'primitives'} 删除数量"""
+    gltf = doc.gltf
+    accessor_users, view_users = _usage_counts(gltf)
+    stats = {'triangles': 0, 'primitives': 0}
+    for mesh in gltf.get('meshes', []):
+        kept = []
+        for primitive in mesh.get('primitives', []):
+            if primitive.get('mode', GL_TRIANGLES) != GL_TRIANGLES or 'indices' not in primitive:
+                kept.append(primitive)
+                continue
+            accessor = gltf['accessors'][primitive['indices']]
+            if accessor['componentType'] not in INDEX_DTYPES or accessor['count'] % 3:
+                kept.append(primitive)
+                continue
+            triangles = native_mesh_converter.read_accessor(doc, primitive['indices'])[:, 0].reshape(-1, 3)
+            a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+            valid = (a != b) & (b != c) & (a != c)
+            position = primitive.get('attributes', {}).get('POSITION')
+            if position is not None and not primitive.get('targets'):
+                # 形变目标可能让重合的顶点分开，只在没有形变目标时按位置判断
+                positions = native_mesh_converter.read_accessor(doc, position)
+                pa, pb, pc = positions[a], positions[b], positions[c]
+                valid &= ~((pa == pb).all(axis=1) | (pb == pc).all(axis=1) | (pa == pc).all(axis=1))
+            removed = int(len(valid) - np.count_nonzero(valid))
+            if not removed:
+                kept.append(primitive)
+                continue
+            stats['triangles'] += removed
+            if removed == len(valid):
+                stats['primitives'] += 1
+                continue
+            _store_indices(doc, primitive, triangles[valid].reshape(-1), accessor_users, view_users)
+            kept.append(primitive)
+        mesh['primitives'] = kept
+
+    # 没有图元的网格不再被节点引用（glTF要求网格至少有一个图元）
+    for node in gltf.get('nodes', []):
+        mesh_index = node.get('mesh')
+        if isinstance(mesh_index, int) and not gltf['meshes'][mesh_index]['primitives']:
+            node.pop('mesh')
+            node.pop('weights', None)
+            node.pop('skin', None)
+    return stats
+
+
+# ----------------------------------------------------------------------
+# 空节点折叠
+# ----------------------------------------------------------------------
+
+def _quaternion_to_matrix(q) -> "np.ndarray":
+    x, y, z, w = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+
+
+def _matrix_to_quaternion(m) -> List[float]:
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = [(m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s, 0.25 * s]
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = [0.25 * s, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s, (m[2, 1] - m[1, 2]) / s]
+    elif m[1, 1] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = [(m[0, 1] + m[1, 0]) / s, 0.25 * s, (m[1, 2] + m[2, 1]) / s, (m[0, 2] - m[2, 0]) / s]
+    else:
+        s = 2.0 * np.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = [(m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, 0.25 * s, (m[1, 0] - m[0, 1]) / s]
+    q = np.array(q) / np.linalg.norm(q)
+    return [float(v) for v in (q if q[3] >= 0 else -q)]
+
+
+def node_matrix(node: Dict) -> "np.ndarray":
+    """节点的局部变换矩阵（4x4，列向量约定）"""
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+    matrix = np.eye(4)
+    matrix[:3, :3] = _quaternion_to_matrix(node.get('rotation', [0.0, 0.0, 0.0, 1.0])) * node.get('scale', [1.0, 1.0, 1.0])
+    matrix[:3, 3] = node.get('translation', [0.0, 0.0, 0.0])
+    return matrix
+
+
+def decompose_matrix(matrix) -> Optional[Dict]:
+    """把变换矩阵分解为TRS，含切变无法表示时返回None"""
+    basis = matrix[:3, :3]
+    scale = np.linalg.norm(basis, axis=0)
+    if np.any(scale < 1e-12) or abs(matrix[3, 3] - 1.0) > SHEAR_TOLERANCE or np.any(np.abs(matrix[3, :3]) > SHEAR_TOLERANCE):
+        return None
+    if np.linalg.det(basis) < 0:
+        scale[0] = -scale[0]
+    rotation = basis / scale
+    if np.abs(rotation.T @ rotation - np.eye(3)).max() > SHEAR_TOLERANCE:
+        return None
+    return {
+        'translation': [float(v) for v in matrix[:3, 3]],
+        'rotation': _matrix_to_quaternion(rotation),
+        'scale': [float(v) for v in scale],
+    }
+
+
+def _set_trs(node: Dict, trs: Dict):
+    node.pop('matrix', None)
+    defaults = {'translation': [0.0, 0.0, 0.0], 'rotation': [0.0, 0.0, 0.0, 1.0], 'scale': [1.0, 1.0, 1.0]}
+    for key, value in trs.items():
+        if np.allclose(value, defaults[key], atol=1e-9):
+            node.pop(key, None)
+        else:
+            node[key] = value
+
+
+def _fixed_nodes(gltf: dict) -> set:
+    """不能折叠或改变变换的节点：动画目标、骨骼与蒙皮的根节点"""
+    fixed = set()
+    for animation in gltf.get('animations', []):
+        for channel in animation.get('channels', []):
+            target = channel.get('target', {}).get('node')
+            if target is not None:
+                fixed.add(target)
+    for skin in gltf.get('skins', []):
+        fixed.update(skin.get('joints', []))
+        if skin.get('skeleton') is not None:
+            fixed.add(skin['skeleton'])
+    return fixed
+
+
+def flatten_empty_nodes(gltf: dict) -> int:
+    """折叠静态空节点链并删除空的叶子节点，返回删除的节点数"""
+    nodes = gltf.get('nodes', [])
+    fixed = _fixed_nodes(gltf)
+    parents = {}
+    for index, node in enumerate(nodes):
+        for child in node.get('children', []):
+            parents[child] = index
+
+    def is_static_empty(index):
+        node = nodes[index]
+        return (index not in fixed and not any(key in node for key in ('mesh', 'camera', 'skin', 'weights', 'extensions')))
+
+    def sibling_list(index):
+        if index in parents:
+            return nodes[parents[index]]['children']
+        return None
+
+    def replace(index, replacement):
+        """在父节点（或场景根节点列表）中用 replacement 替换 index，replacement 为None时删除"""
+        lists = [sibling_list(index)] if index in parents else [scene.get('nodes', []) for scene in gltf.get('scenes', [])]
+        for items in lists:
+            if items is not None and index in items:
+                position = items.index(index)
+                if replacement is None:
+                    items.pop(position)
+                else:
+                    items[position] = replacement
+        if replacement is not None:
+            if index in parents:
+                parents[replacement] = parents[index]
+            else:
+                parents.pop(replacement, None)
+        parents.pop(index, None)
+
+    removed = set()
+    changed = True
+    while changed:
+        changed = False
+        for index, node in enumerate(nodes):
+            if index in removed or not is_static_empty(index):
+                continue
+            children = node.get('children', [])
+            if not children:
+                replace(index, None)
+                removed.add(index)
+                changed = True
+            elif len(children) == 1:
+                child_index = children[0]
+                child = nodes[child_index]
+                if child_index in fixed or 'skin' in child:
+                    continue
+                trs = decompose_matrix(node_matrix(node) @ node_matrix(child))
+                if trs is None:
+                    continue
+                _set_trs(child, trs)
+                if node.get('name') and child.get('name') == node['name'] + ORIENTATION_SUFFIX:
+                    child['name'] = node['name']
+                node['children'] = []
+                replace(index, child_index)
+                removed.add(index)
+                changed = True
+
+    if removed:
+        for node in nodes:
+            if 'children' in node and not node['children']:
+                del node['children']
+        gltf_utils.remove_nodes(gltf, removed)
+    return len(removed)
+
+
+# ----------------------------------------------------------------------
+# 去重与删除未引用数据
+# ----------------------------------------------------------------------
+
+def _usage_counts(gltf: dict):
+    """统计访问器与bufferView被引用的次数"""
+    accessor_users, view_users = {}, {}
+
+    def _collect(kind, index):
+        if kind == 'accessors':
+            accessor_users[index] = accessor_users.get(index, 0) + 1
+        elif kind == 'bufferViews':
+            view_users[index] = view_users.get(index, 0) + 1
+        return index
+
+    gltf_utils.remap_references(gltf, _collect)
+    return accessor_users, view_users
+
+
+def _remap_duplicates(gltf: dict, kind: str, keys: List) -> int:
+    """keys[i] 相同的元素改为引用第一个，返回被替换的元素数量（未引用的元素随后删除）"""
+    first = {}
+    mapping = {}
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        mapping[index] = first.setdefault(key, index)
+    duplicates = sum(1 for index, target in mapping.items() if index != target)
+    if duplicates:
+        gltf_utils.remap_references(gltf, lambda k, index: mapping.get(index, index) if k == kind else index)
+    return duplicates
+
+
+def dedupe_images(doc) -> int:
+    """按数据哈希合并相同的图像，再合并来源与采样器都相同的纹理"""
+    gltf = doc.gltf
+    keys = [gltf_utils.image_key(doc, index) for index in range(len(gltf.get('images', [])))]
+    duplicates = _remap_duplicates(gltf, 'images', keys)
+    texture_keys = [json.dumps(texture, sort_keys=True) for texture in gltf.get('textures', [])]
+    duplicates += _remap_duplicates(gltf, 'textures', texture_keys)
+    return duplicates
+
+
+def dedupe_buffer_views(doc) -> int:
+    """按内容哈希合并相同的bufferView（零拷贝计算哈希）"""
+    gltf = doc.gltf
+    keys = [gltf_utils.buffer_view_key(doc, index) for index in range(len(gltf.get('bufferViews', [])))]
+    return _remap_duplicates(gltf, 'bufferViews', keys)
+
+
+def _reachable_nodes(gltf: dict) -> set:
+    reachable = set()
+    stack = [root for scene in gltf.get('scenes', []) for root in scene.get('nodes', [])]
+    nodes = gltf.get('nodes', [])
+    while stack:
+        index = stack.pop()
+        if index in reachable or index >= len(nodes):
+            continue
+        reachable.add(index)
+        stack.extend(nodes[index].get('children', []))
+    return reachable | _fixed_nodes(gltf)
+
+
+def _compact(gltf: dict, kind: str, used: set) -> int:
+    items = gltf.get(kind, [])
+    if len(used) >= len(items):
+        return 0
+    mapping = {}
+    kept = []
+    for index, item in enumerate(items):
+        if index in used:
+            mapping[index] = len(kept)
+            kept.append(item)
+    gltf[kind] = kept
+    gltf_utils.remap_references(gltf, lambda k, index: mapping.get(index) if k == kind else index)
+    return len(items) - len(kept)
+
+
+def remove_unreferenced(doc) -> Dict[str, int]:
+    """删除没有被引用的数据，返回每类删除的数量"""
+    gltf = doc.gltf
+    removed = {}
+    if gltf.get('scenes'):
+        reachable = _reachable_nodes(gltf)
+        count = len(gltf.get('nodes', [])) - len(reachable)
+        if count:
+            unreachable = [index for index in range(len(gltf['nodes'])) if index not in reachable]
+            for index in unreachable:
+                gltf['nodes'][index].pop('children', None)
+            gltf_utils.remove_nodes(gltf, unreachable)
+            removed['nodes'] = count
+
+    for kind in _PRUNE_ORDER:
+        used = {kind: set()}
+
+        def _collect(k, index):
+            if k in used:
+                used[k].add(index)
+            return index
+
+        gltf_utils.remap_references(gltf, _collect)
+        count = _compact(gltf, kind, used[kind])
+        if count:
+            removed[kind] = count
+
+    count = doc.remove_unused_buffer_views()
+    if count:
+        removed['bufferViews'] = count
+    return removed
+
+
+# ----------------------------------------------------------------------
+# 入口
+# ----------------------------------------------------------------------
+
+def buffer_size(gltf: dict) -> int:
+    return sum(view['byteLength'] for view in gltf.get('bufferViews', []))
+
+
+def cleanup_document(doc, flatten: bool = True) -> Dict:
+    """清理文档，返回统计
+
+    Returns:
+        dict: {'degenerate_triangles', 'degenerate_primitives', 'flattened_nodes', 'duplicate_images',
+               'duplicate_views', 'removed', 'bytes_before', 'bytes_after'}
+    """
+    gltf = doc.gltf
+    stats = {'bytes_before': buffer_size(gltf)}
+    degenerate = remove_degenerate_triangles(doc)
+    stats['degenerate_triangles'] = degenerate['triangles']
+    stats['degenerate_primitives'] = degenerate['primitives']
+    stats['flattened_nodes'] = flatten_empty_nodes(gltf) if flatten else 0
+    stats['duplicate_images'] = dedupe_images(doc)
+    stats['duplicate_views'] = dedupe_buffer_views(doc)
+    stats['removed'] = remove_unreferenced(doc)
+    stats['bytes_after'] = buffer_size(gltf)
+    return stats
+
+
+def cleanup_gltf(gltf_path: str, export_format: str, flatten: bool = True) -> Dict:
+    """清理glTF文件，有改动时保存"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    stats = cleanup_document(doc, flatten)
+    changed = (stats['degenerate_triangles'] or stats['flattened_nodes'] or stats['duplicate_images']
+               or stats['duplicate_views'] or stats['removed'])
+    if changed:
+        doc.save(gltf_path, export_format)
+    return stats
@@ -0,0 +1,712 @@
+#!/usr/bin/env python3
+"""
+glTF工具模块 - 统一读写 .gltf / .glb 文件
+负责：
+1. 读取glTF/GLB（JSON + 二进制缓冲区，尽量使用memoryview零拷贝）
+2. 以 GLB / GLTF_SEPARATE / GLTF_EMBEDDED 格式写出
+3. 遍历并重映射glTF中的索引引用（合并、裁剪等操作共用）
+4. 合并多个glTF文档（相同内容的网格、材质、图像等只保留一份）
+"""
+
+import os
+import json
+import base64
+import hashlib
+import shutil
+import struct
+import copy
+from typing import Callable, Dict, List, Optional
+
+GLB_MAGIC = 0x46546C67  # b'glTF'
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+
+# 顶层数组名称（合并/裁剪时按这些类别重映射索引）
+TOP_LEVEL_ARRAYS = (
+    'accessors', 'animations', 'bufferViews', 'buffers', 'cameras', 'images',
+    'materials', 'meshes', 'nodes', 'samplers', 'scenes', 'skins', 'textures',
+)
+
+
+class GLTFDocument:
+    """内存中的glTF文档：json字典 + 缓冲区列表"""
+
+    def __init__(self, gltf: Optional[dict] = None, buffers: Optional[List] = None, base_dir: Optional[str] = None):
+        self.gltf = gltf if gltf is not None else {"asset": {"version": "2.0"}}
+        # buffers[i] 对应 gltf['buffers'][i] 的数据（bytes / bytearray / memoryview）
+        self.buffers = buffers if buffers is not None else []
+        # 外部文件（图片等）相对路径的基准目录
+        self.base_dir = base_dir
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+    @classmethod
+    def load(cls, path: str) -> "GLTFDocument":
+        """读取 .gltf 或 .glb 文件"""
+        base_dir = os.path.dirname(os.path.abspath(path))
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) >= 12 and struct.unpack_from('<I', data, 0)[0] == GLB_MAGIC:
+            gltf, bin_chunk = _parse_glb(memoryview(data))
+        else:
+            gltf = json.loads(data.decode('utf-8'))
+            bin_chunk = None
+
+        buffers = []
+        for index, buffer in enumerate(gltf.get('buffers', [])):
+            uri = buffer.get('uri')
+            if uri is None:
+                # GLB的BIN块
+                if bin_chunk is None:
+                    raise ValueError(f"buffer {index} 没有uri，且文件不是GLB")
+                buffers.append(bin_chunk)
+            elif uri.startswith('data:'):
+                buffers.append(memoryview(base64.b64decode(uri.split(',', 1)[1])))
+            else:
+                buffer_path = os.path.join(base_dir, _unquote_uri(uri))
+                with open(buffer_path, 'rb') as f:
+                    buffers.append(memoryview(f.read()))
+
+        return cls(gltf, buffers, base_dir)
+
+    # ------------------------------------------------------------------
+    # 数据访问
+    # ------------------------------------------------------------------
+    def buffer_view_bytes(self, view_index: int) -> memoryview:
+        """获取bufferView对应的字节切片（零拷贝）"""
+        view = self.gltf['bufferViews'][view_index]
+        buffer = memoryview(self.buffers[view['buffer']])
+        offset = view.get('byteOffset', 0)
+        return buffer[offset:offset + view['byteLength']]
+
+    def image_bytes(self, image_index: int) -> Optional[bytes]:
+        """获取图片数据（bufferView或外部文件）"""
+        image = self.gltf['images'][image_index]
+        if 'bufferView' in image:
+            return bytes(self.buffer_view_bytes(image['bufferView']))
+        uri = image.get('uri')
+        if not uri:
+            return None
+        if uri.startswith('data:'):
+            return base64.b64decode(uri.split(',', 1)[1])
+        image_path = os.path.join(self.base_dir or '', _unquote_uri(uri))
+        if not os.path.exists(image_path):
+            return None
+        with open(image_path, 'rb') as f:
+            return f.read()
+
+    def external_uris(self) -> List[str]:
+        """返回文档引用的所有外部文件（绝对路径）"""
+        paths = []
+        for item in self.gltf.get('buffers', []) + self.gltf.get('images', []):
+            uri = item.get('uri')
+            if uri and not uri.startswith('data:'):
+                paths.append(os.path.join(self.base_dir or '', _unquote_uri(uri)))
+        return paths
+
+    def resolve_uri(self, uri: str) -> str:
+        """把相对uri解析为绝对路径"""
+        return os.path.join(self.base_dir or '', _unquote_uri(uri))
+
+    def add_buffer_view(self, data, target: Optional[int] = None) -> int:
+        """追加一段数据作为新的bufferView（写入单独的新buffer，保存时统一合并）"""
+        self.gltf.setdefault('buffers', []).append({'byteLength': len(data)})
+        self.buffers.append(memoryview(data).cast('B') if not isinstance(data, (bytes, bytearray)) else data)
+        view = {'buffer': len(self.buffers) - 1, 'byteOffset': 0, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        self.gltf.setdefault('bufferViews', []).append(view)
+        return len(self.gltf['bufferViews']) - 1
+
+    def replace_buffer_view(self, view_index: int, data):
+        """替换bufferView的数据（长度可变），原数据在保存时不再写出"""
+        self._split_buffers_by_view()
+        view = self.gltf['bufferViews'][view_index]
+        self.buffers[view['buffer']] = data
+        self.gltf['buffers'][view['buffer']]['byteLength'] = len(data)
+        view['byteLength'] = len(data)
+
+    def _split_buffers_by_view(self):
+        """把每个bufferView拆到独立的buffer中，使单个视图可以改变长度"""
+        views = self.gltf.get('bufferViews', [])
+        if len(self.buffers) == len(views) and all(
+            view['buffer'] == index and not view.get('byteOffset') for index, view in enumerate(views)
+        ):
+            return
+        buffers = [self.buffer_view_bytes(index) for index in range(len(views))]
+        for index, view in enumerate(views):
+            view['buffer'] = index
+            view.pop('byteOffset', None)
+        self.gltf['buffers'] = [{'byteLength': len(data)} for data in buffers]
+        self.buffers = buffers
+
+    def remove_unused_accessors(self) -> int:
+        """删除没有被引用的访问器，以及随之不再被引用的bufferView（数据在保存时不再写出）
+
+        只删除被删访问器使用过的bufferView，扩展（如Draco）直接引用的bufferView不受影响。
+
+        Returns:
+            int: 删除的访问器数量
+        """
+        used = {'accessors': set(), 'bufferViews': set()}
+
+        def _collect(kind, index):
+            if kind in used:
+                used[kind].add(index)
+            return index
+
+        remap_references(self.gltf, _collect)
+        accessors = self.gltf.get('accessors', [])
+        mapping = {}
+        kept = []
+        candidate_views = set()
+        for index, accessor in enumerate(accessors):
+            if index in used['accessors']:
+                mapping[index] = len(kept)
+                kept.append(accessor)
+                continue
+            sparse = accessor.get('sparse', {})
+            for info in (accessor, sparse.get('indices', {}), sparse.get('values', {})):
+                if 'bufferView' in info:
+                    candidate_views.add(info['bufferView'])
+        removed = len(accessors) - len(kept)
+        if not removed:
+            return 0
+        self.gltf['accessors'] = kept
+        remap_references(self.gltf, lambda kind, index: mapping.get(index) if kind == 'accessors' else index)
+
+        used['bufferViews'].clear()
+        remap_references(self.gltf, _collect)
+        self._remove_buffer_views(candidate_views - used['bufferViews'])
+        return removed
+
+    def remove_unused_buffer_views(self) -> int:
+        """删除没有被访问器、图片或图元扩展（如Draco）引用的bufferView（数据在保存时不再写出）
+
+        Returns:
+            int: 删除的bufferView数量
+        """
+        used = extension_buffer_views(self.gltf)
+
+        def _collect(kind, index):
+            if kind == 'bufferViews':
+                used.add(index)
+            return index
+
+        remap_references(self.gltf, _collect)
+        unused = set(range(len(self.gltf.get('bufferViews', [])))) - used
+        self._remove_buffer_views(unused)
+        return len(unused)
+
+    def _remove_buffer_views(self, unused_views):
+        if not unused_views:
+            return
+        # 拆分后第i个bufferView独占第i个buffer，两者按同一映射删除
+        self._split_buffers_by_view()
+        views = self.gltf['bufferViews']
+        view_mapping = {}
+        for index in range(len(views)):
+            if index not in unused_views:
+                view_mapping[index] = len(view_mapping)
+        self.gltf['bufferViews'] = [views[index] for index in view_mapping]
+        self.gltf['buffers'] = [self.gltf['buffers'][index] for index in view_mapping]
+        self.buffers = [self.buffers[index] for index in view_mapping]
+        remap_references(
+            self.gltf,
+            lambda kind, index: view_mapping.get(index) if kind in ('bufferViews', 'buffers') else index,
+        )
+        for mesh in self.gltf.get('meshes', []):
+            for primitive in mesh.get('primitives', []):
+                for extension in primitive.get('extensions', {}).values():
+                    if isinstance(extension, dict) and extension.get('bufferView') in view_mapping:
+                        extension['bufferView'] = view_mapping[extension['bufferView']]
+
+    # ------------------------------------------------------------------
+    # 写出
+    # ------------------------------------------------------------------
+    def save(self, path: str, export_format: str = 'GLB') -> str:
+        """按指定格式保存，返回实际写入的文件路径
+
+        Args:
+            path: 目标路径（扩展名会按格式自动修正）
+            export_format: 'GLB' | 'GLTF_SEPARATE' | 'GLTF_EMBEDDED'
+        """
+        path = os.path.splitext(path)[0] + ('.glb' if export_format == 'GLB' else '.gltf')
+        out_dir = os.path.dirname(os.path.abspath(path))
+        os.makedirs(out_dir, exist_ok=True)
+
+        gltf = copy.deepcopy(self.gltf)
+        blob = self._consolidate_buffers(gltf)
+        self._relocate_external_images(gltf, out_dir)
+
+        if export_format == 'GLB':
+            if blob:
+                gltf['buffers'] = [{'byteLength': len(blob)}]
+            _write_glb(path, gltf, blob)
+        elif export_format == 'GLTF_SEPARATE':
+            if blob:
+                bin_name = os.path.splitext(os.path.basename(path))[0] + '.bin'
+                with open(os.path.join(out_dir, bin_name), 'wb') as f:
+                    f.write(blob)
+                gltf['buffers'] = [{'byteLength': len(blob), 'uri': bin_name}]
+            _write_json(path, gltf)
+        else:
+            if blob:
+                encoded = base64.b64encode(blob).decode('ascii')
+                gltf['buffers'] = [{
+                    'byteLength': len(blob),
+                    'uri': f"data:application/octet-stream;base64,{encoded}",
+                }]
+            _write_json(path, gltf)
+
+        return path
+
+    def _consolidate_buffers(self, gltf: dict) -> bytearray:
+        """把所有buffer拼接为一个（4字节对齐），并修正bufferView偏移"""
+        blob = bytearray()
+        buffer_starts = []
+        for data in self.buffers:
+            _pad_to(blob, 4)
+            buffer_starts.append(len(blob))
+            blob += data
+        _pad_to(blob, 4)
+
+        for view in gltf.get('bufferViews', []):
+            view['byteOffset'] = buffer_starts[view['buffer']] + view.get('byteOffset', 0)
+            view['buffer'] = 0
+            if view['byteOffset'] == 0:
+                view.pop('byteOffset')
+        if not blob:
+            gltf.pop('buffers', None)
+        return blob
+
+    def _relocate_external_images(self, gltf: dict, out_dir: str):
+        """外部图片与目标目录不一致时复制过去，保持相对uri有效"""
+        if not self.base_dir or os.path.normcase(os.path.abspath(self.base_dir)) == os.path.normcase(out_dir):
+            return
+        for image in gltf.get('images', []):
+            uri = image.get('uri')
+            if not uri or uri.startswith('data:'):
+                continue
+            src = os.path.join(self.base_dir, _unquote_uri(uri))
+            dst = os.path.join(out_dir, _unquote_uri(uri))
+            if os.path.exists(src):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                shutil.copy2(src, dst)
+
+
+# ----------------------------------------------------------------------
+# 索引引用遍历
+# ----------------------------------------------------------------------
+
+def remap_references(gltf: dict, remap: Callable[[str, int], int]):
+    """遍历glTF中所有索引引用，并用 remap(kind, index) 的返回值替换
+
+    kind 为顶层数组名（如 'accessors'、'nodes'），另有 'lights' 表示KHR_lights_punctual灯光。
+    返回值为 None 时删除该引用（仅对可选引用有效）。
+    """
+    def _set(container, key, kind):
+        if key in container and isinstance(container[key], int):
+            new_index = remap(kind, container[key])
+            if new_index is None:
+                del container[key]
+            else:
+                container[key] = new_index
+
+    def _set_list(container, key, kind):
+        if key in container:
+            new_list = [remap(kind, i) for i in container[key]]
+            container[key] = [i for i in new_list if i is not None]
+
+    if isinstance(gltf.get('scene'), int):
+        _set(gltf, 'scene', 'scenes')
+    for scene in gltf.get('scenes', []):
+        _set_list(scene, 'nodes', 'nodes')
+
+    for node in gltf.get('nodes', []):
+        _set_list(node, 'children', 'nodes')
+        _set(node, 'mesh', 'meshes')
+        _set(node, 'camera', 'cameras')
+        _set(node, 'skin', 'skins')
+        light_ext = node.get('extensions', {}).get('KHR_lights_punctual')
+        if light_ext:
+            _set(light_ext, 'light', 'lights')
+
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            attributes = primitive.get('attributes', {})
+            for name in list(attributes.keys()):
+                _set(attributes, name, 'accessors')
+            _set(primitive, 'indices', 'accessors')
+            _set(primitive, 'material', 'materials')
+            for target in primitive.get('targets', []):
+                for name in list(target.keys()):
+                    _set(target, name, 'accessors')
+
+    for accessor in gltf.get('accessors', []):
+        _set(accessor, 'bufferView', 'bufferViews')
+        sparse = accessor.get('sparse')
+        if sparse:
+            _set(sparse.get('indices', {}), 'bufferView', 'bufferViews')
+            _set(sparse.get('values', {}), 'bufferView', 'bufferViews')
+
+    for view in gltf.get('bufferViews', []):
+        _set(view, 'buffer', 'buffers')
+
+    for material in gltf.get('materials', []):
+        _remap_texture_infos(material, remap)
+
+    for texture in gltf.get('textures', []):
+        _set(texture, 'sampler', 'samplers')
+        _set(texture, 'source', 'images')
+        for ext in texture.get('extensions', {}).values():
+            if isinstance(ext, dict):
+                _set(ext, 'source', 'images')
+
+    for image in gltf.get('images', []):
+        _set(image, 'bufferView', 'bufferViews')
+
+    for skin in gltf.get('skins', []):
+        _set(skin, 'inverseBindMatrices', 'accessors')
+        _set_list(skin, 'joints', 'nodes')
+        _set(skin, 'skeleton', 'nodes')
+
+    for animation in gltf.get('animations', []):
+        for channel in animation.get('channels', []):
+            _set(channel.get('target', {}), 'node', 'nodes')
+        for sampler in animation.get('samplers', []):
+            _set(sampler, 'input', 'accessors')
+            _set(sampler, 'output', 'accessors')
+
+
+def extension_buffer_views(gltf: dict) -> set:
+    """图元扩展（如KHR_draco_mesh_compression）直接引用的bufferView（remap_references不遍历扩展）"""
+    views = set()
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            for extension in primitive.get('extensions', {}).values():
+                if isinstance(extension, dict) and isinstance(extension.get('bufferView'), int):
+                    views.add(extension['bufferView'])
+    return views
+
+
+def remove_nodes(gltf: dict, node_indices) -> Dict[int, int]:
+    """删除节点（不删除其子节点，调用方需保证被删除的节点没有子节点），返回旧索引到新索引的映射"""
+    removed = set(node_indices)
+    mapping = {}
+    kept = []
+    for index, node in enumerate(gltf.get('nodes', [])):
+        if index in removed:
+            continue
+        mapping[index] = len(kept)
+        kept.append(node)
+    gltf['nodes'] = kept
+    remap_references(gltf, lambda kind, index: mapping.get(index) if kind == 'nodes' else index)
+    return mapping
+
+
+def copy_mesh(target: GLTFDocument, source: GLTFDocument, mesh_index: int,
+              material_remap: Optional[Callable[[int], Optional[int]]] = None) -> int:
+    """把source中的一个网格（连同访问器与bufferView数据）复制到target，返回新网格索引
+
+    material_remap(源材质索引) 返回target中的材质索引，返回None或未提供时去掉材质引用。
+    """
+    view_map = {}
+    accessor_map = {}
+
+    def copy_view(view_index):
+        if view_index not in view_map:
+            view = source.gltf['bufferViews'][view_index]
+            new_index = target.add_buffer_view(bytes(source.buffer_view_bytes(view_index)), view.get('target'))
+            if 'byteStride' in view:
+                target.gltf['bufferViews'][new_index]['byteStride'] = view['byteStride']
+            view_map[view_index] = new_index
+        return view_map[view_index]
+
+    def copy_accessor(accessor_index):
+        if accessor_index not in accessor_map:
+            accessor = copy.deepcopy(source.gltf['accessors'][accessor_index])
+            if 'bufferView' in accessor:
+                accessor['bufferView'] = copy_view(accessor['bufferView'])
+            sparse = accessor.get('sparse')
+            if sparse:
+                sparse['indices']['bufferView'] = copy_view(sparse['indices']['bufferView'])
+                sparse['values']['bufferView'] = copy_view(sparse['values']['bufferView'])
+            target.gltf.setdefault('accessors', []).append(accessor)
+            accessor_map[accessor_index] = len(target.gltf['accessors']) - 1
+        return accessor_map[accessor_index]
+
+    mesh = copy.deepcopy(source.gltf['meshes'][mesh_index])
+    for primitive in mesh.get('primitives', []):
+        primitive['attributes'] = {name: copy_accessor(index) for name, index in primitive.get('attributes', {}).items()}
+        if 'indices' in primitive:
+            primitive['indices'] = copy_accessor(primitive['indices'])
+        if 'targets' in primitive:
+            primitive['targets'] = [
+                {name: copy_accessor(index) for name, index in morph.items()} for morph in primitive['targets']
+            ]
+        if 'material' in primitive:
+            material = material_remap(primitive['material']) if material_remap else None
+            if material is None:
+                primitive.pop('material')
+            else:
+                primitive['material'] = material
+    target.gltf.setdefault('meshes', []).append(mesh)
+    return len(target.gltf['meshes']) - 1
+
+
+def _remap_texture_infos(obj, remap):
+    """材质中所有 *Texture 字典的 index 都指向textures"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if isinstance(value, dict):
+                if key.endswith('Texture') and isinstance(value.get('index'), int):
+                    value['index'] = remap('textures', value['index'])
+                _remap_texture_infos(value, remap)
+            elif isinstance(value, list):
+                for item in value:
+                    _remap_texture_infos(item, remap)
+
+
+def get_lights(gltf: dict) -> list:
+    """获取KHR_lights_punctual灯光列表"""
+    return gltf.get('extensions', {}).get('KHR_lights_punctual', {}).get('lights', [])
+
+
+# ----------------------------------------------------------------------
+# 合并
+# ----------------------------------------------------------------------
+
+def merge_documents(documents: List[GLTFDocument]) -> GLTFDocument:
+    """把多个glTF文档合并为一个文档（所有根节点放入同一个scene，重复的内容只保留一份）"""
+    merged = {
+        'asset': {'version': '2.0', 'generator': 'Blender2Quick3D gltf_utils'},
+        'scene': 0,
+        'scenes': [{'name': 'Scene', 'nodes': []}],
+    }
+    merged_buffers = []
+    lights = []
+    extensions_used = set()
+    extensions_required = set()
+
+    for doc in documents:
+        gltf = copy.deepcopy(doc.gltf)
+        offsets = {kind: len(merged.get(kind, [])) for kind in TOP_LEVEL_ARRAYS}
+        offsets['buffers'] = len(merged_buffers)
+        offsets['lights'] = len(lights)
+
+        remap_references(gltf, lambda kind, index: index + offsets[kind])
+        _offset_extension_buffer_views(gltf, offsets['bufferViews'])
+
+        scene_index = gltf.get('scene', 0)
+        scenes = gltf.get('scenes', [])
+        if scenes:
+            # scene索引已重映射，需要减去偏移得到本文档内的索引
+            local_scene = scenes[scene_index - offsets['scenes']] if scene_index - offsets['scenes'] < len(scenes) else scenes[0]
+            merged['scenes'][0]['nodes'].extend(local_scene.get('nodes', []))
+
+        for kind in TOP_LEVEL_ARRAYS:
+            if kind in ('scenes', 'buffers'):
+                continue
+            if gltf.get(kind):
+                merged.setdefault(kind, []).extend(gltf[kind])
+
+        merged.setdefault('buffers', []).extend(gltf.get('buffers', []))
+        merged_buffers.extend(doc.buffers)
+        lights.extend(get_lights(gltf))
+        extensions_used.update(gltf.get('extensionsUsed', []))
+        extensions_required.update(gltf.get('extensionsRequired', []))
+
+    if lights:
+        merged.setdefault('extensions', {})['KHR_lights_punctual'] = {'lights': lights}
+    if extensions_used:
+        merged['extensionsUsed'] = sorted(extensions_used)
+    if extensions_required:
+        merged['extensionsRequired'] = sorted(extensions_required)
+
+    base_dir = documents[0].base_dir if documents else None
+    document = GLTFDocument(merged, merged_buffers, base_dir)
+    dedupe_merged_document(document)
+    return document
+
+
+def buffer_view_key(doc: GLTFDocument, view_index: int) -> tuple:
+    """bufferView的内容键：目标、步长、长度与数据哈希（零拷贝计算）"""
+    view = doc.gltf['bufferViews'][view_index]
+    digest = hashlib.sha1(doc.buffer_view_bytes(view_index)).hexdigest()
+    return (view.get('target'), view.get('byteStride'), view['byteLength'], digest)
+
+
+def image_key(doc: GLTFDocument, image_index: int) -> Optional[tuple]:
+    """图像的内容键：MIME类型与数据哈希，读取不到数据时返回None"""
+    data = doc.image_bytes(image_index)
+    if data is None:
+        return None
+    return (doc.gltf['images'][image_index].get('mimeType'), hashlib.sha1(data).hexdigest())
+
+
+def dedupe_merged_document(doc: GLTFDocument) -> Dict[str, int]:
+    """合并后的文档中，相同内容的bufferView、访问器、图像、采样器、纹理、材质与网格只保留一份
+
+    按引用关系从下到上处理：下层合并并重映射后，引用相同数据的上层条目JSON相同，直接按JSON比较。
+    材质与网格的名称参与比较（共享的Blender数据在各单元中同名），不同名的等价材质由材质去重处理。
+    图元扩展（如Draco）直接引用的bufferView不参与合并。
+
+    Returns:
+        dict: 每类删除的重复条目数量
+    """
+    gltf = doc.gltf
+    removed = {}
+
+    fixed_views = extension_buffer_views(gltf)
+    view_keys = [None if index in fixed_views else buffer_view_key(doc, index)
+                 for index in range(len(gltf.get('bufferViews', [])))]
+    first = {}
+    mapping = {}
+    for index, key in enumerate(view_keys):
+        if key is not None:
+            mapping[index] = first.setdefault(key, index)
+    duplicates = {index for index, target in mapping.items() if index != target}
+    if duplicates:
+        remap_references(gltf, lambda kind, index: mapping.get(index, index) if kind == 'bufferViews' else index)
+        doc._remove_buffer_views(duplicates)
+        removed['bufferViews'] = len(duplicates)
+
+    image_keys = [image_key(doc, index) for index in range(len(gltf.get('images', [])))]
+    for kind, keys in (('images', image_keys), ('samplers', None), ('textures', None),
+                       ('accessors', None), ('materials', None), ('meshes', None)):
+        if keys is None:
+            keys = [json.dumps(item, sort_keys=True) for item in gltf.get(kind, [])]
+        count = _drop_duplicates(gltf, kind, keys)
+        if count:
+            removed[kind] = count
+    return removed
+
+
+def _drop_duplicates(gltf: dict, kind: str, keys: List) -> int:
+    """keys[i] 相同的条目只保留第一个，引用改为指向保留的条目，返回删除的数量（键为None的条目不合并）"""
+    items = gltf.get(kind, [])
+    first = {}
+    mapping = {}
+    kept = []
+    for index, key in enumerate(keys):
+        if key is not None and key in first:
+            mapping[index] = first[key]
+            continue
+        if key is not None:
+            first[key] = len(kept)
+        mapping[index] = len(kept)
+        kept.append(items[index])
+    if len(kept) == len(items):
+        return 0
+    gltf[kind] = kept
+    remap_references(gltf, lambda k, index: mapping.get(index, index) if k == kind else index)
+    return len(items) - len(kept)
+
+
+def _offset_extension_buffer_views(gltf: dict, offset: int):
+    """remap_references不遍历图元扩展，合并时单独偏移扩展引用的bufferView"""
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            for extension in primitive.get('extensions', {}).values():
+                if isinstance(extension, dict) and isinstance(extension.get('bufferView'), int):
+                    extension['bufferView'] += offset
+
+
+# ----------------------------------------------------------------------
+# 内部工具
+# ----------------------------------------------------------------------
+
+def _parse_glb(data: memoryview):
+    """解析GLB，返回 (json字典, BIN块memoryview)"""
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if version != 2:
+        raise ValueError(f"不支持的GLB版本: {version}")
+    offset = 12
+    gltf = None
+    bin_chunk = None
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == GLB_CHUNK_JSON:
+            gltf = json.loads(bytes(chunk).decode('utf-8'))
+        elif chunk_type == GLB_CHUNK_BIN and bin_chunk is None:
+            bin_chunk = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ValueError("GLB缺少JSON块")
+    return gltf, bin_chunk
+
+
+def _write_glb(path: str, gltf: dict, blob: bytes):
+    json_bytes = bytearray(json.dumps(gltf, separators=(',', ':')).encode('utf-8'))
+    _pad_to(json_bytes, 4, b' ')
+    total = 12 + 8 + len(json_bytes) + (8 + len(blob) if blob else 0)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<III', GLB_MAGIC, 2, total))
+        f.write(struct.pack('<II', len(json_bytes), GLB_CHUNK_JSON))
+        f.write(json_bytes)
+        if blob:
+            f.write(struct.pack('<II', len(blob), GLB_CHUNK_BIN))
+            f.write(blob)
+
+
+def _write_json(path: str, gltf: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(gltf, f, separators=(',', ':'))
+
+
+def _pad_to(buffer: bytearray, alignment: int, fill: bytes = b'\x00'):
+    remainder = len(buffer) % alignment
+    if remainder:
+        buffer += fill * (alignment - remainder)
+
+
+def _unquote_uri(uri: str) -> str:
+    from urllib.parse import unquote
+    return unquote(uri)
+
+
+def load_gltf_json(path: str) -> dict:
+    """只读取 .gltf 的JSON或GLB的JSON块（不加载缓冲区）"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) == 12 and struct.unpack_from('<I', header, 0)[0] == GLB_MAGIC:
+            chunk_length, chunk_type = struct.unpack('<II', f.read(8))
+            if chunk_type != GLB_CHUNK_JSON:
+                raise ValueError("GLB的第一个块不是JSON")
+            return json.loads(f.read(chunk_length).decode('utf-8'))
+        return json.loads((header + f.read()).decode('utf-8'))
+
+
+def list_companion_files(gltf_path: str) -> List[str]:
+    """列出 .gltf 引用的外部文件（.bin、图片），GLB/嵌入式文件返回空列表"""
+    if not gltf_path or not gltf_path.lower().endswith('.gltf') or not os.path.exists(gltf_path):
+        return []
+    try:
+        with open(gltf_path, 'r', encoding='utf-8') as f:
+            gltf = json.load(f)
+    except Exception:
+        return []
+    base_dir = os.path.dirname(os.path.abspath(gltf_path))
+    files = []
+    for item in gltf.get('buffers', []) + gltf.get('images', []):
+        uri = item.get('uri')
+        if uri and not uri.startswith('data:'):
+            files.append(os.path.join(base_dir, _unquote_uri(uri)))
+    return files
+
+
+def get_gltf_extension(export_format: str) -> str:
+    """根据导出格式返回文件扩展名"""
+    return '.glb' if export_format == 'GLB' else '.gltf'
+
+
+def scene_root_nodes(gltf: dict) -> List[int]:
+    """返回默认scene的根节点索引列表"""
+    scenes = gltf.get('scenes', [])
+    if not scenes:
+        return []
+    return list(scenes[gltf.get('scene', 0)].get('nodes', []))
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+增量GLTF导出模块
+负责：
+1. 按顶层对象层级（根对象 + 子对象）划分导出单元
+2. 根据变更日志和修改器堆栈哈希判断单元是否需要重新导出
+3. 只重新导出变化的单元（每个单元缓存为独立的GLB）
+4. 把所有单元合并为Balsam读取的单个glTF文件
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import bpy
+from typing import Dict, List, Optional
+
+from . import path_manager
+from . import change_journal
+from . import gltf_utils
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+
+def _round_matrix(matrix, digits: int = 5):
+    """矩阵转为可哈希的元组"""
+    return tuple(round(value, digits) for row in matrix for value in row)
+
+
+def _property_signature(data_block) -> List:
+    """收集数据块（如修改器）所有RNA属性的取值，用于哈希"""
+    signature = []
+    for prop in data_block.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier in ('rna_type', 'name', 'is_override_data'):
+            continue
+        try:
+            value = getattr(data_block, identifier)
+        except Exception:
+            continue
+        if prop.type == 'POINTER':
+            value = getattr(value, 'name', None)
+        elif prop.type == 'COLLECTION':
+            value = len(value)
+        elif getattr(prop, 'is_array', False):
+            try:
+                value = tuple(value)
+            except TypeError:
+                value = str(value)
+        signature.append((identifier, repr(value)))
+    return signature
+
+
+def get_modifier_stack_signature(obj) -> List:
+    """修改器堆栈签名（类型、顺序、参数）"""
+    return [(mod.type, mod.name, _property_signature(mod)) for mod in obj.modifiers]
+
+
+def get_modifier_dependencies(obj) -> List:
+    """修改器引用的其他对象（如布尔切割对象），它们的变化也会影响结果"""
+    dependencies = []
+    for mod in obj.modifiers:
+        for prop in mod.bl_rna.properties:
+            if prop.type != 'POINTER':
+                continue
+            try:
+                value = getattr(mod, prop.identifier)
+            except Exception:
+                continue
+            if isinstance(value, bpy.types.Object):
+                dependencies.append(value)
+    return dependencies
+
+
+def get_instanced_objects(obj) -> List:
+    """对象以集合实例方式显示的对象（Empty的集合实例），它们的变化也会影响导出结果"""
+    if getattr(obj, 'instance_type', None) != 'COLLECTION' or obj.instance_collection is None:
+        return []
+    return list(obj.instance_collection.all_objects)
+
+
+def compute_object_signature(obj) -> List:
+    """单个对象的导出签名"""
+    animation_data = getattr(obj, 'animation_data', None)
+    action = animation_data.action.name if animation_data and animation_data.action else None
+    signature = [
+        obj.name,
+        obj.type,
+        obj.parent.name if obj.parent else None,
+        _round_matrix(obj.matrix_world),
+        obj.data.name if obj.data is not None else None,
+        tuple(slot.material.name if slot.material else None for slot in obj.material_slots),
+        action,
+        get_modifier_stack_signature(obj),
+    ]
+    for dependency in get_modifier_dependencies(obj):
+        signature.append((dependency.name, _round_matrix(dependency.matrix_world)))
+    return signature
+
+
+def export_objects_to_glb(context, objects: List, filepath: str, export_kwargs: Dict) -> bool:
+    """只选中给定对象并导出为GLB，导出后恢复原来的选择状态"""
+    return export_objects(context, objects, filepath, dict(export_kwargs, export_format='GLB'))
+
+
+def export_objects(context, objects: List, filepath: str, export_kwargs: Dict) -> bool:
+    """只选中给定对象并按 export_kwargs 中的格式导出，导出后恢复原来的选择状态"""
+    view_layer = context.view_layer
+    previous_selection = [obj for obj in view_layer.objects if obj.select_get()]
+    previous_active = view_layer.objects.active
+    try:
+        for obj in previous_selection:
+            obj.select_set(False)
+        for obj in objects:
+            obj.select_set(True)
+        view_layer.objects.active = objects[0]
+
+        kwargs = dict(export_kwargs)
+        kwargs.update(use_selection=True)
+        bpy.ops.export_scene.gltf(filepath=filepath, **kwargs)
+        return os.path.exists(filepath)
+    except Exception as e:
+        print(f"❌ 导出单元失败 {objects[0].name}: {e}")
+        return False
+    finally:
+        for obj in view_layer.objects:
+            if obj.select_get():
+                obj.select_set(False)
+        for obj in previous_selection:
+            try:
+                obj.select_set(True)
+            except Exception:
+                pass
+        view_layer.objects.active = previous_active
+
+
+class IncrementalGLTFExporter:
+    """增量GLTF导出器"""
+
+    def __init__(self, export_kwargs: Dict, cache_dir: Optional[str] = None):
+        """
+        Args:
+            export_kwargs: bpy.ops.export_scene.gltf 的参数（不含filepath）
+            cache_dir: 单元缓存目录，默认为工作空间状态目录下的 incremental
+        """
+        self.export_kwargs = dict(export_kwargs)
+        self.cache_dir = cache_dir or path_manager.get_path_manager().get_workspace_state_dir("incremental")
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE_NAME)
+        self.stats = {'units': 0, 'exported': 0, 'reused': 0}
+
+    def _settings_hash(self) -> str:
+        """导出设置哈希：设置变化时所有单元都要重新导出"""
+        settings = {k: v for k, v in self.export_kwargs.items() if k != 'export_format'}
+        return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _load_manifest(self) -> Dict:
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取增量导出清单失败: {e}")
+        return {}
+
+    def _save_manifest(self, manifest: Dict):
+        try:
+            with open(self.manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"⚠️ 保存增量导出清单失败: {e}")
+
+    def collect_units(self, view_layer) -> Dict[str, List]:
+        """按根对象划分导出单元 {根对象名称: [对象列表]}"""
+        visible = [obj for obj in view_layer.objects if obj.visible_get(view_layer=view_layer)]
+        visible_names = {obj.name for obj in visible}
+        units = {}
+
+        def _root_of(obj):
+            while obj.parent is not None and obj.parent.name in visible_names:
+                obj = obj.parent
+            return obj
+
+        for obj in visible:
+            units.setdefault(_root_of(obj).name, []).append(obj)
+        return units
+
+    def _unit_hash(self, objects: List, settings_hash: str) -> str:
+        hasher = hashlib.sha1(settings_hash.encode('utf-8'))
+        for obj in sorted(objects, key=lambda o: o.name):
+            hasher.update(repr(compute_object_signature(obj)).encode('utf-8'))
+        return hasher.hexdigest()
+
+    def _is_unit_dirty(self, objects: List, journal) -> bool:
+        for obj in objects:
+            if journal.is_object_dirty(obj):
+                return True
+            instanced = get_instanced_objects(obj)
+            # 集合成员变化时，集合实例导出的内容随之变化（可见对象本身在导出时重新收集）
+            if instanced and journal.structure_changed:
+                return True
+            for dependency in get_modifier_dependencies(obj) + instanced:
+                if journal.is_object_dirty(dependency):
+                    return True
+        return False
+
+    def _export_unit(self, context, objects: List, filepath: str) -> bool:
+        """只选中单元内的对象并导出为GLB"""
+        return export_objects_to_glb(context, objects, filepath, self.export_kwargs)
+
+    def export(self, target_path: str, export_format: str = 'GLTF_EMBEDDED', context=None) -> Optional[str]:
+        """执行增量导出，返回实际写入的glTF路径，失败返回None"""
+        context = context or bpy.context
+        start_time = time.perf_counter()
+        journal = change_journal.get_change_journal()
+        manifest = self._load_manifest()
+        settings_hash = self._settings_hash()
+
+        # 清单来自其他会话或导出设置变化时，日志不可信，全部重新导出
+        trusted = (manifest.get('session_id') == journal.session_id
+                   and manifest.get('settings_hash') == settings_hash)
+        old_units = manifest.get('units', {}) if trusted else {}
+        if not trusted:
+            print("ℹ️ 增量导出清单不可用（新会话或设置变化），执行完整导出")
+
+        units = self.collect_units(context.view_layer)
+        if not units:
+            print("⚠️ 没有可导出的可见对象")
+            return None
+
+        new_units = {}
+        documents = []
+        self.stats = {'units': len(units), 'exported': 0, 'reused': 0}
+
+        for root_name, objects in sorted(units.items()):
+            unit_hash = self._unit_hash(objects, settings_hash)
+            cached = old_units.get(root_name)
+            cached_file = os.path.join(self.cache_dir, cached['file']) if cached else None
+
+            if (cached and cached.get('hash') == unit_hash and os.path.exists(cached_file)
+                    and not self._is_unit_dirty(objects, journal)):
+                unit_file = cached['file']
+                self.stats['reused'] += 1
+            else:
+                safe_name = re.sub(r'[^\w\-]', '_', root_name)
+                unit_file = f"{safe_name}_{unit_hash[:12]}.glb"
+                if not self._export_unit(context, objects, os.path.join(self.cache_dir, unit_file)):
+                    return None
+                self.stats['exported'] += 1
+
+            new_units[root_name] = {'hash': unit_hash, 'file': unit_file}
+            documents.append(gltf_utils.GLTFDocument.load(os.path.join(self.cache_dir, unit_file)))
+
+        # 删除不再被引用的单元缓存（已删除的对象、旧会话遗留的文件）
+        referenced = {unit['file'] for unit in new_units.values()}
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.glb') and file_name not in referenced:
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+        merged = gltf_utils.merge_documents(documents)
+        merged.gltf['asset']['copyright'] = self.export_kwargs.get('export_copyright', '')
+        written_path = merged.save(target_path, export_format)
+
+        self._save_manifest({
+            'session_id': journal.session_id,
+            'settings_hash': settings_hash,
+            'units': new_units,
+        })
+        journal.clear()
+
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ 增量导出完成: {self.stats['exported']} 个单元重新导出, "
+              f"{self.stats['reused']} 个单元复用缓存, 耗时 {elapsed:.2f}s")
+        return written_path
+
+
+def export_incremental(target_path: str, export_kwargs: Dict, export_format: str = 'GLTF_EMBEDDED') -> Optional[str]:
+    """增量导出场景（兼容性函数）"""
+    try:
+        exporter = IncrementalGLTFExporter(export_kwargs)
+        return exporter.export(target_path, export_format)
+    except Exception as e:
+        print(f"❌ 增量导出失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
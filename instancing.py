@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+GPU实例化模块 - 把共享网格与材质的重复对象合并为一个实例化的Model
+负责：
+1. 在导出的glTF中查找网格内容相同（顶点数据、索引与材质都相同）、父节点相同的静态节点
+2. 每组只保留一个原型节点（重命名为标记名称），删除其余节点与不再使用的网格，并记录所有实例的变换
+3. balsam转换后，在QML中找到原型Model，去掉其自身变换并挂上 InstanceList 或 FileInstancing
+   （实例数量较多时写出XML实例表，避免QML中出现成千上万个条目）
+
+实例变换取自glTF节点的局部TRS（已经是Y轴向上、相对父节点的坐标），
+原型Model的局部变换被清除为单位矩阵，因此实例变换与原来各个节点的变换完全一致。
+网格按内容而不是索引比较：增量导出时每个根层级单独导出再合并，关联复制的对象在不同根层级中
+会得到各自的网格条目。
+"""
+
+import os
+import re
+import json
+import math
+import hashlib
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+from . import material_dedup
+
+INSTANCING_PLAN_FILE_NAME = "instancing.json"
+# 实例表目录（相对工作空间，与 meshes/、maps/ 同级）
+INSTANCING_DIR_NAME = "instancing"
+# AUTO 模式下超过该数量时使用 FileInstancing
+FILE_INSTANCING_THRESHOLD = 100
+DEFAULT_MIN_INSTANCES = 4
+
+INSTANCING_MODES = ('OFF', 'AUTO', 'INSTANCE_LIST', 'FILE_INSTANCING')
+
+_TRANSFORM_PROPERTY_PATTERN = re.compile(r'^\s*(position|rotation|eulerRotation|scale)\s*:')
+
+
+def _marker_name(prefix: str, index: int) -> str:
+    """原型节点的标记名称，balsam会据此生成QML id"""
+    return f"b2qinst{prefix}{index}x"
+
+
+def _accessor_digest(doc, accessor_index: int, cache: Dict) -> str:
+    """访问器的内容哈希：类型信息加上所在bufferView的数据（零拷贝计算）"""
+    if accessor_index not in cache:
+        gltf = doc.gltf
+        accessor = gltf['accessors'][accessor_index]
+        meta = {key: value for key, value in accessor.items() if key not in ('bufferView', 'sparse', 'name', 'extras')}
+        digest = hashlib.sha1(json.dumps(meta, sort_keys=True).encode('utf-8'))
+        sparse = accessor.get('sparse', {})
+        for info in (accessor, sparse.get('indices', {}), sparse.get('values', {})):
+            if 'bufferView' in info:
+                view = gltf['bufferViews'][info['bufferView']]
+                digest.update(json.dumps([info.get('byteOffset', 0), info.get('componentType'),
+                                          view.get('byteStride')]).encode('utf-8'))
+                digest.update(doc.buffer_view_bytes(info['bufferView']))
+        cache[accessor_index] = digest.hexdigest()
+    return cache[accessor_index]
+
+
+def mesh_content_keys(doc) -> List[str]:
+    """每个网格的内容键：图元的顶点属性、索引、形变目标与材质参数都相同的网格键相同
+
+    带扩展（如Draco压缩）的图元无法按访问器比较，其网格只与自身相同。
+    """
+    gltf = doc.gltf
+    materials = gltf.get('materials', [])
+    accessor_cache, image_cache, material_cache = {}, {}, {}
+    keys = []
+    for mesh_index, mesh in enumerate(gltf.get('meshes', [])):
+        primitives = mesh.get('primitives', [])
+        if any(primitive.get('extensions') for primitive in primitives):
+            keys.append(f"mesh{mesh_index}")
+            continue
+        content = []
+        for primitive in primitives:
+            material = primitive.get('material')
+            if isinstance(material, int) and material not in material_cache:
+                material_cache[material] = material_dedup.canonical_material(doc, materials[material], image_cache)
+            content.append({
+                'mode': primitive.get('mode', 4),
+                'attributes': {name: _accessor_digest(doc, index, accessor_cache)
+                               for name, index in primitive.get('attributes', {}).items()},
+                'indices': _accessor_digest(doc, primitive['indices'], accessor_cache) if 'indices' in primitive else None,
+                'targets': [{name: _accessor_digest(doc, index, accessor_cache) for name, index in target.items()}
+                            for target in primitive.get('targets', [])],
+                'material': material_cache.get(material),
+            })
+        data = json.dumps({'primitives': content, 'weights': mesh.get('weights')}, sort_keys=True)
+        keys.append(hashlib.sha1(data.encode('utf-8')).hexdigest())
+    return keys
+
+
+def collect_instance_groups(gltf: dict, min_count: int = DEFAULT_MIN_INSTANCES,
+                            mesh_keys: Optional[List[str]] = None) -> List[List[int]]:
+    """查找可以实例化的节点组（每组为节点索引列表，按索引排序）
+
+    只合并静态的叶子网格节点：无子节点、无蒙皮、无形变权重、不是动画目标或骨骼，且使用TRS表示变换。
+    mesh_keys 为 mesh_content_keys 的结果，未给出时按网格索引分组。
+    """
+    nodes = gltf.get('nodes', [])
+    parents = {}
+    for index, node in enumerate(nodes):
+        for child in node.get('children', []):
+            parents[child] = index
+
+    excluded = set()
+    for animation in gltf.get('animations', []):
+        for channel in animation.get('channels', []):
+            target = channel.get('target', {}).get('node')
+            if target is not None:
+                excluded.add(target)
+    for skin in gltf.get('skins', []):
+        excluded.update(skin.get('joints', []))
+        if skin.get('skeleton') is not None:
+            excluded.add(skin['skeleton'])
+
+    groups = {}
+    for index, node in enumerate(nodes):
+        if ('mesh' not in node or index in excluded or node.get('children') or 'skin' in node
+                or 'weights' in node or 'matrix' in node or 'camera' in node
+                or 'KHR_lights_punctual' in node.get('extensions', {})):
+            continue
+        mesh_key = mesh_keys[node['mesh']] if mesh_keys else node['mesh']
+        groups.setdefault((mesh_key, parents.get(index)), []).append(index)
+
+    return [members for members in groups.values() if len(members) >= max(min_count, 2)]
+
+
+def instance_document(document, min_count: int = DEFAULT_MIN_INSTANCES, marker_prefix: str = "") -> List[Dict]:
+    """在文档中合并重复节点
+
+    Args:
+        document: gltf_utils.GLTFDocument
+        min_count: 至少多少个重复对象才实例化
+        marker_prefix: 标记名称前缀（同一工作空间中有多个glTF时区分）
+
+    Returns:
+        list: 每组为 {'marker', 'name', 'mesh', 'instances': [{'translation', 'rotation', 'scale'}]}
+    """
+    gltf = document.gltf
+    groups = collect_instance_groups(gltf, min_count, mesh_content_keys(document))
+    if not groups:
+        return []
+
+    nodes = gltf['nodes']
+    meshes = gltf.get('meshes', [])
+    plan = []
+    removed = []
+    for group_index, members in enumerate(groups):
+        prototype = nodes[members[0]]
+        marker = _marker_name(marker_prefix, group_index)
+        plan.append({
+            'marker': marker,
+            'name': prototype.get('name', ''),
+            'mesh': meshes[prototype['mesh']].get('name', '') if prototype['mesh'] < len(meshes) else '',
+            'instances': [{
+                'translation': nodes[i].get('translation', [0.0, 0.0, 0.0]),
+                'rotation': nodes[i].get('rotation', [0.0, 0.0, 0.0, 1.0]),
+                'scale': nodes[i].get('scale', [1.0, 1.0, 1.0]),
+            } for i in members],
+        })
+        # 原型节点清除自身变换，实例变换由QML中的实例表提供
+        prototype['name'] = marker
+        for key in ('translation', 'rotation', 'scale'):
+            prototype.pop(key, None)
+        removed.extend(members[1:])
+
+    gltf_utils.remove_nodes(gltf, removed)
+    _remove_unused_meshes(document)
+    total = sum(len(group['instances']) for group in plan)
+    print(f"🔁 实例化: {total} 个对象合并为 {len(plan)} 个实例化Model（删除 {len(removed)} 个节点）")
+    return plan
+
+
+def instance_gltf(gltf_path: str, export_format: str, min_count: int = DEFAULT_MIN_INSTANCES,
+                  marker_prefix: str = "") -> List[Dict]:
+    """在glTF文件中合并重复节点，有实例化时原地改写文件"""
+    document = gltf_utils.GLTFDocument.load(gltf_path)
+    plan = instance_document(document, min_count, marker_prefix)
+    if plan:
+        document.save(gltf_path, export_format)
+    return plan
+
+
+def _remove_unused_meshes(document):
+    """删除被合并节点独占的网格（内容相同但索引不同的网格），以及随之不再使用的访问器"""
+    gltf = document.gltf
+    used = {node['mesh'] for node in gltf.get('nodes', []) if isinstance(node.get('mesh'), int)}
+    meshes = gltf.get('meshes', [])
+    if len(used) >= len(meshes):
+        return
+    mapping = {}
+    kept = []
+    for index, mesh in enumerate(meshes):
+        if index in used:
+            mapping[index] = len(kept)
+            kept.append(mesh)
+    gltf['meshes'] = kept
+    gltf_utils.remap_references(gltf, lambda kind, index: mapping.get(index) if kind == 'meshes' else index)
+    document.remove_unused_accessors()
+
+
+def save_instancing_plan(state_dir: str, groups: List[Dict], mode: str):
+    """保存实例化计划，balsam完成后据此改写QML"""
+    os.makedirs(state_dir, exist_ok=True)
+    plan_path = os.path.join(state_dir, INSTANCING_PLAN_FILE_NAME)
+    if not groups:
+        if os.path.exists(plan_path):
+            os.remove(plan_path)
+        return
+    with open(plan_path, 'w', encoding='utf-8') as f:
+        json.dump({'mode': mode, 'groups': groups}, f, ensure_ascii=False)
+
+
+def load_instancing_plan(state_dir: str) -> Optional[Dict]:
+    plan_path = os.path.join(state_dir, INSTANCING_PLAN_FILE_NAME)
+    if not os.path.exists(plan_path):
+        return None
+    try:
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 读取实例化计划失败: {e}")
+        return None
+
+
+# ----------------------------------------------------------------------
+# QML
+# ----------------------------------------------------------------------
+def _fmt(value: float) -> str:
+    return f"{value + 0.0:.6g}"  # + 0.0 去掉 -0
+
+
+def quaternion_to_qt_euler(x: float, y: float, z: float, w: float) -> List[float]:
+    """四元数转为Qt的 eulerRotation（度），与 QQuaternion::toEulerAngles 一致"""
+    length = math.sqrt(x * x + y * y + z * z + w * w) or 1.0
+    x, y, z, w = x / length, y / length, z / length, w / length
+    sinp = -2.0 * (y * z - x * w)
+    if abs(sinp) >= 1.0 - 1e-6:
+        # 万向节锁：roll 置零，全部归入 yaw
+        pitch = math.copysign(math.pi / 2, sinp)
+        yaw = math.atan2(-2.0 * (x * z - y * w), 1.0 - 2.0 * (y * y + z * z))
+        roll = 0.0
+    else:
+        pitch = math.asin(sinp)
+        yaw = math.atan2(2.0 * (x * z + y * w), 1.0 - 2.0 * (x * x + y * y))
+        roll = math.atan2(2.0 * (x * y + z * w), 1.0 - 2.0 * (x * x + z * z))
+    return [math.degrees(pitch), math.degrees(yaw), math.degrees(roll)]
+
+
+def build_instance_list_qml(instances: List[Dict], indent: str) -> str:
+    """生成 InstanceList（实例较少时使用）"""
+    entries = []
+    for instance in instances:
+        tx, ty, tz = instance['translation']
+        rx, ry, rz, rw = instance['rotation']
+        sx, sy, sz = instance['scale']
+        entries.append(
+            f"{indent}        InstanceListEntry {{ "
+            f"position: Qt.vector3d({_fmt(tx)}, {_fmt(ty)}, {_fmt(tz)}); "
+            f"rotation: Qt.quaternion({_fmt(rw)}, {_fmt(rx)}, {_fmt(ry)}, {_fmt(rz)}); "
+            f"scale: Qt.vector3d({_fmt(sx)}, {_fmt(sy)}, {_fmt(sz)}) }}"
+        )
+    return (f"{indent}instancing: InstanceList {{\n"
+            f"{indent}    instances: [\n" + ",\n".join(entries) + "\n"
+            f"{indent}    ]\n"
+            f"{indent}}}\n")
+
+
+def write_instance_table(path: str, instances: List[Dict]):
+    """写出 FileInstancing 使用的XML实例表"""
+    lines = ['<?xml version="1.0" encoding="UTF-8" ?>', '<InstanceTable>']
+    for instance in instances:
+        tx, ty, tz = instance['translation']
+        sx, sy, sz = instance['scale']
+        ex, ey, ez = quaternion_to_qt_euler(*instance['rotation'])
+        lines.append(
+            f'  <Instance position="{_fmt(tx)} {_fmt(ty)} {_fmt(tz)}" '
+            f'scale="{_fmt(sx)} {_fmt(sy)} {_fmt(sz)}" '
+            f'eulerRotation="{_fmt(ex)} {_fmt(ey)} {_fmt(ez)}"/>'
+        )
+    lines.append('</InstanceTable>')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _instancing_qml(group: Dict, mode: str, output_dir: str, indent: str) -> str:
+    instances = group['instances']
+    use_file = mode == 'FILE_INSTANCING' or (mode == 'AUTO' and len(instances) > FILE_INSTANCING_THRESHOLD)
+    if not use_file:
+        return build_instance_list_qml(instances, indent)
+    rel_path = f"{INSTANCING_DIR_NAME}/{group['marker']}.xml"
+    write_instance_table(os.path.join(output_dir, rel_path), instances)
+    return f'{indent}instancing: FileInstancing {{ source: "{rel_path}" }}\n'
+
+
+def apply_instancing_to_qml(qml_content: str, plan: Dict, output_dir: str) -> str:
+    """在balsam生成的QML中为原型Model挂上实例表"""
+    from .qml_handler import find_enclosing_block
+
+    mode = plan.get('mode', 'AUTO')
+    for group in plan.get('groups', []):
+        match = re.search(r'\bid:\s*(\w*' + re.escape(group['marker']) + r'\w*)', qml_content)
+        if not match:
+            print(f"⚠️ QML中未找到实例化原型: {group['name']} ({group['marker']})")
+            continue
+        block = find_enclosing_block(qml_content, match.start())
+        if block is not None and not qml_content[:block[0]].rstrip().endswith('Model'):
+            # 原型生成为 Node + 子Model 时，实例表挂在子Model上
+            child = re.search(r'\bModel\s*\{', qml_content[block[0] + 1:block[1]])
+            block = find_enclosing_block(qml_content, block[0] + 1 + child.end()) if child else None
+        if block is None:
+            print(f"⚠️ 实例化原型不是Model: {group['name']}")
+            continue
+        start, end = block
+
+        # 去掉原型Model自身的变换（只处理该块的直接属性）
+        body_lines = qml_content[start + 1:end].split('\n')
+        depth = 0
+        kept = []
+        for line in body_lines:
+            if depth == 0 and _TRANSFORM_PROPERTY_PATTERN.match(line):
+                depth += line.count('{') - line.count('}')
+                continue
+            depth += line.count('{') - line.count('}')
+            kept.append(line)
+        indent_match = re.search(r'\n(\s*)id:', qml_content[start:end])
+        indent = indent_match.group(1) if indent_match else "    "
+        closing_indent = kept.pop() if kept and not kept[-1].strip() else ""
+        body = "\n".join(kept).rstrip() + "\n" + _instancing_qml(group, mode, output_dir, indent) + closing_indent
+
+        qml_content = qml_content[:start + 1] + body + qml_content[end:]
+        print(f"✅ 实例化Model: {group['name']} x{len(group['instances'])}")
+    return qml_content
+
+
+def _remove_stale_tables(output_dir: str, plan: Optional[Dict]):
+    """删除不属于当前实例化计划的XML实例表"""
+    table_dir = os.path.join(output_dir, INSTANCING_DIR_NAME)
+    if not os.path.isdir(table_dir):
+        return
+    current = {group['marker'] + ".xml" for group in (plan or {}).get('groups', [])}
+    for name in os.listdir(table_dir):
+        if name.endswith('.xml') and name not in current:
+            os.remove(os.path.join(table_dir, name))
+
+
+def apply_instancing_to_output(output_dir: str, state_dir: str) -> int:
+    """按实例化计划改写工作空间中balsam生成的QML，返回处理的文件数"""
+    from .qml_handler import ASSEMBLED_QML_EXTENSION
+
+    plan = load_instancing_plan(state_dir)
+    _remove_stale_tables(output_dir, plan)
+    if not plan:
+        return 0
+    processed = 0
+    for name in os.listdir(output_dir):
+        if not name.endswith('.qml') or name.endswith(ASSEMBLED_QML_EXTENSION):
+            continue
+        path = os.path.join(output_dir, name)
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if 'b2qinst' not in content:
+            continue
+        new_content = apply_instancing_to_qml(content, plan, output_dir)
+        if new_content != content:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            processed += 1
+    return processed
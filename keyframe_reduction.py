@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+关键帧精简模块 - balsam转换前删除导出glTF动画中的冗余关键帧
+负责：
+1. 线性插值的采样器：按Ramer–Douglas–Peucker算法只保留插值误差超过容差的关键帧
+   （平移按距离、旋转按球面插值后的夹角、缩放按相对误差、变形权重按绝对误差）
+2. 阶跃插值的采样器：删除与前一帧数值相同的关键帧；三次样条采样器保持不变
+3. 精简后的时间/数值写入新的访问器，删除不再使用的访问器与数据，统计关键帧数与动画数据大小
+4. 统计balsam输出中的关键帧：内联在QML中的Keyframe数量与大小、二进制关键帧文件（--useBinaryKeyframes）的大小
+
+烘焙动画每帧一个关键帧，匀速或静止的通道精简后只剩首尾两帧；
+balsam为每个关键帧写出一个 Keyframe {} 元素，关键帧越少QML越小、加载时解析越快。
+依赖numpy（Blender自带），不可用时跳过。
+"""
+
+import os
+import re
+import math
+from typing import Dict, Optional
+
+from . import gltf_utils
+from . import native_mesh_converter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 默认容差：平移（场景单位）、旋转（度）、缩放（相对值）、变形权重
+DEFAULT_POSITION_TOLERANCE = 0.001
+DEFAULT_ANGLE_TOLERANCE = 0.1
+DEFAULT_SCALE_TOLERANCE = 0.001
+DEFAULT_WEIGHT_TOLERANCE = 0.001
+
+# balsam写出二进制关键帧文件的命令行选项
+BINARY_KEYFRAMES_OPTION = "--useBinaryKeyframes"
+
+COMPONENT_FLOAT = 5126
+
+_KEYFRAME_PATTERN = re.compile(r'\bKeyframe\s*\{')
+_KEYFRAME_SOURCE_PATTERN = re.compile(r'keyframeSource\s*:\s*"([^"]+)"')
+
+
+def get_tolerances(position: float = DEFAULT_POSITION_TOLERANCE, angle_degrees: float = DEFAULT_ANGLE_TOLERANCE,
+                   scale: float = DEFAULT_SCALE_TOLERANCE, weight: float = DEFAULT_WEIGHT_TOLERANCE) -> Dict[str, float]:
+    """按glTF动画通道（target.path）组织的容差，旋转换算为弧度"""
+    return {
+        'translation': position,
+        'rotation': math.radians(angle_degrees),
+        'scale': scale,
+        'weights': weight,
+    }
+
+
+# ----------------------------------------------------------------------
+# 曲线精简
+# ----------------------------------------------------------------------
+
+def _normalize(rows):
+    lengths = np.linalg.norm(rows, axis=-1, keepdims=True)
+    lengths[lengths == 0] = 1.0
+    return rows / lengths
+
+
+def _slerp(start, end, t):
+    """两个四元数之间按t（数组）做球面插值，走最短路径"""
+    start = _normalize(start)
+    end = _normalize(end)
+    dot = float(np.dot(start, end))
+    if dot < 0.0:
+        end = -end
+        dot = -dot
+    if dot > 0.9995:
+        return _normalize(start + (end - start) * t[:, None])
+    theta = math.acos(min(dot, 1.0))
+    return (np.sin((1.0 - t) * theta)[:, None] * start + np.sin(t * theta)[:, None] * end) / math.sin(theta)
+
+
+def _segment_errors(path: str, times, values, start: int, end: int):
+    """用首尾两帧插值代替 (start, end) 之间的关键帧时，每个中间关键帧的误差"""
+    duration = times[end] - times[start]
+    t = (times[start + 1:end] - times[start]) / duration if duration > 0 else np.zeros(end - start - 1)
+    actual = values[start + 1:end]
+    if path == 'rotation':
+        approx = _slerp(values[start], values[end], t)
+        dots = np.clip(np.abs(np.sum(approx * _normalize(actual), axis=1)), 0.0, 1.0)
+        return 2.0 * np.arccos(dots)
+    diff = values[start] + (values[end] - values[start]) * t[:, None] - actual
+    if path == 'translation':
+        return np.linalg.norm(diff, axis=1)
+    if path == 'scale':
+        # 相对误差；绝对值小于1的缩放按绝对误差计算，避免接近0时容差失效
+        return np.abs(diff).max(axis=1) / np.maximum(np.abs(actual).max(axis=1), 1.0)
+    return np.abs(diff).max(axis=1)
+
+
+def reduce_linear(times, values, path: str, tolerance: float):
+    """线性插值曲线的RDP精简，返回保留的关键帧下标（始终保留首尾两帧）
+
+    Args:
+        times: (n,) 关键帧时间
+        values: (n, 分量数) 关键帧数值
+        path: 通道类型（translation / rotation / scale / weights）
+        tolerance: 允许的最大误差（旋转为弧度）
+    """
+    count = len(times)
+    if count <= 2:
+        return np.arange(count)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        errors = _segment_errors(path, times, values, start, end)
+        worst = int(np.argmax(errors))
+        if errors[worst] > tolerance:
+            split = start + 1 + worst
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def reduce_step(values):
+    """阶跃插值曲线：删除与前一帧相同的关键帧，保留最后一帧以保持动画时长"""
+    count = len(values)
+    if count <= 2:
+        return np.arange(count)
+    keep = np.ones(count, dtype=bool)
+    keep[1:] = np.any(values[1:] != values[:-1], axis=1)
+    keep[-1] = True
+    return np.flatnonzero(keep)
+
+
+# ----------------------------------------------------------------------
+# glTF
+# ----------------------------------------------------------------------
+
+def _usage_counts(gltf: dict):
+    """统计访问器被引用的次数、bufferView被访问器/图片引用的次数"""
+    accessor_users, view_users = {}, {}
+
+    def _collect(kind, index):
+        if kind == 'accessors':
+            accessor_users[index] = accessor_users.get(index, 0) + 1
+        elif kind == 'bufferViews':
+            view_users[index] = view_users.get(index, 0) + 1
+        return index
+
+    gltf_utils.remap_references(gltf, _collect)
+    return accessor_users, view_users
+
+
+def _store_accessor(doc, accessor_index: int, rows, accessor_users: Dict, view_users: Dict) -> int:
+    """把float32数据写回访问器，返回写入的访问器索引
+
+    访问器只被一处引用且独占bufferView时原地替换数据；否则（如多个采样器共享的时间轴）写入新的访问器，
+    原访问器的引用计数减一，不再使用时由 remove_unused_accessors 删除。
+    """
+    accessors = doc.gltf['accessors']
+    accessor = accessors[accessor_index]
+    data = np.ascontiguousarray(rows, dtype='<f4')
+    exclusive = (accessor_users.get(accessor_index, 0) == 1 and 'sparse' not in accessor
+                 and view_users.get(accessor.get('bufferView')) == 1)
+    if exclusive:
+        doc.replace_buffer_view(accessor['bufferView'], data.tobytes())
+        doc.gltf['bufferViews'][accessor['bufferView']].pop('byteStride', None)
+        accessor.pop('byteOffset', None)
+        target_index = accessor_index
+    else:
+        accessor_users[accessor_index] -= 1
+        target = {'type': accessor['type']}
+        target['bufferView'] = doc.add_buffer_view(data.tobytes())
+        view_users[target['bufferView']] = 1
+        accessors.append(target)
+        target_index = len(accessors) - 1
+        accessor_users[target_index] = 1
+        if 'min' in accessor:
+            target['min'] = accessor['min']
+        accessor = target
+
+    accessor['componentType'] = COMPONENT_FLOAT
+    accessor['count'] = len(data)
+    accessor.pop('normalized', None)
+    accessor.pop('sparse', None)
+    # 采样器的时间访问器必须带有min/max
+    if 'min' in accessor:
+        accessor['min'] = [float(v) for v in data.min(axis=0)]
+        accessor['max'] = [float(v) for v in data.max(axis=0)]
+    return target_index
+
+
+def animation_data_size(gltf: dict) -> int:
+    """动画采样器引用的bufferView总字节数"""
+    views = set()
+    accessors = gltf.get('accessors', [])
+    for animation in gltf.get('animations', []):
+        for sampler in animation.get('samplers', []):
+            for key in ('input', 'output'):
+                accessor = accessors[sampler[key]]
+                if 'bufferView' in accessor:
+                    views.add(accessor['bufferView'])
+    return sum(gltf['bufferViews'][view]['byteLength'] for view in views)
+
+
+def reduce_document(doc, tolerances: Dict[str, float]) -> Dict:
+    """精简文档中所有动画采样器的关键帧
+
+    Returns:
+        dict: {'samplers', 'reduced_samplers', 'keyframes_before', 'keyframes_after', 'bytes_before', 'bytes_after'}
+    """
+    gltf = doc.gltf
+    stats = {'samplers': 0, 'reduced_samplers': 0, 'keyframes_before': 0, 'keyframes_after': 0,
+             'bytes_before': animation_data_size(gltf), 'bytes_after': 0}
+    accessor_users, view_users = _usage_counts(gltf)
+    # 精简结果相同的时间轴（如静止通道只剩首尾两帧）共用一个访问器
+    shared_inputs = {}
+
+    for animation in gltf.get('animations', []):
+        paths = {}
+        for channel in animation.get('channels', []):
+            paths.setdefault(channel['sampler'], channel.get('target', {}).get('path'))
+        for sampler_index, sampler in enumerate(animation.get('samplers', [])):
+            times = native_mesh_converter.read_accessor(doc, sampler['input'], as_float=True)[:, 0]
+            count = len(times)
+            stats['samplers'] += 1
+            stats['keyframes_before'] += count
+            interpolation = sampler.get('interpolation', 'LINEAR')
+            path = paths.get(sampler_index)
+            if interpolation == 'CUBICSPLINE' or path not in tolerances or count <= 2:
+                stats['keyframes_after'] += count
+                continue
+
+            output = native_mesh_converter.read_accessor(doc, sampler['output'], as_float=True)
+            values = output.reshape(count, -1).astype(np.float64)
+            if interpolation == 'STEP':
+                kept = reduce_step(values)
+            else:
+                kept = reduce_linear(times.astype(np.float64), values, path, tolerances[path])
+            stats['keyframes_after'] += len(kept)
+            if len(kept) == count:
+                continue
+
+            key = (sampler['input'], kept.tobytes())
+            if key in shared_inputs:
+                accessor_users[sampler['input']] -= 1
+                accessor_users[shared_inputs[key]] += 1
+                sampler['input'] = shared_inputs[key]
+            else:
+                new_input = _store_accessor(doc, sampler['input'], times[kept].reshape(-1, 1), accessor_users, view_users)
+                shared_inputs[key] = new_input
+                sampler['input'] = new_input
+            components = output.shape[1]
+            sampler['output'] = _store_accessor(
+                doc, sampler['output'], values[kept].reshape(-1, components), accessor_users, view_users
+            )
+            stats['reduced_samplers'] += 1
+
+    if stats['reduced_samplers']:
+        doc.remove_unused_accessors()
+    stats['bytes_after'] = animation_data_size(gltf)
+    return stats
+
+
+def reduce_gltf(gltf_path: str, export_format: str, tolerances: Dict[str, float]) -> Optional[Dict]:
+    """精简glTF文件中的动画关键帧并保存，没有动画时返回None"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    if not doc.gltf.get('animations'):
+        return None
+    stats = reduce_document(doc, tolerances)
+    if stats['reduced_samplers']:
+        doc.save(gltf_path, export_format)
+    return stats
+
+
+# ----------------------------------------------------------------------
+# balsam输出
+# ----------------------------------------------------------------------
+
+def summarize_keyframe_output(output_dir: str) -> Dict:
+    """统计balsam输出中的关键帧：QML内联Keyframe数与QML大小、二进制关键帧文件数与大小"""
+    summary = {'qml_bytes': 0, 'inline_keyframes': 0, 'binary_files': 0, 'binary_bytes': 0}
+    binary_files = set()
+    for root, _dirs, files in os.walk(output_dir):
+        for name in files:
+            if not name.endswith('.qml'):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+            summary['qml_bytes'] += len(content.encode('utf-8'))
+            summary['inline_keyframes'] += len(_KEYFRAME_PATTERN.findall(content))
+            for source in _KEYFRAME_SOURCE_PATTERN.findall(content):
+                source = source[len('file:'):] if source.startswith('file:') else source
+                binary_files.add(os.path.normpath(os.path.join(root, source)))
+    for path in binary_files:
+        if os.path.exists(path):
+            summary['binary_files'] += 1
+            summary['binary_bytes'] += os.path.getsize(path)
+    return summary
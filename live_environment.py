@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+实时环境推送模块 - 把SceneEnvironment属性的修改直接推送到正在运行的预览窗口
+负责：
+1. SceneEnvironmentManager 注册的属性 update 回调只标记"有修改"，并注册一个 bpy.app.timers 计时器
+2. 计时器每帧最多触发一次：用 QMLHandler 的生成函数重新生成 SceneEnvironment 属性，
+   与上次推送的结果对比，只把变化的属性交给预览窗口 setProperty
+3. 拖动滑块时多次修改合并为一次推送，不重建 QQmlApplicationEngine
+
+属性的取值与条件（如AO关闭时不写 aoStrength）与组装QML时完全一致；
+环境类型切换（SceneEnvironment <-> ExtendedSceneEnvironment）或嵌套对象（如IBL光照探针）
+无法直接推送，需要重新打开预览窗口。
+"""
+
+import re
+from typing import Dict, Optional, Tuple
+
+import bpy
+
+# 合并推送的间隔（约一帧）
+PUSH_INTERVAL = 1.0 / 60.0
+
+_PROPERTY_LINE = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*:\s*(.+?)\s*$')
+
+# 上次推送（或窗口打开时组装）的环境：(类型名, {QML属性名: QML表达式})
+_last_environment: Optional[Tuple[str, Dict[str, str]]] = None
+
+
+def parse_environment_qml(environment_qml: str) -> Tuple[str, Dict[str, str]]:
+    """把 generate_scene_environment_qml 的结果解析为 (类型名, {属性名: 表达式})"""
+    lines = environment_qml.strip().splitlines()
+    type_name = lines[0].split('{')[0].strip() if lines else ''
+    properties = {}
+    for line in lines[1:-1]:
+        match = _PROPERTY_LINE.match(line)
+        if match:
+            properties[match.group(1)] = match.group(2)
+    return type_name, properties
+
+
+def generate_environment() -> Tuple[str, Dict[str, str]]:
+    """按当前场景属性生成SceneEnvironment（不做IBL检测，IBL图像变化需要重新转换）"""
+    from . import qml_handler
+    from . import scene_environment
+
+    handler = qml_handler.QMLHandler()
+    settings = handler.get_default_scene_settings()
+    settings.update(scene_environment.get_scene_environment_settings())
+    return parse_environment_qml(handler.generate_scene_environment_qml(settings))
+
+
+def is_enabled(scene=None) -> bool:
+    try:
+        scene = scene or bpy.context.scene
+        return bool(getattr(scene, "qtquick3d_live_environment", True))
+    except Exception:
+        return False
+
+
+def begin_session():
+    """预览窗口加载QML后调用：记录当前环境作为对比基准"""
+    global _last_environment
+    try:
+        _last_environment = generate_environment()
+    except Exception as e:
+        print(f"⚠️ 记录实时环境基准失败: {e}")
+        _last_environment = None
+
+
+def end_session():
+    """预览窗口关闭后调用"""
+    global _last_environment
+    _last_environment = None
+    if bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.unregister(_flush)
+
+
+def on_property_update(scene, context):
+    """SceneEnvironment属性的 update 回调：本帧内只注册一次推送"""
+    if _last_environment is None or not is_enabled(scene):
+        return
+    if not bpy.app.timers.is_registered(_flush):
+        bpy.app.timers.register(_flush, first_interval=PUSH_INTERVAL)
+
+
+def _flush():
+    """计时器回调：把与上次推送不同的属性推送到预览窗口（返回None表示不再重复）"""
+    global _last_environment
+    if _last_environment is None:
+        return None
+    from . import qt_quick3d_integration_pyside6 as integration
+
+    try:
+        type_name, properties = generate_environment()
+    except Exception as e:
+        print(f"⚠️ 生成实时环境属性失败: {e}")
+        return None
+    last_type, last_properties = _last_environment
+    if type_name != last_type:
+        print(f"ℹ️ 环境类型已改为 {type_name}，需要重新打开预览窗口")
+        return None
+
+    changed = {name: value for name, value in properties.items() if last_properties.get(name) != value}
+    removed = [name for name in last_properties if name not in properties]
+    if not changed and not removed:
+        return None
+
+    failed = integration.push_scene_environment_properties(changed, removed, type_name)
+    if failed is None:
+        # 预览窗口已关闭
+        _last_environment = None
+        return None
+    if failed:
+        print(f"ℹ️ 以下属性无法实时更新，需要重新打开预览窗口: {', '.join(sorted(failed))}")
+    # 推送失败的属性保留旧值，下次修改时再次尝试
+    pushed = {name: value for name, value in properties.items() if name not in failed}
+    pushed.update({name: last_properties[name] for name in failed if name in last_properties})
+    _last_environment = (type_name, pushed)
+    return None
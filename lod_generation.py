@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+网格LOD模块 - 为高面数网格生成简化层级，并在QML中按相机距离切换
+负责：
+1. 找出三角形数超过阈值的网格对象（支持逐对象覆盖：关闭 / 强制 / 层级数 / 距离系数）
+2. 用临时对象 + Decimate修改器生成各级简化网格，单独导出为一个GLB（不修改用户的对象与网格）
+3. 把简化网格并入导出的glTF：原节点的网格移到子节点 l0，各级简化网格作为子节点 l1..ln
+4. balsam转换后，在原节点上按相机距离计算 b2qLodLevel，各级Model只在对应层级可见
+
+切换距离以网格包围球半径为基准（与Model的局部单位一致，通过 sceneScale 换算），
+第 j 级在 距离系数 × 半径 × 2^(j-1) 处切换。相机由QML根对象的 b2qLodCamera 属性提供，
+默认绑定到场景相机，可以在Qt Design Studio中改为其他相机。
+"""
+
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+from .qml_handler import find_enclosing_block
+
+LOD_PLAN_FILE_NAME = "lod.json"
+LOD_MESHES_FILE_NAME = "lod_meshes.glb"
+DEFAULT_MIN_TRIANGLES = 10000
+DEFAULT_LOD_LEVELS = 2
+MAX_LOD_LEVELS = 4
+DEFAULT_DISTANCE_FACTOR = 10.0
+# 每一级相对原网格保留的三角形比例
+LOD_LEVEL_RATIO = 0.5
+
+LOD_CAMERA_PROPERTY = "b2qLodCamera"
+LOD_LEVEL_PROPERTY = "b2qLodLevel"
+
+_CAMERA_PATTERN = re.compile(r'\b(?:Perspective|Orthographic|Frustum|Custom)Camera\s*\{')
+_ID_LINE_PATTERN = re.compile(r'\n[ \t]*id\s*:\s*(\w+)[^\n]*')
+
+
+def _marker_name(group_index: int, level: int) -> str:
+    """各级LOD节点的标记名称，balsam会据此生成QML id"""
+    return f"b2qlod{group_index}l{level}x"
+
+
+# ----------------------------------------------------------------------
+# Blender侧：候选对象与简化网格
+# ----------------------------------------------------------------------
+
+def get_object_lod_settings(obj, scene) -> Optional[Dict]:
+    """合并场景设置与对象覆盖，返回 {'levels', 'bias', 'force'}；对象关闭LOD时返回None"""
+    mode = getattr(obj, "qtquick3d_lod_mode", 'DEFAULT')
+    if mode == 'OFF':
+        return None
+    levels = getattr(obj, "qtquick3d_lod_levels", 0) or getattr(scene, "qtquick3d_lod_levels", DEFAULT_LOD_LEVELS)
+    return {
+        'levels': max(1, min(MAX_LOD_LEVELS, levels)),
+        'bias': getattr(obj, "qtquick3d_lod_bias", 1.0),
+        'force': mode == 'FORCE',
+    }
+
+
+def _count_triangles(evaluated_obj) -> int:
+    mesh = evaluated_obj.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        return len(mesh.loop_triangles)
+    finally:
+        evaluated_obj.to_mesh_clear()
+
+
+def collect_lod_candidates(context, node_names, min_triangles: int = DEFAULT_MIN_TRIANGLES) -> List[Dict]:
+    """找出需要生成LOD的网格对象
+
+    Args:
+        node_names: 导出的glTF中存在的节点名（已被实例化合并等步骤移除的对象不再处理）
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    candidates = []
+    for obj in context.view_layer.objects:
+        if obj.type != 'MESH' or obj.name not in node_names or not obj.visible_get():
+            continue
+        settings = get_object_lod_settings(obj, context.scene)
+        if settings is None:
+            continue
+        # 形态键与骨骼变形无法保留到简化网格中
+        if obj.data.shape_keys or any(modifier.type == 'ARMATURE' for modifier in obj.modifiers):
+            continue
+        triangles = _count_triangles(obj.evaluated_get(depsgraph))
+        if not settings['force'] and triangles < min_triangles:
+            continue
+        settings.update(object=obj, name=obj.name, triangles=triangles)
+        candidates.append(settings)
+    return candidates
+
+
+def export_lod_meshes(context, candidates: List[Dict], export_kwargs: Dict, filepath: str) -> bool:
+    """为候选对象生成各级简化网格并导出为一个GLB
+
+    每个候选对象得到 candidate['lod_nodes'] = [各级临时对象名]，即GLB中对应的节点名。
+    临时对象位于原点，因此GLB中的网格数据与原对象网格处于同一局部空间。
+    """
+    import bpy
+    from . import incremental_export
+
+    depsgraph = context.evaluated_depsgraph_get()
+    collection = context.scene.collection
+    temp_objects = []
+    base_meshes = []
+    shared = {}
+    try:
+        for candidate in candidates:
+            obj = candidate['object']
+            # 没有修改器、没有对象级材质的关联复制共用同一组简化网格
+            share_key = None
+            if not obj.modifiers and all(slot.link != 'OBJECT' for slot in obj.material_slots):
+                share_key = (obj.data.name, candidate['levels'])
+            if share_key in shared:
+                candidate['lod_nodes'] = shared[share_key]
+                continue
+
+            base_mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+            base_meshes.append(base_mesh)
+            lod_nodes = []
+            for level in range(1, candidate['levels'] + 1):
+                temp = bpy.data.objects.new(f"b2qlodsrc{len(temp_objects)}", base_mesh)
+                collection.objects.link(temp)
+                temp_objects.append(temp)
+                for index, slot in enumerate(obj.material_slots):
+                    if index < len(temp.material_slots):
+                        temp.material_slots[index].link = 'OBJECT'
+                        temp.material_slots[index].material = slot.material
+                decimate = temp.modifiers.new("b2q_lod_decimate", 'DECIMATE')
+                decimate.ratio = LOD_LEVEL_RATIO ** level
+                lod_nodes.append(temp.name)
+            candidate['lod_nodes'] = lod_nodes
+            if share_key is not None:
+                shared[share_key] = lod_nodes
+
+        if not temp_objects:
+            return False
+        context.view_layer.update()
+
+        kwargs = dict(export_kwargs)
+        # 只需要几何数据：材质按名称对应回主glTF，不导出贴图与动画
+        kwargs.update(export_apply=True, export_animations=False, export_image_format='NONE',
+                      export_lights=False, export_cameras=False)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        return incremental_export.export_objects_to_glb(context, temp_objects, filepath, kwargs)
+    finally:
+        for temp in temp_objects:
+            bpy.data.objects.remove(temp, do_unlink=True)
+        for mesh in base_meshes:
+            bpy.data.meshes.remove(mesh)
+
+
+# ----------------------------------------------------------------------
+# glTF侧：并入简化网格
+# ----------------------------------------------------------------------
+
+def _mesh_radius(gltf: dict, mesh_index: int) -> float:
+    """由POSITION访问器的min/max得到网格包围球半径（局部单位）"""
+    low, high = [float('inf')] * 3, [float('-inf')] * 3
+    for primitive in gltf['meshes'][mesh_index].get('primitives', []):
+        accessor = gltf['accessors'][primitive['attributes']['POSITION']]
+        if 'min' not in accessor or 'max' not in accessor:
+            continue
+        low = [min(a, b) for a, b in zip(low, accessor['min'])]
+        high = [max(a, b) for a, b in zip(high, accessor['max'])]
+    if low[0] == float('inf'):
+        return 1.0
+    return max(1e-6, 0.5 * sum((b - a) ** 2 for a, b in zip(low, high)) ** 0.5)
+
+
+def _mesh_triangles(gltf: dict, mesh_index: int) -> int:
+    total = 0
+    for primitive in gltf['meshes'][mesh_index].get('primitives', []):
+        accessor_index = primitive.get('indices', primitive['attributes'].get('POSITION'))
+        total += gltf['accessors'][accessor_index]['count'] // 3
+    return total
+
+
+def apply_lods_to_document(doc, candidates: List[Dict], lod_doc,
+                           distance_factor: float = DEFAULT_DISTANCE_FACTOR, first_index: int = 0) -> List[Dict]:
+    """把简化网格并入导出的glTF文档，返回LOD组计划"""
+    nodes = doc.gltf.get('nodes', [])
+    by_name = {candidate['name']: candidate for candidate in candidates if candidate.get('lod_nodes')}
+    lod_meshes = {node.get('name'): node['mesh'] for node in lod_doc.gltf.get('nodes', []) if 'mesh' in node}
+    materials = {material.get('name'): index for index, material in enumerate(doc.gltf.get('materials', []))}
+    lod_materials = lod_doc.gltf.get('materials', [])
+
+    def material_remap(index):
+        return materials.get(lod_materials[index].get('name')) if index < len(lod_materials) else None
+
+    copied = {}
+    groups = []
+    for node_index in range(len(nodes)):
+        node = nodes[node_index]
+        candidate = by_name.get(node.get('name'))
+        if candidate is None or 'mesh' not in node or 'skin' in node:
+            continue
+        if not all(name in lod_meshes for name in candidate['lod_nodes']):
+            print(f"⚠️ 未找到简化网格，跳过LOD: {candidate['name']}")
+            continue
+
+        group_index = first_index + len(groups)
+        radius = _mesh_radius(doc.gltf, node['mesh'])
+        level_nodes = [{'name': _marker_name(group_index, 0), 'mesh': node.pop('mesh')}]
+        if 'weights' in node:
+            level_nodes[0]['weights'] = node.pop('weights')
+        for level, lod_node in enumerate(candidate['lod_nodes'], 1):
+            if lod_node not in copied:
+                copied[lod_node] = gltf_utils.copy_mesh(doc, lod_doc, lod_meshes[lod_node], material_remap)
+            level_nodes.append({'name': _marker_name(group_index, level), 'mesh': copied[lod_node]})
+
+        first_new = len(nodes)
+        nodes.extend(level_nodes)
+        node['children'] = node.get('children', []) + list(range(first_new, len(nodes)))
+
+        triangles = [_mesh_triangles(doc.gltf, level_node['mesh']) for level_node in level_nodes]
+        distances = [
+            round(radius * distance_factor * candidate['bias'] * (2 ** (level - 1)), 4)
+            for level in range(1, len(level_nodes))
+        ]
+        groups.append({
+            'name': candidate['name'],
+            'marker': f"b2qlod{group_index}",
+            'distances': distances,
+            'triangles': triangles,
+        })
+        print(f"🔻 LOD: {candidate['name']} {' → '.join(str(count) for count in triangles)} 三角形")
+    return groups
+
+
+def apply_lods_to_gltf(gltf_path: str, export_format: str, candidates: List[Dict], lod_doc,
+                       distance_factor: float = DEFAULT_DISTANCE_FACTOR, first_index: int = 0) -> List[Dict]:
+    """把简化网格并入导出的glTF文件，有LOD组时保存"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    groups = apply_lods_to_document(doc, candidates, lod_doc, distance_factor, first_index)
+    if groups:
+        doc.save(gltf_path, export_format)
+    return groups
+
+
+# ----------------------------------------------------------------------
+# LOD计划（导出时生成，balsam成功后应用）
+# ----------------------------------------------------------------------
+
+def save_lod_plan(state_dir: str, groups: List[Dict], camera_name: Optional[str] = None):
+    """保存本次导出的LOD组，供balsam转换完成后改写QML"""
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, LOD_PLAN_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'camera': camera_name, 'groups': groups}, f, indent=2)
+
+
+def load_lod_plan(state_dir: str) -> Optional[Dict]:
+    path = os.path.join(state_dir, LOD_PLAN_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 读取LOD计划失败: {e}")
+        return None
+
+
+# ----------------------------------------------------------------------
+# QML改写
+# ----------------------------------------------------------------------
+
+def _find_marker_block(content: str, marker: str):
+    match = re.search(r'\bid:\s*(\w*' + re.escape(marker) + r'\w*)', content)
+    return find_enclosing_block(content, match.start()) if match else None
+
+
+def _line_indent(content: str, block_start: int) -> str:
+    """块内第一行属性的缩进"""
+    match = re.compile(r'\n([ \t]*)\S').search(content, block_start)
+    return match.group(1) if match else "    "
+
+
+def _insert_after_id(content: str, block_start: int, text: str) -> str:
+    """在块的 id 行之后插入若干行（没有id时插在块开头）"""
+    id_match = _ID_LINE_PATTERN.match(content, block_start + 1)
+    insert_at = id_match.end() if id_match else block_start + 1
+    return content[:insert_at] + text + content[insert_at:]
+
+
+def _level_binding(group: Dict, indent: str) -> str:
+    distances = group['distances']
+    expression = " : ".join(f"distance < {distance:g} ? {level}" for level, distance in enumerate(distances))
+    return (
+        f"\n{indent}property int {LOD_LEVEL_PROPERTY}: {{"
+        f"\n{indent}    if (!{LOD_CAMERA_PROPERTY})"
+        f"\n{indent}        return 0"
+        f"\n{indent}    const distance = {LOD_CAMERA_PROPERTY}.scenePosition.minus(scenePosition).length()"
+        f" / Math.max(sceneScale.x, 1e-6)"
+        f"\n{indent}    return {expression} : {len(distances)}"
+        f"\n{indent}}}"
+    )
+
+
+def _find_camera_id(content: str, camera_name: Optional[str]) -> Optional[str]:
+    if camera_name:
+        hint = camera_name.lower() + "_camera"
+        if re.search(r'\bid:\s*' + re.escape(hint) + r'\b', content):
+            return hint
+    match = _CAMERA_PATTERN.search(content)
+    if match:
+        id_match = _ID_LINE_PATTERN.match(content, match.end())
+        if id_match:
+            return id_match.group(1)
+    return None
+
+
+def _bind_camera(content: str, camera_id: Optional[str]) -> str:
+    """声明 b2qLodCamera：根对象绑定场景相机；含LOD的内联组件由实例传入相机"""
+    target = camera_id or "null"
+    for match in reversed(list(re.finditer(r'\bcomponent\s+(\w+)\s*:\s*\w+\s*\{', content))):
+        block = find_enclosing_block(content, match.end())
+        if not block or 'b2qlod' not in content[block[0]:block[1]]:
+            continue
+        component_name = match.group(1)
+        # 先改写组件实例（位于组件声明之后），再改写组件本身
+        for instance in reversed(list(re.finditer(r'\b' + re.escape(component_name) + r'\s*\{', content))):
+            if instance.start() == match.start() or block[0] <= instance.start() <= block[1]:
+                continue
+            id_match = re.compile(r'\s*id\s*:\s*\w+').match(content, instance.end())
+            insert_at = id_match.end() if id_match else instance.end()
+            separator = "; " if id_match else " "
+            content = content[:insert_at] + f"{separator}{LOD_CAMERA_PROPERTY}: {target}" + content[insert_at:]
+        indent = _line_indent(content, block[0])
+        content = _insert_after_id(content, block[0], f"\n{indent}property Node {LOD_CAMERA_PROPERTY}: null")
+
+    root_start = content.find('{')
+    if root_start >= 0:
+        indent = _line_indent(content, root_start)
+        content = _insert_after_id(content, root_start, f"\n{indent}property Node {LOD_CAMERA_PROPERTY}: {target}")
+    return content
+
+
+def apply_lod_to_qml(qml_content: str, plan: Dict) -> str:
+    """在balsam生成的QML中添加按相机距离切换LOD的绑定"""
+    applied = 0
+    for group in plan.get('groups', []):
+        level_count = len(group['distances']) + 1
+        first = _find_marker_block(qml_content, f"{group['marker']}l0x")
+        if first is None:
+            continue
+        parent = find_enclosing_block(qml_content, first[0])
+        if parent is None:
+            print(f"⚠️ QML中未找到LOD组节点: {group['name']}")
+            continue
+        parent_id = _ID_LINE_PATTERN.match(qml_content, parent[0] + 1)
+        reference = parent_id.group(1) if parent_id else "parent"
+
+        # 从后往前插入，前面的位置不受影响
+        for level in reversed(range(level_count)):
+            block = _find_marker_block(qml_content, f"{group['marker']}l{level}x")
+            if block is None:
+                continue
+            indent = _line_indent(qml_content, block[0])
+            qml_content = _insert_after_id(
+                qml_content, block[0], f"\n{indent}visible: {reference}.{LOD_LEVEL_PROPERTY} === {level}"
+            )
+        qml_content = _insert_after_id(qml_content, parent[0], _level_binding(group, _line_indent(qml_content, parent[0])))
+        applied += 1
+
+    if applied:
+        qml_content = _bind_camera(qml_content, _find_camera_id(qml_content, plan.get('camera')))
+        print(f"✅ LOD切换已写入 {applied} 个网格")
+    return qml_content
+
+
+def apply_lod_to_output(output_dir: str, state_dir: str) -> int:
+    """按LOD计划改写工作空间中balsam生成的QML，返回处理的文件数"""
+    from .qml_handler import ASSEMBLED_QML_EXTENSION
+
+    plan = load_lod_plan(state_dir)
+    if not plan or not plan.get('groups'):
+        return 0
+    processed = 0
+    for name in os.listdir(output_dir):
+        if not name.endswith('.qml') or name.endswith(ASSEMBLED_QML_EXTENSION):
+            continue
+        path = os.path.join(output_dir, name)
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if 'b2qlod' not in content:
+            continue
+        new_content = apply_lod_to_qml(content, plan)
+        if new_content != content:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            processed += 1
+    return processed
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+材质去重模块 - 合并参数完全相同的材质，并在组装的QML中把共享材质只写一次
+负责：
+1. 计算Blender材质的指纹：从材质输出节点沿连接遍历节点树，记录节点类型、节点属性、
+   未连接输入的值、连接关系与引用的图像，加上混合模式、背面剔除等材质设置（与节点名称、位置无关）
+2. 导出后合并glTF中的等价材质：Blender指纹相同、且导出后的参数也相同（贴图按图像内容与采样器比较）
+   的材质只保留第一个，图元改为引用保留的材质，balsam因此只生成一个PrincipledMaterial
+3. 组装QML时在每个id作用域（场景QML、每个内联组件）内，属性相同的PrincipledMaterial只保留第一个声明，
+   删除其余声明，Model的 materials 列表改为引用保留的id
+
+CAD数据中常见上百个内容相同、只是名称不同的材质，合并后着色器与管线的创建次数随之减少。
+"""
+
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from . import gltf_utils
+
+_MATERIAL_START_PATTERN = re.compile(r'(?m)^([ \t]*)PrincipledMaterial\s*\{')
+_PROPERTY_PATTERN = re.compile(r'^([A-Za-z_][\w.]*)\s*:\s*(.+?)\s*;?\s*$')
+# Model的材质列表（或单个材质id）
+_MATERIALS_PROPERTY_PATTERN = re.compile(r'(\bmaterials\s*:\s*)(\[[^\]]*\]|[A-Za-z_]\w*)')
+# 比较材质时忽略的属性
+_IGNORED_PROPERTIES = ('id', 'objectName')
+
+# 比较浮点属性时保留的小数位数
+FLOAT_DIGITS = 6
+
+
+# ----------------------------------------------------------------------
+# Blender材质指纹
+# ----------------------------------------------------------------------
+
+def _value(value):
+    """把RNA属性值转换为可比较、可哈希的形式"""
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS)
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if hasattr(value, 'name_full'):
+        return _id_key(value)
+    try:
+        return tuple(_value(item) for item in value)
+    except TypeError:
+        return str(value)
+
+
+def _id_key(id_block):
+    """数据块的比较键：图像按文件路径（打包图像按大小）与颜色设置比较，使内容相同的重复图像数据块视为同一张"""
+    if getattr(id_block, 'bl_rna', None) is not None and id_block.bl_rna.identifier == 'Image':
+        packed = getattr(id_block, 'packed_file', None)
+        source = ('packed', packed.size) if packed else ('file', id_block.filepath_from_user())
+        return ('image', id_block.source, source, id_block.colorspace_settings.name, id_block.alpha_mode)
+    return (type(id_block).__name__, id_block.name_full)
+
+
+def _node_properties(node, base_properties) -> Tuple:
+    """节点自身的属性（不含所有着色器节点共有的名称、位置等属性）"""
+    values = []
+    for prop in node.bl_rna.properties:
+        if prop.identifier in base_properties or prop.type == 'COLLECTION':
+            continue
+        value = getattr(node, prop.identifier, None)
+        if prop.type == 'POINTER' and value is not None and not hasattr(value, 'name_full'):
+            # image_user、color_mapping 等嵌套结构不影响导出的材质参数
+            continue
+        values.append((prop.identifier, _value(value)))
+    return tuple(values)
+
+
+def _follow_reroutes(link):
+    """跳过转接点，返回实际的来源 (节点, 输出接口)；连接被静音或悬空时返回None"""
+    while link and not getattr(link, 'is_muted', False):
+        node = link.from_node
+        if node.type != 'REROUTE':
+            return node, link.from_socket
+        links = node.inputs[0].links if node.inputs and node.inputs[0].is_linked else ()
+        link = links[0] if links else None
+    return None
+
+
+def fingerprint_material(material) -> str:
+    """计算材质的指纹，内容相同（仅名称、节点布局不同）的材质指纹相同"""
+    import bpy
+
+    settings = tuple(
+        (name, _value(getattr(material, name)))
+        for name in ('use_nodes', 'blend_method', 'alpha_threshold', 'use_backface_culling', 'diffuse_color',
+                     'metallic', 'roughness')
+        if hasattr(material, name)
+    )
+    nodes = []
+    if material.use_nodes and material.node_tree:
+        base_properties = {prop.identifier for prop in bpy.types.ShaderNode.bl_rna.properties}
+        visited = {}
+
+        def visit(node) -> int:
+            key = node.as_pointer()
+            if key in visited:
+                return visited[key]
+            visited[key] = len(nodes)
+            entry = [node.bl_idname, _node_properties(node, base_properties)]
+            nodes.append(entry)
+            inputs = []
+            for socket in node.inputs:
+                if not socket.enabled:
+                    continue
+                source = _follow_reroutes(socket.links[0]) if socket.is_linked else None
+                if source:
+                    inputs.append((socket.identifier, 'link', visit(source[0]), source[1].identifier))
+                elif hasattr(socket, 'default_value'):
+                    inputs.append((socket.identifier, 'value', _value(socket.default_value)))
+            entry.append(tuple(inputs))
+            return visited[key]
+
+        outputs = [node for node in material.node_tree.nodes
+                   if node.type == 'OUTPUT_MATERIAL' and getattr(node, 'is_active_output', True)]
+        for node in outputs[:1]:
+            visit(node)
+    data = repr((settings, tuple(tuple(entry) for entry in nodes)))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def collect_fingerprints(materials) -> Dict[str, str]:
+    """{材质名称: 指纹}（glTF材质名与Blender材质名一致）"""
+    fingerprints = {}
+    for material in materials:
+        try:
+            fingerprints[material.name] = fingerprint_material(material)
+        except Exception as e:
+            print(f"⚠️ 计算材质指纹失败，不参与合并: {material.name} ({e})")
+    return fingerprints
+
+
+# ----------------------------------------------------------------------
+# glTF
+# ----------------------------------------------------------------------
+
+def _image_digest(doc, image_index: int, cache: Dict) -> str:
+    if image_index not in cache:
+        data = doc.image_bytes(image_index)
+        cache[image_index] = hashlib.sha1(data).hexdigest() if data is not None else f"image{image_index}"
+    return cache[image_index]
+
+
+def canonical_material(doc, material: Dict, image_cache: Dict) -> str:
+    """导出后的材质参数（不含名称与extras），贴图引用替换为图像内容与采样器
+
+    合并后的文档中各部分的纹理与图像仍是独立的条目，按内容比较才能识别相同的材质。
+    """
+    gltf = doc.gltf
+    textures = gltf.get('textures', [])
+    samplers = gltf.get('samplers', [])
+
+    def canonical(value):
+        if isinstance(value, dict):
+            result = {key: canonical(item) for key, item in value.items() if key != 'index'}
+            if isinstance(value.get('index'), int) and value['index'] < len(textures):
+                texture = textures[value['index']]
+                sources = [texture.get('source')] + [ext.get('source') for ext in texture.get('extensions', {}).values()
+                                                     if isinstance(ext, dict)]
+                result['texture'] = {
+                    'images': [_image_digest(doc, source, image_cache) for source in sources if isinstance(source, int)],
+                    'sampler': samplers[texture['sampler']] if isinstance(texture.get('sampler'), int) else None,
+                }
+            return result
+        if isinstance(value, list):
+            return [canonical(item) for item in value]
+        if isinstance(value, float):
+            return round(value, FLOAT_DIGITS)
+        return value
+
+    definition = {key: value for key, value in material.items() if key not in ('name', 'extras')}
+    return json.dumps(canonical(definition), sort_keys=True)
+
+
+def dedupe_document(doc, fingerprints: Optional[Dict[str, str]] = None) -> Dict:
+    """合并文档中的等价材质
+
+    Args:
+        doc: gltf_utils.GLTFDocument
+        fingerprints: {材质名称: Blender材质指纹}；给出时指纹也必须相同才合并
+
+    Returns:
+        dict: {'materials_before', 'materials_after', 'merged': {保留的材质名: [被合并的材质名]}}
+    """
+    gltf = doc.gltf
+    materials = gltf.get('materials', [])
+    stats = {'materials_before': len(materials), 'materials_after': len(materials), 'merged': {}}
+    if len(materials) < 2:
+        return stats
+
+    fingerprints = fingerprints or {}
+    image_cache = {}
+    first_by_key = {}
+    mapping = {}
+    kept = []
+    for index, material in enumerate(materials):
+        key = (fingerprints.get(material.get('name')), canonical_material(doc, material, image_cache))
+        if key in first_by_key:
+            target = first_by_key[key]
+            mapping[index] = mapping[target]
+            stats['merged'].setdefault(materials[target].get('name', str(target)), []).append(
+                material.get('name', str(index)))
+            continue
+        first_by_key[key] = index
+        mapping[index] = len(kept)
+        kept.append(material)
+
+    if len(kept) == len(materials):
+        return stats
+    gltf['materials'] = kept
+    gltf_utils.remap_references(gltf, lambda kind, index: mapping.get(index) if kind == 'materials' else index)
+    stats['materials_after'] = len(kept)
+    return stats
+
+
+def dedupe_gltf(gltf_path: str, export_format: str, fingerprints: Optional[Dict[str, str]] = None) -> Dict:
+    """合并glTF文件中的等价材质，有合并时保存"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    stats = dedupe_document(doc, fingerprints)
+    if stats['materials_after'] < stats['materials_before']:
+        doc.save(gltf_path, export_format)
+    return stats
+
+
+# ----------------------------------------------------------------------
+# QML
+# ----------------------------------------------------------------------
+
+def _find_material_blocks(content: str) -> List[Dict]:
+    """找出没有嵌套对象的PrincipledMaterial声明，返回 {'start', 'end', 'indent', 'id', 'key'}
+
+    key 为除id与objectName以外的全部属性（含对贴图等id的引用），相同即为同一材质。
+    """
+    blocks = []
+    for match in _MATERIAL_START_PATTERN.finditer(content):
+        open_index = match.end() - 1
+        close_index = content.find('}', open_index)
+        if close_index < 0 or '{' in content[open_index + 1:close_index]:
+            continue
+        material_id = None
+        properties = []
+        for line in content[open_index + 1:close_index].splitlines():
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+            property_match = _PROPERTY_PATTERN.match(line)
+            if not property_match:
+                properties = None
+                break
+            name, value = property_match.groups()
+            if name == 'id':
+                material_id = value
+            elif name not in _IGNORED_PROPERTIES:
+                properties.append(f"{name}: {value}")
+        if not properties or not material_id:
+            continue
+        blocks.append({'start': match.start(), 'end': close_index + 1, 'indent': match.group(1),
+                       'id': material_id, 'key': "\n".join(sorted(properties))})
+    return blocks
+
+
+def _replace_material_references(content: str, mapping: Dict[str, str]) -> str:
+    """把 materials 属性（列表或单个id）中被合并的id替换为保留的id"""
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(material_id) for material_id in mapping) + r')\b')
+
+    def replace(match):
+        return match.group(1) + pattern.sub(lambda ref: mapping[ref.group(1)], match.group(2))
+
+    return _MATERIALS_PROPERTY_PATTERN.sub(replace, content)
+
+
+def _share_materials_in_scope(content: str):
+    """在一个id作用域（场景QML或一个内联组件）内合并属性相同的材质声明，返回 (新QML, 删除的声明数)"""
+    blocks = _find_material_blocks(content)
+    groups = {}
+    for block in blocks:
+        groups.setdefault(block['key'], []).append(block)
+    if all(len(group) < 2 for group in groups.values()):
+        return content, 0
+
+    # materials 以外引用了某个id（如Timeline动画的target）时，该声明保留
+    outside = _MATERIALS_PROPERTY_PATTERN.sub('', content)
+    mapping = {}
+    removed = []
+    for group in groups.values():
+        keep = group[0]['id']
+        for block in group[1:]:
+            if len(re.findall(r'\b' + re.escape(block['id']) + r'\b', outside)) > 1:
+                continue
+            mapping[block['id']] = keep
+            removed.append(block)
+    if not removed:
+        return content, 0
+
+    # 从后向前删除，前面声明的位置保持不变
+    for block in sorted(removed, key=lambda item: item['start'], reverse=True):
+        before = content[:block['start']]
+        if before.rstrip().endswith(('[', ',')):
+            # 声明写在 materials 列表中：改为引用保留的材质
+            content = before + block['indent'] + mapping[block['id']] + content[block['end']:]
+            continue
+        end = block['end']
+        if content.startswith('\n', end):
+            end += 1
+        content = before + content[end:]
+    return _replace_material_references(content, mapping), len(removed)
+
+
+def share_qml_materials(content: str, inline_components=None):
+    """属性相同的PrincipledMaterial只保留第一个声明，Model的 materials 改为引用它的id
+
+    内联组件有独立的id作用域，看不到场景中的id，因此场景QML与每个内联组件各自合并；
+    运行时每组相同的材质只创建一个材质对象。
+
+    Args:
+        content: 删除import后的场景QML
+        inline_components: [(组件名, 组件QML)]
+
+    Returns:
+        (新的场景QML, 新的内联组件列表, 删除的重复材质声明数)
+    """
+    content, removed = _share_materials_in_scope(content)
+    new_components = []
+    for name, body in inline_components or []:
+        body, count = _share_materials_in_scope(body)
+        new_components.append((name, body))
+        removed += count
+    return content, new_components, removed
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+网格优化模块 - balsam转换前重排导出glTF中的三角形与顶点
+负责：
+1. 顶点缓存优化：按Tipsify算法（Sander et al. 2007）重排三角形，提高变换后顶点缓存命中率
+2. 减少过度绘制：Tipsify在缓存断点处划分簇，按簇朝外程度排序，外侧的面先绘制
+3. 顶点读取优化：按首次使用顺序重排顶点数据，删除未使用的顶点，索引能放下时改为16位
+4. 可选的位置量化：把顶点位置对齐到包围盒上的16位网格，合并因此完全相同的顶点
+5. 输出每个网格优化前后的ACMR（平均每个三角形的缓存未命中数）
+
+只处理三角形列表；属性访问器被多个图元共享或数据交错存储时，只重排三角形，不重排顶点。
+依赖numpy（Blender自带），不可用时跳过。
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+from . import gltf_utils
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 模拟的FIFO顶点缓存大小（Tipsify与ACMR统计共用）
+VERTEX_CACHE_SIZE = 16
+DEFAULT_QUANTIZATION_BITS = 16
+
+GL_TRIANGLES = 4
+GL_ELEMENT_ARRAY_BUFFER = 34963
+COMPONENT_UNSIGNED_SHORT = 5123
+COMPONENT_UNSIGNED_INT = 5125
+COMPONENT_FLOAT = 5126
+
+COMPONENT_SIZES = {5120: 1, 5121: 1, 5122: 2, 5123: 2, 5125: 4, 5126: 4}
+TYPE_COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}
+
+
+# ----------------------------------------------------------------------
+# 统计
+# ----------------------------------------------------------------------
+
+def compute_acmr(indices, cache_size: int = VERTEX_CACHE_SIZE) -> float:
+    """模拟FIFO顶点缓存，返回平均每个三角形的缓存未命中数（最优约0.5，最差3.0）"""
+    fifo = deque()
+    cached = set()
+    misses = 0
+    for vertex in indices:
+        if vertex not in cached:
+            misses += 1
+            fifo.append(vertex)
+            cached.add(vertex)
+            if len(fifo) > cache_size:
+                cached.discard(fifo.popleft())
+    return misses / max(1, len(indices) // 3)
+
+
+# ----------------------------------------------------------------------
+# 三角形重排
+# ----------------------------------------------------------------------
+
+def tipsify(indices: List[int], vertex_count: int, cache_size: int = VERTEX_CACHE_SIZE):
+    """Tipsify顶点缓存优化，返回 (三角形顺序, 簇起始位置列表)
+
+    簇在每次遇到缓存断点（dead end）时划分，供过度绘制排序使用。
+    """
+    flat = np.asarray(indices, dtype=np.int64)
+    triangle_count = len(flat) // 3
+    counts = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    adjacency = (np.argsort(flat, kind='stable') // 3).tolist()
+    live = counts.tolist()
+
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end = []
+    stamp = cache_size + 1
+    cursor = 0
+    order = []
+    cluster_starts = [0]
+
+    fan = next((v for v in range(vertex_count) if live[v] > 0), -1)
+    while fan >= 0:
+        candidates = []
+        for k in range(offsets[fan], offsets[fan + 1]):
+            triangle = adjacency[k]
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in indices[triangle * 3:triangle * 3 + 3]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if stamp - cache_time[vertex] > cache_size:
+                    cache_time[vertex] = stamp
+                    stamp += 1
+
+        # 优先选择扇出后仍在缓存中、且在缓存中最久的顶点
+        fan, best_priority = -1, -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                priority = 0
+                if stamp - cache_time[vertex] + 2 * live[vertex] <= cache_size:
+                    priority = stamp - cache_time[vertex]
+                if priority > best_priority:
+                    fan, best_priority = vertex, priority
+
+        if fan < 0:
+            # 缓存断点：开始新簇，先回溯最近使用的顶点，再按顺序查找
+            cluster_starts.append(len(order))
+            while dead_end:
+                vertex = dead_end.pop()
+                if live[vertex] > 0:
+                    fan = vertex
+                    break
+            else:
+                while cursor < vertex_count and live[cursor] <= 0:
+                    cursor += 1
+                fan = cursor if cursor < vertex_count else -1
+
+    cluster_starts = sorted(set(start for start in cluster_starts if start < len(order)))
+    return order, cluster_starts
+
+
+def sort_clusters_for_overdraw(order: List[int], cluster_starts: List[int], triangles, positions) -> List[int]:
+    """按簇朝外程度降序排列（簇中心相对网格中心的方向与簇法线的点积），外侧的面先绘制以遮挡内侧"""
+    if len(cluster_starts) < 2:
+        return order
+    corners = positions[triangles]  # (三角形数, 3, 3)
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    centroids = corners.mean(axis=1)
+    mesh_center = centroids.mean(axis=0)
+
+    ordered = np.asarray(order, dtype=np.int64)
+    bounds = list(cluster_starts) + [len(order)]
+    scores = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        members = ordered[start:end]
+        normal = face_normals[members].sum(axis=0)
+        length = float(np.linalg.norm(normal))
+        if length <= 0.0:
+            scores.append(0.0)
+            continue
+        scores.append(float(np.dot(centroids[members].mean(axis=0) - mesh_center, normal / length)))
+
+    # 稳定排序，分数相同的簇保持Tipsify的原始顺序
+    cluster_order = sorted(range(len(scores)), key=lambda index: -scores[index])
+    return [triangle for index in cluster_order for triangle in order[bounds[index]:bounds[index + 1]]]
+
+
+# ----------------------------------------------------------------------
+# 访问器读写
+# ----------------------------------------------------------------------
+
+def _accessor_element_size(accessor: Dict) -> Optional[int]:
+    components = TYPE_COMPONENTS.get(accessor.get('type'))
+    size = COMPONENT_SIZES.get(accessor.get('componentType'))
+    if not components or not size:
+        return None
+    return components * size
+
+
+def _read_rows(doc, accessor: Dict):
+    """以 (count, 元素字节数) 的uint8数组读取紧密排列的访问器数据；交错或稀疏存储时返回None"""
+    element_size = _accessor_element_size(accessor)
+    if element_size is None or 'bufferView' not in accessor or 'sparse' in accessor:
+        return None
+    view = doc.gltf['bufferViews'][accessor['bufferView']]
+    if view.get('byteStride', element_size) != element_size:
+        return None
+    offset = accessor.get('byteOffset', 0)
+    data = np.frombuffer(doc.buffer_view_bytes(accessor['bufferView']), dtype=np.uint8)
+    return data[offset:offset + accessor['count'] * element_size].reshape(accessor['count'], element_size)
+
+
+def _read_indices(doc, accessor: Dict):
+    dtype = {5121: np.uint8, 5123: '<u2', 5125: '<u4'}[accessor['componentType']]
+    rows = _read_rows(doc, accessor)
+    if rows is None:
+        return None
+    return rows.reshape(-1).view(dtype).astype(np.int64)
+
+
+def _write_rows(doc, accessor: Dict, rows):
+    """用新数据替换访问器独占的bufferView"""
+    doc.replace_buffer_view(accessor['bufferView'], np.ascontiguousarray(rows).tobytes())
+    accessor.pop('byteOffset', None)
+    accessor['count'] = len(rows)
+
+
+def _encode_indices(indices, vertex_count: int):
+    """按顶点数选择索引宽度，返回 (componentType, 数据)"""
+    # 0xFFFF 是16位索引的图元重启值，不能作为顶点索引使用
+    if vertex_count < 0xFFFF:
+        return COMPONENT_UNSIGNED_SHORT, indices.astype('<u2').tobytes()
+    return COMPONENT_UNSIGNED_INT, indices.astype('<u4').tobytes()
+
+
+def _write_indices(doc, accessor: Dict, component_type: int, data: bytes, count: int):
+    """用编码后的索引替换访问器独占的bufferView"""
+    accessor['componentType'] = component_type
+    doc.replace_buffer_view(accessor['bufferView'], data)
+    accessor.pop('byteOffset', None)
+    accessor['count'] = count
+    accessor.pop('min', None)
+    accessor.pop('max', None)
+    view = doc.gltf['bufferViews'][accessor['bufferView']]
+    view['target'] = GL_ELEMENT_ARRAY_BUFFER
+    view.pop('byteStride', None)
+
+
+def _usage_counts(gltf: dict):
+    """统计访问器被图元引用的次数、bufferView被访问器/图片引用的次数"""
+    accessor_users, view_users = {}, {}
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            used = list(primitive.get('attributes', {}).values())
+            if 'indices' in primitive:
+                used.append(primitive['indices'])
+            for morph in primitive.get('targets', []):
+                used.extend(morph.values())
+            for index in used:
+                accessor_users[index] = accessor_users.get(index, 0) + 1
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            accessor_users[skin['inverseBindMatrices']] = accessor_users.get(skin['inverseBindMatrices'], 0) + 1
+    for animation in gltf.get('animations', []):
+        for sampler in animation.get('samplers', []):
+            for key in ('input', 'output'):
+                accessor_users[sampler[key]] = accessor_users.get(sampler[key], 0) + 1
+    for accessor in gltf.get('accessors', []):
+        if 'bufferView' in accessor:
+            view_users[accessor['bufferView']] = view_users.get(accessor['bufferView'], 0) + 1
+    for image in gltf.get('images', []):
+        if 'bufferView' in image:
+            view_users[image['bufferView']] = view_users.get(image['bufferView'], 0) + 1
+    return accessor_users, view_users
+
+
+# ----------------------------------------------------------------------
+# 图元优化
+# ----------------------------------------------------------------------
+
+def _quantize_positions(rows, bits: int):
+    """把位置对齐到包围盒上的 2^bits 级网格（仍以float32存储）"""
+    positions = rows.view('<f4').reshape(-1, 3).astype(np.float64)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    step = (high - low) / float((1 << bits) - 1)
+    step[step <= 0] = 1.0
+    snapped = np.round((positions - low) / step) * step + low
+    return snapped.astype('<f4').view(np.uint8).reshape(len(rows), 12)
+
+
+def optimize_primitive(doc, primitive: Dict, accessor_users: Dict, view_users: Dict,
+                       quantize_bits: int = 0) -> Optional[Dict]:
+    """优化单个三角形图元，返回 {'triangles', 'acmr_before', 'acmr_after', 'vertices_before', 'vertices_after'}"""
+    gltf = doc.gltf
+    if primitive.get('mode', GL_TRIANGLES) != GL_TRIANGLES or 'indices' not in primitive or primitive.get('extensions'):
+        return None
+    index_accessor = gltf['accessors'][primitive['indices']]
+    if accessor_users.get(primitive['indices'], 0) != 1 or view_users.get(index_accessor.get('bufferView'), 0) != 1:
+        return None
+    indices = _read_indices(doc, index_accessor)
+    if indices is None or len(indices) < 3:
+        return None
+    indices = indices[:len(indices) // 3 * 3]
+
+    # 顶点属性（含形态目标）都是本图元独占、紧密排列时才能重排顶点
+    vertex_accessors = list(primitive.get('attributes', {}).values())
+    for morph in primitive.get('targets', []):
+        vertex_accessors.extend(morph.values())
+    vertex_rows = {}
+    for accessor_index in vertex_accessors:
+        accessor = gltf['accessors'][accessor_index]
+        rows = None
+        if accessor_users.get(accessor_index, 0) == 1 and view_users.get(accessor.get('bufferView'), 0) == 1:
+            rows = _read_rows(doc, accessor)
+        if rows is None:
+            vertex_rows = None
+            break
+        vertex_rows[accessor_index] = rows
+
+    position_accessor = gltf['accessors'][primitive['attributes']['POSITION']]
+    vertex_count = position_accessor['count']
+    stats = {
+        'triangles': len(indices) // 3,
+        'acmr_before': compute_acmr(indices.tolist()),
+        'vertices_before': vertex_count,
+    }
+
+    position_index = primitive['attributes']['POSITION']
+    if vertex_rows is not None and quantize_bits and position_accessor.get('componentType') == COMPONENT_FLOAT:
+        vertex_rows[position_index] = _quantize_positions(vertex_rows[position_index], quantize_bits)
+        # 合并所有属性完全相同的顶点，并去掉因此退化的三角形
+        combined = np.ascontiguousarray(np.concatenate([vertex_rows[i] for i in vertex_accessors], axis=1))
+        keys = combined.view(np.dtype((np.void, combined.shape[1]))).reshape(-1)
+        _unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        indices = inverse.reshape(-1)[indices]
+        vertex_rows = {i: rows[first] for i, rows in vertex_rows.items()}
+        vertex_count = len(first)
+        triangles = indices.reshape(-1, 3)
+        keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])
+        indices = triangles[keep].reshape(-1)
+        if len(indices) == 0:
+            return None
+
+    order, cluster_starts = tipsify(indices.tolist(), vertex_count)
+    triangles = indices.reshape(-1, 3)
+    if vertex_rows is not None:
+        positions = vertex_rows[position_index].view('<f4').reshape(-1, 3)
+    else:
+        positions = _read_rows(doc, position_accessor)
+        positions = positions.view('<f4').reshape(-1, 3) if positions is not None else None
+    if positions is not None and position_accessor.get('componentType') == COMPONENT_FLOAT:
+        order = sort_clusters_for_overdraw(order, cluster_starts, triangles, positions.astype(np.float64))
+    indices = triangles[np.asarray(order, dtype=np.int64)].reshape(-1)
+
+    new_rows = {}
+    bounds = None
+    if vertex_rows is not None:
+        # 按首次使用顺序重排顶点，未使用的顶点被删除
+        unique_vertices, first_use = np.unique(indices, return_index=True)
+        fetch_order = unique_vertices[np.argsort(first_use, kind='stable')]
+        remap = np.full(vertex_count, -1, dtype=np.int64)
+        remap[fetch_order] = np.arange(len(fetch_order))
+        indices = remap[indices]
+        vertex_count = len(fetch_order)
+        new_rows = {accessor_index: rows[fetch_order] for accessor_index, rows in vertex_rows.items()}
+        if position_accessor.get('componentType') == COMPONENT_FLOAT:
+            positions = new_rows[position_index].view('<f4').reshape(-1, 3)
+            bounds = ([float(v) for v in positions.min(axis=0)], [float(v) for v in positions.max(axis=0)])
+    component_type, index_data = _encode_indices(indices, vertex_count)
+    stats['acmr_after'] = compute_acmr(indices.tolist())
+    stats['vertices_after'] = vertex_count
+
+    # 所有新数据都计算完成后才写回文档，中途失败时图元保持原样
+    for accessor_index, rows in new_rows.items():
+        _write_rows(doc, gltf['accessors'][accessor_index], rows)
+    if bounds is not None:
+        position_accessor['min'], position_accessor['max'] = bounds
+    _write_indices(doc, index_accessor, component_type, index_data, len(indices))
+    return stats
+
+
+def optimize_document(doc, quantize_bits: int = 0) -> List[Dict]:
+    """优化文档中所有三角形网格，返回每个网格的统计"""
+    accessor_users, view_users = _usage_counts(doc.gltf)
+    report = []
+    for mesh_index, mesh in enumerate(doc.gltf.get('meshes', [])):
+        totals = {'triangles': 0, 'misses_before': 0.0, 'misses_after': 0.0, 'vertices_before': 0, 'vertices_after': 0}
+        for primitive in mesh.get('primitives', []):
+            try:
+                stats = optimize_primitive(doc, primitive, accessor_users, view_users, quantize_bits)
+            except Exception as e:
+                print(f"⚠️ 网格优化失败，保留原始数据: {mesh.get('name', mesh_index)} ({e})")
+                stats = None
+            if not stats:
+                continue
+            totals['triangles'] += stats['triangles']
+            totals['misses_before'] += stats['acmr_before'] * stats['triangles']
+            totals['misses_after'] += stats['acmr_after'] * stats['triangles']
+            totals['vertices_before'] += stats['vertices_before']
+            totals['vertices_after'] += stats['vertices_after']
+        if not totals['triangles']:
+            continue
+        entry = {
+            'mesh': mesh.get('name', str(mesh_index)),
+            'triangles': totals['triangles'],
+            'acmr_before': round(totals['misses_before'] / totals['triangles'], 3),
+            'acmr_after': round(totals['misses_after'] / totals['triangles'], 3),
+            'vertices_before': totals['vertices_before'],
+            'vertices_after': totals['vertices_after'],
+        }
+        report.append(entry)
+        print(f"📐 {entry['mesh']}: ACMR {entry['acmr_before']:.3f} → {entry['acmr_after']:.3f}, "
+              f"顶点 {entry['vertices_before']} → {entry['vertices_after']}")
+    return report
+
+
+def optimize_gltf(gltf_path: str, export_format: str, quantize_bits: int = 0) -> List[Dict]:
+    """优化glTF文件中所有三角形网格，有改动时保存"""
+    doc = gltf_utils.GLTFDocument.load(gltf_path)
+    report = optimize_document(doc, quantize_bits)
+    if report:
+        doc.save(gltf_path, export_format)
+    return report
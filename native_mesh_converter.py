@@ -0,0 +1,1041 @@
+#!/usr/bin/env python3
+"""
+内置glTF转换器 - 不依赖Qt安装，用Python/NumPy代替balsam把glTF/GLB转换为Qt Quick3D资源
+负责：
+1. 以零拷贝方式读取glTF访问器（numpy视图直接指向缓冲区，支持交错存储、归一化整数与稀疏访问器）
+2. 每个glTF网格写出一个Quick3D .mesh 文件：交错顶点缓冲 + 索引缓冲，每个三角形图元一个子网格
+3. 把图像写入 maps/，生成与balsam相同结构的根QML：Texture、PrincipledMaterial、Node/Model、相机、灯光与节点动画Timeline
+4. 命令行参数与balsam一致（--outputPath/-o、--help、--version），转换器像调用balsam一样在后台进程中运行它：
+    python native_mesh_converter.py --outputPath DIR scene.glb
+
+.mesh 按Qt 6.0引入的第3版格式写出（Qt 6 各版本均可读取）。
+不支持蒙皮、变形目标以及需要解码的压缩扩展（Draco、meshopt），find_unsupported_features 会列出这些内容，
+转换器据此改用balsam（已安装时）。依赖numpy（Blender自带）。
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import shutil
+import struct
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+if __package__:
+    from . import gltf_utils
+else:
+    # 作为命令行运行时插件目录就是 sys.path[0]
+    import gltf_utils
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+NATIVE_CONVERTER_VERSION = "blender2quick3d-native 1.0"
+
+HELP_TEXT = """Usage: native_mesh_converter.py [options] sourceFileName
+Converts a glTF 2.0 asset to Qt Quick3D QML and .mesh files (balsam compatible command line)
+
+Options:
+  -?, -h, --help               Displays help.
+  -v, --version                Displays version information.
+  -o, --outputPath <outdir>    Sets the location to place the generated file(s).
+"""
+
+# .mesh 文件格式（QSSGMesh，小端序）
+MESH_FILE_ID = 3365961549
+MESH_FILE_VERSION = 3
+MULTI_MESH_FILE_ID = 555777497
+MULTI_MESH_FILE_VERSION = 1
+MESH_HEADER_SIZE = 12
+MESH_STRUCT_SIZE = 56
+VERTEX_ENTRY_SIZE = 16
+SUBSET_STRUCT_SIZE = 40
+MULTI_HEADER_SIZE = 16
+MULTI_ENTRY_SIZE = 16
+# 新版本的子网格结构追加了光照贴图尺寸与LOD数量（读取balsam输出时使用）
+SUBSET_STRUCT_SIZES = {3: 40, 4: 40, 5: 48}
+SUBSET_STRUCT_SIZE_LATEST = 56
+
+# QSSGMesh::Mesh 枚举
+MESH_COMPONENT_UINT16 = 3
+MESH_COMPONENT_UINT32 = 5
+MESH_COMPONENT_FLOAT32 = 10
+MESH_DRAW_MODE_TRIANGLES = 7
+MESH_WINDING_COUNTER_CLOCKWISE = 2
+
+# glTF常量
+GL_TRIANGLES = 4
+GL_TRIANGLE_STRIP = 5
+GL_TRIANGLE_FAN = 6
+WRAP_MODES = {33071: "Texture.ClampToEdge", 33648: "Texture.MirroredRepeat"}
+COMPONENT_DTYPES = {5120: 'i1', 5121: 'u1', 5122: '<i2', 5123: '<u2', 5125: '<u4', 5126: '<f4'}
+TYPE_COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+# 归一化整数转换为浮点数时的除数
+NORMALIZED_DIVISORS = {5120: 127.0, 5121: 255.0, 5122: 32767.0, 5123: 65535.0, 5125: 4294967295.0}
+MIME_EXTENSIONS = {'image/png': '.png', 'image/jpeg': '.jpg', 'image/webp': '.webp', 'image/ktx2': '.ktx2'}
+
+# 能处理（或可以安全忽略）的glTF扩展
+SUPPORTED_EXTENSIONS = {
+    'KHR_lights_punctual',
+    'KHR_materials_emissive_strength',
+    'KHR_materials_unlit',
+    'KHR_mesh_quantization',
+    'KHR_texture_transform',
+}
+
+# (Quick3D属性名, 分量数)，顺序即交错顶点中的顺序
+VERTEX_ATTRIBUTES = (
+    ('attr_pos', 3),
+    ('attr_norm', 3),
+    ('attr_uv0', 2),
+    ('attr_uv1', 2),
+    ('attr_textan', 3),
+    ('attr_binormal', 3),
+    ('attr_color', 4),
+)
+
+ANIMATION_PROPERTIES = {'translation': 'position', 'rotation': 'rotation', 'scale': 'scale'}
+
+# QML/JavaScript保留字不能用作id
+_RESERVED_IDS = {
+    'as', 'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger', 'default', 'delete', 'do',
+    'else', 'enum', 'export', 'extends', 'false', 'finally', 'for', 'function', 'id', 'if', 'import', 'in',
+    'instanceof', 'let', 'new', 'null', 'of', 'on', 'parent', 'property', 'readonly', 'return', 'signal',
+    'super', 'switch', 'this', 'throw', 'true', 'try', 'typeof', 'undefined', 'var', 'void', 'while', 'with',
+    'yield', 'node',
+}
+
+
+# ----------------------------------------------------------------------
+# 输入检查
+# ----------------------------------------------------------------------
+
+def find_unsupported_features(gltf: dict) -> List[str]:
+    """列出内置转换器无法处理的内容（为空表示可以完整转换）"""
+    features = []
+    required = [ext for ext in gltf.get('extensionsRequired', []) if ext not in SUPPORTED_EXTENSIONS]
+    features.extend(required)
+    if gltf.get('skins'):
+        features.append("skins")
+    if any(primitive.get('targets') for mesh in gltf.get('meshes', []) for primitive in mesh.get('primitives', [])):
+        features.append("morph targets")
+    return features
+
+
+def check_gltf_file(gltf_path: str) -> List[str]:
+    """只读取glTF的JSON部分检查不支持的内容（不加载缓冲区，可在主线程调用）"""
+    return find_unsupported_features(gltf_utils.load_gltf_json(gltf_path))
+
+
+# ----------------------------------------------------------------------
+# 访问器读取
+# ----------------------------------------------------------------------
+
+def read_accessor(doc, accessor_index: int, as_float: bool = False):
+    """读取访问器为 (count, 分量数) 的numpy数组
+
+    紧密排列或交错存储的数据返回直接指向缓冲区的只读视图（不复制）；
+    as_float 时整数数据按 normalized 转换为float32（会生成新数组）。
+    """
+    accessor = doc.gltf['accessors'][accessor_index]
+    components = TYPE_COMPONENTS[accessor['type']]
+    dtype = np.dtype(COMPONENT_DTYPES[accessor['componentType']])
+    count = accessor['count']
+
+    if 'bufferView' in accessor:
+        view = doc.gltf['bufferViews'][accessor['bufferView']]
+        stride = view.get('byteStride') or dtype.itemsize * components
+        array = np.ndarray((count, components), dtype=dtype, buffer=doc.buffer_view_bytes(accessor['bufferView']),
+                           offset=accessor.get('byteOffset', 0), strides=(stride, dtype.itemsize))
+    else:
+        array = np.zeros((count, components), dtype=dtype)
+
+    if 'sparse' in accessor:
+        array = _apply_sparse(doc, accessor['sparse'], array, components)
+
+    if as_float and array.dtype != np.float32:
+        result = array.astype(np.float32)
+        if accessor.get('normalized'):
+            result /= NORMALIZED_DIVISORS[accessor['componentType']]
+            np.maximum(result, -1.0, out=result)
+        return result
+    return array
+
+
+def _apply_sparse(doc, sparse: Dict, array, components: int):
+    """把稀疏访问器的替换值写入基础数据的副本"""
+    count = sparse['count']
+    indices_info = sparse['indices']
+    values_info = sparse['values']
+    indices = np.frombuffer(doc.buffer_view_bytes(indices_info['bufferView']),
+                            dtype=COMPONENT_DTYPES[indices_info['componentType']],
+                            count=count, offset=indices_info.get('byteOffset', 0))
+    values = np.frombuffer(doc.buffer_view_bytes(values_info['bufferView']), dtype=array.dtype,
+                           count=count * components, offset=values_info.get('byteOffset', 0))
+    result = np.array(array)
+    result[indices.astype(np.int64)] = values.reshape(count, components)
+    return result
+
+
+def _triangle_indices(doc, primitive: Dict, vertex_count: int):
+    """图元的三角形列表索引（条带与扇形展开为列表），点和线图元返回None"""
+    if 'indices' in primitive:
+        indices = read_accessor(doc, primitive['indices'])[:, 0].astype(np.uint32)
+    else:
+        indices = np.arange(vertex_count, dtype=np.uint32)
+
+    mode = primitive.get('mode', GL_TRIANGLES)
+    if mode == GL_TRIANGLES:
+        return indices[:len(indices) - len(indices) % 3]
+    if mode not in (GL_TRIANGLE_STRIP, GL_TRIANGLE_FAN):
+        return None
+    if len(indices) < 3:
+        return indices[:0]
+
+    if mode == GL_TRIANGLE_STRIP:
+        steps = np.arange(len(indices) - 2)
+        odd = steps % 2 == 1
+        a = np.where(odd, indices[steps + 1], indices[steps])
+        b = np.where(odd, indices[steps], indices[steps + 1])
+        c = indices[steps + 2]
+    else:
+        steps = np.arange(1, len(indices) - 1)
+        a = np.full(len(steps), indices[0], dtype=np.uint32)
+        b = indices[steps]
+        c = indices[steps + 1]
+    # 去掉条带中用于连接的退化三角形
+    keep = (a != b) & (b != c) & (a != c)
+    return np.stack([a, b, c], axis=1)[keep].reshape(-1)
+
+
+# ----------------------------------------------------------------------
+# 顶点数据
+# ----------------------------------------------------------------------
+
+def _normalize_rows(vectors, fallback):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    degenerate = lengths[:, 0] < 1e-12
+    result = vectors / np.where(lengths < 1e-12, 1.0, lengths)
+    result[degenerate] = fallback
+    return result
+
+
+def compute_normals(positions, indices):
+    """按面积加权累加面法线，生成平滑顶点法线（glTF没有NORMAL时使用）"""
+    triangles = indices.reshape(-1, 3)
+    v0, v1, v2 = (positions[triangles[:, k]] for k in range(3))
+    face_normals = np.cross(v1 - v0, v2 - v0)
+    normals = np.zeros_like(positions, dtype=np.float64)
+    for k in range(3):
+        np.add.at(normals, triangles[:, k], face_normals)
+    return _normalize_rows(normals, (0.0, 0.0, 1.0)).astype(np.float32)
+
+
+def compute_tangents(positions, normals, uvs, indices):
+    """按三角形累加切线（Lengyel方法）并正交化，返回 (count, 4)，w为副切线方向（与glTF TANGENT相同）"""
+    triangles = indices.reshape(-1, 3)
+    p0, p1, p2 = (positions[triangles[:, k]].astype(np.float64) for k in range(3))
+    w0, w1, w2 = (uvs[triangles[:, k]].astype(np.float64) for k in range(3))
+    e1, e2 = p1 - p0, p2 - p0
+    d1, d2 = w1 - w0, w2 - w0
+    det = d1[:, 0] * d2[:, 1] - d2[:, 0] * d1[:, 1]
+    inverse = np.where(np.abs(det) > 1e-12, 1.0 / np.where(det == 0, 1.0, det), 0.0)[:, None]
+    sdir = (e1 * d2[:, 1:2] - e2 * d1[:, 1:2]) * inverse
+    tdir = (e2 * d1[:, 0:1] - e1 * d2[:, 0:1]) * inverse
+
+    tan1 = np.zeros((len(positions), 3))
+    tan2 = np.zeros((len(positions), 3))
+    for k in range(3):
+        np.add.at(tan1, triangles[:, k], sdir)
+        np.add.at(tan2, triangles[:, k], tdir)
+
+    normals = normals.astype(np.float64)
+    tangents = tan1 - normals * np.sum(normals * tan1, axis=1, keepdims=True)
+    tangents = _normalize_rows(tangents, (1.0, 0.0, 0.0))
+    handedness = np.where(np.sum(np.cross(normals, tangents) * tan2, axis=1) < 0.0, -1.0, 1.0)
+    return np.hstack([tangents, handedness[:, None]]).astype(np.float32)
+
+
+def _material_uses_normal_map(gltf: dict, material_index) -> bool:
+    if material_index is None:
+        return False
+    materials = gltf.get('materials', [])
+    return material_index < len(materials) and 'normalTexture' in materials[material_index]
+
+
+def _read_primitive(doc, primitive: Dict) -> Optional[Dict]:
+    """读取一个三角形图元的顶点属性，缺少法线/切线时按需生成"""
+    attributes = primitive.get('attributes', {})
+    if 'POSITION' not in attributes:
+        return None
+    positions = read_accessor(doc, attributes['POSITION'], as_float=True)
+    indices = _triangle_indices(doc, primitive, len(positions))
+    if indices is None or not len(indices):
+        return None
+
+    part = {'positions': positions, 'indices': indices, 'material': primitive.get('material')}
+    part['normals'] = (read_accessor(doc, attributes['NORMAL'], as_float=True) if 'NORMAL' in attributes
+                       else compute_normals(positions, indices))
+    for semantic, key in (('TEXCOORD_0', 'uv0'), ('TEXCOORD_1', 'uv1')):
+        part[key] = read_accessor(doc, attributes[semantic], as_float=True) if semantic in attributes else None
+    part['color'] = None
+    if 'COLOR_0' in attributes:
+        color = read_accessor(doc, attributes['COLOR_0'], as_float=True)
+        if color.shape[1] == 3:
+            color = np.hstack([color, np.ones((len(color), 1), dtype=np.float32)])
+        part['color'] = color
+    part['tangents'] = None
+    if 'TANGENT' in attributes:
+        part['tangents'] = read_accessor(doc, attributes['TANGENT'], as_float=True)
+    elif part['uv0'] is not None and _material_uses_normal_map(doc.gltf, part['material']):
+        part['tangents'] = compute_tangents(positions, part['normals'], part['uv0'], indices)
+    return part
+
+
+def build_mesh(doc, mesh_index: int) -> Optional[Dict]:
+    """把glTF网格的三角形图元合并为一个交错顶点缓冲，每个图元一个子网格
+
+    不同图元的属性取并集，缺少的属性填默认值；UV按Quick3D的约定翻转V。
+
+    Returns:
+        dict: {'name', 'entries', 'stride', 'vertex_data', 'index_component', 'index_data',
+               'subsets', 'materials', 'vertex_count'}，没有三角形图元时返回None
+    """
+    mesh = doc.gltf['meshes'][mesh_index]
+    mesh_name = mesh.get('name') or f"mesh{mesh_index}"
+    parts = []
+    for primitive_index, primitive in enumerate(mesh.get('primitives', [])):
+        part = _read_primitive(doc, primitive)
+        if part is None:
+            print(f"⚠️ 跳过非三角形图元: {mesh_name}[{primitive_index}]")
+            continue
+        part['name'] = f"{mesh_name}_{primitive_index}" if len(mesh.get('primitives', [])) > 1 else mesh_name
+        parts.append(part)
+    if not parts:
+        return None
+
+    present = {'attr_pos', 'attr_norm'}
+    if any(part['uv0'] is not None for part in parts):
+        present.add('attr_uv0')
+    if any(part['uv1'] is not None for part in parts):
+        present.add('attr_uv1')
+    if any(part['tangents'] is not None for part in parts):
+        present.update(('attr_textan', 'attr_binormal'))
+    if any(part['color'] is not None for part in parts):
+        present.add('attr_color')
+
+    entries = []
+    columns = {}
+    stride_floats = 0
+    for name, components in VERTEX_ATTRIBUTES:
+        if name in present:
+            entries.append({'name': name, 'components': components, 'offset': stride_floats * 4})
+            columns[name] = slice(stride_floats, stride_floats + components)
+            stride_floats += components
+
+    vertex_count = sum(len(part['positions']) for part in parts)
+    vertices = np.zeros((vertex_count, stride_floats), dtype=np.float32)
+    if 'attr_color' in columns:
+        vertices[:, columns['attr_color']] = 1.0
+    index_list = []
+    subsets = []
+    base = 0
+    index_offset = 0
+    for part in parts:
+        rows = slice(base, base + len(part['positions']))
+        vertices[rows, columns['attr_pos']] = part['positions']
+        vertices[rows, columns['attr_norm']] = part['normals']
+        for key, name in (('uv0', 'attr_uv0'), ('uv1', 'attr_uv1')):
+            if part[key] is not None:
+                vertices[rows, columns[name].start] = part[key][:, 0]
+                vertices[rows, columns[name].start + 1] = 1.0 - part[key][:, 1]
+        if part['tangents'] is not None:
+            tangents = part['tangents']
+            vertices[rows, columns['attr_textan']] = tangents[:, :3]
+            vertices[rows, columns['attr_binormal']] = np.cross(part['normals'], tangents[:, :3]) * tangents[:, 3:4]
+        if part['color'] is not None:
+            vertices[rows, columns['attr_color']] = part['color']
+
+        index_list.append(part['indices'].astype(np.uint32) + base)
+        subsets.append({
+            'name': part['name'],
+            'offset': index_offset,
+            'count': len(part['indices']),
+            'min': part['positions'].min(axis=0).tolist(),
+            'max': part['positions'].max(axis=0).tolist(),
+        })
+        base += len(part['positions'])
+        index_offset += len(part['indices'])
+
+    indices = np.concatenate(index_list)
+    if vertex_count <= 0xFFFF:
+        index_component, index_data = MESH_COMPONENT_UINT16, indices.astype('<u2').tobytes()
+    else:
+        index_component, index_data = MESH_COMPONENT_UINT32, indices.astype('<u4').tobytes()
+
+    return {
+        'name': mesh_name,
+        'entries': entries,
+        'stride': stride_floats * 4,
+        'vertex_data': vertices.astype('<f4').tobytes(),
+        'vertex_count': vertex_count,
+        'index_component': index_component,
+        'index_data': index_data,
+        'subsets': subsets,
+        'materials': [part['material'] for part in parts],
+    }
+
+
+# ----------------------------------------------------------------------
+# .mesh 读写
+# ----------------------------------------------------------------------
+
+def _pad4(block: bytearray):
+    block += b'\x00' * (-len(block) % 4)
+
+
+def write_mesh_file(path: str, mesh: Dict):
+    """按QSSGMesh第3版格式写出网格（文件末尾附带多网格索引，网格ID为1）
+
+    各数据块依次排列并按4字节对齐，结构中的偏移量相对于网格结构起点。
+    """
+    entries = mesh['entries']
+    subsets = mesh['subsets']
+    body = bytearray()
+
+    # 顶点属性表与属性名（名称带长度前缀并以0结尾）
+    names = bytearray()
+    name_offsets = []
+    names_start = MESH_STRUCT_SIZE + VERTEX_ENTRY_SIZE * len(entries)
+    for entry in entries:
+        encoded = entry['name'].encode('ascii') + b'\x00'
+        name_offsets.append(names_start + len(names) + 4)
+        names += struct.pack('<I', len(encoded)) + encoded
+        _pad4(names)
+    for entry, name_offset in zip(entries, name_offsets):
+        body += struct.pack('<IIII', name_offset, MESH_COMPONENT_FLOAT32, entry['components'], entry['offset'])
+    body += names
+
+    vertex_offset = MESH_STRUCT_SIZE + len(body)
+    body += mesh['vertex_data']
+    _pad4(body)
+    index_offset = MESH_STRUCT_SIZE + len(body)
+    body += mesh['index_data']
+    _pad4(body)
+
+    # 子网格与子网格名称（UTF-16，长度按字符计并包含结尾的0）
+    subsets_offset = MESH_STRUCT_SIZE + len(body)
+    subset_names = bytearray()
+    subset_names_start = subsets_offset + SUBSET_STRUCT_SIZE * len(subsets)
+    subset_records = bytearray()
+    for subset in subsets:
+        encoded = subset['name'].encode('utf-16-le') + b'\x00\x00'
+        subset_records += struct.pack('<II6fII', subset['count'], subset['offset'], *subset['min'], *subset['max'],
+                                      subset_names_start + len(subset_names), len(encoded) // 2)
+        subset_names += encoded
+        _pad4(subset_names)
+    body += subset_records + subset_names
+
+    mesh_struct = struct.pack(
+        '<14I',
+        MESH_STRUCT_SIZE, len(entries),
+        mesh['stride'],
+        vertex_offset, len(mesh['vertex_data']),
+        mesh['index_component'],
+        index_offset, len(mesh['index_data']),
+        subsets_offset, len(subsets),
+        0, 0,  # 关节（蒙皮）
+        MESH_DRAW_MODE_TRIANGLES, MESH_WINDING_COUNTER_CLOCKWISE,
+    )
+    header = struct.pack('<IHHI', MESH_FILE_ID, MESH_FILE_VERSION, 0, MESH_STRUCT_SIZE + len(body))
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(mesh_struct)
+        f.write(body)
+        # 多网格索引：条目在前，文件头在最后；条目偏移为相对文件头的负值
+        f.write(struct.pack('<QII', 0, 1, 0))
+        f.write(struct.pack('<IIII', MULTI_MESH_FILE_ID, MULTI_MESH_FILE_VERSION,
+                            (-MULTI_ENTRY_SIZE) & 0xFFFFFFFF, 1))
+
+
+def read_mesh_file(path: str) -> Dict:
+    """读取 .mesh 文件中的第一个网格（第3版及更新版本，用于与balsam的输出对比）
+
+    Returns:
+        dict: {'version', 'entries', 'stride', 'vertex_count', 'index_component', 'index_count',
+               'subsets', 'draw_mode', 'winding'}
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    file_id, _version, _entries_offset, entry_count = struct.unpack_from('<IIII', data, len(data) - MULTI_HEADER_SIZE)
+    if file_id != MULTI_MESH_FILE_ID or entry_count < 1:
+        raise ValueError(f"不是Quick3D网格文件: {path}")
+    entries_start = len(data) - MULTI_HEADER_SIZE - MULTI_ENTRY_SIZE * entry_count
+    mesh_entries = sorted(struct.unpack_from('<QII', data, entries_start + i * MULTI_ENTRY_SIZE)[:2]
+                          for i in range(entry_count))
+    mesh_start = min(mesh_entries, key=lambda entry: entry[1])[0]
+
+    mesh_id, version, _flags, _size = struct.unpack_from('<IHHI', data, mesh_start)
+    if mesh_id != MESH_FILE_ID:
+        raise ValueError(f"网格数据头无效: {path}")
+    fields = struct.unpack_from('<14I', data, mesh_start + MESH_HEADER_SIZE)
+    (_e_off, entry_count, stride, _v_off, vertex_size, index_component, _i_off, index_size,
+     _s_off, subset_count, _j_off, _j_count, draw_mode, winding) = fields
+
+    # 各数据块按顺序排列，忽略结构中的偏移量
+    base = mesh_start + MESH_HEADER_SIZE
+    cursor = MESH_STRUCT_SIZE
+
+    def aligned(value):
+        return value + (-value % 4)
+
+    entries = []
+    for i in range(entry_count):
+        _name_offset, component_type, components, offset = struct.unpack_from('<IIII', data, base + cursor)
+        entries.append({'component_type': component_type, 'components': components, 'offset': offset})
+        cursor += VERTEX_ENTRY_SIZE
+    for entry in entries:
+        (length,) = struct.unpack_from('<I', data, base + cursor)
+        cursor += 4
+        entry['name'] = data[base + cursor:base + cursor + length].rstrip(b'\x00').decode('ascii', 'replace')
+        cursor = aligned(cursor + length)
+    cursor = aligned(cursor + vertex_size)
+    cursor = aligned(cursor + index_size)
+
+    subset_size = SUBSET_STRUCT_SIZES.get(version, SUBSET_STRUCT_SIZE_LATEST)
+    subsets = []
+    for i in range(subset_count):
+        values = struct.unpack_from('<II6fII', data, base + cursor)
+        subsets.append({'count': values[0], 'offset': values[1], 'min': list(values[2:5]),
+                        'max': list(values[5:8]), 'name_length': values[9]})
+        cursor += subset_size
+    for subset in subsets:
+        length = subset.pop('name_length') * 2
+        subset['name'] = data[base + cursor:base + cursor + length].decode('utf-16-le', 'replace').rstrip('\x00')
+        cursor = aligned(cursor + length)
+
+    index_width = 2 if index_component == MESH_COMPONENT_UINT16 else 4
+    return {
+        'version': version,
+        'entries': entries,
+        'stride': stride,
+        'vertex_count': vertex_size // stride if stride else 0,
+        'index_component': index_component,
+        'index_count': index_size // index_width,
+        'subsets': subsets,
+        'draw_mode': draw_mode,
+        'winding': winding,
+    }
+
+
+# ----------------------------------------------------------------------
+# QML生成
+# ----------------------------------------------------------------------
+
+def _identifier(name: Optional[str], used: set, fallback: str) -> str:
+    """生成唯一的QML id（小写开头，只含字母数字下划线）"""
+    ident = re.sub(r'[^A-Za-z0-9_]', '_', name or '') or fallback
+    if ident[0].isdigit():
+        ident = "_" + ident
+    ident = ident[0].lower() + ident[1:]
+    candidate = ident
+    suffix = 1
+    while candidate in used or candidate in _RESERVED_IDS:
+        candidate = f"{ident}_{suffix}"
+        suffix += 1
+    used.add(candidate)
+    return candidate
+
+
+def _file_stem(name: Optional[str], fallback: str) -> str:
+    stem = re.sub(r'[^A-Za-z0-9_\-]', '_', name or '').strip('_')
+    return stem or fallback
+
+
+def _number(value: float) -> str:
+    text = f"{value:.6g}"
+    return "0" if text == "-0" else text
+
+
+def _string(value: str) -> str:
+    return json.dumps(value or "", ensure_ascii=False)
+
+
+def _vector(values) -> str:
+    return "Qt.vector%dd(%s)" % (len(values), ", ".join(_number(v) for v in values))
+
+
+def _quaternion(values) -> str:
+    x, y, z, w = values
+    return f"Qt.quaternion({_number(w)}, {_number(x)}, {_number(y)}, {_number(z)})"
+
+
+def _linear_to_srgb(value: float) -> float:
+    value = min(max(value, 0.0), 1.0)
+    return value * 12.92 if value <= 0.0031308 else 1.055 * value ** (1.0 / 2.4) - 0.055
+
+
+def _color(values) -> str:
+    """glTF的线性颜色转换为QML颜色（Quick3D的颜色属性按sRGB解释）"""
+    r, g, b = (_linear_to_srgb(v) for v in values[:3])
+    a = values[3] if len(values) > 3 else 1.0
+    return f"Qt.rgba({_number(r)}, {_number(g)}, {_number(b)}, {_number(a)})"
+
+
+def matrix_to_trs(matrix):
+    """把glTF节点的列主序矩阵分解为 (平移, 旋转四元数xyzw, 缩放)"""
+    m = np.array(matrix, dtype=np.float64).reshape(4, 4).T
+    translation = m[:3, 3].tolist()
+    basis = m[:3, :3]
+    scale = np.linalg.norm(basis, axis=0)
+    if np.linalg.det(basis) < 0:
+        scale[0] = -scale[0]
+    rotation = basis / np.where(np.abs(scale) < 1e-12, 1.0, scale)
+
+    trace = rotation[0, 0] + rotation[1, 1] + rotation[2, 2]
+    if trace > 0:
+        s = math.sqrt(trace + 1.0) * 2
+        quat = [(rotation[2, 1] - rotation[1, 2]) / s, (rotation[0, 2] - rotation[2, 0]) / s,
+                (rotation[1, 0] - rotation[0, 1]) / s, 0.25 * s]
+    elif rotation[0, 0] > rotation[1, 1] and rotation[0, 0] > rotation[2, 2]:
+        s = math.sqrt(1.0 + rotation[0, 0] - rotation[1, 1] - rotation[2, 2]) * 2
+        quat = [0.25 * s, (rotation[0, 1] + rotation[1, 0]) / s, (rotation[0, 2] + rotation[2, 0]) / s,
+                (rotation[2, 1] - rotation[1, 2]) / s]
+    elif rotation[1, 1] > rotation[2, 2]:
+        s = math.sqrt(1.0 + rotation[1, 1] - rotation[0, 0] - rotation[2, 2]) * 2
+        quat = [(rotation[0, 1] + rotation[1, 0]) / s, 0.25 * s, (rotation[1, 2] + rotation[2, 1]) / s,
+                (rotation[0, 2] - rotation[2, 0]) / s]
+    else:
+        s = math.sqrt(1.0 + rotation[2, 2] - rotation[0, 0] - rotation[1, 1]) * 2
+        quat = [(rotation[0, 2] + rotation[2, 0]) / s, (rotation[1, 2] + rotation[2, 1]) / s, 0.25 * s,
+                (rotation[1, 0] - rotation[0, 1]) / s]
+    return translation, quat, scale.tolist()
+
+
+class _QmlBuilder:
+    """按balsam的布局生成根QML：资源（纹理、材质）、节点树、动画"""
+
+    def __init__(self, doc, mesh_files: Dict[int, Dict], map_paths: Dict[int, str]):
+        self.doc = doc
+        self.gltf = doc.gltf
+        self.mesh_files = mesh_files
+        self.map_paths = map_paths
+        self.used_ids = set()
+        self.texture_lines = []
+        self.texture_ids = {}
+        self.material_lines = []
+        self.material_ids = {}
+        self.node_ids = {}
+
+    # 资源 ---------------------------------------------------------------
+
+    def texture_id(self, texture_info: Optional[Dict]) -> Optional[str]:
+        """纹理引用对应的Texture id（同一纹理与UV通道只生成一次）"""
+        if not texture_info or 'index' not in texture_info:
+            return None
+        texture_index = texture_info['index']
+        tex_coord = texture_info.get('texCoord', 0)
+        key = (texture_index, tex_coord)
+        if key in self.texture_ids:
+            return self.texture_ids[key]
+
+        textures = self.gltf.get('textures', [])
+        texture = textures[texture_index] if texture_index < len(textures) else {}
+        source = self.map_paths.get(texture.get('source'))
+        if source is None:
+            self.texture_ids[key] = None
+            return None
+        image = self.gltf['images'][texture['source']]
+        texture_id = _identifier(f"{image.get('name') or texture_index}_texture", self.used_ids, "texture")
+        self.texture_ids[key] = texture_id
+
+        lines = ["    Texture {", f"        id: {texture_id}", f"        source: {_string(source)}",
+                 "        generateMipmaps: true", "        mipFilter: Texture.Linear"]
+        samplers = self.gltf.get('samplers', [])
+        sampler = samplers[texture['sampler']] if texture.get('sampler') is not None else {}
+        for key_name, prop in (('wrapS', 'tilingModeHorizontal'), ('wrapT', 'tilingModeVertical')):
+            mode = WRAP_MODES.get(sampler.get(key_name))
+            if mode:
+                lines.append(f"        {prop}: {mode}")
+        if tex_coord:
+            lines.append(f"        indexUV: {tex_coord}")
+        lines.append("    }")
+        self.texture_lines += lines
+        return texture_id
+
+    def material_id(self, material_index: Optional[int]) -> str:
+        """图元材质对应的PrincipledMaterial id（没有材质的图元使用glTF默认材质）"""
+        key = material_index if material_index is not None else -1
+        if key in self.material_ids:
+            return self.material_ids[key]
+        materials = self.gltf.get('materials', [])
+        material = materials[material_index] if material_index is not None and material_index < len(materials) else {}
+        name = material.get('name') or ("defaultMaterial" if key < 0 else f"material{material_index}")
+        material_id = _identifier(f"{name}_material", self.used_ids, "material")
+        self.material_ids[key] = material_id
+
+        lines = ["    PrincipledMaterial {", f"        id: {material_id}", f"        objectName: {_string(name)}"]
+        lines += [f"        {line}" for line in self._material_properties(material)]
+        lines.append("    }")
+        self.material_lines += lines
+        return material_id
+
+    def _material_properties(self, material: Dict) -> List[str]:
+        pbr = material.get('pbrMetallicRoughness', {})
+        extensions = material.get('extensions', {})
+        lines = []
+
+        base_color = pbr.get('baseColorFactor', [1.0, 1.0, 1.0, 1.0])
+        if list(base_color) != [1.0, 1.0, 1.0, 1.0]:
+            lines.append(f"baseColor: {_color(base_color)}")
+        base_map = self.texture_id(pbr.get('baseColorTexture'))
+        if base_map:
+            lines.append(f"baseColorMap: {base_map}")
+
+        lines.append(f"metalness: {_number(pbr.get('metallicFactor', 1.0))}")
+        lines.append(f"roughness: {_number(pbr.get('roughnessFactor', 1.0))}")
+        metal_rough_map = self.texture_id(pbr.get('metallicRoughnessTexture'))
+        if metal_rough_map:
+            lines += [f"metalnessMap: {metal_rough_map}", "metalnessChannel: Material.B",
+                      f"roughnessMap: {metal_rough_map}", "roughnessChannel: Material.G"]
+
+        normal_info = material.get('normalTexture')
+        normal_map = self.texture_id(normal_info)
+        if normal_map:
+            lines.append(f"normalMap: {normal_map}")
+            if normal_info.get('scale', 1.0) != 1.0:
+                lines.append(f"normalStrength: {_number(normal_info['scale'])}")
+
+        occlusion_info = material.get('occlusionTexture')
+        occlusion_map = self.texture_id(occlusion_info)
+        if occlusion_map:
+            lines += [f"occlusionMap: {occlusion_map}", "occlusionChannel: Material.R"]
+            if occlusion_info.get('strength', 1.0) != 1.0:
+                lines.append(f"occlusionAmount: {_number(occlusion_info['strength'])}")
+
+        emissive_map = self.texture_id(material.get('emissiveTexture'))
+        if emissive_map:
+            lines.append(f"emissiveMap: {emissive_map}")
+        strength = extensions.get('KHR_materials_emissive_strength', {}).get('emissiveStrength', 1.0)
+        emissive = [value * strength for value in material.get('emissiveFactor', [0.0, 0.0, 0.0])]
+        if any(emissive):
+            lines.append(f"emissiveFactor: {_vector(emissive)}")
+
+        alpha_mode = material.get('alphaMode', 'OPAQUE')
+        if alpha_mode == 'MASK':
+            lines += ["alphaMode: PrincipledMaterial.Mask", f"alphaCutoff: {_number(material.get('alphaCutoff', 0.5))}"]
+        elif alpha_mode == 'BLEND':
+            lines.append("alphaMode: PrincipledMaterial.Blend")
+        elif base_map or base_color[3] < 1.0:
+            # glTF的不透明材质忽略alpha，Quick3D默认会按alpha混合
+            lines.append("alphaMode: PrincipledMaterial.Opaque")
+        if material.get('doubleSided'):
+            lines.append("cullMode: Material.NoCulling")
+        if 'KHR_materials_unlit' in extensions:
+            lines.append("lighting: PrincipledMaterial.NoLighting")
+        return lines
+
+    # 节点 ---------------------------------------------------------------
+
+    def node_lines(self, node_index: int, depth: int) -> List[str]:
+        node = self.gltf['nodes'][node_index]
+        indent = "    " * depth
+        mesh_file = self.mesh_files.get(node.get('mesh'))
+        camera = self.gltf.get('cameras', [])[node['camera']] if 'camera' in node else None
+        lights = gltf_utils.get_lights(self.gltf)
+        light_index = node.get('extensions', {}).get('KHR_lights_punctual', {}).get('light')
+        light = lights[light_index] if light_index is not None and light_index < len(lights) else None
+
+        # 节点本身的类型：模型 > 相机 > 灯光 > 普通节点，其余附加内容作为不带变换的子节点
+        attachments = []
+        if mesh_file:
+            element, properties = "Model", self._model_properties(mesh_file)
+        else:
+            element, properties = "Node", []
+        for kind, item in (('camera', camera), ('light', light)):
+            if item is None:
+                continue
+            item_element, item_properties = (self._camera(item) if kind == 'camera' else self._light(item))
+            if element == "Node":
+                element, properties = item_element, item_properties
+            else:
+                attachments.append((item_element, item_properties))
+
+        node_id = _identifier(node.get('name'), self.used_ids, f"node{node_index}")
+        self.node_ids[node_index] = node_id
+        lines = [f"{indent}{element} {{", f"{indent}    id: {node_id}",
+                 f"{indent}    objectName: {_string(node.get('name', ''))}"]
+        lines += [f"{indent}    {line}" for line in self._transform(node)]
+        lines += [f"{indent}    {line}" for line in properties]
+        for item_element, item_properties in attachments:
+            lines.append(f"{indent}    {item_element} {{")
+            lines += [f"{indent}        {line}" for line in item_properties]
+            lines.append(f"{indent}    }}")
+        for child in node.get('children', []):
+            lines += self.node_lines(child, depth + 1)
+        lines.append(f"{indent}}}")
+        return lines
+
+    def _transform(self, node: Dict) -> List[str]:
+        if 'matrix' in node:
+            translation, rotation, scale = matrix_to_trs(node['matrix'])
+        else:
+            translation = node.get('translation', [0.0, 0.0, 0.0])
+            rotation = node.get('rotation', [0.0, 0.0, 0.0, 1.0])
+            scale = node.get('scale', [1.0, 1.0, 1.0])
+        lines = []
+        if any(abs(v) > 1e-9 for v in translation):
+            lines.append(f"position: {_vector(translation)}")
+        if any(abs(v) > 1e-9 for v in rotation[:3]):
+            lines.append(f"rotation: {_quaternion(rotation)}")
+        if any(abs(v - 1.0) > 1e-9 for v in scale):
+            lines.append(f"scale: {_vector(scale)}")
+        return lines
+
+    def _model_properties(self, mesh_file: Dict) -> List[str]:
+        materials = [self.material_id(index) for index in mesh_file['materials']]
+        return [f"source: {_string(mesh_file['path'])}", f"materials: [{', '.join(materials)}]"]
+
+    def _camera(self, camera: Dict):
+        if camera.get('type') == 'orthographic':
+            params = camera.get('orthographic', {})
+            lines = [f"clipNear: {_number(params.get('znear', 0.01))}", f"clipFar: {_number(params.get('zfar', 1000.0))}"]
+            return "OrthographicCamera", lines
+        params = camera.get('perspective', {})
+        lines = [f"fieldOfView: {_number(math.degrees(params.get('yfov', math.radians(60.0))))}",
+                 f"clipNear: {_number(params.get('znear', 0.01))}"]
+        if 'zfar' in params:
+            lines.append(f"clipFar: {_number(params['zfar'])}")
+        return "PerspectiveCamera", lines
+
+    def _light(self, light: Dict):
+        lines = [f"color: {_color(list(light.get('color', [1.0, 1.0, 1.0])))}",
+                 f"brightness: {_number(light.get('intensity', 1.0))}"]
+        light_type = light.get('type')
+        if light_type == 'directional':
+            return "DirectionalLight", lines
+        if light_type == 'spot':
+            spot = light.get('spot', {})
+            lines += [f"coneAngle: {_number(math.degrees(spot.get('outerConeAngle', math.pi / 4)) * 2)}",
+                      f"innerConeAngle: {_number(math.degrees(spot.get('innerConeAngle', 0.0)) * 2)}"]
+            return "SpotLight", lines
+        return "PointLight", lines
+
+    # 动画 ---------------------------------------------------------------
+
+    def animation_lines(self) -> List[str]:
+        """节点的平移/旋转/缩放动画转换为 Timeline + KeyframeGroup（帧单位为毫秒）"""
+        lines = []
+        for animation_index, animation in enumerate(self.gltf.get('animations', [])):
+            groups = []
+            end_frame = 0.0
+            for channel in animation.get('channels', []):
+                target = channel.get('target', {})
+                node_id = self.node_ids.get(target.get('node'))
+                prop = ANIMATION_PROPERTIES.get(target.get('path'))
+                if not node_id or not prop:
+                    continue
+                sampler = animation['samplers'][channel['sampler']]
+                times = read_accessor(self.doc, sampler['input'], as_float=True)[:, 0]
+                values = read_accessor(self.doc, sampler['output'], as_float=True)
+                width = 4 if prop == 'rotation' else 3
+                values = values.reshape(-1, width)
+                interpolation = sampler.get('interpolation', 'LINEAR')
+                if interpolation == 'CUBICSPLINE':
+                    values = values.reshape(len(times), 3, width)[:, 1]
+                if not len(times):
+                    continue
+                keys = list(zip(times.tolist(), values.tolist()))
+                if interpolation == 'STEP':
+                    # 在下一个关键帧之前保持当前值
+                    stepped = []
+                    for i, (time_value, value) in enumerate(keys):
+                        stepped.append((time_value, value))
+                        if i + 1 < len(keys):
+                            stepped.append((keys[i + 1][0] - 1e-4, value))
+                    keys = stepped
+                end_frame = max(end_frame, float(times[-1]) * 1000.0)
+
+                groups += ["        KeyframeGroup {", f"            target: {node_id}",
+                           f"            property: \"{prop}\""]
+                for time_value, value in keys:
+                    formatted = _quaternion(value) if prop == 'rotation' else _vector(value)
+                    groups.append(f"            Keyframe {{ frame: {_number(time_value * 1000.0)}; value: {formatted} }}")
+                groups.append("        }")
+
+            if not groups:
+                continue
+            timeline_id = _identifier(f"timeline{animation_index}", self.used_ids, "timeline")
+            lines += ["", "    // Animations:", "    Timeline {", f"        id: {timeline_id}",
+                      f"        objectName: {_string(animation.get('name', ''))}",
+                      "        startFrame: 0", f"        endFrame: {_number(end_frame)}",
+                      "        currentFrame: 0", "        enabled: true",
+                      "        animations: TimelineAnimation {", f"            duration: {_number(max(end_frame, 1.0))}",
+                      "            from: 0", f"            to: {_number(end_frame)}",
+                      "            running: true", "            loops: Animation.Infinite", "        }"]
+            lines += groups
+            lines.append("    }")
+        return lines
+
+    def build(self) -> str:
+        nodes = []
+        roots = gltf_utils.scene_root_nodes(self.gltf)
+        if not roots and not self.gltf.get('scenes'):
+            children = {child for node in self.gltf.get('nodes', []) for child in node.get('children', [])}
+            roots = [i for i in range(len(self.gltf.get('nodes', []))) if i not in children]
+        for root in roots:
+            nodes += self.node_lines(root, 1)
+        animations = self.animation_lines()
+
+        imports = ["import QtQuick", "import QtQuick3D"]
+        if animations:
+            imports.append("import QtQuick.Timeline")
+        lines = imports + ["", "Node {", "    id: node", "", "    // Resources"]
+        lines += self.texture_lines + self.material_lines
+        lines += ["", "    // Nodes:"] + nodes + animations
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# 转换
+# ----------------------------------------------------------------------
+
+def write_maps(doc, output_dir: str) -> Dict[int, str]:
+    """把glTF中的图像写入 maps/，返回 {图像索引: 相对路径}"""
+    paths = {}
+    used_names = set()
+    for image_index, image in enumerate(doc.gltf.get('images', [])):
+        uri = image.get('uri')
+        external = uri and not uri.startswith('data:')
+        if external:
+            stem, ext = os.path.splitext(os.path.basename(unquote(uri)))
+        else:
+            stem, ext = image.get('name'), MIME_EXTENSIONS.get(image.get('mimeType'), '.png')
+        stem = _file_stem(stem, str(image_index))
+        name = f"{stem}{ext}"
+        suffix = 1
+        while name.lower() in used_names:
+            name = f"{stem}_{suffix}{ext}"
+            suffix += 1
+
+        target = os.path.join(output_dir, "maps", name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if external:
+            source = doc.resolve_uri(uri)
+            if not os.path.exists(source):
+                print(f"⚠️ 图像文件不存在: {source}")
+                continue
+            shutil.copyfile(source, target)
+        else:
+            data = doc.image_bytes(image_index)
+            if data is None:
+                continue
+            with open(target, 'wb') as f:
+                f.write(data)
+        used_names.add(name.lower())
+        paths[image_index] = f"maps/{name}"
+    return paths
+
+
+def write_meshes(doc, output_dir: str) -> Dict[int, Dict]:
+    """每个glTF网格写出一个 .mesh 文件，返回 {网格索引: {'path', 'materials'}}"""
+    mesh_files = {}
+    used_names = set()
+    for mesh_index in range(len(doc.gltf.get('meshes', []))):
+        mesh = build_mesh(doc, mesh_index)
+        if mesh is None:
+            continue
+        stem = _file_stem(mesh['name'], f"mesh{mesh_index}").lower()
+        name = stem
+        suffix = 1
+        while name in used_names:
+            name = f"{stem}_{suffix}"
+            suffix += 1
+        used_names.add(name)
+        rel_path = f"meshes/{name}.mesh"
+        os.makedirs(os.path.join(output_dir, "meshes"), exist_ok=True)
+        write_mesh_file(os.path.join(output_dir, rel_path), mesh)
+        mesh_files[mesh_index] = {'path': rel_path, 'materials': mesh['materials']}
+    return mesh_files
+
+
+def qml_component_name(source: str) -> str:
+    """balsam的根QML文件名：输入文件名首字母大写"""
+    stem = re.sub(r'[^A-Za-z0-9_]', '_', os.path.splitext(os.path.basename(source))[0]) or "Scene"
+    if stem[0].isdigit():
+        stem = "_" + stem
+    return stem[0].upper() + stem[1:]
+
+
+def convert_gltf(gltf_path: str, output_dir: str) -> Optional[str]:
+    """把glTF/GLB转换为Quick3D资源（meshes/、maps/ 与根QML）
+
+    Returns:
+        str: 生成的QML文件路径，失败返回None
+    """
+    if not NUMPY_AVAILABLE:
+        print("❌ 内置转换器需要numpy")
+        return None
+    try:
+        doc = gltf_utils.GLTFDocument.load(gltf_path)
+        unsupported = find_unsupported_features(doc.gltf)
+        if unsupported:
+            print(f"⚠️ 以下内容不会被转换: {', '.join(unsupported)}")
+        os.makedirs(output_dir, exist_ok=True)
+        map_paths = write_maps(doc, output_dir)
+        mesh_files = write_meshes(doc, output_dir)
+        qml = _QmlBuilder(doc, mesh_files, map_paths).build()
+        qml_path = os.path.join(output_dir, qml_component_name(gltf_path) + ".qml")
+        with open(qml_path, 'w', encoding='utf-8') as f:
+            f.write(qml)
+        print(f"✅ 内置转换完成: {qml_path} ({len(mesh_files)} 个网格, {len(map_paths)} 张贴图)")
+        return qml_path
+    except Exception as e:
+        print(f"❌ 内置转换失败: {e}")
+        return None
+
+
+def _parse_args(argv: List[str]):
+    """解析与balsam兼容的命令行参数，返回 (输入文件, 输出目录)"""
+    output_dir = None
+    source = None
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in ('-h', '-?', '--help'):
+            print(HELP_TEXT)
+            sys.exit(0)
+        if arg in ('-v', '--version'):
+            print(NATIVE_CONVERTER_VERSION)
+            sys.exit(0)
+        if arg in ('-o', '--outputPath') and index + 1 < len(argv):
+            index += 1
+            output_dir = argv[index]
+        elif not arg.startswith('-'):
+            source = arg
+        index += 1
+    return source, output_dir or os.getcwd()
+
+
+def main(argv: List[str]) -> int:
+    # 输出被转换器捕获时控制台编码可能无法表示emoji
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(errors='replace')
+    source, output_dir = _parse_args(argv)
+    if not source or not os.path.exists(source):
+        print(f"Input file not found: {source}", file=sys.stderr)
+        return 1
+    return 0 if convert_gltf(source, output_dir) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
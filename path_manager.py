@@ -5,9 +5,13 @@
 """
 
 import os
+import sys
 import bpy
 from typing import Optional, Dict, Any
 
+# 工作空间内部状态目录名称（增量导出缓存、转换清单等）
+WORKSPACE_STATE_DIR_NAME = ".blender2quick3d"
+
 
 class PathManager:
     """路径管理器 - 统一管理所有路径"""
@@ -139,7 +143,15 @@ class PathManager:
                 filename = "scene.gltf"
         
         return os.path.join(self.output_base_dir, filename)
-    
+
+    def get_workspace_state_dir(self, sub_dir: str = None) -> str:
+        """获取工作空间内部状态目录（缓存、清单等），不会被Balsam输出覆盖"""
+        state_dir = os.path.join(self.output_base_dir, WORKSPACE_STATE_DIR_NAME)
+        if sub_dir:
+            state_dir = os.path.join(state_dir, sub_dir)
+        os.makedirs(state_dir, exist_ok=True)
+        return state_dir
+
     def get_output_paths(self) -> Dict[str, str]:
         """获取所有输出路径信息"""
         return {
@@ -388,6 +400,139 @@ def save_balsam_cache():
         print(f"❌ 保存balsam缓存失败: {e}")
         return False
 
+# 内置的Python转换器（native_mesh_converter.py）：命令行与balsam兼容，不依赖Qt安装
+NATIVE_CONVERTER_KEY = "NATIVE"
+NATIVE_CONVERTER_FILE = os.path.join(os.path.dirname(__file__), "native_mesh_converter.py")
+
+
+def is_native_converter(path) -> bool:
+    """路径是否为内置转换器"""
+    return bool(path) and os.path.normcase(os.path.abspath(path)) == os.path.normcase(NATIVE_CONVERTER_FILE)
+
+
+def get_converter_command(balsam_path: str) -> list:
+    """balsam命令的可执行部分：内置转换器用Blender自带的Python解释器运行"""
+    if is_native_converter(balsam_path):
+        return [sys.executable, balsam_path]
+    return [balsam_path]
+
+# 全局变量 - balsam命令行能力缓存（每个可执行文件只探测一次）
+BALSAM_CAPABILITIES = {}
+BALSAM_CAPABILITIES_LOADED = False
+BALSAM_CAPABILITIES_FILE = os.path.join(os.path.dirname(__file__), "balsam_capabilities.json")
+
+
+def _get_balsam_identity(path: str) -> Optional[Dict[str, Any]]:
+    """balsam可执行文件标识（大小+修改时间），文件更新后需要重新探测"""
+    try:
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+    except OSError:
+        return None
+
+
+def load_balsam_capabilities():
+    """从文件加载balsam能力缓存"""
+    global BALSAM_CAPABILITIES, BALSAM_CAPABILITIES_LOADED
+    if BALSAM_CAPABILITIES_LOADED:
+        return BALSAM_CAPABILITIES
+    BALSAM_CAPABILITIES_LOADED = True
+    if not os.path.exists(BALSAM_CAPABILITIES_FILE):
+        return BALSAM_CAPABILITIES
+    try:
+        import json
+        with open(BALSAM_CAPABILITIES_FILE, 'r', encoding='utf-8') as f:
+            BALSAM_CAPABILITIES = json.load(f)
+        print(f"✅ 从缓存加载了 {len(BALSAM_CAPABILITIES)} 个balsam能力信息")
+    except Exception as e:
+        print(f"❌ 加载balsam能力缓存失败: {e}")
+        BALSAM_CAPABILITIES = {}
+    return BALSAM_CAPABILITIES
+
+
+def save_balsam_capabilities():
+    """保存balsam能力缓存"""
+    try:
+        import json
+        with open(BALSAM_CAPABILITIES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(BALSAM_CAPABILITIES, f, indent=2, ensure_ascii=False)
+        return True
+    except Exception as e:
+        print(f"❌ 保存balsam能力缓存失败: {e}")
+        return False
+
+
+def _parse_balsam_help(help_text: str) -> Dict[str, Any]:
+    """解析 balsam --help 输出中的选项"""
+    import re
+    options = sorted(set(re.findall(r'(?<![\w-])(--[A-Za-z][\w-]*|-[A-Za-z])(?![\w-])', help_text)))
+    if '--outputPath' in options:
+        output_flag = '--outputPath'
+    elif '-o' in options:
+        output_flag = '-o'
+    else:
+        # 不支持输出路径参数：在输出目录中执行，生成到当前目录
+        output_flag = None
+    return {'options': options, 'output_flag': output_flag}
+
+
+def probe_balsam_capabilities(balsam_path: str, force: bool = False) -> Optional[Dict[str, Any]]:
+    """探测balsam命令行能力（--help 与 --version），结果按可执行文件缓存
+    
+    Args:
+        balsam_path: balsam可执行文件路径
+        force: 忽略缓存重新探测
+    
+    Returns:
+        dict: {'version', 'options', 'output_flag', 'size', 'mtime'}，探测失败返回None
+    """
+    if not balsam_path or not os.path.exists(balsam_path):
+        return None
+    load_balsam_capabilities()
+    key = os.path.normcase(os.path.abspath(balsam_path))
+    identity = _get_balsam_identity(balsam_path)
+
+    cached = BALSAM_CAPABILITIES.get(key)
+    if (not force and cached and cached.get('size') == identity['size']
+            and cached.get('mtime') == identity['mtime']):
+        return cached
+
+    import subprocess
+    env = get_qt_environment_for_path(balsam_path)
+    try:
+        print(f"🔍 探测balsam命令行能力: {balsam_path}")
+        command = get_converter_command(balsam_path)
+        help_result = subprocess.run(command + ["--help"], capture_output=True, text=True, timeout=30, env=env)
+        help_text = (help_result.stdout or '') + (help_result.stderr or '')
+        if help_result.returncode != 0 and not help_text.strip():
+            print(f"⚠️ balsam --help 失败，返回码: {help_result.returncode}")
+            return None
+
+        version = None
+        try:
+            version_result = subprocess.run(command + ["--version"], capture_output=True, text=True, timeout=30, env=env)
+            version = ((version_result.stdout or '') + (version_result.stderr or '')).strip() or None
+        except Exception as e:
+            print(f"⚠️ balsam --version 失败: {e}")
+
+        capabilities = _parse_balsam_help(help_text)
+        capabilities.update(identity)
+        capabilities['version'] = version
+        BALSAM_CAPABILITIES[key] = capabilities
+        save_balsam_capabilities()
+        print(f"✅ balsam能力: 版本={version}, 输出参数={capabilities['output_flag']}, 选项数={len(capabilities['options'])}")
+        return capabilities
+    except Exception as e:
+        print(f"⚠️ 探测balsam能力失败: {e}")
+        return None
+
+
+def balsam_supports_option(balsam_path: str, option: str) -> bool:
+    """balsam是否支持指定的命令行选项（基于缓存的 --help 结果）"""
+    capabilities = probe_balsam_capabilities(balsam_path)
+    return bool(capabilities and option in capabilities.get('options', []))
+
+
 def scan_qt_balsam_paths():
     """扫描C:/Qt目录下的balsam.exe文件"""
     candidates = []
@@ -576,7 +721,9 @@ def build_balsam_enum_items(self, context):
     except ImportError:
         pass
     
-    items = [("AUTO", f"Auto{pyside6_info}", "Auto-select balsam matching PySide6 version")]
+    items = [("AUTO", f"Auto{pyside6_info}", "Auto-select balsam matching PySide6 version"),
+             (NATIVE_CONVERTER_KEY, "Built-in (Python, no Qt)",
+              "Convert with the bundled Python/NumPy converter; scenes with skins or morph targets use balsam if installed")]
     
     # 从缓存加载路径（如果还没有加载）
     if not BALSAM_CACHE_LOADED:
@@ -615,7 +762,10 @@ def update_balsam_selection(self, context):
     
     print(f"🔧 update_balsam_selection被调用，选择版本: {selected_version}")
     
-    if selected_version == "AUTO":
+    if selected_version == NATIVE_CONVERTER_KEY:
+        print(f"✅ 使用内置转换器: {NATIVE_CONVERTER_FILE}")
+        set_selected_balsam_path(NATIVE_CONVERTER_FILE)
+    elif selected_version == "AUTO":
         # 自动选择最新的版本
         print("🔍 开始AUTO选择...")
         latest = find_balsam_executable()
@@ -650,8 +800,11 @@ def get_selected_balsam_path():
     """获取选择的balsam路径"""
     global _SELECTED_BALSAM_PATH
     if _SELECTED_BALSAM_PATH is None:
-        # 如果没有选择，使用默认的
+        # 如果没有选择，使用默认的；没有安装balsam时使用内置转换器
         _SELECTED_BALSAM_PATH = find_balsam_executable()
+        if _SELECTED_BALSAM_PATH is None:
+            print("ℹ️ 未找到balsam，使用内置转换器")
+            _SELECTED_BALSAM_PATH = NATIVE_CONVERTER_FILE
     return _SELECTED_BALSAM_PATH
 
 def get_pyside6_installation_info():
@@ -766,7 +919,7 @@ def get_qt_environment_for_path(balsam_path):
     """为指定的balsam路径获取Qt环境变量"""
     env = os.environ.copy()
     
-    if balsam_path and os.path.exists(balsam_path):
+    if balsam_path and os.path.exists(balsam_path) and not is_native_converter(balsam_path):
         # 获取Qt安装目录
         qt_dir = os.path.dirname(os.path.dirname(balsam_path))
         qt_bin = os.path.dirname(balsam_path)
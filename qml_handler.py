@@ -11,8 +11,11 @@ QML处理器模块
 
 import os
 import re
+import math
 from pathlib import Path
 
+from . import conversion_trace
+
 
 try:
     import bpy
@@ -25,6 +28,12 @@ except ImportError:
 import os
 DEFAULT_DEBUG_MODE = os.environ.get('BLENDER2QUICK3D_DEBUG', 'false').lower() == 'true'
 
+# 组装后的完整QML（Window + View3D）保存时使用的扩展名，查找balsam输出时会跳过这些文件
+ASSEMBLED_QML_EXTENSION = ".assembled.qml"
+
+# 预览中SceneEnvironment的objectName，属性修改时直接推送到运行中的对象
+SCENE_ENVIRONMENT_OBJECT_NAME = "sceneEnvironment"
+
 def enable_qml_debug_mode():
     """启用QML调试模式（打印完整QML内容）"""
     os.environ['BLENDER2QUICK3D_DEBUG'] = 'true'
@@ -39,6 +48,49 @@ def disable_qml_debug_mode():
     DEFAULT_DEBUG_MODE = False
     print("INFO: QML调试模式已禁用")
 
+def format_inline_component(component_name, component_body, indent="        "):
+    """把一个QML对象包装为内联组件声明（component Name: Type { ... }）
+    
+    内联组件拥有独立的id作用域，多个balsam输出合并到同一文档时id不会冲突。
+    
+    Args:
+        component_name (str): 组件名称（必须以大写字母开头）
+        component_body (str): 去掉import语句后的QML对象，如 "Node { ... }"
+        indent (str): 每行的缩进
+    """
+    lines = component_body.strip().splitlines()
+    if not lines:
+        return ""
+    body = "\n".join(indent + line if line.strip() else "" for line in lines)
+    return f"{indent}component {component_name}: {body[len(indent):]}\n"
+
+
+def find_enclosing_block(content: str, position: int):
+    """返回包含 position 的最内层 { } 块的 (起始大括号位置, 结束大括号位置)"""
+    depth = 0
+    start = position
+    while start > 0:
+        start -= 1
+        if content[start] == '}':
+            depth += 1
+        elif content[start] == '{':
+            if depth == 0:
+                break
+            depth -= 1
+    else:
+        return None
+
+    depth = 0
+    for end in range(start, len(content)):
+        if content[end] == '{':
+            depth += 1
+        elif content[end] == '}':
+            depth -= 1
+            if depth == 0:
+                return start, end
+    return None
+
+
 class QMLHandler:
     """QML处理器类"""
     
@@ -110,8 +162,11 @@ class QMLHandler:
         
         qml_files = []
         try:
+            # 单独转换的组件由主场景实例化，不作为场景QML
+            from . import component_conversion
+            component_files = component_conversion.get_component_qml_files(self.qml_output_dir)
             for file in os.listdir(self.qml_output_dir):
-                if file.endswith('.qml'):
+                if file.endswith('.qml') and not file.endswith(ASSEMBLED_QML_EXTENSION) and file not in component_files:
                     qml_files.append(os.path.join(self.qml_output_dir, file))
             
             print(f"✅ 找到 {len(qml_files)} 个QML文件:")
@@ -459,8 +514,19 @@ class QMLHandler:
         }
         return modes.get(mode, "ExtendedSceneEnvironment.Additive")
     
-    def assemble_complete_qml(self, cleaned_qml_content, scene_name="DemoScene"):
-        """组装完整的QML内容，包含View3D和SceneEnvironment"""
+    def assemble_complete_qml(self, cleaned_qml_content, scene_name="DemoScene", inline_components=None,
+                              camera_id=None, extra_imports=None):
+        """组装完整的QML内容，包含View3D和SceneEnvironment
+        
+        Args:
+            cleaned_qml_content (str): 删除import后的场景QML
+            scene_name (str): 窗口标题中的场景名称
+            inline_components (list, optional): [(组件名, 组件QML)]，作为内联组件声明在View3D中，
+                                                场景QML可以直接实例化这些组件
+            camera_id (str, optional): 场景QML中定义的相机id，作为View3D的相机并由WasdController控制；
+                                       为None时按Blender活动相机推断balsam生成的相机id
+            extra_imports (list, optional): 额外的QML模块导入，如 ["QtQuick3D.AssetUtils"]
+        """
         if not cleaned_qml_content:
             print("❌ 没有清理后的QML内容可组装")
             return None
@@ -481,7 +547,9 @@ class QMLHandler:
                     is_camera_name_ascii = False
             
             
-            if current_camera and is_camera_name_ascii:
+            if camera_id:
+                wasd_controller_qml = self.generate_wasd_controller_qml(camera_id, settings)
+            elif current_camera and is_camera_name_ascii:
                 current_camera_name = current_camera.name.lower()
                 wasd_controller_camera = current_camera_name + "_camera"
                 wasd_controller_qml = self.generate_wasd_controller_qml(wasd_controller_camera, settings)
@@ -493,6 +561,24 @@ class QMLHandler:
             # 清理QML内容，修复兼容性问题
             cleaned_qml_content = self.fix_qml_compatibility_issues(cleaned_qml_content)
             
+            # 属性相同的材质只声明一次，各Model引用同一个材质对象
+            if getattr(bpy.context.scene, "qtquick3d_dedupe_materials", False):
+                from . import material_dedup
+                cleaned_qml_content, inline_components, removed_count = material_dedup.share_qml_materials(
+                    cleaned_qml_content, inline_components
+                )
+                if removed_count:
+                    print(f"✅ 已合并 {removed_count} 个重复的材质声明")
+            
+            # 内联组件声明（如分片转换的各个分片）
+            inline_components_qml = "".join(
+                format_inline_component(name, self.fix_qml_compatibility_issues(body))
+                for name, body in (inline_components or [])
+            )
+            
+            extra_imports_qml = "".join(f"import {module}\n" for module in (extra_imports or []))
+            view3d_camera_qml = f"camera: {camera_id}\n        " if camera_id else ""
+            
             # 创建完整的QML内容
             head_qml = """"""
             complete_qml = f'''
@@ -500,7 +586,7 @@ import QtQuick
 import QtQuick3D
 import QtQuick3D.Helpers
 import QtQuick.Timeline
-
+{extra_imports_qml}
 Window {{
     visible: true
     width: {settings['view3d_width']}
@@ -510,9 +596,10 @@ Window {{
     View3D {{
         id: view3D
         anchors.fill: parent
-        
+        {view3d_camera_qml}
         environment: {scene_environment_qml}
         
+{inline_components_qml}
         // 插入清理后的QML内容
         {cleaned_qml_content}
     }}
@@ -534,7 +621,7 @@ Window {{
         """生成SceneEnvironment的QML字符串"""
         try:
             # 基础SceneEnvironment设置
-            qml_parts = []
+            qml_parts = [f'objectName: "{SCENE_ENVIRONMENT_OBJECT_NAME}"']
             
             # 基本属性
             qml_parts.append(f"antialiasingMode: {self.get_antialiasing_mode_qml(settings['antialiasing_mode'])}")
@@ -632,12 +719,12 @@ Window {{
                 
         except Exception as e:
             print(f"❌ 生成SceneEnvironment QML失败: {e}")
-            return "SceneEnvironment {\n    clearColor: \"#303030\"\n    backgroundMode: SceneEnvironment.Color\n    antialiasingMode: SceneEnvironment.MSAA\n    antialiasingQuality: SceneEnvironment.High\n}"
+            return f"SceneEnvironment {{\n    objectName: \"{SCENE_ENVIRONMENT_OBJECT_NAME}\"\n    clearColor: \"#303030\"\n    backgroundMode: SceneEnvironment.Color\n    antialiasingMode: SceneEnvironment.MSAA\n    antialiasingQuality: SceneEnvironment.High\n}}"
     
     def generate_extended_scene_environment_qml(self, settings):
         """生成ExtendedSceneEnvironment的QML字符串"""
         try:
-            qml_parts = []
+            qml_parts = [f'objectName: "{SCENE_ENVIRONMENT_OBJECT_NAME}"']
             
             # 基础SceneEnvironment属性（继承）
             qml_parts.append(f"antialiasingMode: {self.get_antialiasing_mode_qml(settings['antialiasing_mode'])}")
@@ -912,6 +999,78 @@ Window {{
             print(f"❌ 生成WASD控制器QML失败: {e}")
             return f"WasdController {{ controlledObject: {controlled_object} }}"
     
+    def generate_preview_camera_qml(self, camera_id, settings):
+        """生成与Blender活动相机一致的PerspectiveCamera（快速预览中glTF内的相机无法通过id引用）
+        
+        位置与朝向按glTF导出器的Y轴向上约定转换：Blender (x, y, z) -> (x, z, -y)。
+        """
+        lines = [f"id: {camera_id}"]
+        try:
+            camera = bpy.context.scene.camera if BLENDER_AVAILABLE else None
+        except Exception:
+            camera = None
+        if camera is None or getattr(camera, 'type', None) != 'CAMERA':
+            lines.append("z: 10")
+            return "PerspectiveCamera {\n    " + "\n    ".join(lines) + "\n}"
+        
+        from mathutils import Matrix
+        
+        y_up = Matrix(((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)))
+        world = camera.matrix_world
+        position = y_up @ world.to_translation()
+        rotation = (y_up @ world.to_3x3().normalized()).to_quaternion()
+        data = camera.data
+        lines.append(f"position: Qt.vector3d({position.x:.6g}, {position.y:.6g}, {position.z:.6g})")
+        lines.append(f"rotation: Qt.quaternion({rotation.w:.6g}, {rotation.x:.6g}, {rotation.y:.6g}, {rotation.z:.6g})")
+        lines.append(f"clipNear: {data.clip_start:.6g}")
+        lines.append(f"clipFar: {data.clip_end:.6g}")
+        
+        # 视场角按相机的传感器适配方式换算为水平或垂直方向
+        sensor_fit = getattr(data, 'sensor_fit', 'AUTO')
+        if sensor_fit == 'AUTO':
+            horizontal = settings.get('view3d_width', 1280) >= settings.get('view3d_height', 720)
+            angle = data.angle
+        else:
+            horizontal = sensor_fit == 'HORIZONTAL'
+            angle = data.angle_x if horizontal else data.angle_y
+        lines.append(f"fieldOfView: {math.degrees(angle):.6g}")
+        if horizontal:
+            lines.append("fieldOfViewOrientation: PerspectiveCamera.Horizontal")
+        return "PerspectiveCamera {\n    " + "\n    ".join(lines) + "\n}"
+    
+    def assemble_runtime_preview_qml(self, gltf_path, scene_name=None):
+        """快速预览：用 RuntimeLoader 直接加载导出的glTF，外层使用与balsam输出相同的View3D/SceneEnvironment/WasdController
+        
+        Args:
+            gltf_path (str): 导出的glTF/GLB路径
+            scene_name (str, optional): 窗口标题中的场景名称
+        """
+        if not gltf_path or not os.path.exists(gltf_path):
+            print(f"❌ 预览glTF不存在: {gltf_path}")
+            return None
+        
+        try:
+            settings = self.read_scene_properties()
+            camera_id = "previewCamera"
+            camera_qml = self.generate_preview_camera_qml(camera_id, settings)
+            source_url = Path(os.path.abspath(gltf_path)).as_uri()
+            loader_qml = f'''RuntimeLoader {{
+    id: runtimeLoader
+    source: "{source_url}"
+    onStatusChanged: {{
+        if (status === RuntimeLoader.Error)
+            console.warn("RuntimeLoader: " + errorString)
+    }}
+}}'''
+            content = f"{camera_qml}\n\n{loader_qml}"
+            if not scene_name:
+                scene_name = os.path.splitext(os.path.basename(gltf_path))[0] + " (Quick Preview)"
+            return self.assemble_complete_qml(content, scene_name, camera_id=camera_id,
+                                              extra_imports=["QtQuick3D.AssetUtils"])
+        except Exception as e:
+            print(f"❌ 组装快速预览QML失败: {e}")
+            return None
+    
     def get_assembled_qml(self):
         """获取组装好的QML内容"""
         return self.assembled_qml
@@ -950,31 +1109,35 @@ Window {{
             if not self.setup_environment():
                 return False
             
-            # 2. 查找QML文件
-            if not qml_file_path:
-                qml_files = self.find_qml_files()
-                if not qml_files:
-                    print("❌ 未找到QML文件")
+            with conversion_trace.span("qml_assembly", stage=True):
+                # 2. 查找QML文件
+                if not qml_file_path:
+                    qml_files = self.find_qml_files()
+                    if not qml_files:
+                        print("❌ 未找到QML文件")
+                        return False
+                    qml_file_path = qml_files[0]  # 使用第一个找到的QML文件
+                
+                # 3. 读取QML文件
+                qml_content = self.read_qml_file(qml_file_path)
+                if not qml_content:
+                    return False
+                
+                # 4. 删除import语句
+                cleaned_content = self.remove_import_statements(qml_content)
+                if not cleaned_content:
+                    return False
+                
+                # 5. 组装完整QML
+                if not scene_name:
+                    scene_name = os.path.splitext(os.path.basename(qml_file_path))[0]
+                
+                # 主场景实例化的组件作为内联组件声明，预览时可以直接解析
+                from . import component_conversion
+                inline_components = component_conversion.load_inline_components(os.path.dirname(qml_file_path))
+                complete_qml = self.assemble_complete_qml(cleaned_content, scene_name, inline_components)
+                if not complete_qml:
                     return False
-                qml_file_path = qml_files[0]  # 使用第一个找到的QML文件
-            
-            # 3. 读取QML文件
-            qml_content = self.read_qml_file(qml_file_path)
-            if not qml_content:
-                return False
-            
-            # 4. 删除import语句
-            cleaned_content = self.remove_import_statements(qml_content)
-            if not cleaned_content:
-                return False
-            
-            # 5. 组装完整QML
-            if not scene_name:
-                scene_name = os.path.splitext(os.path.basename(qml_file_path))[0]
-            
-            complete_qml = self.assemble_complete_qml(cleaned_content, scene_name)
-            if not complete_qml:
-                return False
             
             print("🎉 QML文件处理完成！")
             return True
@@ -1029,10 +1192,26 @@ def get_qml_content_for_integration(debug_mode=None):
         debug_mode (bool, optional): 是否启用调试模式，打印完整的QML内容。
                                     如果为None，则使用全局调试设置。
     """
+    # 创建处理器；单独调用时（如预览窗口）写出自己的 trace.json
+    handler = QMLHandler()
+    with conversion_trace.traced_run("qml_integration", lambda: handler.qml_output_dir):
+        return _get_qml_content(handler, debug_mode)
+
+
+def get_runtime_preview_qml(gltf_path, debug_mode=None):
+    """获取快速预览的QML内容（RuntimeLoader直接加载glTF，不需要balsam输出）"""
+    handler = QMLHandler()
+    if debug_mode is None:
+        debug_mode = DEFAULT_DEBUG_MODE
+    handler.set_debug_mode(debug_mode)
+    if not handler.assemble_runtime_preview_qml(gltf_path):
+        print("❌ 快速预览QML组装失败")
+        return None
+    return handler.get_qml_for_qt_quick3d()
+
+
+def _get_qml_content(handler, debug_mode):
     try:
-        # 创建处理器并处理QML文件
-        handler = QMLHandler()
-        
         # 设置调试模式
         if debug_mode is None:
             debug_mode = DEFAULT_DEBUG_MODE
@@ -16,6 +16,7 @@ try:
     from . import scene_environment
     from . import balsam_gltf_converter
     from . import qml_handler
+    from . import live_environment
     MODULES_AVAILABLE = True
     print("✅ 所有模块加载成功")
 except ImportError as e:
@@ -69,8 +70,14 @@ if QT_AVAILABLE:
         print(f"✗ 系统PySide6加载失败: {e}")
         QT_AVAILABLE = False
 
-def show_quick3d_window():
-    """显示Quick3D窗口"""
+def show_quick3d_window(preview_gltf_path=None, assembled_qml=None):
+    """显示Quick3D窗口
+    
+    Args:
+        preview_gltf_path (str, optional): 快速预览模式：用RuntimeLoader直接加载该glTF，
+                                           不读取balsam输出的QML
+        assembled_qml (str, optional): 已组装好的QML内容，直接加载，不再调用QML处理器
+    """
     if not QT_AVAILABLE:
         print("❌ Qt库不可用")
         return False
@@ -192,6 +199,12 @@ def show_quick3d_window():
                                 
                             else:
                                 print(f"⚠️ QML输出目录不存在: {qml_output_dir}")
+                            
+                            # 快速预览：IBL等相对路径相对于预览glTF所在目录解析
+                            if preview_gltf_path:
+                                base_url = QUrl.fromLocalFile(os.path.join(os.path.dirname(preview_gltf_path), ""))
+                                self.qml_engine.setBaseUrl(base_url)
+                                print(f"✅ 快速预览Base URL: {base_url.toString()}")
                         except Exception as e:
                             print(f"⚠️ 无法获取Balsam路径: {e}")
                             # 回退到本地路径
@@ -210,8 +223,16 @@ def show_quick3d_window():
                         else:
                             print(f"⚠️ 本地QML输出目录不存在: {qml_output_dir}")
                     # 使用QML处理器获取组装好的QML内容
-                    qml_content = None
-                    if QML_HANDLER_AVAILABLE:
+                    qml_content = assembled_qml
+                    if qml_content:
+                        print("✅ 使用已组装好的QML内容")
+                    elif QML_HANDLER_AVAILABLE and preview_gltf_path:
+                        try:
+                            print("🔧 快速预览：使用RuntimeLoader加载glTF...")
+                            qml_content = qml_handler.get_runtime_preview_qml(preview_gltf_path)
+                        except Exception as e:
+                            print(f"⚠️ 快速预览QML组装失败: {e}")
+                    elif QML_HANDLER_AVAILABLE:
                         try:
                             print("🔧 使用QML处理器获取组装好的QML内容...")
                             qml_content = qml_handler.get_qml_content_for_integration()
@@ -315,6 +336,10 @@ Window {{
                         qml_container.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
                         layout.addWidget(qml_container)
                         
+                        # 记录当前环境，之后的属性修改直接推送到运行中的SceneEnvironment
+                        if MODULES_AVAILABLE:
+                            live_environment.begin_session()
+                        
                     else:
                         print("ERROR: QML加载失败")
                         
@@ -376,6 +401,8 @@ Window {{
             def closeEvent(self, event):
                 """窗口关闭事件"""
                 print("✅ QML View3D窗口已关闭")
+                if MODULES_AVAILABLE:
+                    live_environment.end_session()
                 event.accept()
         
         # 创建并显示窗口
@@ -402,6 +429,126 @@ Window {{
 _qml_window = None
 _qml_app = None
 
+def reload_quick3d_window(assembled_qml=None):
+    """预览窗口已打开时用新的QML内容重新创建窗口（保持窗口位置），窗口未打开时不做任何事
+    
+    Returns:
+        bool: 是否重新加载了窗口
+    """
+    global _qml_window
+    window = _qml_window
+    if window is None:
+        return False
+    try:
+        if not window.isVisible():
+            return False
+        position = window.pos()
+        window.close()
+    except RuntimeError:
+        # 窗口的C++对象已被删除
+        _qml_window = None
+        return False
+    
+    print("🔄 重新加载Quick3D窗口...")
+    if not show_quick3d_window(assembled_qml=assembled_qml):
+        return False
+    _qml_window.move(position)
+    return True
+
+def _find_scene_environment(window):
+    """预览窗口中的SceneEnvironment对象"""
+    root_objects = window.qml_engine.rootObjects()
+    if not root_objects:
+        return None
+    root = root_objects[0]
+    environment = root.findChild(QObject, qml_handler.SCENE_ENVIRONMENT_OBJECT_NAME)
+    if environment is None:
+        # 作为属性值声明的对象不一定是子对象，从View3D的environment属性读取
+        for child in root.findChildren(QObject):
+            value = child.property("environment")
+            if isinstance(value, QObject):
+                return value
+    return environment
+
+
+def _get_environment_defaults(window, type_name):
+    """同类型新建对象（属性均为默认值），用于恢复不再写入QML的属性"""
+    defaults = getattr(window, '_environment_defaults', None)
+    if defaults is None:
+        defaults = window._environment_defaults = {}
+    if type_name not in defaults:
+        component = QQmlComponent(window.qml_engine)
+        component.setData(f"import QtQuick3D\nimport QtQuick3D.Helpers\n{type_name} {{}}\n".encode(), QUrl())
+        defaults[type_name] = component.create() if component.isReady() else None
+        if defaults[type_name] is None:
+            print(f"⚠️ 无法创建 {type_name} 默认对象: {component.errorString().strip()}")
+    return defaults[type_name]
+
+
+def _evaluate_qml(engine, scope, expression_text):
+    """在对象作用域中计算QML表达式，返回 (值, 是否成功)"""
+    expression = QQmlExpression(engine.rootContext(), scope, expression_text)
+    value = expression.evaluate()
+    if isinstance(value, tuple):
+        value = value[0]
+    if expression.hasError():
+        return None, False
+    return value, True
+
+
+def push_scene_environment_properties(changed, removed, type_name="SceneEnvironment"):
+    """把属性直接写入运行中预览的SceneEnvironment（setProperty），不重新加载QML
+    
+    Args:
+        changed (dict): {QML属性名: QML表达式}，取值与组装QML时相同，如 "SceneEnvironment.MSAA"
+        removed (list): 不再写入QML的属性名，恢复为该类型的默认值
+        type_name (str): SceneEnvironment 或 ExtendedSceneEnvironment
+    
+    Returns:
+        set: 无法推送的属性名；预览窗口未打开时返回None
+    """
+    window = _qml_window
+    if window is None or not QT_AVAILABLE:
+        return None
+    try:
+        if not window.isVisible():
+            return None
+        environment = _find_scene_environment(window)
+    except RuntimeError:
+        # 窗口的C++对象已被删除
+        return None
+    if environment is None:
+        return set(changed) | set(removed)
+    
+    engine = window.qml_engine
+    meta_object = environment.metaObject()
+    failed = set()
+    for name, expression_text in changed.items():
+        if meta_object.indexOfProperty(name) < 0:
+            failed.add(name)
+            continue
+        value, ok = _evaluate_qml(engine, environment, expression_text)
+        if ok and environment.setProperty(name, value):
+            continue
+        # QVariant无法直接转换（如颜色字符串）时在QML中赋值，使用QML的类型转换
+        _, ok = _evaluate_qml(engine, environment, f"{name} = {expression_text}")
+        if not ok:
+            failed.add(name)
+    
+    if removed:
+        defaults = _get_environment_defaults(window, type_name)
+        for name in removed:
+            if defaults is None or meta_object.indexOfProperty(name) < 0:
+                failed.add(name)
+            elif not environment.setProperty(name, defaults.property(name)):
+                failed.add(name)
+    
+    pushed = len(changed) + len(removed) - len(failed)
+    if pushed:
+        print(f"🎨 实时更新SceneEnvironment: {pushed} 个属性")
+    return failed
+
+
 def create_quick3d_scene():
     """创建Quick3D场景"""
     if not QUICK3D_AVAILABLE:
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+场景开销预检模块 - 在导出之前根据Blender数据估算转换结果的运行时开销
+负责：
+1. 统计每个对象与全场景的三角形数、顶点缓冲字节数（按Blender网格数据估算，不导出任何文件）
+2. 按目标平台配置（Target Profile）的贴图尺寸上限与压缩方式估算贴图显存
+3. 统计唯一材质数、估算绘制调用数（考虑GPU实例化合并）与动画通道数
+4. 与目标平台的预算比较并给出警告，面板与转换前检查共用同一份报告
+
+网格只读取计数（三角形数 = 角点数 - 2 × 面数），多材质网格用 foreach_get 一次读出面材质索引，
+共享网格数据的对象只统计一次，万级对象的场景也只需几百毫秒。
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from . import texture_pipeline
+
+# 各目标平台的预算（超过时警告）
+PREFLIGHT_BUDGETS = {
+    'ORIGINAL': {'triangles': 10000000, 'vertex_bytes': 1024 * 1024 * 1024, 'texture_bytes': 2048 * 1024 * 1024,
+                 'draw_calls': 10000, 'animated_channels': 20000},
+    'DESKTOP': {'triangles': 5000000, 'vertex_bytes': 512 * 1024 * 1024, 'texture_bytes': 1024 * 1024 * 1024,
+                'draw_calls': 5000, 'animated_channels': 10000},
+    'MOBILE': {'triangles': 1000000, 'vertex_bytes': 128 * 1024 * 1024, 'texture_bytes': 256 * 1024 * 1024,
+               'draw_calls': 500, 'animated_channels': 2000},
+    'EMBEDDED': {'triangles': 250000, 'vertex_bytes': 32 * 1024 * 1024, 'texture_bytes': 64 * 1024 * 1024,
+                 'draw_calls': 150, 'animated_channels': 500},
+}
+BUDGET_LABELS = {
+    'triangles': "Triangles",
+    'vertex_bytes': "Vertex buffers",
+    'texture_bytes': "Texture memory",
+    'draw_calls': "Draw calls",
+    'animated_channels': "Animated channels",
+}
+# 报告中保留的最重对象数量
+PREFLIGHT_TOP_OBJECTS = 10
+
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+
+_last_report = None
+
+
+def get_last_report() -> Optional[Dict]:
+    """最近一次预检报告"""
+    return _last_report
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.2f} GB"
+
+
+def format_value(key: str, value: float) -> str:
+    return format_bytes(value) if key.endswith('_bytes') else f"{int(value):,}"
+
+
+# ----------------------------------------------------------------------
+# 网格、贴图与动画
+# ----------------------------------------------------------------------
+
+def mesh_cost(mesh, slot_count: int) -> Dict:
+    """网格的三角形数、顶点缓冲估算与实际使用的材质槽数量
+
+    顶点数按Blender顶点计算（硬边与UV接缝的拆分会让实际值略高），
+    顶点格式与balsam输出一致：位置、法线、最多两组UV，有UV时加切线与副法线，有颜色属性时加颜色。
+    """
+    polygon_count = len(mesh.polygons)
+    triangles = len(mesh.loops) - 2 * polygon_count
+    vertices = len(mesh.vertices)
+    uv_count = min(len(mesh.uv_layers), 2)
+    color_attributes = getattr(mesh, 'color_attributes', None)
+    has_colors = bool(len(color_attributes) if color_attributes is not None else len(mesh.vertex_colors))
+    stride = 24 + 8 * uv_count + (24 if uv_count else 0) + (16 if has_colors else 0)
+    index_size = 2 if vertices <= 0xFFFF else 4
+
+    used_slots = 1 if triangles else 0
+    if slot_count > 1 and polygon_count:
+        material_indices = np.empty(polygon_count, dtype=np.int32)
+        mesh.polygons.foreach_get('material_index', material_indices)
+        used_slots = int(np.unique(material_indices).size)
+    return {
+        'triangles': triangles,
+        'vertices': vertices,
+        'vertex_bytes': vertices * stride + triangles * 3 * index_size,
+        'submeshes': used_slots,
+    }
+
+
+def material_images(material) -> List:
+    """材质节点树中使用的图像"""
+    if not material or not material.use_nodes or not material.node_tree:
+        return []
+    return [node.image for node in material.node_tree.nodes if node.type == 'TEX_IMAGE' and node.image]
+
+
+def image_memory(image, profile_settings: Dict) -> int:
+    """贴图在目标平台上的显存估算：按最长边上限缩放；BCn压缩按BC1/BC3的字节率并计入mip链"""
+    width, height = image.size
+    width, height = texture_pipeline.fit_size(width, height, profile_settings.get('max_size', 0))
+    pixels = width * height
+    if profile_settings.get('compress'):
+        bytes_per_pixel = 1.0 if image.channels == 4 and image.alpha_mode != 'NONE' else 0.5
+        return int(pixels * bytes_per_pixel * 4 / 3)
+    return pixels * 4
+
+
+def _action_fcurves(action):
+    """动作的F曲线（兼容Blender 4.4之后的分层动作）"""
+    fcurves = getattr(action, 'fcurves', None)
+    if fcurves is not None:
+        return list(fcurves)
+    curves = []
+    for layer in getattr(action, 'layers', ()):
+        for strip in layer.strips:
+            for channelbag in getattr(strip, 'channelbags', ()):
+                curves.extend(channelbag.fcurves)
+    return curves
+
+
+def animated_channels(id_blocks) -> Dict:
+    """动画通道数（每个数据块的每个属性路径算一个通道）与关键帧总数"""
+    channels = 0
+    keyframes = 0
+    seen_actions = set()
+    for id_block in id_blocks:
+        animation_data = getattr(id_block, 'animation_data', None) if id_block else None
+        if not animation_data:
+            continue
+        actions = [animation_data.action] if animation_data.action else []
+        for track in animation_data.nla_tracks:
+            actions.extend(strip.action for strip in track.strips if strip.action)
+        paths = set()
+        for action in actions:
+            for fcurve in _action_fcurves(action):
+                paths.add(fcurve.data_path)
+                if action.name_full not in seen_actions:
+                    keyframes += len(fcurve.keyframe_points)
+            seen_actions.add(action.name_full)
+        channels += len(paths)
+    return {'channels': channels, 'keyframes': keyframes}
+
+
+# ----------------------------------------------------------------------
+# 场景
+# ----------------------------------------------------------------------
+
+def analyze_scene(context, profile: Optional[str] = None) -> Dict:
+    """分析当前视图层中可见对象的开销并与目标平台预算比较
+
+    Args:
+        context: bpy.context
+        profile: 目标平台（TEXTURE_PROFILES的键），为空时使用场景的 Target Profile
+
+    Returns:
+        dict: {'profile', 'seconds', 'object_count', 'totals', 'budgets', 'warnings', 'objects'}
+    """
+    global _last_report
+    start = time.perf_counter()
+    scene = context.scene
+    profile = profile or getattr(scene, "qtquick3d_target_profile", texture_pipeline.DEFAULT_TEXTURE_PROFILE)
+    if profile not in texture_pipeline.TEXTURE_PROFILES:
+        profile = texture_pipeline.DEFAULT_TEXTURE_PROFILE
+    profile_settings = texture_pipeline.TEXTURE_PROFILES[profile]
+    depsgraph = context.evaluated_depsgraph_get()
+
+    instancing = getattr(scene, "qtquick3d_instancing", 'OFF') != 'OFF'
+    min_instances = getattr(scene, "qtquick3d_instancing_min_count", 4)
+
+    mesh_costs = {}
+    materials = {}
+    images = {}
+    rows = []
+    instance_groups = {}
+    animated = []
+    for obj in context.view_layer.objects:
+        if not obj.visible_get():
+            continue
+        animated.append(obj)
+        if obj.type not in GEOMETRY_TYPES:
+            if obj.type in ('CAMERA', 'LIGHT'):
+                animated.append(obj.data)
+            continue
+
+        slot_materials = [slot.material for slot in obj.material_slots]
+        for material in slot_materials:
+            if material and material.name_full not in materials:
+                materials[material.name_full] = material
+        if obj.type == 'MESH' and obj.data.shape_keys:
+            animated.append(obj.data.shape_keys)
+
+        # 没有修改器的网格对象直接读原始数据并按网格共享统计；其他对象读取求值后的结果
+        shared = obj.type == 'MESH' and not obj.modifiers
+        key = obj.data.as_pointer() if shared else obj.as_pointer()
+        cost = mesh_costs.get(key)
+        if cost is None:
+            if shared:
+                cost = mesh_cost(obj.data, len(slot_materials))
+            else:
+                evaluated = obj.evaluated_get(depsgraph)
+                if obj.type == 'MESH':
+                    cost = mesh_cost(evaluated.data, len(slot_materials))
+                else:
+                    mesh = evaluated.to_mesh()
+                    cost = mesh_cost(mesh, len(slot_materials)) if mesh else None
+                    evaluated.to_mesh_clear()
+                    cost = cost or {'triangles': 0, 'vertices': 0, 'vertex_bytes': 0, 'submeshes': 0}
+            mesh_costs[key] = cost
+        rows.append((obj.name, cost))
+        if shared and instancing:
+            group_key = (key, tuple(m.name_full if m else None for m in slot_materials))
+            instance_groups[group_key] = instance_groups.get(group_key, 0) + 1
+
+    # 每个对象、每个子网格一次绘制调用；满足实例化条件的重复对象合并为一次
+    counts = np.array([[cost['triangles'], cost['vertex_bytes'], cost['submeshes']] for _name, cost in rows],
+                      dtype=np.int64).reshape(-1, 3)
+    draw_calls = int(counts[:, 2].sum())
+    for (key, _materials), count in instance_groups.items():
+        if count >= min_instances:
+            draw_calls -= (count - 1) * mesh_costs[key]['submeshes']
+
+    for material in materials.values():
+        for image in material_images(material):
+            if image.name_full not in images:
+                images[image.name_full] = image_memory(image, profile_settings)
+    animation = animated_channels(animated)
+
+    totals = {
+        'triangles': int(counts[:, 0].sum()),
+        # 共享网格的顶点缓冲只上传一次
+        'vertex_bytes': int(sum(cost['vertex_bytes'] for cost in mesh_costs.values())),
+        'texture_bytes': int(sum(images.values())),
+        'draw_calls': draw_calls,
+        'animated_channels': animation['channels'],
+        'keyframes': animation['keyframes'],
+        'materials': len(materials),
+        'textures': len(images),
+    }
+    budgets = PREFLIGHT_BUDGETS.get(profile, PREFLIGHT_BUDGETS['ORIGINAL'])
+    warnings = [
+        f"{BUDGET_LABELS[key]} {format_value(key, totals[key])} exceeds the {profile.lower()} budget of {format_value(key, limit)}"
+        for key, limit in budgets.items() if totals[key] > limit
+    ]
+
+    heaviest = np.argsort(-counts[:, 0], kind='stable')[:PREFLIGHT_TOP_OBJECTS] if len(rows) else []
+    report = {
+        'profile': profile,
+        'seconds': time.perf_counter() - start,
+        'object_count': len(rows),
+        'totals': totals,
+        'budgets': budgets,
+        'warnings': warnings,
+        'objects': [dict(rows[i][1], name=rows[i][0]) for i in heaviest],
+    }
+    _last_report = report
+    return report
+
+
+def print_report(report: Dict):
+    totals = report['totals']
+    print(f"🔍 场景预检 ({report['profile']}, {report['seconds'] * 1000:.0f} ms): {report['object_count']} 个几何对象, "
+          f"{totals['triangles']:,} 个三角形, 顶点缓冲 {format_bytes(totals['vertex_bytes'])}, "
+          f"贴图 {totals['textures']} 张 {format_bytes(totals['texture_bytes'])}, {totals['materials']} 个材质, "
+          f"约 {totals['draw_calls']:,} 次绘制调用, {totals['animated_channels']} 个动画通道")
+    for row in report['objects']:
+        print(f"  📦 {row['name']}: {row['triangles']:,} 三角形, {format_bytes(row['vertex_bytes'])}, {row['submeshes']} 个子网格")
+    for warning in report['warnings']:
+        print(f"⚠️ {warning}")
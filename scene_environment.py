@@ -9,6 +9,12 @@ from bpy.props import IntProperty, FloatProperty, FloatVectorProperty, BoolPrope
 from typing import Dict, Any
 
 
+def _on_property_update(scene, context):
+    """属性修改时把新值推送到正在运行的预览窗口（按帧合并，见 live_environment）"""
+    from . import live_environment
+    live_environment.on_property_update(scene, context)
+
+
 class SceneEnvironmentManager:
     """SceneEnvironment设置管理器"""
     
@@ -44,7 +50,8 @@ class SceneEnvironmentManager:
             description="View3D window width",
             default=800,
             min=100,
-            max=4096
+            max=4096,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_view3d_width')
         
@@ -53,7 +60,8 @@ class SceneEnvironmentManager:
             description="View3D window height",
             default=600,
             min=100,
-            max=4096
+            max=4096,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_view3d_height')
         
@@ -63,7 +71,8 @@ class SceneEnvironmentManager:
             description="Anti-aliasing mode",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_antialiasing_mode')
         
@@ -72,7 +81,8 @@ class SceneEnvironmentManager:
             description="Anti-aliasing quality",
             default=1,
             min=0,
-            max=3
+            max=3,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_antialiasing_quality')
         
@@ -81,7 +91,8 @@ class SceneEnvironmentManager:
             description="Ambient occlusion strength",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_strength')
         
@@ -90,7 +101,8 @@ class SceneEnvironmentManager:
             description="Background rendering mode",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_background_mode')
         
@@ -99,14 +111,16 @@ class SceneEnvironmentManager:
             description="Background clear color",
             default=(0.0, 0.0, 0.0, 1.0),
             size=4,
-            subtype='COLOR'
+            subtype='COLOR',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_clear_color')
         
         bpy.types.Scene.qtquick3d_scissor_enabled = BoolProperty(
             name="Scissor Enabled",
             description="Enable scissor testing",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_scissor_enabled')
         
@@ -114,7 +128,8 @@ class SceneEnvironmentManager:
             name="Scissor Rect",
             description="Scissor rectangle",
             default=(0.0, 0.0, 1.0, 1.0),
-            size=4
+            size=4,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_scissor_rect')
         
@@ -123,7 +138,8 @@ class SceneEnvironmentManager:
             description="Light probe exposure",
             default=0.0,
             min=-10.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_probe_exposure')
         
@@ -132,7 +148,8 @@ class SceneEnvironmentManager:
             description="Light probe horizon cutoff",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_probe_horizon')
         
@@ -141,7 +158,8 @@ class SceneEnvironmentManager:
             description="Light probe orientation",
             default=(0.0, 0.0, 0.0),
             size=3,
-            subtype='EULER'
+            subtype='EULER',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_probe_orientation')
         
@@ -149,7 +167,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_skybox_cubemap = StringProperty(
             name="Skybox Cubemap",
             description="Skybox cubemap texture path",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_skybox_cubemap')
         
@@ -158,7 +177,8 @@ class SceneEnvironmentManager:
             description="Skybox blur amount",
             default=0.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_skybox_blur_amount')
         
@@ -166,7 +186,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_light_probe = StringProperty(
             name="Light Probe",
             description="Light probe texture path",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_light_probe')
         
@@ -175,7 +196,8 @@ class SceneEnvironmentManager:
             description="Lightmapper type",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lightmapper')
         
@@ -183,7 +205,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_fog = StringProperty(
             name="Fog",
             description="Fog settings",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_fog')
         
@@ -191,14 +214,16 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_debug_settings = StringProperty(
             name="Debug Settings",
             description="Debug settings",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_debug_settings')
         
         bpy.types.Scene.qtquick3d_effects = StringProperty(
             name="Effects",
             description="Effects settings",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_effects')
         
@@ -207,14 +232,16 @@ class SceneEnvironmentManager:
             description="Order independent transparency method",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_oit_method')
         
         bpy.types.Scene.qtquick3d_use_extended_environment = BoolProperty(
             name="Use Extended Environment",
             description="Use ExtendedSceneEnvironment",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_use_extended_environment')
     
@@ -225,7 +252,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_ao_enabled = BoolProperty(
             name="AO Enabled",
             description="Enable ambient occlusion",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_enabled')
         
@@ -234,7 +262,8 @@ class SceneEnvironmentManager:
             description="Ambient occlusion bias",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_bias')
         
@@ -243,14 +272,16 @@ class SceneEnvironmentManager:
             description="Ambient occlusion distance",
             default=5.0,
             min=0.1,
-            max=100.0
+            max=100.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_distance')
         
         bpy.types.Scene.qtquick3d_ao_dither = BoolProperty(
             name="AO Dither",
             description="Ambient occlusion dithering",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_dither')
         
@@ -259,7 +290,8 @@ class SceneEnvironmentManager:
             description="Ambient occlusion sample rate",
             default=2,
             min=1,
-            max=8
+            max=8,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_sample_rate')
         
@@ -268,7 +300,8 @@ class SceneEnvironmentManager:
             description="Ambient occlusion softness",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_ao_softness')
         
@@ -276,14 +309,16 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_depth_prepass_enabled = BoolProperty(
             name="Depth PrePass",
             description="Enable depth prepass",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_depth_prepass_enabled')
         
         bpy.types.Scene.qtquick3d_depth_test_enabled = BoolProperty(
             name="Depth Test",
             description="Enable depth testing",
-            default=True
+            default=True,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_depth_test_enabled')
         
@@ -293,7 +328,8 @@ class SceneEnvironmentManager:
             description="Anti-aliasing mode",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_aa_mode')
         
@@ -302,7 +338,8 @@ class SceneEnvironmentManager:
             description="Anti-aliasing quality",
             default=1,
             min=0,
-            max=3
+            max=3,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_aa_quality')
         
@@ -311,28 +348,32 @@ class SceneEnvironmentManager:
             description="Anti-aliasing sample count",
             default=4,
             min=1,
-            max=16
+            max=16,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_aa_sample_count')
         
         bpy.types.Scene.qtquick3d_aa_transparent_enabled = BoolProperty(
             name="AA Transparent",
             description="Enable transparent anti-aliasing",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_aa_transparent_enabled')
         
         bpy.types.Scene.qtquick3d_specular_aa_enabled = BoolProperty(
             name="Specular AA",
             description="Enable specular anti-aliasing",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_specular_aa_enabled')
         
         bpy.types.Scene.qtquick3d_temporal_aa_enabled = BoolProperty(
             name="Temporal AA",
             description="Enable temporal anti-aliasing",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_temporal_aa_enabled')
         
@@ -341,7 +382,8 @@ class SceneEnvironmentManager:
             description="Temporal anti-aliasing strength",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_temporal_aa_strength')
         
@@ -350,7 +392,8 @@ class SceneEnvironmentManager:
             description="Temporal anti-aliasing velocity scale",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_temporal_aa_velocity_scale')
         
@@ -360,7 +403,8 @@ class SceneEnvironmentManager:
             description="Tone mapping mode",
             default=0,
             min=0,
-            max=2
+            max=2,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_tonemap_mode')
         
@@ -369,7 +413,8 @@ class SceneEnvironmentManager:
             description="Scene exposure",
             default=0.0,
             min=-5.0,
-            max=5.0
+            max=5.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_exposure')
         
@@ -378,7 +423,8 @@ class SceneEnvironmentManager:
             description="Image sharpness",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_sharpness')
         
@@ -387,7 +433,8 @@ class SceneEnvironmentManager:
             description="White point value",
             default=1.0,
             min=0.1,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_white_point')
     
@@ -398,7 +445,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_dof_enabled = BoolProperty(
             name="Enable Depth of Field",
             description="Enable depth of field effect",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_dof_enabled')
         
@@ -407,7 +455,8 @@ class SceneEnvironmentManager:
             description="Depth of field blur amount",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_dof_blur_amount')
         
@@ -416,7 +465,8 @@ class SceneEnvironmentManager:
             description="Depth of field focus distance",
             default=100.0,
             min=0.1,
-            max=1000.0
+            max=1000.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_dof_focus_distance')
         
@@ -425,7 +475,8 @@ class SceneEnvironmentManager:
             description="Depth of field focus range",
             default=10.0,
             min=0.1,
-            max=100.0
+            max=100.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_dof_focus_range')
         
@@ -433,7 +484,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_glow_enabled = BoolProperty(
             name="Enable Glow",
             description="Enable glow effect",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_enabled')
         
@@ -442,7 +494,8 @@ class SceneEnvironmentManager:
             description="Glow effect intensity",
             default=0.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_intensity')
         
@@ -451,7 +504,8 @@ class SceneEnvironmentManager:
             description="Glow bloom amount",
             default=0.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_bloom')
         
@@ -460,7 +514,8 @@ class SceneEnvironmentManager:
             description="Glow blend factor",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_blend_factor')
         
@@ -469,7 +524,8 @@ class SceneEnvironmentManager:
             description="Glow blend mode",
             default=0,
             min=0,
-            max=3
+            max=3,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_blend_mode')
         
@@ -478,7 +534,8 @@ class SceneEnvironmentManager:
             description="Glow level",
             default=0,
             min=0,
-            max=10
+            max=10,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_level')
         
@@ -487,7 +544,8 @@ class SceneEnvironmentManager:
             description="Glow HDR maximum value",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_hdr_maximum_value')
         
@@ -496,7 +554,8 @@ class SceneEnvironmentManager:
             description="Glow HDR minimum value",
             default=0.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_hdr_minimum_value')
         
@@ -505,7 +564,8 @@ class SceneEnvironmentManager:
             description="Glow HDR scale",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_hdr_scale')
         
@@ -513,21 +573,24 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_lens_flare_enabled = BoolProperty(
             name="Enable Lens Flare",
             description="Enable lens flare effect",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_enabled')
         
         bpy.types.Scene.qtquick3d_lens_flare_apply_dirt_texture = BoolProperty(
             name="Apply Dirt Texture",
             description="Apply dirt texture to lens flare",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_apply_dirt_texture')
         
         bpy.types.Scene.qtquick3d_lens_flare_apply_starburst_texture = BoolProperty(
             name="Apply Starburst Texture",
             description="Apply starburst texture to lens flare",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_apply_starburst_texture')
         
@@ -536,7 +599,8 @@ class SceneEnvironmentManager:
             description="Lens flare bloom scale",
             default=0.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_bloom_scale')
         
@@ -545,7 +609,8 @@ class SceneEnvironmentManager:
             description="Lens flare brightness",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_brightness')
         
@@ -553,7 +618,8 @@ class SceneEnvironmentManager:
             name="Color Texture",
             description="Lens flare color texture",
             default="",
-            subtype='FILE_PATH'
+            subtype='FILE_PATH',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_lens_color_texture')
         
@@ -561,7 +627,8 @@ class SceneEnvironmentManager:
             name="Dirt Texture",
             description="Lens flare dirt texture",
             default="",
-            subtype='FILE_PATH'
+            subtype='FILE_PATH',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_lens_dirt_texture')
         
@@ -569,7 +636,8 @@ class SceneEnvironmentManager:
             name="Starburst Texture",
             description="Lens flare starburst texture",
             default="",
-            subtype='FILE_PATH'
+            subtype='FILE_PATH',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_lens_starburst_texture')
         
@@ -578,7 +646,8 @@ class SceneEnvironmentManager:
             description="Lens flare stretch to aspect ratio",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_stretch_to_aspect')
         
@@ -587,7 +656,8 @@ class SceneEnvironmentManager:
             description="Lens flare bloom bias",
             default=0.0,
             min=-1.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_bloom_bias')
         
@@ -596,7 +666,8 @@ class SceneEnvironmentManager:
             description="Lens flare camera direction",
             default=(0.0, 0.0, 1.0),
             size=3,
-            subtype='DIRECTION'
+            subtype='DIRECTION',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_camera_direction')
         
@@ -605,7 +676,8 @@ class SceneEnvironmentManager:
             description="Lens flare distortion",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_distortion')
         
@@ -614,7 +686,8 @@ class SceneEnvironmentManager:
             description="Lens flare halo width",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_halo_width')
         
@@ -622,7 +695,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_lut_enabled = BoolProperty(
             name="Enable LUT",
             description="Enable lookup table",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lut_enabled')
         
@@ -631,7 +705,8 @@ class SceneEnvironmentManager:
             description="LUT filter alpha value",
             default=1.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lut_filter_alpha')
         
@@ -640,7 +715,8 @@ class SceneEnvironmentManager:
             description="LUT size",
             default=32.0,
             min=16.0,
-            max=64.0
+            max=64.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lut_size')
         
@@ -648,7 +724,8 @@ class SceneEnvironmentManager:
             name="LUT Texture",
             description="LUT texture file",
             default="",
-            subtype='FILE_PATH'
+            subtype='FILE_PATH',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lut_texture')
         
@@ -656,7 +733,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_vignette_enabled = BoolProperty(
             name="Enable Vignette",
             description="Enable vignette effect",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_vignette_enabled')
         
@@ -665,7 +743,8 @@ class SceneEnvironmentManager:
             description="Vignette effect strength",
             default=0.0,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_vignette_strength')
         
@@ -674,7 +753,8 @@ class SceneEnvironmentManager:
             description="Vignette effect radius",
             default=0.5,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_vignette_radius')
         
@@ -683,7 +763,8 @@ class SceneEnvironmentManager:
             description="Vignette effect color",
             default=(0.0, 0.0, 0.0, 1.0),
             size=4,
-            subtype='COLOR'
+            subtype='COLOR',
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_vignette_color')
         
@@ -691,21 +772,24 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_color_adjustments_enabled = BoolProperty(
             name="Enable Color Adjustments",
             description="Enable color adjustments",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_color_adjustments_enabled')
         
         bpy.types.Scene.qtquick3d_dithering_enabled = BoolProperty(
             name="Enable Dithering",
             description="Enable dithering",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_dithering_enabled')
         
         bpy.types.Scene.qtquick3d_fxaa_enabled = BoolProperty(
             name="Enable FXAA",
             description="Enable FXAA anti-aliasing",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_fxaa_enabled')
         
@@ -715,7 +799,8 @@ class SceneEnvironmentManager:
             description="Image brightness adjustment",
             default=0.0,
             min=-1.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_brightness')
         
@@ -724,7 +809,8 @@ class SceneEnvironmentManager:
             description="Image contrast adjustment",
             default=1.0,
             min=0.0,
-            max=3.0
+            max=3.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_contrast')
         
@@ -733,7 +819,8 @@ class SceneEnvironmentManager:
             description="Image saturation adjustment",
             default=1.0,
             min=0.0,
-            max=3.0
+            max=3.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_saturation')
         
@@ -743,21 +830,24 @@ class SceneEnvironmentManager:
             description="Glow effect strength",
             default=1.0,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_strength')
         
         bpy.types.Scene.qtquick3d_glow_quality_high = BoolProperty(
             name="Glow High Quality",
             description="Enable high quality glow",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_quality_high')
         
         bpy.types.Scene.qtquick3d_glow_use_bicubic_upscale = BoolProperty(
             name="Glow Bicubic Upscale",
             description="Use bicubic upscaling for glow",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_glow_use_bicubic_upscale')
         
@@ -767,7 +857,8 @@ class SceneEnvironmentManager:
             description="Lens flare ghost count",
             default=4,
             min=0,
-            max=20
+            max=20,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_ghost_count')
         
@@ -776,7 +867,8 @@ class SceneEnvironmentManager:
             description="Lens flare ghost dispersal",
             default=0.2,
             min=0.0,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_ghost_dispersal')
         
@@ -785,7 +877,8 @@ class SceneEnvironmentManager:
             description="Lens flare blur amount",
             default=0.5,
             min=0.0,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_lens_flare_blur_amount')
     
@@ -796,7 +889,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_wasd_enabled = BoolProperty(
             name="WASD Enabled",
             description="Enable WASD controller",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_enabled')
         
@@ -806,7 +900,8 @@ class SceneEnvironmentManager:
             description="Forward movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_forward_speed')
         
@@ -814,14 +909,16 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_wasd_controlled_object = StringProperty(
             name="Controlled Object",
             description="Object to be controlled by WASD",
-            default=""
+            default="",
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_controlled_object')
         
         bpy.types.Scene.qtquick3d_wasd_inputs_need_processing = BoolProperty(
             name="Inputs Need Processing",
             description="Whether inputs need processing",
-            default=True
+            default=True,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_inputs_need_processing')
         
@@ -830,7 +927,8 @@ class SceneEnvironmentManager:
             description="Left movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_left_speed')
         
@@ -839,7 +937,8 @@ class SceneEnvironmentManager:
             description="Right movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_right_speed')
         
@@ -848,7 +947,8 @@ class SceneEnvironmentManager:
             description="Up movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_up_speed')
         
@@ -857,7 +957,8 @@ class SceneEnvironmentManager:
             description="Down movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_down_speed')
         
@@ -866,7 +967,8 @@ class SceneEnvironmentManager:
             description="Shift movement speed",
             default=3.0,
             min=0.1,
-            max=10.0
+            max=10.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_shift_speed')
         
@@ -874,7 +976,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_wasd_mouse_enabled = BoolProperty(
             name="Mouse Enabled",
             description="Enable mouse controls",
-            default=True
+            default=True,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_mouse_enabled')
         
@@ -883,7 +986,8 @@ class SceneEnvironmentManager:
             description="Mouse X axis speed",
             default=0.1,
             min=0.01,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_x_speed')
         
@@ -892,21 +996,24 @@ class SceneEnvironmentManager:
             description="Mouse Y axis speed",
             default=0.1,
             min=0.01,
-            max=1.0
+            max=1.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_y_speed')
         
         bpy.types.Scene.qtquick3d_wasd_x_invert = BoolProperty(
             name="X Invert",
             description="Invert X axis",
-            default=False
+            default=False,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_x_invert')
         
         bpy.types.Scene.qtquick3d_wasd_y_invert = BoolProperty(
             name="Y Invert",
             description="Invert Y axis",
-            default=True
+            default=True,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_y_invert')
         
@@ -914,7 +1021,8 @@ class SceneEnvironmentManager:
         bpy.types.Scene.qtquick3d_wasd_keys_enabled = BoolProperty(
             name="Keys Enabled",
             description="Enable key controls",
-            default=True
+            default=True,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_keys_enabled')
         
@@ -924,7 +1032,8 @@ class SceneEnvironmentManager:
             description="Base movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_speed')
         
@@ -933,7 +1042,8 @@ class SceneEnvironmentManager:
             description="Backward movement speed",
             default=5.0,
             min=0.1,
-            max=50.0
+            max=50.0,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_back_speed')
         
@@ -942,7 +1052,8 @@ class SceneEnvironmentManager:
             description="Accepted mouse buttons",
             default=1,
             min=0,
-            max=7
+            max=7,
+            update=_on_property_update
         )
         self.registered_properties.add('qtquick3d_wasd_accepted_buttons')
     
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+分片并行转换模块 - 按顶层集合拆分场景，并行运行多个balsam进程
+负责：
+1. 按场景的顶层集合划分分片（直接位于场景集合中的对象单独成一个分片）
+2. 每个分片导出为独立的GLB，并在各自的目录中运行balsam
+3. 在有上限的进程池中并行转换所有分片（每个分片可单独命中balsam缓存）
+4. 把各分片的 meshes/、maps/ 加上分片前缀合并到工作空间，避免文件名冲突
+5. 生成合并后的场景QML：包含相机的分片直接内联，其余分片作为内联组件实例化
+"""
+
+import os
+import re
+import shutil
+import bpy
+from typing import Dict, List, Optional
+
+from . import path_manager
+from . import conversion_jobs
+from . import incremental_export
+from .qml_handler import format_inline_component
+
+SHARDS_STATE_SUB_DIR = "shards"
+# 合并QML根节点的id，避免与balsam生成的id冲突
+MERGED_ROOT_ID = "b2q_sharded_scene"
+
+_IMPORT_PATTERN = re.compile(r'^\s*import\s+.*?$', re.MULTILINE)
+# balsam生成的资源引用，如 source: "meshes/cube.mesh"、source: "maps/0.png"
+_ASSET_REFERENCE_PATTERN = re.compile(r'(["\'])((?:meshes|maps)/)([^"\']+)\1')
+
+
+def _shard_identifier(name: str, used: set) -> str:
+    """分片名称转为唯一的小写标识符（用于目录、文件前缀和QML id）"""
+    identifier = re.sub(r'[^0-9a-zA-Z_]', '_', name).strip('_').lower()
+    identifier = re.sub(r'_+', '_', identifier)
+    if not identifier or identifier[0].isdigit():
+        identifier = f"shard{len(used)}" + (f"_{identifier}" if identifier else "")
+    unique = identifier
+    index = 1
+    while unique in used:
+        unique = f"{identifier}_{index}"
+        index += 1
+    used.add(unique)
+    return unique
+
+
+def qml_component_name(stem: str) -> str:
+    """按balsam的规则由文件名生成QML组件名（首字母大写）"""
+    name = re.sub(r'[^\w]', '_', stem)
+    if not name or not name[0].isalpha():
+        name = "Node" + name
+    return name[0].upper() + name[1:]
+
+
+def collect_shards(scene, view_layer, exclude: Optional[set] = None) -> List[Dict]:
+    """按顶层集合划分分片
+
+    同一对象属于多个集合时只归入第一个分片；排除/隐藏的对象不导出。
+    包含场景相机的分片标记为主分片（直接内联，WASD控制器可以引用相机id）。
+    exclude 中的对象（已单独转换为组件的对象）不归入任何分片。
+
+    Returns:
+        list: 每项为 {'name', 'id', 'objects', 'primary'}
+    """
+    visible = {obj.name: obj for obj in view_layer.objects
+               if obj.visible_get(view_layer=view_layer) and obj.name not in (exclude or ())}
+    assigned = set()
+    groups = []
+    for collection in scene.collection.children:
+        objects = [visible[obj.name] for obj in collection.all_objects
+                   if obj.name in visible and obj.name not in assigned]
+        assigned.update(obj.name for obj in objects)
+        if objects:
+            groups.append((collection.name, objects))
+
+    root_objects = [obj for name, obj in visible.items() if name not in assigned]
+    if root_objects:
+        groups.insert(0, (scene.collection.name or "Scene Collection", root_objects))
+
+    used = set()
+    shards = [{'name': name, 'id': _shard_identifier(name, used), 'objects': objects, 'primary': False}
+              for name, objects in groups]
+
+    camera_name = scene.camera.name if scene.camera else None
+    primary = next((shard for shard in shards
+                    if any(obj.name == camera_name for obj in shard['objects'])), None)
+    if primary is None and shards:
+        primary = shards[0]
+    if primary is not None:
+        primary['primary'] = True
+    return shards
+
+
+def export_shards(export_kwargs: Dict, output_base_dir: str, context=None,
+                  exclude: Optional[set] = None) -> Optional[List[Dict]]:
+    """把场景按分片导出为GLB（必须在主线程执行）
+
+    Returns:
+        list: 分片列表（增加了 'gltf_path'、'output_dir'、'component'、'instance_id'），失败返回None
+    """
+    context = context or bpy.context
+    shards = collect_shards(context.scene, context.view_layer, exclude)
+    if not shards:
+        print("⚠️ 没有可导出的可见对象")
+        return None
+
+    shards_root = os.path.join(output_base_dir, path_manager.WORKSPACE_STATE_DIR_NAME, SHARDS_STATE_SUB_DIR)
+    os.makedirs(shards_root, exist_ok=True)
+
+    # 删除已不存在的分片目录
+    shard_ids = {shard['id'] for shard in shards}
+    for name in os.listdir(shards_root):
+        path = os.path.join(shards_root, name)
+        if os.path.isdir(path) and name not in shard_ids:
+            shutil.rmtree(path, ignore_errors=True)
+            print(f"🧹 删除过期的分片目录: {name}")
+
+    for shard in shards:
+        shard['output_dir'] = os.path.join(shards_root, shard['id'])
+        shard['gltf_path'] = os.path.join(shard['output_dir'], f"{shard['id']}.glb")
+        shard['component'] = "Shard_" + shard['id']
+        shard['instance_id'] = "shard_" + shard['id']
+        os.makedirs(shard['output_dir'], exist_ok=True)
+        if not incremental_export.export_objects_to_glb(context, shard['objects'], shard['gltf_path'], export_kwargs):
+            print(f"❌ 分片导出失败: {shard['name']}")
+            return None
+        print(f"📦 分片 {shard['name']}: {len(shard['objects'])} 个对象 -> {os.path.basename(shard['gltf_path'])}")
+        # 后台线程不能访问bpy对象
+        shard['objects'] = [obj.name for obj in shard['objects']]
+
+    print(f"✅ 场景已拆分为 {len(shards)} 个分片")
+    return shards
+
+
+def clear_shard_outputs(shard_dir: str):
+    """删除分片目录中上一次的balsam输出，保证合并时只包含本次生成的文件"""
+    for name in os.listdir(shard_dir):
+        path = os.path.join(shard_dir, name)
+        if name.endswith('.qml') and os.path.isfile(path):
+            os.remove(path)
+        elif name in ('meshes', 'maps') and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _find_shard_qml(shard: Dict) -> Optional[str]:
+    stem = os.path.splitext(os.path.basename(shard['gltf_path']))[0]
+    expected = os.path.join(shard['output_dir'], qml_component_name(stem) + ".qml")
+    if os.path.exists(expected):
+        return expected
+    candidates = [os.path.join(shard['output_dir'], name) for name in os.listdir(shard['output_dir'])
+                  if name.endswith('.qml')]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def _link_or_copy(src: str, dst: str):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def prefix_asset_references(qml_content: str, prefix: str):
+    """给QML中引用的 meshes/、maps/ 文件加上前缀
+
+    Returns:
+        tuple: (修改后的QML, [(原相对路径, 新相对路径)])
+    """
+    renamed = {}
+
+    def _replace(match):
+        quote, sub_dir, rel_path = match.groups()
+        renamed[sub_dir + rel_path] = sub_dir + prefix + rel_path
+        return f"{quote}{sub_dir}{prefix}{rel_path}{quote}"
+
+    return _ASSET_REFERENCE_PATTERN.sub(_replace, qml_content), sorted(renamed.items())
+
+
+def merge_shard_outputs(shards: List[Dict], output_dir: str, qml_name: str) -> bool:
+    """把各分片的balsam输出合并到输出目录（不访问bpy，可在后台线程调用）
+
+    上一次合并留下、本次不再引用的资源文件由分阶段输出的清单负责删除。
+
+    Args:
+        shards: export_shards 返回的分片列表
+        output_dir: 输出目录（转换器的暂存目录）
+        qml_name: 合并后的QML组件名（不含扩展名）
+    """
+    try:
+        imports = []
+        components = []
+        primary_body = None
+        written = []
+
+        for shard in shards:
+            qml_path = _find_shard_qml(shard)
+            if not qml_path:
+                print(f"❌ 分片 {shard['name']} 没有生成QML")
+                return False
+            with open(qml_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            for line in _IMPORT_PATTERN.findall(content):
+                if line.strip() not in imports:
+                    imports.append(line.strip())
+            body = _IMPORT_PATTERN.sub('', content).strip()
+
+            # 分片之间的 meshes/maps 可能重名，统一加上分片前缀
+            body, renamed = prefix_asset_references(body, shard['id'] + "_")
+            for src_rel, dst_rel in renamed:
+                src = os.path.join(shard['output_dir'], src_rel)
+                if not os.path.exists(src):
+                    print(f"⚠️ 分片 {shard['name']} 引用的文件不存在: {src_rel}")
+                    continue
+                _link_or_copy(src, os.path.join(output_dir, dst_rel))
+                written.append(dst_rel)
+
+            if shard['primary']:
+                primary_body = body
+            else:
+                components.append((shard['component'], shard['instance_id'], body))
+
+        lines = imports + ["", "Node {", f"    id: {MERGED_ROOT_ID}", ""]
+        for component_name, _instance_id, body in components:
+            lines.append(format_inline_component(component_name, body, indent="    "))
+        if primary_body:
+            lines.extend("    " + line if line.strip() else "" for line in primary_body.splitlines())
+            lines.append("")
+        for component_name, instance_id, _body in components:
+            lines.append(f"    {component_name} {{ id: {instance_id} }}")
+        lines.append("}")
+
+        qml_path = os.path.join(output_dir, qml_name + ".qml")
+        tmp_path = qml_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, qml_path)
+
+        print(f"✅ 已合并 {len(shards)} 个分片: {qml_path}（{len(written)} 个资源文件）")
+        return True
+    except Exception as e:
+        print(f"❌ 合并分片输出失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def create_shard_job_group(converter, shards: List[Dict], qml_name: str, max_workers: Optional[int] = None,
+                           cache=None, finalize=None) -> conversion_jobs.BalsamJobGroup:
+    """为每个分片创建balsam任务，并组合为并行任务组
+
+    Args:
+        converter: 已解析balsam路径的 BalsamGLTFToQMLConverter
+        shards: export_shards 返回的分片列表
+        qml_name: 合并后的QML组件名
+        max_workers: 同时运行的balsam进程数上限
+        cache: balsam输出缓存（每个分片单独缓存，未改变的分片直接恢复）
+        finalize: 替代默认合并步骤的回调（选择性转换写出组件时使用）
+    """
+    env = converter.get_balsam_environment()
+    jobs = []
+    for shard in shards:
+        shard_converter = converter.__class__()
+        shard_converter.balsam_path = converter.balsam_path
+        shard_converter.balsam_extra_args = converter.balsam_extra_args
+        shard_converter.gltf_path = shard['gltf_path']
+        shard_converter.output_base_dir = shard['output_dir']
+        shard_converter.qml_output_dir = shard['output_dir']
+
+        def pre_run(shard_converter=shard_converter, shard_dir=shard['output_dir']):
+            clear_shard_outputs(shard_dir)
+            return shard_converter.try_restore_balsam_cache(cache)
+
+        def post_run(success, shard_converter=shard_converter):
+            shard_converter.store_balsam_cache(cache, success)
+
+        jobs.append((shard['name'], conversion_jobs.BalsamJob(
+            shard_converter.build_balsam_attempts(),
+            env=env,
+            input_size=os.path.getsize(shard['gltf_path']),
+            pre_run=pre_run,
+            post_run=post_run,
+        )))
+
+    output_dir = converter.get_balsam_output_dir()
+    return conversion_jobs.BalsamJobGroup(
+        jobs,
+        max_workers=max_workers,
+        finalize=finalize or (lambda: merge_shard_outputs(shards, output_dir, qml_name)),
+    )
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+分阶段输出模块 - balsam与后处理先写入暂存目录，完成后只把变化的文件提交到工作空间
+负责：
+1. 在工作空间的内部状态目录下创建全新的暂存目录（与工作空间同一文件系统，保证 os.replace 原子）
+2. 转换成功后逐个比较暂存文件与工作空间中的同名文件，只替换内容发生变化的文件，
+   未变化的文件保持原有修改时间，Qt Design Studio / qmllint 等监视工具不会收到多余的变更通知
+3. 用输出清单记录上次提交的文件，删除本次不再生成的旧文件；不在清单中的文件（用户自己的文件）不会被触碰
+4. 转换失败时直接丢弃暂存目录，工作空间保持上一次完整的结果
+"""
+
+import os
+import json
+import shutil
+import filecmp
+from typing import Dict, List
+
+from . import path_manager
+
+STAGING_DIR_NAME = "staging"
+OUTPUT_MANIFEST_FILE_NAME = "output_manifest.json"
+
+
+def get_state_dir(output_dir: str) -> str:
+    """工作空间内部状态目录"""
+    return os.path.join(output_dir, path_manager.WORKSPACE_STATE_DIR_NAME)
+
+
+def get_staging_dir(output_dir: str) -> str:
+    """工作空间对应的暂存目录"""
+    return os.path.join(get_state_dir(output_dir), STAGING_DIR_NAME)
+
+
+def begin_staging(output_dir: str) -> str:
+    """清空并重新创建暂存目录
+
+    Returns:
+        str: 暂存目录路径
+    """
+    staging_dir = get_staging_dir(output_dir)
+    discard_staging(staging_dir)
+    os.makedirs(staging_dir, exist_ok=True)
+    return staging_dir
+
+
+def discard_staging(staging_dir: str):
+    """删除暂存目录（转换失败或提交完成后调用）"""
+    if staging_dir and os.path.isdir(staging_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def list_staged_files(staging_dir: str) -> List[str]:
+    """暂存目录中的所有文件（相对路径，使用 / 分隔）"""
+    files = []
+    for root, _dirs, names in os.walk(staging_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            files.append(os.path.relpath(path, staging_dir).replace(os.sep, '/'))
+    return sorted(files)
+
+
+def load_output_manifest(output_dir: str, manifest_name: str = OUTPUT_MANIFEST_FILE_NAME) -> List[str]:
+    """读取上次提交到工作空间的文件列表（manifest_name 区分主场景与各个组件的清单）"""
+    manifest_path = os.path.join(get_state_dir(output_dir), manifest_name)
+    try:
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return list(json.load(f).get('files', []))
+    except Exception as e:
+        print(f"⚠️ 读取输出清单失败: {e}")
+    return []
+
+
+def save_output_manifest(output_dir: str, files: List[str], manifest_name: str = OUTPUT_MANIFEST_FILE_NAME):
+    """保存本次提交到工作空间的文件列表"""
+    manifest_path = os.path.join(get_state_dir(output_dir), manifest_name)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'files': sorted(files)}, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def is_same_file_content(src: str, dst: str) -> bool:
+    """两个文件内容是否相同（先比较大小，再逐字节比较）"""
+    try:
+        if os.path.samefile(src, dst):
+            return True
+        if os.path.getsize(src) != os.path.getsize(dst):
+            return False
+        return filecmp.cmp(src, dst, shallow=False)
+    except OSError:
+        return False
+
+
+def _remove_empty_parents(path: str, stop_dir: str):
+    """删除文件后向上清理空目录（不超过工作空间根目录）"""
+    parent = os.path.dirname(path)
+    stop_dir = os.path.abspath(stop_dir)
+    while os.path.abspath(parent) != stop_dir and parent.startswith(stop_dir):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def commit_staged_output(staging_dir: str, output_dir: str,
+                         manifest_name: str = OUTPUT_MANIFEST_FILE_NAME) -> Dict[str, int]:
+    """把暂存目录提交到工作空间
+
+    Args:
+        staging_dir: begin_staging 创建的暂存目录
+        output_dir: 工作空间目录
+        manifest_name: 输出清单文件名，只删除同一清单中记录的旧文件
+
+    Returns:
+        dict: {'changed', 'unchanged', 'removed'} 文件数量
+    """
+    stats = {'changed': 0, 'unchanged': 0, 'removed': 0}
+    files = list_staged_files(staging_dir)
+
+    for rel_path in files:
+        src = os.path.join(staging_dir, rel_path)
+        dst = os.path.join(output_dir, rel_path)
+        if os.path.isfile(dst) and is_same_file_content(src, dst):
+            stats['unchanged'] += 1
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.replace(src, dst)
+        stats['changed'] += 1
+
+    # 删除上一次提交、本次不再生成的文件
+    current = set(files)
+    for rel_path in load_output_manifest(output_dir, manifest_name):
+        if rel_path in current:
+            continue
+        path = os.path.join(output_dir, rel_path)
+        if os.path.isfile(path):
+            os.remove(path)
+            stats['removed'] += 1
+            _remove_empty_parents(path, output_dir)
+
+    save_output_manifest(output_dir, files, manifest_name)
+    discard_staging(staging_dir)
+    return stats
+
+
+def remove_committed_outputs(output_dir: str, manifest_name: str = OUTPUT_MANIFEST_FILE_NAME) -> int:
+    """删除输出清单中记录的文件（清理工作空间中由插件生成的输出）
+
+    Returns:
+        int: 删除的文件数量
+    """
+    removed = 0
+    for rel_path in load_output_manifest(output_dir, manifest_name):
+        path = os.path.join(output_dir, rel_path)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+            _remove_empty_parents(path, output_dir)
+    save_output_manifest(output_dir, [], manifest_name)
+    return removed
@@ -0,0 +1,18 @@
+"""
+测试配置 - 把插件目录注册为包，不执行 __init__.py（其中需要bpy）
+
+只测试不依赖Blender的模块（glTF处理、QML改写等），在插件目录下运行：
+    python -m pytest tests
+"""
+
+import os
+import sys
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "blender2quick3d"
+
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [ADDON_DIR]
+    sys.modules[PACKAGE_NAME] = package
@@ -0,0 +1,79 @@
+import math
+
+import pytest
+
+from blender2quick3d import gltf_cleanup, gltf_utils
+
+
+def _scene(nodes, roots):
+    return {'asset': {'version': '2.0'}, 'scene': 0, 'scenes': [{'nodes': roots}], 'nodes': nodes, 'meshes': [{}]}
+
+
+def test_flatten_bakes_trs_into_single_child():
+    half = math.sqrt(0.5)
+    gltf = _scene([
+        {'name': 'Empty', 'translation': [1.0, 0.0, 0.0], 'rotation': [0.0, 0.0, half, half], 'scale': [2.0, 2.0, 2.0],
+         'children': [1]},
+        {'name': 'Mesh', 'mesh': 0, 'translation': [1.0, 0.0, 0.0]},
+    ], [0])
+
+    assert gltf_cleanup.flatten_empty_nodes(gltf) == 1
+    assert gltf['scenes'][0]['nodes'] == [0]
+    node = gltf['nodes'][0]
+    assert node['name'] == 'Mesh' and 'children' not in node
+    # 子节点的平移先经过父节点的缩放与绕Z轴90度旋转
+    assert node['translation'] == pytest.approx([1.0, 2.0, 0.0], abs=1e-9)
+    assert node['rotation'] == pytest.approx([0.0, 0.0, half, half], abs=1e-9)
+    assert node['scale'] == pytest.approx([2.0, 2.0, 2.0], abs=1e-9)
+
+
+def test_flatten_keeps_sheared_chain():
+    angle = math.radians(45.0) / 2.0
+    nodes = [
+        {'name': 'Empty', 'scale': [2.0, 1.0, 1.0], 'children': [1]},
+        {'name': 'Mesh', 'mesh': 0, 'rotation': [0.0, 0.0, math.sin(angle), math.cos(angle)]},
+    ]
+    gltf = _scene([dict(node) for node in nodes], [0])
+
+    # 非均匀缩放的父节点下旋转45度的子节点含切变，无法用TRS表示
+    assert gltf_cleanup.flatten_empty_nodes(gltf) == 0
+    assert gltf['nodes'] == nodes
+
+
+def test_flatten_keeps_animated_and_skinned_nodes():
+    gltf = _scene([
+        {'name': 'Animated', 'children': [1]},
+        {'name': 'Mesh', 'mesh': 0},
+        {'name': 'Rig', 'children': [3]},
+        {'name': 'SkinnedMesh', 'mesh': 0, 'skin': 0},
+        {'name': 'Joint'},
+        {'name': 'Unused'},
+    ], [0, 2, 4, 5])
+    gltf['skins'] = [{'joints': [4]}]
+    gltf['animations'] = [{'channels': [{'sampler': 0, 'target': {'node': 0, 'path': 'translation'}}],
+                           'samplers': [{'input': 0, 'output': 1}]}]
+
+    # 只删除空的叶子节点 Unused；动画目标、蒙皮网格的父节点与骨骼保持不变
+    assert gltf_cleanup.flatten_empty_nodes(gltf) == 1
+    assert [node['name'] for node in gltf['nodes']] == ['Animated', 'Mesh', 'Rig', 'SkinnedMesh', 'Joint']
+    assert gltf['scenes'][0]['nodes'] == [0, 2, 4]
+    assert gltf['skins'][0]['joints'] == [4]
+
+
+def test_remove_unreferenced_compacts_buffer_views():
+    doc = gltf_utils.GLTFDocument()
+    used = doc.add_buffer_view(b'\x01' * 12)
+    doc.add_buffer_view(b'\x02' * 8)
+    draco = doc.add_buffer_view(b'\x03' * 4)
+    doc.gltf.update(_scene([{'mesh': 0}], [0]))
+    doc.gltf['accessors'] = [{'bufferView': used, 'componentType': 5126, 'count': 1, 'type': 'VEC3'}]
+    doc.gltf['meshes'] = [{'primitives': [{
+        'attributes': {'POSITION': 0},
+        'extensions': {'KHR_draco_mesh_compression': {'bufferView': draco, 'attributes': {'POSITION': 0}}},
+    }]}]
+
+    removed = gltf_cleanup.remove_unreferenced(doc)
+
+    assert removed == {'bufferViews': 1}
+    assert [bytes(doc.buffer_view_bytes(index)) for index in range(2)] == [b'\x01' * 12, b'\x03' * 4]
+    assert doc.gltf['meshes'][0]['primitives'][0]['extensions']['KHR_draco_mesh_compression']['bufferView'] == 1
@@ -0,0 +1,56 @@
+import struct
+
+from blender2quick3d import gltf_utils
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 24
+
+
+def _unit_document(name, offset=0.0):
+    """增量导出中的一个单元：一个带贴图材质的三角形网格与引用它的根节点"""
+    doc = gltf_utils.GLTFDocument()
+    gltf = doc.gltf
+    position_view = doc.add_buffer_view(struct.pack('<9f', 0, 0, 0, 1, 0, 0, 0, 1, 0), 34962)
+    index_view = doc.add_buffer_view(struct.pack('<3H', 0, 1, 2) + b'\x00\x00', 34963)
+    image_view = doc.add_buffer_view(PNG_BYTES)
+    gltf['accessors'] = [
+        {'bufferView': position_view, 'componentType': 5126, 'count': 3, 'type': 'VEC3',
+         'min': [0, 0, 0], 'max': [1, 1, 0]},
+        {'bufferView': index_view, 'componentType': 5123, 'count': 3, 'type': 'SCALAR'},
+    ]
+    gltf['images'] = [{'name': 'Wood', 'mimeType': 'image/png', 'bufferView': image_view}]
+    gltf['samplers'] = [{'magFilter': 9729, 'minFilter': 9987}]
+    gltf['textures'] = [{'sampler': 0, 'source': 0}]
+    gltf['materials'] = [{'name': 'Paint', 'pbrMetallicRoughness': {'baseColorTexture': {'index': 0}}}]
+    gltf['meshes'] = [{'name': 'Cube', 'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1, 'material': 0}]}]
+    gltf['nodes'] = [{'name': name, 'mesh': 0, 'translation': [offset, 0.0, 0.0]}]
+    gltf['scenes'] = [{'nodes': [0]}]
+    gltf['scene'] = 0
+    return doc
+
+
+def test_merge_keeps_shared_mesh_and_material_once(tmp_path):
+    merged = gltf_utils.merge_documents([_unit_document('A'), _unit_document('B', offset=5.0)])
+    path = merged.save(str(tmp_path / "scene.glb"), 'GLB')
+
+    result = gltf_utils.load_gltf_json(path)
+    assert [node['mesh'] for node in result['nodes']] == [0, 0]
+    assert result['scenes'][0]['nodes'] == [0, 1]
+    for kind in ('meshes', 'materials', 'textures', 'images', 'samplers'):
+        assert len(result[kind]) == 1, kind
+    assert len(result['accessors']) == 2
+    assert len(result['bufferViews']) == 3
+    reloaded = gltf_utils.GLTFDocument.load(path)
+    assert reloaded.image_bytes(0) == PNG_BYTES
+
+
+def test_merge_keeps_different_materials_apart():
+    other = _unit_document('B')
+    other.gltf['materials'][0]['name'] = 'Varnish'
+    merged = gltf_utils.merge_documents([_unit_document('A'), other])
+
+    gltf = merged.gltf
+    assert [material['name'] for material in gltf['materials']] == ['Paint', 'Varnish']
+    # 网格引用的材质不同，各自保留；几何与贴图数据仍只有一份
+    assert len(gltf['meshes']) == 2
+    assert len(gltf['accessors']) == 2
+    assert len(gltf['images']) == 1
@@ -0,0 +1,76 @@
+import struct
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from blender2quick3d import gltf_utils, instancing
+
+
+def test_write_instance_table(tmp_path):
+    path = tmp_path / "instancing" / "table.xml"
+    instances = [
+        {'translation': [1.0, 2.0, 3.0], 'rotation': [0.0, 0.0, 0.0, 1.0], 'scale': [1.0, 1.0, 1.0]},
+        # 绕Y轴旋转90度
+        {'translation': [-4.0, 0.0, 0.5], 'rotation': [0.0, 0.70710678, 0.0, 0.70710678], 'scale': [2.0, 2.0, 2.0]},
+    ]
+    instancing.write_instance_table(str(path), instances)
+
+    root = ET.parse(path).getroot()
+    assert root.tag == "InstanceTable"
+    entries = root.findall("Instance")
+    assert len(entries) == 2
+    assert entries[0].attrib == {'position': "1 2 3", 'scale': "1 1 1", 'eulerRotation': "0 0 0"}
+    assert entries[1].get('position') == "-4 0 0.5"
+    assert entries[1].get('scale') == "2 2 2"
+    euler = [float(value) for value in entries[1].get('eulerRotation').split()]
+    assert euler == pytest.approx([0.0, 90.0, 0.0], abs=1e-4)
+
+
+def _cube_document(node_count, offset=0.0):
+    """一个三角形网格与若干引用它的根节点（模拟增量导出中的一个根层级文件）"""
+    positions = struct.pack('<9f', 0, 0, 0, 1, 0, 0, 0, 1, 0)
+    indices = struct.pack('<3H', 0, 1, 2) + b'\x00\x00'
+    doc = gltf_utils.GLTFDocument()
+    gltf = doc.gltf
+    position_view = doc.add_buffer_view(positions, 34962)
+    index_view = doc.add_buffer_view(indices, 34963)
+    gltf['accessors'] = [
+        {'bufferView': position_view, 'componentType': 5126, 'count': 3, 'type': 'VEC3',
+         'min': [0, 0, 0], 'max': [1, 1, 0]},
+        {'bufferView': index_view, 'componentType': 5123, 'count': 3, 'type': 'SCALAR'},
+    ]
+    gltf['materials'] = [{'name': 'Paint', 'pbrMetallicRoughness': {'baseColorFactor': [1, 0, 0, 1]}}]
+    gltf['meshes'] = [{'name': 'Cube', 'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1, 'material': 0}]}]
+    gltf['nodes'] = [{'name': f'Cube{offset}_{i}', 'mesh': 0, 'translation': [offset + i, 0.0, 0.0]}
+                     for i in range(node_count)]
+    gltf['scenes'] = [{'nodes': list(range(node_count))}]
+    gltf['scene'] = 0
+    return doc
+
+
+def test_instance_groups_span_merged_documents(tmp_path):
+    # 不同名的网格合并时各自保留
+    other = _cube_document(3, offset=10.0)
+    other.gltf['meshes'][0]['name'] = 'Cube.001'
+    merged = gltf_utils.merge_documents([_cube_document(2), other])
+    path = merged.save(str(tmp_path / "scene.glb"), 'GLB')
+
+    # 按索引两个网格各自不到4个节点；按内容是同一个网格
+    assert instancing.collect_instance_groups(merged.gltf, 4) == []
+    groups = instancing.instance_gltf(path, 'GLB', min_count=4)
+
+    assert len(groups) == 1
+    assert [instance['translation'][0] for instance in groups[0]['instances']] == [0.0, 1.0, 10.0, 11.0, 12.0]
+    result = gltf_utils.load_gltf_json(path)
+    assert len(result['nodes']) == 1
+    assert len(result['meshes']) == 1
+    assert len(result['accessors']) == 2
+
+
+def test_different_materials_are_not_grouped(tmp_path):
+    other = _cube_document(2, offset=10.0)
+    other.gltf['materials'][0]['pbrMetallicRoughness']['baseColorFactor'] = [0, 0, 1, 1]
+    merged = gltf_utils.merge_documents([_cube_document(2), other])
+    keys = instancing.mesh_content_keys(merged)
+    assert keys[0] != keys[1]
+    assert instancing.collect_instance_groups(merged.gltf, 2, keys) == [[0, 1], [2, 3]]
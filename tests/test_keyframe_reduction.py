@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from blender2quick3d import gltf_utils, keyframe_reduction, native_mesh_converter
+
+
+def _add_accessor(doc, rows, accessor_type, with_bounds=False):
+    data = np.ascontiguousarray(rows, dtype='<f4')
+    accessor = {'bufferView': doc.add_buffer_view(data.tobytes()), 'componentType': 5126,
+                'count': len(data), 'type': accessor_type}
+    if with_bounds:
+        accessor['min'] = [float(v) for v in data.min(axis=0)]
+        accessor['max'] = [float(v) for v in data.max(axis=0)]
+    doc.gltf.setdefault('accessors', []).append(accessor)
+    return len(doc.gltf['accessors']) - 1
+
+
+def _baked_animation():
+    """每帧一个关键帧的烘焙动画，三个采样器共用同一个时间访问器
+
+    - 节点0平移：两段匀速直线（0→5帧沿X，5→10帧沿Y）
+    - 节点1平移：与节点0形状相同，精简后应与节点0共用新的时间轴
+    - 节点0缩放：静止
+    """
+    doc = gltf_utils.GLTFDocument()
+    times = np.arange(11, dtype=np.float64).reshape(-1, 1) / 24.0
+    frames = np.arange(11, dtype=np.float64)
+    path = np.stack([np.minimum(frames, 5.0), np.maximum(frames - 5.0, 0.0), np.zeros(11)], axis=1)
+    time_accessor = _add_accessor(doc, times, 'SCALAR', with_bounds=True)
+    outputs = [
+        _add_accessor(doc, path, 'VEC3'),
+        _add_accessor(doc, path * 2.0 + 1.0, 'VEC3'),
+        _add_accessor(doc, np.ones((11, 3)), 'VEC3'),
+    ]
+    doc.gltf['nodes'] = [{'name': 'A'}, {'name': 'B'}]
+    doc.gltf['animations'] = [{
+        'channels': [
+            {'sampler': 0, 'target': {'node': 0, 'path': 'translation'}},
+            {'sampler': 1, 'target': {'node': 1, 'path': 'translation'}},
+            {'sampler': 2, 'target': {'node': 0, 'path': 'scale'}},
+        ],
+        'samplers': [{'input': time_accessor, 'output': output, 'interpolation': 'LINEAR'} for output in outputs],
+    }]
+    return doc, times[:, 0], path
+
+
+def test_reduce_linear_keeps_segment_endpoints():
+    _doc, times, path = _baked_animation()
+    kept = keyframe_reduction.reduce_linear(times, path, 'translation', 0.001)
+    assert kept.tolist() == [0, 5, 10]
+
+    constant = keyframe_reduction.reduce_linear(times, np.ones((11, 3)), 'scale', 0.001)
+    assert constant.tolist() == [0, 10]
+
+
+def test_reduce_document_with_shared_input():
+    doc, times, path = _baked_animation()
+    stats = keyframe_reduction.reduce_document(doc, keyframe_reduction.get_tolerances())
+
+    assert stats['samplers'] == 3 and stats['reduced_samplers'] == 3
+    assert stats['keyframes_before'] == 33 and stats['keyframes_after'] == 3 + 3 + 2
+    assert stats['bytes_after'] < stats['bytes_before']
+
+    samplers = doc.gltf['animations'][0]['samplers']
+    # 形状相同的两条曲线共用精简后的时间轴，静止曲线使用自己的时间轴
+    assert samplers[0]['input'] == samplers[1]['input']
+    assert samplers[2]['input'] != samplers[0]['input']
+
+    def read(index):
+        return native_mesh_converter.read_accessor(doc, index, as_float=True)
+
+    assert read(samplers[0]['input'])[:, 0] == pytest.approx(times[[0, 5, 10]])
+    assert read(samplers[2]['input'])[:, 0] == pytest.approx(times[[0, 10]])
+    assert read(samplers[0]['output']) == pytest.approx(path[[0, 5, 10]])
+    assert read(samplers[1]['output']) == pytest.approx(path[[0, 5, 10]] * 2.0 + 1.0)
+    assert read(samplers[2]['output']) == pytest.approx(np.ones((2, 3)))
+
+    # 原来共用的时间访问器不再被引用，与原始数值一起删除
+    assert len(doc.gltf['accessors']) == 5
+    time_accessor = doc.gltf['accessors'][samplers[0]['input']]
+    assert time_accessor['min'] == pytest.approx([0.0]) and time_accessor['max'] == pytest.approx([10 / 24.0])
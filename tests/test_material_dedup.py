@@ -0,0 +1,102 @@
+from blender2quick3d import material_dedup
+
+SCENE_QML = """Node {
+    id: scene
+    PrincipledMaterial {
+        id: paint_a
+        objectName: "PaintA"
+        baseColor: "#ffcc0000"
+        roughness: 0.5
+    }
+    PrincipledMaterial {
+        id: paint_b
+        objectName: "PaintB"
+        baseColor: "#ffcc0000"
+        roughness: 0.5
+    }
+    PrincipledMaterial {
+        id: glass
+        baseColor: "#ff0000cc"
+        roughness: 0.5
+    }
+    Model {
+        id: door
+        source: "meshes/door.mesh"
+        materials: [
+            paint_b,
+            glass
+        ]
+    }
+    Model {
+        id: body
+        source: "meshes/body.mesh"
+        materials: [paint_a]
+    }
+    Model {
+        id: hood
+        source: "meshes/hood.mesh"
+        materials: paint_b
+    }
+}
+"""
+
+
+def test_identical_materials_declared_once():
+    content, components, removed = material_dedup.share_qml_materials(SCENE_QML)
+
+    assert removed == 1
+    assert components == []
+    assert content.count("PrincipledMaterial {") == 2
+    assert "paint_b" not in content
+    assert "materials: [\n            paint_a,\n            glass\n        ]" in content
+    assert "materials: [paint_a]" in content
+    assert "materials: paint_a" in content
+
+
+def test_materials_are_shared_per_id_scope():
+    component = SCENE_QML.replace("scene", "part")
+    content, components, removed = material_dedup.share_qml_materials(SCENE_QML, [("Part", component)])
+
+    # 内联组件看不到场景中的id，各自保留一个声明
+    assert removed == 2
+    assert components[0][0] == "Part"
+    assert components[0][1].count("PrincipledMaterial {") == 2
+    assert "paint_b" not in components[0][1]
+
+
+def test_material_referenced_elsewhere_is_kept():
+    animated = SCENE_QML.replace(
+        "    Model {\n        id: door",
+        "    PropertyAnimation { target: paint_b; property: \"roughness\"; to: 1.0 }\n    Model {\n        id: door",
+    )
+    content, _components, removed = material_dedup.share_qml_materials(animated)
+
+    assert removed == 0
+    assert content == animated
+
+
+def test_inline_declaration_in_materials_list():
+    content = """Node {
+    Model {
+        materials: [
+            PrincipledMaterial {
+                id: first
+                baseColor: "#ff00ff00"
+            }
+        ]
+    }
+    Model {
+        materials: [
+            PrincipledMaterial {
+                id: second
+                baseColor: "#ff00ff00"
+            }
+        ]
+    }
+}
+"""
+    result, _components, removed = material_dedup.share_qml_materials(content)
+
+    assert removed == 1
+    assert "second" not in result
+    assert "materials: [\n            first\n        ]" in result
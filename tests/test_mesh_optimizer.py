@@ -0,0 +1,81 @@
+import numpy as np
+
+from blender2quick3d import gltf_utils, mesh_optimizer
+
+
+def _grid_triangles(size):
+    """size x size 的网格平面，按列优先的顺序输出三角形（顶点缓存命中率很低）"""
+    triangles = []
+    for x in range(size):
+        for y in range(size):
+            a = y * (size + 1) + x
+            b, c, d = a + 1, a + size + 1, a + size + 2
+            triangles += [(a, b, c), (b, d, c)]
+    return triangles, (size + 1) * (size + 1)
+
+
+def test_tipsify_keeps_triangles_and_improves_acmr():
+    triangles, vertex_count = _grid_triangles(24)
+    indices = [vertex for triangle in triangles for vertex in triangle]
+
+    order, cluster_starts = mesh_optimizer.tipsify(indices, vertex_count)
+    reordered = [vertex for triangle in order for vertex in triangles[triangle]]
+
+    assert sorted(order) == list(range(len(triangles)))
+    assert sorted(triangles[triangle] for triangle in order) == sorted(triangles)
+    assert cluster_starts[0] == 0 and cluster_starts == sorted(cluster_starts)
+    assert mesh_optimizer.compute_acmr(reordered) <= mesh_optimizer.compute_acmr(indices)
+
+
+def test_compute_acmr_bounds():
+    # 每个三角形的顶点都不同：每个三角形3次未命中
+    assert mesh_optimizer.compute_acmr(list(range(30))) == 3.0
+    # 同一个三角形重复绘制：只有第一次未命中
+    assert mesh_optimizer.compute_acmr([0, 1, 2] * 10) == 0.3
+
+
+def test_index_width_avoids_restart_index():
+    component_type, data = mesh_optimizer._encode_indices(np.array([0, 1, 0xFFFD]), 0xFFFE)
+    assert component_type == mesh_optimizer.COMPONENT_UNSIGNED_SHORT and len(data) == 6
+
+    component_type, data = mesh_optimizer._encode_indices(np.array([0, 1, 0xFFFE]), 0xFFFF)
+    assert component_type == mesh_optimizer.COMPONENT_UNSIGNED_INT and len(data) == 12
+
+
+def _grid_document(size):
+    triangles, vertex_count = _grid_triangles(size)
+    positions = np.array([(i % (size + 1), i // (size + 1), 0.0) for i in range(vertex_count)], dtype='<f4')
+    normals = np.tile(np.array([0.0, 0.0, 1.0], dtype='<f4'), (vertex_count, 1))
+    indices = np.array(triangles, dtype='<u4').reshape(-1)
+    doc = gltf_utils.GLTFDocument()
+    views = [doc.add_buffer_view(positions.tobytes(), 34962), doc.add_buffer_view(normals.tobytes(), 34962),
+             doc.add_buffer_view(indices.tobytes(), 34963)]
+    doc.gltf['accessors'] = [
+        {'bufferView': views[0], 'componentType': 5126, 'count': vertex_count, 'type': 'VEC3',
+         'min': [0, 0, 0], 'max': [size, size, 0]},
+        {'bufferView': views[1], 'componentType': 5126, 'count': vertex_count, 'type': 'VEC3'},
+        {'bufferView': views[2], 'componentType': 5125, 'count': len(indices), 'type': 'SCALAR'},
+    ]
+    doc.gltf['meshes'] = [{'name': 'Grid', 'primitives': [{'attributes': {'POSITION': 0, 'NORMAL': 1}, 'indices': 2}]}]
+    return doc
+
+
+def test_optimize_document_reorders_grid():
+    doc = _grid_document(16)
+    report = mesh_optimizer.optimize_document(doc)
+
+    assert report[0]['acmr_after'] < report[0]['acmr_before']
+    assert doc.gltf['accessors'][2]['componentType'] == mesh_optimizer.COMPONENT_UNSIGNED_SHORT
+
+
+def test_failed_primitive_is_left_untouched(monkeypatch):
+    doc = _grid_document(8)
+    before = ([bytes(doc.buffer_view_bytes(i)) for i in range(3)], [dict(a) for a in doc.gltf['accessors']])
+
+    def fail(*args):
+        raise ValueError("encode failed")
+
+    # 顶点属性已重排、索引尚未写回时失败
+    monkeypatch.setattr(mesh_optimizer, '_encode_indices', fail)
+    assert mesh_optimizer.optimize_document(doc) == []
+    assert ([bytes(doc.buffer_view_bytes(i)) for i in range(3)], doc.gltf['accessors']) == before
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+纹理优化模块 - 在GLTF导出之后、balsam转换之前处理贴图
+负责：
+1. 按目标平台配置限制贴图分辨率（等比缩放，替换glTF中的图片数据）
+2. 预生成完整的mip链，并编码为GPU压缩格式（BC1/BC3），写出KTX容器
+3. 按源图片内容哈希缓存处理结果，未变化的贴图不会重复编码
+4. balsam转换后，把 maps/ 中对应的贴图引用改写为KTX文件
+
+glTF中的图片必须保持PNG/JPEG（balsam只接受这些格式），因此压缩纹理在balsam之后再接入QML：
+balsam会把图片原样写入 maps/，按内容哈希即可找回对应的KTX。
+BCn编码优先使用numpy向量化实现，numpy不可用时退回纯Python逐块编码，两者输出完全一致。
+"""
+
+import os
+import re
+import json
+import zlib
+import shutil
+import struct
+import base64
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from . import gltf_utils
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 编码算法变化时递增，使旧缓存失效
+TEXTURE_CACHE_VERSION = 1
+TEXTURE_PLAN_FILE_NAME = "textures.json"
+
+# 目标平台配置：max_size 为最长边上限（0表示不限制），compress 表示是否输出BCn压缩的KTX
+# BCn只有桌面GPU普遍支持，移动/嵌入式平台只做缩放，避免生成无法上传的纹理
+TEXTURE_PROFILES = {
+    'ORIGINAL': {'max_size': 0, 'compress': False},
+    'DESKTOP': {'max_size': 4096, 'compress': True},
+    'MOBILE': {'max_size': 1024, 'compress': False},
+    'EMBEDDED': {'max_size': 512, 'compress': False},
+}
+DEFAULT_TEXTURE_PROFILE = 'ORIGINAL'
+
+# KTX 1.1 常量
+KTX_IDENTIFIER = b'\xabKTX 11\xbb\r\n\x1a\n'
+KTX_ENDIANNESS = 0x04030201
+GL_COMPRESSED_RGB_S3TC_DXT1_EXT = 0x83F0
+GL_COMPRESSED_RGBA_S3TC_DXT5_EXT = 0x83F3
+GL_RGB = 0x1907
+GL_RGBA = 0x1908
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def get_default_cache_dir() -> str:
+    """默认纹理缓存目录：插件目录下的 cache/textures"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "textures")
+
+
+def clear_texture_cache(cache_dir: Optional[str] = None) -> bool:
+    """删除所有缓存的贴图处理结果"""
+    cache_dir = cache_dir or get_default_cache_dir()
+    try:
+        if os.path.isdir(cache_dir):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        print(f"🧹 贴图缓存已清空: {cache_dir}")
+        return True
+    except Exception as e:
+        print(f"❌ 清空贴图缓存失败: {e}")
+        return False
+
+
+def fit_size(width: int, height: int, max_size: int):
+    """按最长边上限等比缩小，返回新尺寸（不放大）"""
+    if not max_size or max(width, height) <= max_size:
+        return width, height
+    scale = max_size / float(max(width, height))
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+# ----------------------------------------------------------------------
+# 图片解码（使用Blender自带的图像库，支持glTF中的PNG/JPEG）
+# ----------------------------------------------------------------------
+
+def decode_image(data: bytes, suffix: str = ".png", size=None):
+    """解码图片并可选缩放，返回 (宽, 高, RGBA字节)，行顺序为从上到下
+
+    必须在主线程调用（使用 bpy.data.images）。
+    """
+    import bpy
+
+    fd, temp_path = tempfile.mkstemp(suffix=suffix)
+    image = None
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        image = bpy.data.images.load(temp_path, check_existing=False)
+        # 读取原始数值，不做色彩空间转换
+        image.colorspace_settings.name = 'Non-Color'
+        width, height = image.size
+        if size and tuple(size) != (width, height):
+            image.scale(size[0], size[1])
+            width, height = image.size
+
+        if NUMPY_AVAILABLE:
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+            # Blender的像素从下往上存储
+            rgba = np.clip(pixels.reshape(height, width, 4)[::-1] * 255.0 + 0.5, 0, 255).astype(np.uint8)
+            return width, height, rgba.tobytes()
+
+        pixels = image.pixels[:]
+        rows = []
+        stride = width * 4
+        for y in range(height - 1, -1, -1):
+            row = pixels[y * stride:(y + 1) * stride]
+            rows.append(bytes(min(255, max(0, int(v * 255.0 + 0.5))) for v in row))
+        return width, height, b''.join(rows)
+    finally:
+        if image is not None:
+            bpy.data.images.remove(image)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def has_alpha(rgba: bytes) -> bool:
+    """是否存在非不透明像素"""
+    if NUMPY_AVAILABLE:
+        return bool((np.frombuffer(rgba, dtype=np.uint8)[3::4] < 255).any())
+    return any(a < 255 for a in rgba[3::4])
+
+
+# ----------------------------------------------------------------------
+# PNG编码
+# ----------------------------------------------------------------------
+
+def _png_chunk(tag: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload) & 0xFFFFFFFF)
+
+
+def encode_png(rgba: bytes, width: int, height: int, alpha: bool = True) -> bytes:
+    """把RGBA字节编码为PNG（不透明图片写为RGB，减小体积）"""
+    channels = 4 if alpha else 3
+    if NUMPY_AVAILABLE:
+        pixels = np.frombuffer(rgba, dtype=np.uint8).reshape(height, width, 4)[:, :, :channels]
+        rows = np.zeros((height, width * channels + 1), dtype=np.uint8)
+        rows[:, 1:] = pixels.reshape(height, width * channels)
+        raw = rows.tobytes()
+    else:
+        stride = width * 4
+        parts = []
+        for y in range(height):
+            row = rgba[y * stride:(y + 1) * stride]
+            if not alpha:
+                row = bytes(b for i, b in enumerate(row) if i % 4 != 3)
+            parts.append(b'\x00' + row)
+        raw = b''.join(parts)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6 if alpha else 2, 0, 0, 0)
+    return (PNG_SIGNATURE + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(raw, 6)) + _png_chunk(b'IEND', b''))
+
+
+# ----------------------------------------------------------------------
+# mip链
+# ----------------------------------------------------------------------
+
+def downsample(rgba: bytes, width: int, height: int):
+    """2x2盒式滤波生成下一级mip，返回 (宽, 高, RGBA字节)，尺寸向下取整（KTX/GL约定）"""
+    new_width, new_height = max(1, width // 2), max(1, height // 2)
+    if NUMPY_AVAILABLE:
+        pixels = np.frombuffer(rgba, dtype=np.uint8).reshape(height, width, 4).astype(np.uint16)
+        # 某个方向为1时复制该行/列参与平均
+        if height == 1:
+            pixels = np.concatenate([pixels, pixels], axis=0)
+        if width == 1:
+            pixels = np.concatenate([pixels, pixels], axis=1)
+        pixels = pixels[:new_height * 2, :new_width * 2]
+        total = (pixels[0::2, 0::2] + pixels[1::2, 0::2] + pixels[0::2, 1::2] + pixels[1::2, 1::2] + 2) // 4
+        return new_width, new_height, total.astype(np.uint8).tobytes()
+
+    out = bytearray(new_width * new_height * 4)
+    for y in range(new_height):
+        y0 = min(y * 2, height - 1)
+        y1 = min(y * 2 + 1, height - 1)
+        for x in range(new_width):
+            x0 = min(x * 2, width - 1)
+            x1 = min(x * 2 + 1, width - 1)
+            for c in range(4):
+                total = (rgba[(y0 * width + x0) * 4 + c] + rgba[(y1 * width + x0) * 4 + c]
+                         + rgba[(y0 * width + x1) * 4 + c] + rgba[(y1 * width + x1) * 4 + c] + 2)
+                out[(y * new_width + x) * 4 + c] = total // 4
+    return new_width, new_height, bytes(out)
+
+
+def build_mip_chain(rgba: bytes, width: int, height: int) -> List[tuple]:
+    """生成完整mip链 [(宽, 高, RGBA字节)]，直到1x1"""
+    levels = [(width, height, rgba)]
+    while width > 1 or height > 1:
+        width, height, rgba = downsample(rgba, width, height)
+        levels.append((width, height, rgba))
+    return levels
+
+
+# ----------------------------------------------------------------------
+# BCn编码（BC1 = DXT1，BC3 = DXT5）
+# ----------------------------------------------------------------------
+
+def _pack565(r: int, g: int, b: int) -> int:
+    return (((r * 31 + 127) // 255) << 11) | (((g * 63 + 127) // 255) << 5) | ((b * 31 + 127) // 255)
+
+
+def _unpack565(color: int):
+    r, g, b = (color >> 11) & 31, (color >> 5) & 63, color & 31
+    return (r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)
+
+
+def _extract_block(rgba: bytes, width: int, height: int, bx: int, by: int) -> List[tuple]:
+    """取出一个4x4块（越界时复制边缘像素）"""
+    pixels = []
+    for y in range(4):
+        row = min(by * 4 + y, height - 1) * width
+        for x in range(4):
+            i = (row + min(bx * 4 + x, width - 1)) * 4
+            pixels.append((rgba[i], rgba[i + 1], rgba[i + 2], rgba[i + 3]))
+    return pixels
+
+
+def _encode_color_block(pixels: List[tuple]) -> bytes:
+    """以包围盒两端为端点编码BC1颜色块（始终为4色模式）"""
+    c0 = _pack565(max(p[0] for p in pixels), max(p[1] for p in pixels), max(p[2] for p in pixels))
+    c1 = _pack565(min(p[0] for p in pixels), min(p[1] for p in pixels), min(p[2] for p in pixels))
+    if c0 < c1:
+        c0, c1 = c1, c0
+    indices = 0
+    if c0 != c1:
+        p0, p1 = _unpack565(c0), _unpack565(c1)
+        palette = [
+            p0, p1,
+            tuple((2 * a + b) // 3 for a, b in zip(p0, p1)),
+            tuple((a + 2 * b) // 3 for a, b in zip(p0, p1)),
+        ]
+        for i, pixel in enumerate(pixels):
+            distances = [sum((pixel[c] - entry[c]) ** 2 for c in range(3)) for entry in palette]
+            indices |= distances.index(min(distances)) << (2 * i)
+    return struct.pack('<HHI', c0, c1, indices)
+
+
+def _encode_alpha_block(pixels: List[tuple]) -> bytes:
+    """编码BC3的alpha块（8级插值模式）"""
+    a0 = max(p[3] for p in pixels)
+    a1 = min(p[3] for p in pixels)
+    indices = 0
+    if a0 != a1:
+        palette = [a0, a1] + [((7 - k) * a0 + k * a1) // 7 for k in range(1, 7)]
+        for i, pixel in enumerate(pixels):
+            distances = [abs(pixel[3] - entry) for entry in palette]
+            indices |= distances.index(min(distances)) << (3 * i)
+    return struct.pack('<BB', a0, a1) + indices.to_bytes(6, 'little')
+
+
+def _encode_bc_python(rgba: bytes, width: int, height: int, alpha: bool) -> bytes:
+    out = bytearray()
+    for by in range((height + 3) // 4):
+        for bx in range((width + 3) // 4):
+            pixels = _extract_block(rgba, width, height, bx, by)
+            if alpha:
+                out += _encode_alpha_block(pixels)
+            out += _encode_color_block(pixels)
+    return bytes(out)
+
+
+def _blocks_numpy(rgba: bytes, width: int, height: int):
+    """把图片切分为 (块数, 16, 4) 的int32数组（越界时复制边缘像素）"""
+    pixels = np.frombuffer(rgba, dtype=np.uint8).reshape(height, width, 4)
+    padded_h, padded_w = (height + 3) // 4 * 4, (width + 3) // 4 * 4
+    pixels = np.pad(pixels, ((0, padded_h - height), (0, padded_w - width), (0, 0)), mode='edge')
+    blocks = pixels.reshape(padded_h // 4, 4, padded_w // 4, 4, 4).transpose(0, 2, 1, 3, 4)
+    return blocks.reshape(-1, 16, 4).astype(np.int32)
+
+
+def _encode_color_blocks_numpy(blocks) -> 'np.ndarray':
+    def pack(rgb):
+        return (((rgb[:, 0] * 31 + 127) // 255) << 11) | (((rgb[:, 1] * 63 + 127) // 255) << 5) | ((rgb[:, 2] * 31 + 127) // 255)
+
+    def unpack(color):
+        r, g, b = (color >> 11) & 31, (color >> 5) & 63, color & 31
+        return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1)
+
+    rgb = blocks[:, :, :3]
+    c0 = pack(rgb.max(axis=1))
+    c1 = pack(rgb.min(axis=1))
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    p0, p1 = unpack(c0), unpack(c1)
+    palette = np.stack([p0, p1, (2 * p0 + p1) // 3, (p0 + 2 * p1) // 3], axis=1)
+    distances = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=3)
+    selected = distances.argmin(axis=2).astype(np.uint32)
+    selected[c0 == c1] = 0
+    indices = (selected << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = indices.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_alpha_blocks_numpy(blocks) -> 'np.ndarray':
+    alpha = blocks[:, :, 3]
+    a0, a1 = alpha.max(axis=1), alpha.min(axis=1)
+    k = np.arange(1, 7)
+    palette = np.concatenate([
+        a0[:, None], a1[:, None], ((7 - k)[None, :] * a0[:, None] + k[None, :] * a1[:, None]) // 7,
+    ], axis=1)
+    selected = np.abs(alpha[:, :, None] - palette[:, None, :]).argmin(axis=2).astype(np.uint64)
+    selected[a0 == a1] = 0
+    indices = (selected << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:8] = indices.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def encode_bc(rgba: bytes, width: int, height: int, alpha: bool) -> bytes:
+    """编码为BC3（有alpha）或BC1（不透明），块按行优先排列"""
+    if not NUMPY_AVAILABLE:
+        return _encode_bc_python(rgba, width, height, alpha)
+    blocks = _blocks_numpy(rgba, width, height)
+    color = _encode_color_blocks_numpy(blocks)
+    if alpha:
+        color = np.concatenate([_encode_alpha_blocks_numpy(blocks), color], axis=1)
+    return color.tobytes()
+
+
+# ----------------------------------------------------------------------
+# KTX容器
+# ----------------------------------------------------------------------
+
+def write_ktx(path: str, width: int, height: int, levels: List[bytes], alpha: bool):
+    """写出KTX 1.1文件（压缩格式，每级mip一段数据）"""
+    internal_format = GL_COMPRESSED_RGBA_S3TC_DXT5_EXT if alpha else GL_COMPRESSED_RGB_S3TC_DXT1_EXT
+    header = KTX_IDENTIFIER + struct.pack(
+        '<13I',
+        KTX_ENDIANNESS,
+        0,  # glType（压缩格式为0）
+        1,  # glTypeSize
+        0,  # glFormat（压缩格式为0）
+        internal_format,
+        GL_RGBA if alpha else GL_RGB,
+        width, height, 0,
+        0,  # numberOfArrayElements
+        1,  # numberOfFaces
+        len(levels),
+        0,  # bytesOfKeyValueData
+    )
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        for data in levels:
+            # BCn数据总是4字节对齐，不需要mipPadding
+            f.write(struct.pack('<I', len(data)))
+            f.write(data)
+    os.replace(temp_path, path)
+
+
+# ----------------------------------------------------------------------
+# 处理glTF中的图片
+# ----------------------------------------------------------------------
+
+def _normal_map_images(gltf: dict) -> set:
+    """法线贴图使用的图片索引（BC1会严重损失法线精度，只缩放不压缩）"""
+    images = set()
+    textures = gltf.get('textures', [])
+    for material in gltf.get('materials', []):
+        info = material.get('normalTexture')
+        if info and info.get('index') is not None and info['index'] < len(textures):
+            source = textures[info['index']].get('source')
+            if source is not None:
+                images.add(source)
+    return images
+
+
+class TextureProcessor:
+    """按目标平台配置处理glTF贴图，结果按内容哈希缓存"""
+
+    def __init__(self, profile: str = DEFAULT_TEXTURE_PROFILE, cache_dir: Optional[str] = None):
+        self.profile = profile if profile in TEXTURE_PROFILES else DEFAULT_TEXTURE_PROFILE
+        self.settings = TEXTURE_PROFILES[self.profile]
+        self.cache_dir = cache_dir or get_default_cache_dir()
+        self.stats = {'images': 0, 'cached': 0, 'resized': 0, 'compressed': 0}
+
+    def is_enabled(self) -> bool:
+        return bool(self.settings['max_size'] or self.settings['compress'])
+
+    def compute_key(self, data: bytes, compress: bool) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(f"v{TEXTURE_CACHE_VERSION}|{self.settings['max_size']}|{int(compress)}|".encode('utf-8'))
+        hasher.update(data)
+        return hasher.hexdigest()
+
+    def process_image(self, data: bytes, mime_type: str, compress: bool) -> Dict:
+        """处理单张图片，返回缓存条目 {'key', 'png'（缩放后的路径或None）, 'ktx'（路径或None）}"""
+        key = self.compute_key(data, compress)
+        entry_dir = os.path.join(self.cache_dir, key[:2])
+        meta_path = os.path.join(entry_dir, key + ".json")
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if all(not path or os.path.exists(path) for path in (meta.get('png'), meta.get('ktx'))):
+                    self.stats['cached'] += 1
+                    return meta
+            except Exception:
+                pass
+
+        suffix = ".jpg" if mime_type == 'image/jpeg' else ".png"
+        original = _image_size(data)
+        target = fit_size(original[0], original[1], self.settings['max_size']) if original else None
+        os.makedirs(entry_dir, exist_ok=True)
+        meta = {'key': key, 'png': None, 'ktx': None}
+        if original and target == tuple(original) and not compress:
+            # 尺寸已在上限内且不压缩：记录结果，以后无需再解码
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            return meta
+
+        width, height, rgba = decode_image(data, suffix, target)
+        if original is None:
+            original = (width, height)
+            target = fit_size(width, height, self.settings['max_size'])
+            if target != original:
+                width, height, rgba = decode_image(data, suffix, target)
+
+        alpha = has_alpha(rgba)
+        if (width, height) != tuple(original):
+            meta['png'] = os.path.join(entry_dir, key + ".png")
+            with open(meta['png'], 'wb') as f:
+                f.write(encode_png(rgba, width, height, alpha))
+            self.stats['resized'] += 1
+
+        if compress:
+            levels = [encode_bc(level, w, h, alpha) for w, h, level in build_mip_chain(rgba, width, height)]
+            meta['ktx'] = os.path.join(entry_dir, key + ".ktx")
+            write_ktx(meta['ktx'], width, height, levels, alpha)
+            self.stats['compressed'] += 1
+
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return meta
+
+    def process_document(self, doc) -> Tuple[Dict[str, str], bool]:
+        """处理glTF文档中的全部图片，返回 ({balsam输出贴图的sha256: KTX路径}, 是否替换了图片)"""
+        images = doc.gltf.get('images', [])
+        if not images:
+            return {}, False
+
+        normal_images = _normal_map_images(doc.gltf)
+        compressed = {}
+        changed = False
+        for index, image in enumerate(images):
+            data = doc.image_bytes(index)
+            if not data:
+                continue
+            self.stats['images'] += 1
+            compress = self.settings['compress'] and index not in normal_images
+            try:
+                meta = self.process_image(data, image.get('mimeType', ''), compress)
+            except Exception as e:
+                print(f"⚠️ 贴图处理失败，保留原图: {image.get('name', index)} ({e})")
+                continue
+
+            if meta.get('png'):
+                with open(meta['png'], 'rb') as f:
+                    data = f.read()
+                replace_image(doc, index, data)
+                changed = True
+            if meta.get('ktx'):
+                compressed[hashlib.sha256(data).hexdigest()] = meta['ktx']
+        return compressed, changed
+
+    def process_gltf(self, gltf_path: str, export_format: str) -> Dict[str, str]:
+        """处理glTF文件中的全部图片，有替换时保存，返回 {balsam输出贴图的sha256: KTX路径}"""
+        doc = gltf_utils.GLTFDocument.load(gltf_path)
+        compressed, changed = self.process_document(doc)
+        if changed:
+            doc.save(gltf_path, export_format)
+        return compressed
+
+
+def _image_size(data: bytes):
+    """读取PNG/JPEG头中的尺寸（无法识别时返回None）"""
+    if data[:8] == PNG_SIGNATURE and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:2] == b'\xff\xd8':
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            # SOF0..SOF15（排除DHT/JPG/DAC）
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + length
+    return None
+
+
+def replace_image(doc: "gltf_utils.GLTFDocument", image_index: int, data: bytes):
+    """用新的PNG数据替换glTF中的图片"""
+    image = doc.gltf['images'][image_index]
+    image['mimeType'] = 'image/png'
+    if 'bufferView' in image:
+        doc.replace_buffer_view(image['bufferView'], data)
+        return
+    uri = image.get('uri', '')
+    if uri.startswith('data:'):
+        image['uri'] = "data:image/png;base64," + base64.b64encode(data).decode('ascii')
+        return
+    # 外部图片：写为同名PNG，删除被替换的原文件
+    old_path = doc.resolve_uri(uri)
+    new_uri = os.path.splitext(uri)[0] + ".png"
+    new_path = doc.resolve_uri(new_uri)
+    with open(new_path, 'wb') as f:
+        f.write(data)
+    if os.path.normcase(old_path) != os.path.normcase(new_path) and os.path.exists(old_path):
+        os.remove(old_path)
+    image['uri'] = new_uri
+
+
+# ----------------------------------------------------------------------
+# 纹理计划（导出时生成，balsam成功后应用）
+# ----------------------------------------------------------------------
+
+def save_texture_plan(state_dir: str, compressed: Dict[str, str], profile: str):
+    """保存本次导出的压缩纹理映射，供balsam转换完成后使用"""
+    os.makedirs(state_dir, exist_ok=True)
+    with open(os.path.join(state_dir, TEXTURE_PLAN_FILE_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'profile': profile, 'compressed': compressed}, f, indent=2)
+
+
+def load_texture_plan(state_dir: str) -> Optional[Dict]:
+    path = os.path.join(state_dir, TEXTURE_PLAN_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 读取纹理计划失败: {e}")
+        return None
+
+
+def apply_compressed_textures(output_dir: str, state_dir: str) -> int:
+    """把balsam输出的贴图替换为压缩KTX，改写QML中的引用，返回替换的贴图数"""
+    from .qml_handler import ASSEMBLED_QML_EXTENSION, find_enclosing_block
+
+    plan = load_texture_plan(state_dir)
+    maps_dir = os.path.join(output_dir, "maps")
+    if not plan or not plan.get('compressed') or not os.path.isdir(maps_dir):
+        return 0
+
+    replacements = {}
+    for name in sorted(os.listdir(maps_dir)):
+        path = os.path.join(maps_dir, name)
+        if not os.path.isfile(path) or name.lower().endswith(".ktx"):
+            continue
+        with open(path, 'rb') as f:
+            ktx_source = plan['compressed'].get(hashlib.sha256(f.read()).hexdigest())
+        if not ktx_source:
+            continue
+        if not os.path.exists(ktx_source):
+            print(f"⚠️ 压缩纹理缓存已不存在: {ktx_source}")
+            continue
+        ktx_name = os.path.splitext(name)[0] + ".ktx"
+        shutil.copy2(ktx_source, os.path.join(maps_dir, ktx_name))
+        replacements[f'"maps/{name}"'] = f'"maps/{ktx_name}"'
+
+    if not replacements:
+        return 0
+
+    pattern = re.compile('|'.join(re.escape(key) for key in replacements))
+    for name in os.listdir(output_dir):
+        if not name.endswith(".qml") or name.endswith(ASSEMBLED_QML_EXTENSION):
+            continue
+        qml_path = os.path.join(output_dir, name)
+        with open(qml_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if not pattern.search(content):
+            continue
+
+        # 从后往前替换，预生成的mip需要 mipFilter 才会被采样
+        for match in reversed(list(pattern.finditer(content))):
+            content = content[:match.start()] + replacements[match.group(0)] + content[match.end():]
+            block = find_enclosing_block(content, match.start())
+            if block and 'mipFilter' not in content[block[0]:block[1]]:
+                line_start = content.rfind('\n', 0, match.start()) + 1
+                indent = re.match(r'[ \t]*', content[line_start:]).group(0)
+                # 插在 id 行之后（没有id时插在块开头）
+                id_match = re.compile(r'\n[ \t]*id\s*:[^\n]*').match(content, block[0] + 1)
+                insert_at = id_match.end() if id_match else block[0] + 1
+                content = content[:insert_at] + f"\n{indent}mipFilter: Texture.Linear" + content[insert_at:]
+        with open(qml_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return len(replacements)